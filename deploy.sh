@@ -112,6 +112,7 @@ fi
 
 echo -e "${GREEN}Step 6: Running Django migrations...${NC}"
 python manage.py migrate
+python manage.py createcachetable
 python manage.py collectstatic --noinput
 
 echo -e "${GREEN}Step 7: Building frontend...${NC}"
@@ -122,7 +123,7 @@ npm run build
 echo -e "${GREEN}Step 8: Creating logs directory...${NC}"
 mkdir -p "$SERVER_DIR/logs"
 
-echo -e "${GREEN}Step 9: Setting up Gunicorn service...${NC}"
+echo -e "${GREEN}Step 9: Setting up Gunicorn, email worker and nightly rollup services...${NC}"
 sudo tee /etc/systemd/system/elora.service > /dev/null <<EOF
 [Unit]
 Description=Elora Gunicorn daemon
@@ -145,9 +146,61 @@ ExecStart=${SERVER_DIR}/venv/bin/gunicorn \
 WantedBy=multi-user.target
 EOF
 
+# Sends verification and other transactional emails queued by the API
+sudo tee /etc/systemd/system/elora-mailer.service > /dev/null <<EOF
+[Unit]
+Description=Elora email outbox worker
+After=network.target mysql.service
+
+[Service]
+User=ubuntu
+Group=www-data
+WorkingDirectory=${SERVER_DIR}
+Environment="PATH=${SERVER_DIR}/venv/bin"
+Environment="DJANGO_SETTINGS_MODULE=crud.settings"
+ExecStart=${SERVER_DIR}/venv/bin/python manage.py send_outbox_emails
+KillSignal=SIGTERM
+TimeoutStopSec=60
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
+# Re-closes yesterday's admin dashboard totals (DailyPlatformStats) every night
+sudo tee /etc/systemd/system/elora-rollup.service > /dev/null <<EOF
+[Unit]
+Description=Elora nightly platform stats rollup
+After=network.target mysql.service
+
+[Service]
+Type=oneshot
+User=ubuntu
+Group=www-data
+WorkingDirectory=${SERVER_DIR}
+Environment="PATH=${SERVER_DIR}/venv/bin"
+Environment="DJANGO_SETTINGS_MODULE=crud.settings"
+ExecStart=${SERVER_DIR}/venv/bin/python manage.py rollup_platform_stats
+EOF
+
+sudo tee /etc/systemd/system/elora-rollup.timer > /dev/null <<EOF
+[Unit]
+Description=Run the Elora platform stats rollup nightly
+
+[Timer]
+OnCalendar=*-*-* 00:15:00
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+EOF
+
 sudo systemctl daemon-reload
 sudo systemctl enable elora
 sudo systemctl start elora
+sudo systemctl enable --now elora-mailer
+sudo systemctl enable --now elora-rollup.timer
 
 echo -e "${GREEN}Step 10: Configuring Nginx...${NC}"
 sudo tee /etc/nginx/sites-available/elora > /dev/null <<EOF
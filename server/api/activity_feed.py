@@ -0,0 +1,85 @@
+"""
+Keyset pagination for merged activity feeds.
+
+A feed is built from several sources, each a queryset that can be ordered
+newest first on ``(timestamp, id)``. Rows are ordered by the key
+``(timestamp, rank, id)`` descending, where ``rank`` is the fixed position of
+the source, so ties between sources break deterministically. A page reads at
+most ``limit + 1`` rows from every source, each one an index range scan that
+starts just past the cursor, and merges them in Python. Page cost therefore
+depends on the page size, not on how deep the page is.
+"""
+import base64
+import heapq
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Q
+
+FeedSource = namedtuple('FeedSource', ['rank', 'queryset', 'timestamp_field'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, rank, pk):
+    raw = f'{timestamp.isoformat()}|{rank}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(timestamp, rank, id)`` from a cursor made by ``encode_cursor``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, rank, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(rank), int(pk)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from exc
+
+
+def _after_cursor(source, cursor):
+    """Restrict a source to rows strictly older than ``cursor`` in feed order."""
+    ts_field = source.timestamp_field
+    cursor_ts, cursor_rank, cursor_id = cursor
+    if source.rank < cursor_rank:
+        return Q(**{f'{ts_field}__lte': cursor_ts})
+    if source.rank > cursor_rank:
+        return Q(**{f'{ts_field}__lt': cursor_ts})
+    return Q(**{f'{ts_field}__lt': cursor_ts}) | Q(**{ts_field: cursor_ts, 'id__lt': cursor_id})
+
+
+def _source_rows(source, cursor, limit):
+    qs = source.queryset
+    if cursor is not None:
+        qs = qs.filter(_after_cursor(source, cursor))
+    qs = qs.order_by(f'-{source.timestamp_field}', '-id')[:limit]
+    for obj in qs:
+        yield (getattr(obj, source.timestamp_field), source.rank, obj.id), obj
+
+
+def fetch_page(sources, cursor=None, limit=50, offset=0):
+    """
+    Return ``(items, next_cursor)`` for one page of the merged feed.
+
+    ``items`` is a list of ``(rank, obj)`` pairs, newest first. ``offset`` skips
+    rows after the cursor and exists only for legacy page-number requests; it
+    costs ``offset`` extra rows per source.
+    """
+    wanted = offset + limit + 1
+    merged = heapq.merge(
+        *(_source_rows(source, cursor, wanted) for source in sources),
+        key=lambda row: row[0],
+        reverse=True,
+    )
+    rows = []
+    for row in merged:
+        rows.append(row)
+        if len(rows) == wanted:
+            break
+
+    page = rows[offset:offset + limit]
+    next_cursor = None
+    if len(rows) > offset + limit and page:
+        next_cursor = encode_cursor(*page[-1][0])
+    return [(key[1], obj) for key, obj in page], next_cursor
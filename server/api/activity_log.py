@@ -0,0 +1,88 @@
+"""
+Append-only activity log behind the recent-activity feeds.
+
+The receivers in ``api.signals`` record one ActivityEvent per registration,
+lesson completion and practice session. Actor names and titles are rendered
+when the event is written, so reading a feed is a single range scan over the
+``(timestamp, id)`` index with no joins. ``prune_events`` backs the
+``prune_activity_events`` retention command.
+"""
+from django.utils import timezone
+
+from .models import ActivityEvent
+
+
+def record_event(actor, verb, obj, title, timestamp=None):
+    return ActivityEvent.objects.create(
+        actor_id=actor.pk,
+        actor_name=actor.username,
+        verb=verb,
+        object_type=obj._meta.model_name,
+        object_id=obj.pk,
+        title=title[:255],
+        timestamp=timestamp or timezone.now(),
+    )
+
+
+def record_registration(user):
+    record_event(user, ActivityEvent.USER_REGISTERED, user, f'New user registered: {user.username}', user.date_joined)
+
+
+def record_lesson_completion(progress):
+    user = progress.user
+    record_event(
+        user,
+        ActivityEvent.LESSON_COMPLETED,
+        progress,
+        f'{user.username} completed {progress.lesson.title}',
+        progress.updated_at,
+    )
+
+
+def _practice_session_event(session):
+    user = session.user
+    return ActivityEvent(
+        actor_id=user.pk,
+        actor_name=user.username,
+        verb=ActivityEvent.PRACTICE_SESSION,
+        object_type=session._meta.model_name,
+        object_id=session.pk,
+        title=f'{user.username} practiced {session.session_type} ({session.duration_minutes}m)'[:255],
+        timestamp=session.session_date,
+    )
+
+
+def record_practice_session(session):
+    _practice_session_event(session).save()
+
+
+def record_practice_sessions(sessions):
+    """Log sessions created with ``bulk_create``, which sends no post_save."""
+    ActivityEvent.objects.bulk_create([_practice_session_event(session) for session in sessions])
+
+
+def recent_events(limit=20, verbs=None, actor=None):
+    """Newest events first, optionally restricted to some verbs or one actor."""
+    qs = ActivityEvent.objects.all()
+    if verbs:
+        qs = qs.filter(verb__in=verbs)
+    if actor is not None:
+        qs = qs.filter(actor=actor)
+    return list(qs.order_by('-timestamp', '-id')[:limit])
+
+
+def prune_events(before, verbs=None, batch_size=5000):
+    """
+    Delete events older than ``before`` in primary-key batches so no single
+    DELETE holds locks on a large range. Returns the number of rows removed.
+    """
+    qs = ActivityEvent.objects.filter(timestamp__lt=before)
+    if verbs:
+        qs = qs.filter(verb__in=verbs)
+
+    deleted = 0
+    while True:
+        batch = list(qs.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += ActivityEvent.objects.filter(id__in=batch).delete()[0]
@@ -0,0 +1,191 @@
+"""
+Streaming storage for pronunciation recordings.
+
+``submit_pronunciation_practice`` accepts a recording in three forms:
+
+* multipart/form-data with an ``audio`` file part. ``AudioUploadHandler``
+  writes the part to disk while Django parses the body, so the recording is
+  never held in memory or copied through a temporary upload file.
+* a raw ``audio/*`` request body, read in chunks with ``save_stream``.
+* the original base64 data URL in JSON (``user_audio_url``), decoded in
+  slices by ``save_data_url``.
+
+All three go through ``AudioWriter``. It enforces
+``PRONUNCIATION_AUDIO_MAX_BYTES`` as bytes arrive and hashes them. The
+finished file is named after its SHA-256, so identical uploads share one file
+and names cannot be guessed from user ids or timestamps.
+"""
+import base64
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+
+AUDIO_DIR = 'pronunciation_recordings'
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+EXTENSIONS = {
+    'audio/webm': '.webm',
+    'audio/ogg': '.ogg',
+    'audio/mpeg': '.mp3',
+    'audio/mp4': '.m4a',
+    'audio/aac': '.aac',
+    'audio/wav': '.wav',
+    'audio/x-wav': '.wav',
+    'audio/wave': '.wav',
+}
+DEFAULT_EXTENSION = '.webm'
+
+
+class AudioTooLarge(Exception):
+    """The recording exceeds ``PRONUNCIATION_AUDIO_MAX_BYTES``."""
+
+
+def max_bytes():
+    return getattr(settings, 'PRONUNCIATION_AUDIO_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+
+def file_mode():
+    """Mode for stored recordings: FILE_UPLOAD_PERMISSIONS, or what open() would give under the umask."""
+    if settings.FILE_UPLOAD_PERMISSIONS is not None:
+        return settings.FILE_UPLOAD_PERMISSIONS
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def extension_for(content_type):
+    return EXTENSIONS.get((content_type or '').split(';')[0].strip().lower(), DEFAULT_EXTENSION)
+
+
+class AudioWriter:
+    """Write a recording chunk by chunk, then move it to its content-hash name."""
+
+    def __init__(self, content_type):
+        self.directory = os.path.join(settings.MEDIA_ROOT, AUDIO_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+        self.extension = extension_for(content_type)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.file = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.upload-', delete=False)
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.size > max_bytes():
+            self.abort()
+            raise AudioTooLarge(f'Recordings are limited to {max_bytes() // (1024 * 1024)} MB')
+        self.digest.update(chunk)
+        self.file.write(chunk)
+
+    def finish(self):
+        """Returns the recording's /media/ URL."""
+        self.file.close()
+        filename = f'{self.digest.hexdigest()}{self.extension}'
+        # NamedTemporaryFile creates 0600 files, which nginx cannot serve from /media/
+        os.chmod(self.file.name, file_mode())
+        # Same content, same name: os.replace keeps one copy
+        os.replace(self.file.name, os.path.join(self.directory, filename))
+        return f'{settings.MEDIA_URL.rstrip("/")}/{AUDIO_DIR}/{filename}'
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.unlink(self.file.name)
+        except FileNotFoundError:
+            pass
+
+
+class AudioUploadHandler(FileUploadHandler):
+    """
+    Upload handler that streams the ``audio`` part of a multipart body into an
+    ``AudioWriter``. Other file parts are dropped. After parsing, ``url`` holds
+    the stored recording and ``error`` is set if it was too large.
+    """
+    chunk_size = CHUNK_SIZE
+    field_name = 'audio'
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.writer = None
+        self.url = None
+        self.error = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if field_name == self.field_name and self.writer is None and self.url is None:
+            self.writer = AudioWriter(self.content_type)
+            raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.writer is None:
+            return None
+        try:
+            self.writer.write(raw_data)
+        except AudioTooLarge as e:
+            self.writer = None
+            self.error = e
+            raise StopUpload()
+        return None
+
+    def file_complete(self, file_size):
+        if self.writer is not None:
+            self.url = self.writer.finish()
+            self.writer = None
+        return None
+
+    def upload_interrupted(self):
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+
+
+def save_stream(stream, content_type):
+    """Store a recording read from a file-like ``stream``; returns its URL."""
+    writer = AudioWriter(content_type)
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+    except AudioTooLarge:
+        raise
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def save_data_url(data_url):
+    """Store a ``data:audio/...;base64,`` recording; returns its URL."""
+    header, encoded = data_url.split(',', 1)
+    content_type = header[len('data:'):].split(';')[0]
+    # The decoded size is known up front, so oversized recordings are refused before decoding
+    if len(encoded) * 3 // 4 > max_bytes() + 2:
+        raise AudioTooLarge(f'Recordings are limited to {max_bytes() // (1024 * 1024)} MB')
+    writer = AudioWriter(content_type)
+    # Decode a slice at a time (a multiple of 4 characters) instead of making a second full copy
+    step = CHUNK_SIZE // 3 * 4
+    try:
+        for offset in range(0, len(encoded), step):
+            writer.write(base64.b64decode(encoded[offset:offset + step]))
+    except AudioTooLarge:
+        raise
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.finish()
+
+
+def local_path(url):
+    """Filesystem path of a recording URL returned by this module, or None for anything else."""
+    prefix = f'{settings.MEDIA_URL.rstrip("/")}/{AUDIO_DIR}/'
+    if not url or not url.startswith(prefix):
+        return None
+    filename = url[len(prefix):]
+    if not filename or '/' in filename or filename.startswith('.'):
+        return None
+    path = os.path.join(settings.MEDIA_ROOT, AUDIO_DIR, filename)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,73 @@
+"""
+Shared cache for serialized catalog responses.
+
+Lessons, achievements, videos, modules, templates and dictionary entries are
+listed on every session but only change when an admin edits them. ``cached``
+stores a GET view's response data in the ``catalog`` cache from
+``settings.CACHES``. Every worker shares that cache: a database table by
+default, a directory on single-host setups, or Redis (CATALOG_CACHE_BACKEND).
+
+Entries are never invalidated in place. The cache key is the view's ETag from
+``content_versions.etag_for``, which hashes the version counters of the
+tables in the response, the URL and the deployed code. The post_save and
+post_delete receivers in ``api.signals`` bump those counters in the same
+transaction as the admin edit. Once the edit commits, every request reads the
+new counter and so a new key, and the response is rebuilt from the edited
+rows. Per-user views add the user's counter, so their own progress rows are
+never stale either. The key also holds each counter's timestamp, so counters
+that repeat after a rollback never reach entries a file or Redis cache kept.
+Entries for old versions expire after CATALOG_CACHE_TIMEOUT.
+
+If the cache backend is unavailable, the view runs as if nothing were cached.
+"""
+import logging
+from functools import wraps
+
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from . import content_versions
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'catalog'
+
+
+def cache_key(request, view_name, models, per_user=False):
+    etag, _ = content_versions.etag_for(request, models, per_user)
+    return f'{view_name}:{etag.strip(chr(34))}'
+
+
+def cached(*models, per_user=False):
+    """
+    Serve a GET view from the catalog cache. The response may depend only on
+    the tables of ``models``, the URL and, with ``per_user``, the request
+    user's rows in ``content_versions.USER_MODELS``. Only 200 responses are
+    stored. Goes under ``content_versions.conditional`` when the view has one,
+    so a 304 is answered before the cache is read.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            cache = caches[CACHE_ALIAS]
+            key = cache_key(request, view.__name__, models, per_user)
+            try:
+                data = cache.get(key)
+            except Exception as e:
+                logger.error(f"Catalog cache read error for {view.__name__}: {str(e)}")
+                return view(request, *args, **kwargs)
+            if data is not None:
+                return Response(data)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and isinstance(response, Response) and response.data is not None:
+                try:
+                    cache.set(key, response.data)
+                except Exception as e:
+                    logger.error(f"Catalog cache write error for {view.__name__}: {str(e)}")
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,424 @@
+"""
+CategoryProgress maintenance.
+
+Activity endpoints apply small deltas to a learner's CategoryProgress row as
+they record work, so the read endpoints only have to SELECT the stored rows.
+The full recompute from source tables lives here too, but it is only run by
+the ``reconcile_category_progress`` management command.
+"""
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import content_versions, sync_log
+from .models import (
+    CategoryProgress, KidsProgress, KidsVocabularyPractice, KidsPronunciationPractice,
+    KidsGameSession, StoryEnrollment, TeenProgress, TeenPronunciationPractice,
+    LessonProgress, VocabularyWord, PronunciationPractice,
+)
+
+logger = logging.getLogger(__name__)
+
+# Every learning category, in progression order
+ALL_CATEGORIES = [choice[0] for choice in CategoryProgress.CATEGORY_CHOICES]
+ADULT_CATEGORIES = ['adults_beginner', 'adults_intermediate', 'adults_advanced']
+
+CATEGORY_PROGRESS_DEFAULTS = {
+    'total_points': 0,
+    'total_streak': 0,
+    'lessons_completed': 0,
+    'practice_time_minutes': 0,
+    'average_score': 0.0,
+    'score_count': 0,
+    'progress_percentage': 0.0,
+    'level': 1,
+    'stories_completed': 0,
+    'vocabulary_words': 0,
+    'pronunciation_attempts': 0,
+    'games_completed': 0,
+}
+
+
+def get_category_progress_rows(user, categories=None):
+    """
+    Return CategoryProgress rows for the user with a single SELECT.
+
+    Categories without a stored row are filled in with unsaved default
+    instances so callers always see every requested category without
+    writing anything on the read path.
+    """
+    categories = list(categories or ALL_CATEGORIES)
+    rows = list(
+        CategoryProgress.objects.filter(user=user, category__in=categories)
+        .order_by('-last_activity', '-total_points')
+    )
+    existing = {row.category for row in rows}
+    for category in categories:
+        if category not in existing:
+            rows.append(CategoryProgress(user=user, category=category, **CATEGORY_PROGRESS_DEFAULTS))
+    return rows
+
+
+def sync_category_progress(user, category, category_progress):
+    """
+    Recompute category progress from the source tables - SAVES TO MYSQL.
+
+    This rescans KidsProgress, LessonProgress and the practice tables, so it is
+    only run by the reconcile_category_progress command. Activity endpoints
+    apply deltas through update_category_progress_from_activity instead.
+    """
+    try:
+        logger.debug(f"Syncing category progress for user {user.id}, category {category}")
+        
+        if category == 'young_kids':
+            kids_progress = KidsProgress.objects.filter(user=user).first()
+            logger.debug(f"YoungKids: Found KidsProgress: {kids_progress is not None}")
+            if kids_progress:
+                logger.debug(f"YoungKids: Points={kids_progress.points}, Streak={kids_progress.streak}")
+                category_progress.total_points = kids_progress.points or 0
+                category_progress.total_streak = kids_progress.streak or 0
+                details = kids_progress.details or {}
+                
+                # Count completed stories
+                story_enrollments = details.get('storyEnrollments', [])
+                if not story_enrollments:
+                    # Also check StoryEnrollment table
+                    story_enrollments_db = StoryEnrollment.objects.filter(user=user, completed=True)
+                    stories_count = story_enrollments_db.count()
+                    logger.debug(f"YoungKids: Found {stories_count} completed stories from StoryEnrollment table")
+                    category_progress.stories_completed = stories_count
+                else:
+                    stories_completed_count = len([
+                        s for s in story_enrollments
+                        if s.get('completed', False)
+                    ])
+                    logger.debug(f"YoungKids: Found {stories_completed_count} completed stories from details")
+                    category_progress.stories_completed = stories_completed_count
+                category_progress.lessons_completed = category_progress.stories_completed  # Also set lessons_completed for consistency
+                
+                # Count vocabulary words
+                vocab_dict = details.get('vocabulary', {})
+                if not vocab_dict:
+                    # Also check KidsVocabularyPractice table
+                    vocab_count = KidsVocabularyPractice.objects.filter(user=user).count()
+                    logger.debug(f"YoungKids: Found {vocab_count} vocabulary words from KidsVocabularyPractice table")
+                    category_progress.vocabulary_words = vocab_count
+                else:
+                    vocab_count = len(vocab_dict)
+                    logger.debug(f"YoungKids: Found {vocab_count} vocabulary words from details")
+                    category_progress.vocabulary_words = vocab_count
+                
+                # Count pronunciation attempts
+                pron_dict = details.get('pronunciation', {})
+                if not pron_dict:
+                    # Also check KidsPronunciationPractice table
+                    pron_count = KidsPronunciationPractice.objects.filter(user=user).count()
+                    logger.debug(f"YoungKids: Found {pron_count} pronunciation attempts from KidsPronunciationPractice table")
+                    category_progress.pronunciation_attempts = pron_count
+                else:
+                    pron_count = len(pron_dict)
+                    logger.debug(f"YoungKids: Found {pron_count} pronunciation attempts from details")
+                    category_progress.pronunciation_attempts = pron_count
+                
+                # Count games
+                games_dict = details.get('games', {})
+                if games_dict:
+                    games_count = games_dict.get('attempts', 0)
+                    logger.debug(f"YoungKids: Found {games_count} games from details")
+                    category_progress.games_completed = games_count
+                else:
+                    # Also check KidsGameSession table
+                    games_count = KidsGameSession.objects.filter(user=user, completed=True).count()
+                    logger.info(f"YoungKids: Found {games_count} games from KidsGameSession table")
+                    category_progress.games_completed = games_count
+                
+                # Update last activity if there's any progress
+                if (category_progress.total_points > 0 or category_progress.stories_completed > 0) and not category_progress.last_activity:
+                    category_progress.last_activity = timezone.now()
+                
+                # Calculate average score from practice sessions
+                if category_progress.pronunciation_attempts > 0:
+                    pron_practices = KidsPronunciationPractice.objects.filter(user=user)
+                    if pron_practices.exists():
+                        scores = [p.best_score for p in pron_practices if p.best_score > 0]
+                        if scores:
+                            category_progress.average_score = sum(scores) / len(scores)
+                            category_progress.score_count = len(scores)
+                            logger.info(f"YoungKids: Calculated average score: {category_progress.average_score}")
+                
+                # Calculate practice time from various sources
+                practice_time_minutes = 0
+                
+                # 1. From game sessions (duration_seconds converted to minutes)
+                game_sessions = KidsGameSession.objects.filter(user=user)
+                game_time_seconds = sum(g.duration_seconds for g in game_sessions if g.duration_seconds)
+                practice_time_minutes += game_time_seconds // 60
+                logger.info(f"YoungKids: Game sessions time: {game_time_seconds // 60} minutes")
+                
+                # 2. Estimate from pronunciation attempts (2 minutes per attempt)
+                if category_progress.pronunciation_attempts > 0:
+                    pron_time = category_progress.pronunciation_attempts * 2
+                    practice_time_minutes += pron_time
+                    logger.info(f"YoungKids: Pronunciation time estimate: {pron_time} minutes")
+                
+                # 3. Estimate from story completions (5 minutes per story)
+                if category_progress.stories_completed > 0:
+                    story_time = category_progress.stories_completed * 5
+                    practice_time_minutes += story_time
+                    logger.info(f"YoungKids: Story time estimate: {story_time} minutes")
+                
+                # 4. Estimate from vocabulary practice (1 minute per word)
+                if category_progress.vocabulary_words > 0:
+                    vocab_time = min(category_progress.vocabulary_words * 1, 60)  # Cap at 60 minutes
+                    practice_time_minutes += vocab_time
+                    logger.info(f"YoungKids: Vocabulary time estimate: {vocab_time} minutes")
+                
+                category_progress.practice_time_minutes = practice_time_minutes
+                logger.info(f"YoungKids: Total practice time: {practice_time_minutes} minutes")
+                
+                logger.info(f"YoungKids: Saving - Points={category_progress.total_points}, Stories={category_progress.stories_completed}, Vocab={category_progress.vocabulary_words}, Time={practice_time_minutes}min")
+                category_progress.save()  # ← SAVE TO MYSQL
+            else:
+                logger.warning(f"YoungKids: No KidsProgress found for user {user.id}")
+        
+        elif category == 'teen_kids':
+            teen_progress = TeenProgress.objects.filter(user=user).first()
+            logger.info(f"TeenKids: Found TeenProgress: {teen_progress is not None}")
+            if teen_progress:
+                logger.info(f"TeenKids: Points={teen_progress.points}, Streak={teen_progress.streak}, Missions={teen_progress.missions_completed}")
+                category_progress.total_points = teen_progress.points or 0
+                category_progress.total_streak = teen_progress.streak or 0
+                category_progress.stories_completed = teen_progress.missions_completed or 0
+                category_progress.lessons_completed = teen_progress.missions_completed or 0  # Also set lessons_completed for consistency
+                category_progress.vocabulary_words = teen_progress.vocabulary_attempts or 0
+                category_progress.pronunciation_attempts = teen_progress.pronunciation_attempts or 0
+                category_progress.games_completed = teen_progress.games_attempts or 0
+                
+                # Calculate average score from practice sessions
+                if category_progress.pronunciation_attempts > 0:
+                    pron_practices = TeenPronunciationPractice.objects.filter(user=user)
+                    if pron_practices.exists():
+                        scores = [p.best_score for p in pron_practices if p.best_score > 0]
+                        if scores:
+                            category_progress.average_score = sum(scores) / len(scores)
+                            category_progress.score_count = len(scores)
+                            logger.info(f"TeenKids: Calculated average score: {category_progress.average_score}")
+                
+                # Calculate practice time from various sources
+                practice_time_minutes = 0
+                
+                # 1. From game sessions (if TeenGameSession exists, use it; otherwise estimate)
+                # Check if TeenGameSession model exists
+                try:
+                    from api.models import TeenGameSession
+                    game_sessions = TeenGameSession.objects.filter(user=user)
+                    if hasattr(TeenGameSession, 'duration_seconds'):
+                        game_time_seconds = sum(g.duration_seconds for g in game_sessions if g.duration_seconds)
+                        practice_time_minutes += game_time_seconds // 60
+                        logger.info(f"TeenKids: Game sessions time: {game_time_seconds // 60} minutes")
+                except (ImportError, AttributeError):
+                    # If TeenGameSession doesn't exist, estimate from games_attempts
+                    if category_progress.games_completed > 0:
+                        game_time = category_progress.games_completed * 3  # 3 minutes per game
+                        practice_time_minutes += game_time
+                        logger.info(f"TeenKids: Game time estimate: {game_time} minutes")
+                
+                # 2. Estimate from pronunciation attempts (2.5 minutes per attempt for teens)
+                if category_progress.pronunciation_attempts > 0:
+                    pron_time = category_progress.pronunciation_attempts * 2.5
+                    practice_time_minutes += int(pron_time)
+                    logger.info(f"TeenKids: Pronunciation time estimate: {int(pron_time)} minutes")
+                
+                # 3. Estimate from story/mission completions (7 minutes per mission for teens)
+                if category_progress.stories_completed > 0:
+                    story_time = category_progress.stories_completed * 7
+                    practice_time_minutes += story_time
+                    logger.info(f"TeenKids: Mission time estimate: {story_time} minutes")
+                
+                # 4. Estimate from vocabulary practice (1.5 minutes per word for teens)
+                if category_progress.vocabulary_words > 0:
+                    vocab_time = min(int(category_progress.vocabulary_words * 1.5), 90)  # Cap at 90 minutes
+                    practice_time_minutes += vocab_time
+                    logger.info(f"TeenKids: Vocabulary time estimate: {vocab_time} minutes")
+                
+                category_progress.practice_time_minutes = practice_time_minutes
+                logger.info(f"TeenKids: Total practice time: {practice_time_minutes} minutes")
+                
+                # Update last activity
+                if (category_progress.total_points > 0 or category_progress.stories_completed > 0) and not category_progress.last_activity:
+                    category_progress.last_activity = timezone.now()
+                
+                logger.info(f"TeenKids: Saving - Points={category_progress.total_points}, Missions={category_progress.stories_completed}, Vocab={category_progress.vocabulary_words}, Time={practice_time_minutes}min")
+                category_progress.save()  # ← SAVE TO MYSQL
+            else:
+                logger.warning(f"TeenKids: No TeenProgress found for user {user.id}")
+        
+        # For adult categories, sync from LessonProgress
+        elif category in ['adults_beginner', 'adults_intermediate', 'adults_advanced']:
+            lesson_type_map = {
+                'adults_beginner': 'beginner',
+                'adults_intermediate': 'intermediate',
+                'adults_advanced': 'advanced'
+            }
+            lesson_type = lesson_type_map.get(category)
+            if lesson_type:
+                lessons = LessonProgress.objects.filter(
+                    user=user,
+                    lesson__lesson_type=lesson_type
+                )
+                completed_lessons = lessons.filter(completed=True)
+                category_progress.lessons_completed = completed_lessons.count()
+                
+                # Calculate points from completed lessons
+                points_from_lessons = 0
+                for lesson in completed_lessons:
+                    if lesson.score:
+                        points_from_lessons += int(lesson.score / 10)
+                        if lesson.score == 100:
+                            points_from_lessons += 20  # Perfect score bonus
+                    points_from_lessons += min(10, lesson.time_spent_minutes // 5)  # Time bonus
+                
+                category_progress.total_points = points_from_lessons
+                category_progress.practice_time_minutes = sum(l.time_spent_minutes for l in lessons)
+                
+                # Calculate average score
+                scores = [l.score for l in completed_lessons if l.score > 0]
+                if scores:
+                    category_progress.average_score = sum(scores) / len(scores)
+                    category_progress.score_count = len(scores)
+                
+                # Count vocabulary words for this level
+                vocab_count = VocabularyWord.objects.filter(user=user).count()
+                category_progress.vocabulary_words = vocab_count
+                
+                # Pronunciation practice is shared by all adult levels
+                category_progress.pronunciation_attempts = PronunciationPractice.objects.filter(user=user).count()
+                
+                # Update last activity
+                if category_progress.lessons_completed > 0:
+                    last_lesson = completed_lessons.order_by('-last_attempt').first()
+                    if last_lesson:
+                        category_progress.last_activity = last_lesson.last_attempt
+                    else:
+                        category_progress.last_activity = timezone.now()
+                
+                category_progress.save()  # ← SAVE TO MYSQL
+        
+        # For IELTS/PTE category
+        elif category == 'ielts_pte':
+            # Check if user has any IELTS/PTE lessons
+            ielts_lessons = LessonProgress.objects.filter(
+                user=user,
+                lesson__lesson_type__in=['ielts', 'pte']
+            )
+            completed_ielts = ielts_lessons.filter(completed=True)
+            category_progress.lessons_completed = completed_ielts.count()
+            
+            if completed_ielts.exists():
+                points_from_lessons = 0
+                for lesson in completed_ielts:
+                    if lesson.score:
+                        points_from_lessons += int(lesson.score / 10)
+                    points_from_lessons += min(10, lesson.time_spent_minutes // 5)
+                
+                category_progress.total_points = points_from_lessons
+                category_progress.practice_time_minutes = sum(l.time_spent_minutes for l in ielts_lessons)
+                
+                scores = [l.score for l in completed_ielts if l.score > 0]
+                if scores:
+                    category_progress.average_score = sum(scores) / len(scores)
+                    category_progress.score_count = len(scores)
+                
+                last_lesson = completed_ielts.order_by('-last_attempt').first()
+                if last_lesson:
+                    category_progress.last_activity = last_lesson.last_attempt
+                else:
+                    category_progress.last_activity = timezone.now()
+                
+                category_progress.save()  # ← SAVE TO MYSQL
+        
+        logger.info(f"Synced category progress for user {user.id}, category {category}")
+    except Exception as e:
+        logger.error(f"Error syncing category progress: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+def update_category_progress_from_activity(
+    user,
+    category: str,
+    points: int = 0,
+    time_minutes: int = 0,
+    score: float = 0,
+    lessons: int = 0,
+    stories: int = 0,
+    vocabulary_words: int = 0,
+    pronunciation_attempts: int = 0,
+    games: int = 0,
+    streak: int = None
+):
+    """
+    Apply an activity delta to CategoryProgress in MySQL.
+
+    All counters and the running average are updated by a single
+    ``UPDATE ... SET x = x + %s`` so concurrent requests from the same learner
+    never lose increments. The row is inserted on first activity; historical
+    data is folded in by the reconcile_category_progress command.
+    """
+    try:
+        now = timezone.now()
+        counters = {
+            'total_points': points,
+            'practice_time_minutes': time_minutes,
+            'lessons_completed': lessons,
+            'stories_completed': stories,
+            'vocabulary_words': vocabulary_words,
+            'pronunciation_attempts': pronunciation_attempts,
+            'games_completed': games,
+        }
+        counters = {field: value for field, value in counters.items() if value and value > 0}
+        
+        updates = {field: F(field) + value for field, value in counters.items()}
+        if streak is not None:
+            updates['total_streak'] = Greatest(F('total_streak'), streak)
+        if score > 0:
+            # average_score must be assigned before score_count: MySQL evaluates
+            # SET clauses left to right and sees the already-updated values.
+            updates['average_score'] = ExpressionWrapper(
+                (F('average_score') * F('score_count') + score) / (F('score_count') + 1),
+                output_field=FloatField(),
+            )
+            updates['score_count'] = F('score_count') + 1
+        updates['last_activity'] = now
+        updates['updated_at'] = now
+        
+        rows = CategoryProgress.objects.filter(user=user, category=category).update(**updates)
+        if not rows:
+            initial = dict(CATEGORY_PROGRESS_DEFAULTS, **counters)
+            if streak is not None:
+                initial['total_streak'] = max(streak, 0)
+            if score > 0:
+                initial['average_score'] = score
+                initial['score_count'] = 1
+            try:
+                with transaction.atomic():
+                    CategoryProgress.objects.create(user=user, category=category, last_activity=now, **initial)
+            except IntegrityError:
+                # Another request inserted the row first; apply the delta to it
+                rows = CategoryProgress.objects.filter(user=user, category=category).update(**updates)
+        if rows:
+            # QuerySet.update() sends no post_save, so log the change for offline sync
+            # and bump the dashboard version here
+            progress_id = CategoryProgress.objects.filter(user=user, category=category).values_list('id', flat=True).first()
+            sync_log.record_change(user.id, 'CategoryProgress', progress_id)
+            content_versions.bump_user(user.id)
+        
+        logger.info(f"CategoryProgress updated for user {user.id}, category {category}: {points} points, {lessons} lessons")
+        
+    except Exception as e:
+        logger.error(f"Error updating CategoryProgress: {str(e)}")
+        # Don't fail the main operation if category progress update fails
+        pass
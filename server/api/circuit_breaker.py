@@ -0,0 +1,181 @@
+"""
+Circuit breaker and in-flight cap for external dependencies, shared across workers.
+
+State lives in UpstreamCircuit/UpstreamLease rather than in process memory, so
+every gunicorn and uvicorn worker sees the same breaker and the same count of
+calls in flight. A caller ``acquire``s a lease before calling the upstream and
+``release``s it with the outcome:
+
+* closed: calls are admitted until ``max_in_flight`` leases are held. Once a
+  window has ``min_requests`` outcomes and at least ``failure_rate`` of them
+  failed, the circuit opens.
+* open: calls are rejected at once until ``open_seconds`` have passed.
+* half-open: up to ``half_open_probes`` calls are let through. One success
+  closes the circuit and one failure opens it again.
+
+Rejections raise ``Rejected`` carrying a Retry-After hint. Leases expire after
+``lease_seconds`` so a worker killed mid-call cannot hold a slot forever.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from math import ceil
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import UpstreamCircuit, UpstreamLease
+
+GEMINI = 'gemini'
+
+Policy = namedtuple('Policy', [
+    'max_in_flight', 'failure_rate', 'min_requests', 'window_seconds',
+    'open_seconds', 'half_open_probes', 'lease_seconds',
+])
+DEFAULT_POLICY = Policy(
+    max_in_flight=100,
+    failure_rate=0.5,
+    min_requests=10,
+    window_seconds=60,
+    open_seconds=30,
+    half_open_probes=1,
+    lease_seconds=120,
+)
+
+
+class Rejected(Exception):
+    """The call was not admitted; ``reason`` is 'open' or 'busy'."""
+
+    def __init__(self, name, reason, retry_after):
+        super().__init__(f'{name} circuit rejected the call ({reason})')
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def policy(name):
+    """Policy for ``name``: the defaults overridden by ``settings.UPSTREAM_CIRCUITS[name]``."""
+    return DEFAULT_POLICY._replace(**getattr(settings, 'UPSTREAM_CIRCUITS', {}).get(name, {}))
+
+
+def _reject(circuit, reason, retry_after):
+    UpstreamCircuit.objects.filter(pk=circuit.pk).update(total_rejected=F('total_rejected') + 1)
+    raise Rejected(circuit.name, reason, max(1, ceil(retry_after)))
+
+
+def acquire(name):
+    """Admit one call to ``name`` and return its lease, or raise ``Rejected``."""
+    rules = policy(name)
+    now = timezone.now()
+    circuit, _ = UpstreamCircuit.objects.get_or_create(name=name)
+
+    # Fast path: an open circuit rejects without taking the row lock
+    if circuit.state == UpstreamCircuit.OPEN:
+        remaining = (circuit.opened_at + timedelta(seconds=rules.open_seconds) - now).total_seconds()
+        if remaining > 0:
+            _reject(circuit, 'open', remaining)
+
+    rejection = None
+    with transaction.atomic():
+        circuit = UpstreamCircuit.objects.select_for_update().get(pk=circuit.pk)
+        if circuit.state == UpstreamCircuit.OPEN:
+            remaining = (circuit.opened_at + timedelta(seconds=rules.open_seconds) - now).total_seconds()
+            if remaining > 0:
+                rejection = ('open', remaining)
+            else:
+                circuit.state = UpstreamCircuit.HALF_OPEN
+                circuit.save(update_fields=['state', 'updated_at'])
+
+        if not rejection:
+            leases = UpstreamLease.objects.filter(circuit=circuit)
+            leases.filter(expires_at__lte=now).delete()
+            in_flight = leases.count()
+            if circuit.state == UpstreamCircuit.HALF_OPEN and in_flight >= rules.half_open_probes:
+                rejection = ('open', 1)
+            elif in_flight >= rules.max_in_flight:
+                rejection = ('busy', 1)
+            else:
+                return UpstreamLease.objects.create(
+                    circuit=circuit,
+                    acquired_at=now,
+                    expires_at=now + timedelta(seconds=rules.lease_seconds),
+                )
+    _reject(circuit, *rejection)
+
+
+def release(lease, success):
+    """
+    Free ``lease`` and record whether the upstream call succeeded. Pass
+    ``success=None`` when the upstream was never called, so nothing is counted.
+    """
+    if success is None:
+        UpstreamLease.objects.filter(pk=lease.pk).delete()
+        return
+    rules = policy(lease.circuit.name)
+    now = timezone.now()
+    with transaction.atomic():
+        circuit = UpstreamCircuit.objects.select_for_update().get(pk=lease.circuit_id)
+        UpstreamLease.objects.filter(pk=lease.pk).delete()
+
+        if circuit.window_started_at <= now - timedelta(seconds=rules.window_seconds):
+            circuit.window_started_at = now
+            circuit.window_requests = circuit.window_failures = 0
+        circuit.window_requests += 1
+        if success:
+            circuit.total_successes += 1
+        else:
+            circuit.window_failures += 1
+            circuit.total_failures += 1
+
+        if circuit.state == UpstreamCircuit.HALF_OPEN:
+            if success:
+                circuit.state = UpstreamCircuit.CLOSED
+                circuit.window_started_at = now
+                circuit.window_requests = circuit.window_failures = 0
+            else:
+                _trip(circuit, now)
+        elif (
+            circuit.state == UpstreamCircuit.CLOSED
+            and circuit.window_requests >= rules.min_requests
+            and circuit.window_failures >= rules.failure_rate * circuit.window_requests
+        ):
+            _trip(circuit, now)
+        circuit.save()
+
+
+def _trip(circuit, now):
+    circuit.state = UpstreamCircuit.OPEN
+    circuit.opened_at = now
+    circuit.total_opened += 1
+
+
+def snapshot():
+    """Breaker state, in-flight count and counters of every circuit, for monitoring."""
+    now = timezone.now()
+    circuits = []
+    for circuit in UpstreamCircuit.objects.order_by('name'):
+        rules = policy(circuit.name)
+        retry_at = None
+        if circuit.state == UpstreamCircuit.OPEN:
+            retry_at = circuit.opened_at + timedelta(seconds=rules.open_seconds)
+        circuits.append({
+            'name': circuit.name,
+            'state': circuit.state,
+            'opened_at': circuit.opened_at,
+            'half_open_at': retry_at,
+            'in_flight': circuit.leases.filter(expires_at__gt=now).count(),
+            'max_in_flight': rules.max_in_flight,
+            'window': {
+                'started_at': circuit.window_started_at,
+                'requests': circuit.window_requests,
+                'failures': circuit.window_failures,
+            },
+            'totals': {
+                'successes': circuit.total_successes,
+                'failures': circuit.total_failures,
+                'rejected': circuit.total_rejected,
+                'opened': circuit.total_opened,
+            },
+        })
+    return circuits
@@ -0,0 +1,156 @@
+"""
+Version stamps and conditional GET for catalog and dashboard endpoints.
+
+Each table in ``CATALOG_MODELS`` has a ContentVersion counter. Each user has
+one more, covering their rows in ``USER_MODELS``. The receivers in
+``api.signals`` bump them on save and delete, in the same transaction as the
+write. Code that writes these tables with ``QuerySet.update`` or
+``bulk_create`` calls ``bump_table``/``bump_user`` itself.
+
+``conditional`` wraps a GET view. Its ETag hashes the counters the response
+depends on (read in one indexed query), the URL and, for per-user views, the
+user. A matching ``If-None-Match`` is answered with 304 before the view runs
+its own queries. Responses carry ``Cache-Control: no-cache``, so browsers
+revalidate on every use. ``Last-Modified`` is sent for information only: HTTP
+dates have one-second resolution, so ``If-Modified-Since`` alone never
+produces a 304.
+"""
+import hashlib
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import (
+    Achievement, CategoryProgress, CommonLesson, CommonLessonEnrollment, ContentVersion,
+    CulturalIntelligenceModule, CulturalIntelligenceProgress, DictionaryEntry, EmailTemplate, KidsLesson,
+    LearningGoal, Lesson, MicrolearningModule, MicrolearningProgress, PersonalizedRecommendation,
+    SpacedRepetitionItem, UserProfile, UserWeeklyChallenge, VideoLesson, WeeklyChallenge,
+)
+
+# Read-mostly tables edited through the admin
+CATALOG_MODELS = (
+    Lesson, KidsLesson, Achievement, VideoLesson, CommonLesson, MicrolearningModule, CulturalIntelligenceModule,
+    EmailTemplate, DictionaryEntry, WeeklyChallenge,
+)
+
+# Per-user tables shown on dashboards; any write bumps the owner's counter
+USER_MODELS = (
+    UserProfile, CategoryProgress, CommonLessonEnrollment, UserWeeklyChallenge, LearningGoal,
+    PersonalizedRecommendation, SpacedRepetitionItem, MicrolearningProgress, CulturalIntelligenceProgress,
+)
+
+_code_stamp = None
+
+
+def table_key(model):
+    return f'table:{model._meta.label_lower}'
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def bump(key):
+    """Increment the counter for ``key``. Call inside the transaction of the write it stands for."""
+    now = timezone.now()
+    if ContentVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            ContentVersion.objects.create(key=key, version=1)
+    except IntegrityError:
+        ContentVersion.objects.filter(key=key).update(version=F('version') + 1, updated_at=now)
+
+
+def bump_table(model):
+    bump(table_key(model))
+
+
+def bump_user(user_id):
+    bump(user_key(user_id))
+
+
+def code_stamp():
+    """Hash of the modules that shape responses, so a deploy changes every ETag."""
+    global _code_stamp
+    if _code_stamp is None:
+        digest = hashlib.blake2b(digest_size=8)
+        for name in ('models.py', 'serializers.py', 'views.py'):
+            digest.update(Path(__file__).with_name(name).read_bytes())
+        _code_stamp = digest.hexdigest()
+    return _code_stamp
+
+
+def etag_for(request, models, per_user=False, stamp=None):
+    """
+    (ETag, last modified timestamp or None) for a response built from ``models``.
+    Remembered on the request, so ``conditional`` and ``catalog_cache.cached``
+    on the same view share one query.
+    """
+    memo = vars(request).setdefault('_content_etags', {})
+    if (models, per_user, stamp) in memo:
+        return memo[(models, per_user, stamp)]
+
+    keys = [table_key(model) for model in models]
+    user_id = request.user.id if per_user and request.user.is_authenticated else None
+    if user_id:
+        keys.append(user_key(user_id))
+    current = {
+        key: (version, updated_at)
+        for key, version, updated_at in ContentVersion.objects.filter(key__in=keys).values_list(
+            'key', 'version', 'updated_at'
+        )
+    }
+    parts = [code_stamp(), request.get_host(), request.get_full_path(), str(user_id or '')]
+    # The timestamp keeps a counter that repeats after a rollback or restore from reusing old ETags
+    for key in keys:
+        version, updated_at = current.get(key, (0, None))
+        parts.append(f'{key}={version}@{updated_at.timestamp() if updated_at else ""}')
+    if stamp is not None:
+        parts.append(str(stamp(request)))
+    etag = '"%s"' % hashlib.blake2b('\n'.join(parts).encode(), digest_size=16).hexdigest()
+
+    last_modified = None
+    if not per_user and stamp is None and len(current) == len(keys):
+        last_modified = max(updated_at for _, updated_at in current.values()).timestamp()
+    memo[(models, per_user, stamp)] = etag, last_modified
+    return etag, last_modified
+
+
+def conditional(*models, per_user=False, stamp=None):
+    """
+    ETag a GET view whose response depends only on the tables of ``models``,
+    the URL and, with ``per_user``, the request user's rows in USER_MODELS.
+    ``stamp(request)`` adds anything else it depends on, such as today's date.
+    Goes under ``@api_view`` so authentication and permissions run first.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not getattr(settings, 'CONDITIONAL_GET', True):
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = etag_for(request, models, per_user, stamp)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            if per_user:
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ('Authorization',))
+            else:
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,151 @@
+"""
+Transactional email outbox.
+
+Views ``enqueue`` an email in the transaction that triggers it instead of
+talking to the mail server, so a request never waits on SMTP. The
+``send_outbox_emails`` worker takes due rows with ``claim_due``. It sends them
+with ``deliver`` over one connection that stays open while there is work.
+A failed message is retried after ``EMAIL_OUTBOX_RETRY_BASE`` seconds,
+doubling each time up to ``EMAIL_OUTBOX_RETRY_MAX``, and is marked failed
+after ``EMAIL_OUTBOX_MAX_ATTEMPTS`` tries.
+
+Claimed rows are leased for ``EMAIL_OUTBOX_LOCK_TIMEOUT`` seconds. If a worker
+dies mid-batch, its rows become due again once the lease runs out.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_BASE_SECONDS = 60
+DEFAULT_RETRY_MAX_SECONDS = 3600
+DEFAULT_LOCK_TIMEOUT_SECONDS = 300
+
+
+def enqueue(to_email, subject, body, html_body='', from_email=None, kind=''):
+    """Queue an email for the worker; call inside the transaction that makes it necessary."""
+    return EmailOutbox.objects.create(
+        kind=kind,
+        to_email=to_email,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+    )
+
+
+def retry_delay(attempts):
+    """Backoff after the ``attempts``-th failed try: base * 2^(attempts - 1), capped."""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE', DEFAULT_RETRY_BASE_SECONDS)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX', DEFAULT_RETRY_MAX_SECONDS)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def _due(now):
+    lapsed = Q(status=EmailOutbox.SENDING, locked_until__lte=now)
+    return (Q(status=EmailOutbox.PENDING) | lapsed) & Q(next_attempt_at__lte=now)
+
+
+def due_count(now=None):
+    return EmailOutbox.objects.filter(_due(now or timezone.now())).count()
+
+
+def claim_due(limit, now=None):
+    """Lease up to ``limit`` due emails to this worker, oldest first."""
+    now = now or timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT_SECONDS))
+    with transaction.atomic():
+        # SKIP LOCKED lets several workers drain the outbox without waiting on each other
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(_due(now))
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        EmailOutbox.objects.filter(id__in=ids).update(status=EmailOutbox.SENDING, locked_until=now + lease)
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('next_attempt_at', 'id'))
+
+
+def _message(email, connection):
+    msg = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html_body:
+        msg.attach_alternative(email.html_body, "text/html")
+    return msg
+
+
+def _claimed(email):
+    return EmailOutbox.objects.filter(pk=email.pk, status=EmailOutbox.SENDING, locked_until=email.locked_until)
+
+
+def _mark_sent(email):
+    _claimed(email).update(status=EmailOutbox.SENT, sent_at=timezone.now(), locked_until=None, last_error='')
+
+
+def _mark_failed(email, error):
+    attempts = email.attempts + 1
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    given_up = attempts >= max_attempts
+    _claimed(email).update(
+        status=EmailOutbox.FAILED if given_up else EmailOutbox.PENDING,
+        attempts=attempts,
+        next_attempt_at=timezone.now() + retry_delay(attempts),
+        locked_until=None,
+        last_error=str(error)[:2000],
+    )
+    if given_up:
+        logger.error(f"Giving up on {email.kind or 'email'} to {email.to_email} after {attempts} attempts: {error}")
+    else:
+        logger.warning(f"Failed to send {email.kind or 'email'} to {email.to_email} (attempt {attempts}): {error}")
+
+
+def deliver(emails, connection):
+    """
+    Send claimed ``emails`` over ``connection``, leaving it open for the next
+    batch. Returns ``(sent, failed)``.
+    """
+    sent = failed = 0
+    for index, email in enumerate(emails):
+        try:
+            connection.open()
+        except Exception as e:
+            # The mail server is unreachable; back the whole batch off instead of timing out per message
+            for pending in emails[index:]:
+                _mark_failed(pending, e)
+            return sent, failed + len(emails) - index
+        try:
+            connection.send_messages([_message(email, connection)])
+        except Exception as e:
+            _mark_failed(email, e)
+            failed += 1
+            # The session may be unusable after an error; the next message reconnects
+            connection.close()
+        else:
+            _mark_sent(email)
+            sent += 1
+    return sent, failed
+
+
+def purge_sent(before, batch_size=5000):
+    """Delete emails sent before ``before`` in primary-key batches. Returns the number removed."""
+    qs = EmailOutbox.objects.filter(status=EmailOutbox.SENT, sent_at__lt=before)
+    deleted = 0
+    while True:
+        batch = list(qs.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += EmailOutbox.objects.filter(id__in=batch).delete()[0]
@@ -0,0 +1,647 @@
+"""
+Gemini request building, response parsing and the async HTTP client behind
+the kids game proxy.
+
+``kids_gemini_game`` (sync workers) and ``kids_gemini_game_async`` (the ASGI
+pool, see ``crud/asgi.py``) share the prompt and parsing code here so both
+entry points answer identically. The async side keeps one keep-alive
+``httpx.AsyncClient`` per event loop and caps concurrent upstream calls at
+``GEMINI_MAX_CONCURRENCY``. A request that cannot get a slot within
+``GEMINI_QUEUE_TIMEOUT`` seconds is turned away instead of queueing without
+bound.
+
+With ``"stream": true`` in the request body both views call
+streamGenerateContent instead and relay the reply as Server-Sent Events:
+``delta`` events carry the spoken text as it is generated, and a final
+``done`` event carries the same parsed message the non-streaming reply has.
+
+Every upstream call holds a lease from the shared ``gemini`` circuit breaker
+(``api.circuit_breaker``). While Gemini is failing, or too many calls are
+already in flight across all workers, game turns are rejected at once with
+``circuit_breaker.Rejected`` instead of waiting on a struggling upstream.
+Only a 404 from v1 is retried against v1beta; timeouts and 5xx are not.
+"""
+import asyncio
+import json
+import logging
+import re
+import weakref
+from collections import namedtuple
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from . import circuit_breaker, game_prompts
+
+logger = logging.getLogger(__name__)
+
+# Gemini 2.5 Flash (stable and fast)
+GEMINI_MODEL = 'gemini-2.5-flash'
+# Try v1 API first (more stable), fallback to v1beta if needed
+API_VERSIONS = ('v1', 'v1beta')
+DEFAULT_API_BASE = 'https://generativelanguage.googleapis.com'
+REQUEST_TIMEOUT = 30
+CONNECT_TIMEOUT = 5
+DEFAULT_MAX_CONCURRENCY = 50
+DEFAULT_QUEUE_TIMEOUT = 5
+
+
+class GeminiBusy(Exception):
+    """No upstream slot became free within ``GEMINI_QUEUE_TIMEOUT``."""
+
+
+# A streaming reply still being relayed, and the circuit lease it holds
+UpstreamStream = namedtuple('UpstreamStream', ['response', 'lease'])
+
+
+def api_url(api_version, api_key):
+    base = getattr(settings, 'GEMINI_API_BASE', DEFAULT_API_BASE).rstrip('/')
+    return f"{base}/{api_version}/models/{GEMINI_MODEL}:generateContent?key={api_key}"
+
+
+def stream_url(api_version, api_key):
+    base = getattr(settings, 'GEMINI_API_BASE', DEFAULT_API_BASE).rstrip('/')
+    return f"{base}/{api_version}/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={api_key}"
+
+
+def build_game_payload(data):
+    """Build the generateContent payload for a game turn from the client's request data."""
+    # Extract request data
+    game_type = data.get('gameType', 'interactive')
+    user_input = data.get('userInput', '')
+    conversation_history = data.get('conversationHistory', [])
+    context = data.get('context', {})
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("user_input = %r, conversation_history length = %d", user_input, len(conversation_history or []))
+        for idx, msg in enumerate((conversation_history or [])[-3:]):  # Last 3 messages
+            logger.debug("History[%d]: role=%s, content=%.50s...", idx, msg.get('role'), msg.get('content', ''))
+    
+    system_prompt = game_prompts.system_prompt(game_type, context.get('age', 7), context.get('level', 'beginner'))
+    
+    # Build user message - initial prompts for each game type (varied and age-appropriate)
+    if not user_input:
+        user_input = game_prompts.initial_prompt(game_type)
+    
+    # Build messages for Gemini API (correct format)
+    # Gemini API expects contents array with alternating user/model messages
+    contents = []
+    
+    # Add conversation history if provided (with proper role mapping)
+    if conversation_history and len(conversation_history) > 0:
+        for msg in conversation_history[-10:]:  # Last 10 messages for context
+            role = msg.get('role', 'user')
+            # Map 'assistant' to 'model' for Gemini API
+            gemini_role = 'model' if role == 'assistant' else 'user'
+            contents.append({
+                'role': gemini_role,
+                'parts': [{'text': str(msg.get('content', ''))}]
+            })
+    
+    # Combine system prompt and user input into the user message
+    combined_text = f"{system_prompt}\n\n{user_input}"
+    contents.append({
+        'role': 'user',
+        'parts': [{'text': combined_text}]
+    })
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Adding user_input to payload: %.100r, total contents count: %d", user_input, len(contents))
+    
+    # Build payload
+    payload = {
+        'contents': contents,
+        'generationConfig': {
+            'temperature': 0.8,
+            'topK': 40,
+            'topP': 0.95,
+            'maxOutputTokens': 1024,
+        },
+        'safetySettings': [
+            {
+                'category': 'HARM_CATEGORY_HARASSMENT',
+                'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
+            },
+            {
+                'category': 'HARM_CATEGORY_HATE_SPEECH',
+                'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
+            },
+            {
+                'category': 'HARM_CATEGORY_SEXUALLY_EXPLICIT',
+                'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
+            },
+            {
+                'category': 'HARM_CATEGORY_DANGEROUS_CONTENT',
+                'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
+            }
+        ]
+    }
+    
+    return payload
+
+
+def failure_details(last_error):
+    """``(status_code, error_message)`` for the ``last_error`` recorded while trying API versions."""
+    if not last_error:
+        return 503, 'Failed to connect to Gemini API'
+    error_data = last_error.get('error', {})
+    error_message = error_data.get('message', 'Unknown error') if isinstance(error_data, dict) else str(error_data)
+    return last_error.get('status', 500), error_message
+
+
+def error_response(status_code, error_message):
+    """Map a failed upstream call to the ``(body, status)`` returned to the client."""
+    # Provide more helpful error message
+    if status_code == 400:
+        return {
+            "message": f"Invalid API request: {error_message}. Please check configuration.",
+            "error": "API_ERROR",
+            "details": error_message
+        }, 400
+    elif status_code == 401 or status_code == 403:
+        return {
+            "message": "AI service authentication failed. Please check API key configuration.",
+            "error": "AUTH_ERROR",
+            "details": error_message
+        }, 503
+    else:
+        return {
+            "message": "Your Gamer temporarily unavailable. Please try again later.",
+            "error": "API_ERROR",
+            "details": error_message
+        }, 502
+
+
+def rejected_response(rejection):
+    """``(body, status)`` for a call the circuit breaker did not admit."""
+    if rejection.reason == 'busy':
+        return {
+            "message": "Lots of players right now! Please try again in a moment.",
+            "error": "BUSY"
+        }, 503
+    return {
+        "message": "Your Gamer temporarily unavailable. Please try again later.",
+        "error": "UPSTREAM_UNAVAILABLE"
+    }, 503
+
+
+def clean_markdown(text):
+    if not text:
+        return text
+    # Remove common markdown formatting - order matters!
+    text = text.replace('**', '')  # Remove bold
+    text = text.replace('*', '')  # Remove any remaining asterisks
+    text = text.replace('__', '')  # Remove underline
+    text = text.replace('_', '')  # Remove any remaining underscores
+    text = text.replace('`', '')  # Remove code formatting
+    text = text.replace('#', '')  # Remove headers
+    # Don't remove parentheses as they might be part of the text
+    # Don't remove brackets to preserve readability
+    return text.strip()
+
+
+def parse_game_response(data, game_type):
+    """Turn a generateContent response into the message shape the game UI expects."""
+    content = data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', 'Sorry, I could not generate a response.')
+    return parse_game_text(content, game_type)
+
+
+def parse_game_text(content, game_type):
+    """Parse the model's reply text (normally a JSON object) into the game UI's message shape."""
+    # Try to parse JSON from response
+    parsed_response = {
+        'content': content.strip(),
+        'gameInstruction': None,
+        'questions': None,
+        'feedback': None,
+        'nextStep': None,
+        'points': 0,
+        'gameEnd': False
+    }
+    
+    # Try to extract JSON from response
+    try:
+        json_match = content.strip().replace('```json', '').replace('```', '').strip()
+        if json_match.startswith('{'):
+            parsed = json.loads(json_match)
+            
+            # Build natural language content from JSON fields
+            # For tongue-twister game, only use content field (no gameInstruction or feedback)
+            message_parts = []
+            
+            # Add main content if available (always use this)
+            if parsed.get('content'):
+                message_parts.append(parsed.get('content'))
+            
+            # For other games, add feedback and nextStep if available
+            if game_type != 'tongue-twister':
+                # Add feedback if available (not for tongue-twister)
+                if parsed.get('feedback'):
+                    message_parts.append(parsed.get('feedback'))
+                
+                # Add nextStep if available
+                if parsed.get('nextStep'):
+                    message_parts.append(parsed.get('nextStep'))
+            
+            # Combine into a single natural message
+            combined_content = '\n\n'.join(filter(None, message_parts))
+            
+            parsed_response.update({
+                'content': clean_markdown(combined_content if combined_content else parsed.get('content', parsed_response['content'])),
+                'gameInstruction': clean_markdown(parsed.get('gameInstruction') if parsed.get('gameInstruction') else None),
+                'questions': parsed.get('questions'),
+                'feedback': clean_markdown(parsed.get('feedback') if parsed.get('feedback') else None),
+                'nextStep': clean_markdown(parsed.get('nextStep') if parsed.get('nextStep') else None),
+                'points': parsed.get('points', 0),
+                'gameEnd': bool(parsed.get('gameEnd', False))
+            })
+    except (json.JSONDecodeError, AttributeError):
+        # If JSON parsing fails, clean up raw content to remove JSON markers
+        cleaned_content = content.strip()
+        # Remove JSON code blocks if present
+        if '```json' in cleaned_content:
+            # Try to extract just the text content
+            parts = cleaned_content.split('```')
+            if len(parts) > 1:
+                # Get the part outside code blocks
+                text_parts = [p.strip() for p in parts if p.strip() and not p.strip().startswith('json')]
+                cleaned_content = '\n\n'.join(text_parts) if text_parts else cleaned_content
+        
+        # If cleaned_content still looks like raw JSON, try to extract text from it
+        if cleaned_content.startswith('{') and ('content' in cleaned_content or 'feedback' in cleaned_content):
+            # Try to extract plain text by removing JSON structure
+            # Find all string values in JSON
+            matches = re.findall(r'"([^"]+)":\s*"([^"]+)"', cleaned_content)
+            text_parts = []
+            for key, value in matches:
+                # Only include non-metadata fields (not points or other JSON keys)
+                if key in ['content', 'feedback', 'nextStep', 'gameInstruction']:
+                    text_parts.append(value)
+            if text_parts:
+                cleaned_content = ' '.join(text_parts)
+        
+        parsed_response['content'] = clean_markdown(cleaned_content)
+    
+    return parsed_response
+
+
+# ============= Streaming =============
+# Fields of the model's JSON reply that are read aloud, in the order parse_game_text joins them
+SPOKEN_FIELDS = ('content', 'feedback', 'nextStep')
+_FIELD_START = re.compile(r'"(\w+)"\s*:\s*"')
+_JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+_MARKDOWN_CHARS = str.maketrans('', '', '*_`#')
+STREAM_ERROR = {
+    "message": "The AI reply was interrupted. Please try again.",
+    "error": "STREAM_INTERRUPTED"
+}
+
+
+class SpokenTextStream:
+    """
+    Pulls the spoken text out of a game turn while it is still being generated.
+
+    ``feed`` takes each chunk of model text and returns the newly completed
+    characters of the spoken string fields of its JSON reply, or the raw text
+    when the model did not answer with JSON. ``result`` parses the whole reply.
+    """
+
+    def __init__(self, game_type):
+        self.game_type = game_type
+        self.text = ''
+        self._fields = SPOKEN_FIELDS[:1] if game_type == 'tongue-twister' else SPOKEN_FIELDS
+        self._json = None
+        self._pos = 0
+        self._field = None
+        self._spoken = False
+        self._field_spoken = False
+
+    def feed(self, chunk):
+        self.text += chunk
+        if self._json is None and not self._detect():
+            return ''
+        if not self._json:
+            delta, self._pos = self.text[self._pos:], len(self.text)
+            return delta.translate(_MARKDOWN_CHARS)
+
+        out = []
+        while True:
+            if self._field is None:
+                match = _FIELD_START.search(self.text, self._pos)
+                if not match:
+                    break
+                self._field, self._pos = match.group(1), match.end()
+                self._field_spoken = False
+            value, closed = self._read_string()
+            if value and self._field in self._fields:
+                if self._spoken and not self._field_spoken:
+                    out.append('\n\n')
+                out.append(value)
+                self._spoken = self._field_spoken = True
+            if not closed:
+                break
+            self._field = None
+        return ''.join(out).translate(_MARKDOWN_CHARS)
+
+    def result(self):
+        return parse_game_text(self.text, self.game_type)
+
+    def _detect(self):
+        # Skip whitespace and a ```json fence the model sometimes adds despite the prompt
+        head = self.text.lstrip().lstrip('`')
+        if head[:4].lower() == 'json':
+            head = head[4:].lstrip()
+        if not head or 'json'.startswith(head.lower()):
+            return False
+        self._json = head.startswith('{')
+        self._pos = len(self.text) - len(head)
+        return True
+
+    def _read_string(self):
+        """Decode the current JSON string value up to its closing quote or the end of the buffer."""
+        out, i, text = [], self._pos, self.text
+        while i < len(text):
+            char = text[i]
+            if char == '"':
+                self._pos = i + 1
+                return ''.join(out), True
+            if char == '\\':
+                if i + 1 >= len(text):
+                    break
+                escape = text[i + 1]
+                if escape == 'u':
+                    if i + 6 > len(text):
+                        break
+                    out.append(chr(int(text[i + 2:i + 6], 16)))
+                    i += 6
+                    continue
+                out.append(_JSON_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            out.append(char)
+            i += 1
+        self._pos = i
+        return ''.join(out), False
+
+
+def chunk_text(line):
+    """Model text carried by one line of the upstream SSE stream ('' for anything else)."""
+    if not line or not line.startswith('data:'):
+        return ''
+    try:
+        data = json.loads(line[5:])
+        parts = data.get('candidates', [{}])[0].get('content', {}).get('parts', [])
+    except (ValueError, AttributeError, IndexError):
+        return ''
+    return ''.join(part.get('text', '') for part in parts)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream_response(events):
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Let nginx pass events through as they are written
+    return response
+
+
+def replay_events(turn):
+    """SSE events for an already parsed turn, such as a cached opening."""
+    if turn.get('content'):
+        yield sse_event('delta', {'text': turn['content']})
+    yield sse_event('done', turn)
+
+
+async def replay_events_async(turn):
+    for event in replay_events(turn):
+        yield event
+
+
+# ============= Upstream calls =============
+def _error_details(response):
+    return {
+        'status': response.status_code,
+        'error': response.json() if response.text else {}
+    }
+
+
+def _healthy(status_code):
+    """Whether an answer counts as a success for the breaker; other 4xx are the request's fault."""
+    return status_code != 0 and status_code != 429 and status_code < 500
+
+
+def _post(url, payload, stream=False):
+    """
+    POST to each API version in turn until one does not answer 404.
+
+    Returns ``(200, response)`` or ``(status_code, last_error)``; a timeout
+    propagates as ``requests.exceptions.Timeout``.
+    """
+    last_error = None
+    for api_version in API_VERSIONS:
+        logger.info(f"Calling Gemini API: {api_version}/models/{GEMINI_MODEL}")
+        try:
+            response = requests.post(url(api_version), json=payload, stream=stream, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.Timeout:
+            raise
+        except requests.exceptions.RequestException as e:
+            last_error = {'status': 0, 'error': {'message': str(e)}}
+            logger.error(f"Request exception with {api_version}: {str(e)}")
+            continue
+        if response.status_code == 200:
+            logger.info(f"Success with {api_version}/models/{GEMINI_MODEL}")
+            return 200, response
+        last_error = _error_details(response)
+        response.close()
+        if response.status_code != 404:
+            logger.error(f"Gemini API error: {response.status_code} - {last_error.get('error', {})}")
+            break
+        # Model not found in this version, try next version
+        logger.warning(f"Model {GEMINI_MODEL} not found in {api_version}, trying v1beta")
+    return failure_details(last_error)[0], last_error
+
+
+def generate(payload, api_key):
+    """
+    Call generateContent with requests.
+
+    Returns ``(200, data)`` with the parsed JSON on success, otherwise
+    ``(status_code, last_error)``. Raises ``circuit_breaker.Rejected`` when
+    the call is not admitted.
+    """
+    lease = circuit_breaker.acquire(circuit_breaker.GEMINI)
+    healthy = False
+    try:
+        status_code, result = _post(lambda version: api_url(version, api_key), payload)
+        healthy = _healthy(status_code)
+        return status_code, (result.json() if status_code == 200 else result)
+    finally:
+        circuit_breaker.release(lease, healthy)
+
+
+def open_stream(payload, api_key):
+    """
+    Start a streamGenerateContent call with requests.
+
+    Returns ``(200, UpstreamStream)`` for ``stream_events`` to relay and
+    release, otherwise ``(status_code, last_error)`` like ``generate``.
+    """
+    lease = circuit_breaker.acquire(circuit_breaker.GEMINI)
+    try:
+        status_code, result = _post(lambda version: stream_url(version, api_key), payload, stream=True)
+    except BaseException:
+        circuit_breaker.release(lease, False)
+        raise
+    if status_code == 200:
+        return 200, UpstreamStream(result, lease)
+    circuit_breaker.release(lease, _healthy(status_code))
+    return status_code, result
+
+
+def stream_events(upstream, game_type):
+    """SSE events for an ``UpstreamStream`` from ``open_stream``."""
+    spoken = SpokenTextStream(game_type)
+    # Stays None when the client goes away mid-stream, which says nothing about the upstream
+    healthy = None
+    try:
+        # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes
+        for line in upstream.response.iter_lines(chunk_size=None, decode_unicode=True):
+            delta = spoken.feed(chunk_text(line))
+            if delta:
+                yield sse_event('delta', {'text': delta})
+        healthy = True
+        yield sse_event('done', spoken.result())
+    except requests.exceptions.RequestException as e:
+        healthy = False
+        logger.error(f"Gemini stream interrupted: {str(e)}")
+        yield sse_event('error', STREAM_ERROR)
+    finally:
+        upstream.response.close()
+        circuit_breaker.release(upstream.lease, healthy)
+
+
+# Event loop -> (client, semaphore); each uvicorn worker runs a single loop
+_pools = weakref.WeakKeyDictionary()
+
+
+def _async_pool():
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        limit = getattr(settings, 'GEMINI_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+        )
+        pool = _pools[loop] = (client, asyncio.Semaphore(limit))
+    return pool
+
+
+async def _acquire_slot():
+    client, slots = _async_pool()
+    try:
+        await asyncio.wait_for(slots.acquire(), getattr(settings, 'GEMINI_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT))
+    except asyncio.TimeoutError:
+        raise GeminiBusy('All Gemini connections are busy')
+    return client, slots
+
+
+async def _post_async(client, url, payload, stream=False):
+    """Async ``_post`` on the pooled client."""
+    last_error = None
+    for api_version in API_VERSIONS:
+        logger.info(f"Calling Gemini API: {api_version}/models/{GEMINI_MODEL}")
+        request = client.build_request('POST', url(api_version), json=payload)
+        try:
+            response = await client.send(request, stream=stream)
+        except httpx.TimeoutException:
+            raise
+        except httpx.RequestError as e:
+            last_error = {'status': 0, 'error': {'message': str(e)}}
+            logger.error(f"Request exception with {api_version}: {str(e)}")
+            continue
+        if response.status_code == 200:
+            logger.info(f"Success with {api_version}/models/{GEMINI_MODEL}")
+            return 200, response
+        await response.aread()
+        await response.aclose()
+        last_error = _error_details(response)
+        if response.status_code != 404:
+            logger.error(f"Gemini API error: {response.status_code} - {last_error.get('error', {})}")
+            break
+        # Model not found in this version, try next version
+        logger.warning(f"Model {GEMINI_MODEL} not found in {api_version}, trying v1beta")
+    return failure_details(last_error)[0], last_error
+
+
+async def generate_async(payload, api_key):
+    """
+    Call generateContent without blocking the event loop.
+
+    Returns like ``generate``. Also raises ``GeminiBusy`` when no slot of
+    this worker's pool frees up within the queue timeout; timeouts propagate
+    as ``httpx.TimeoutException``.
+    """
+    lease = await sync_to_async(circuit_breaker.acquire)(circuit_breaker.GEMINI)
+    healthy = None
+    try:
+        client, slots = await _acquire_slot()
+        healthy = False
+        try:
+            status_code, result = await _post_async(client, lambda version: api_url(version, api_key), payload)
+        finally:
+            slots.release()
+        healthy = _healthy(status_code)
+        return status_code, (result.json() if status_code == 200 else result)
+    finally:
+        await sync_to_async(circuit_breaker.release)(lease, healthy)
+
+
+async def open_stream_async(payload, api_key):
+    """
+    Async ``open_stream``. On success the circuit lease and this worker's pool
+    slot stay taken until ``stream_events_async`` has relayed the response.
+    """
+    lease = await sync_to_async(circuit_breaker.acquire)(circuit_breaker.GEMINI)
+    try:
+        client, slots = await _acquire_slot()
+    except BaseException:
+        await sync_to_async(circuit_breaker.release)(lease, None)
+        raise
+    try:
+        status_code, result = await _post_async(client, lambda version: stream_url(version, api_key), payload, stream=True)
+    except BaseException:
+        slots.release()
+        await sync_to_async(circuit_breaker.release)(lease, False)
+        raise
+    if status_code == 200:
+        return 200, UpstreamStream(result, lease)
+    slots.release()
+    await sync_to_async(circuit_breaker.release)(lease, _healthy(status_code))
+    return status_code, result
+
+
+async def stream_events_async(upstream, game_type):
+    """SSE events for an ``UpstreamStream`` from ``open_stream_async``."""
+    spoken = SpokenTextStream(game_type)
+    healthy = None
+    try:
+        async for line in upstream.response.aiter_lines():
+            delta = spoken.feed(chunk_text(line))
+            if delta:
+                yield sse_event('delta', {'text': delta})
+        healthy = True
+        yield sse_event('done', spoken.result())
+    except httpx.HTTPError as e:
+        healthy = False
+        logger.error(f"Gemini stream interrupted: {str(e)}")
+        yield sse_event('error', STREAM_ERROR)
+    finally:
+        await upstream.response.aclose()
+        _async_pool()[1].release()
+        await sync_to_async(circuit_breaker.release)(upstream.lease, healthy)
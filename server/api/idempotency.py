@@ -0,0 +1,219 @@
+"""
+Durable idempotency keys for offline sync writes.
+
+Keys are stored in SyncIdempotencyKey rather than the per-process cache, so
+every worker sees them. A request ``claim``s its key with an INSERT guarded by
+the (user, key) unique constraint. The winner applies the change and calls
+``complete`` in the same transaction. Later duplicates replay the stored
+response, and duplicates arriving while the winner is still running are told
+to retry. A claim left behind by a worker that died is taken over after
+``SYNC_IDEMPOTENCY_LOCK_TIMEOUT`` seconds.
+"""
+import hashlib
+import json
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SyncIdempotencyKey
+
+DEFAULT_TTL_SECONDS = 86400
+DEFAULT_LOCK_TIMEOUT_SECONDS = 60
+
+CLAIMED = 'claimed'
+REPLAY = 'replay'
+IN_FLIGHT = 'in_flight'
+MISMATCH = 'mismatch'
+
+Claim = namedtuple('Claim', ['outcome', 'record'])
+
+
+class ClaimLost(Exception):
+    """Raised by ``complete`` when another request took over a stale claim."""
+
+
+def request_fingerprint(payload):
+    raw = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'SYNC_IDEMPOTENCY_TTL', DEFAULT_TTL_SECONDS))
+
+
+def lock_timeout_seconds():
+    return getattr(settings, 'SYNC_IDEMPOTENCY_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT_SECONDS)
+
+
+def _resolve(record, fingerprint, now):
+    """Outcome for a key someone already holds, or None when the holder's claim has lapsed."""
+    abandoned = (
+        record.state == SyncIdempotencyKey.IN_PROGRESS
+        and record.created_at <= now - timedelta(seconds=lock_timeout_seconds())
+    )
+    if record.expires_at <= now or abandoned:
+        return None
+    if record.request_hash != fingerprint:
+        return Claim(MISMATCH, record)
+    if record.state == SyncIdempotencyKey.COMPLETED:
+        return Claim(REPLAY, record)
+    return Claim(IN_FLIGHT, record)
+
+
+def claim(user, key, fingerprint):
+    """
+    Try to take ownership of ``key`` for ``user``.
+
+    Returns a ``Claim`` whose outcome is CLAIMED (apply the request), REPLAY
+    (return ``record.response_body``), IN_FLIGHT (another request holds the
+    key) or MISMATCH (the key was used for a different payload).
+    """
+    record = None
+    for _ in range(3):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = SyncIdempotencyKey.objects.create(
+                    user=user,
+                    key=key,
+                    request_hash=fingerprint,
+                    created_at=now,
+                    expires_at=now + _ttl(),
+                )
+            return Claim(CLAIMED, record)
+        except IntegrityError:
+            pass
+
+        record = SyncIdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # The holder released the key between our INSERT and SELECT
+            continue
+
+        resolved = _resolve(record, fingerprint, now)
+        if resolved:
+            return resolved
+
+        # created_at doubles as a fencing token: only one taker can match it
+        taken = SyncIdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            request_hash=fingerprint,
+            state=SyncIdempotencyKey.IN_PROGRESS,
+            response_status=None,
+            response_body=None,
+            created_at=now,
+            expires_at=now + _ttl(),
+        )
+        if taken:
+            record.refresh_from_db()
+            return Claim(CLAIMED, record)
+
+    return Claim(IN_FLIGHT, record)
+
+
+def claim_many(user, fingerprints):
+    """
+    Claim several keys at once; ``fingerprints`` maps key to request fingerprint.
+
+    New keys are inserted with one bulk INSERT and existing ones read with one
+    SELECT. Only keys that lost a race or whose claim has lapsed fall back to
+    ``claim``. Returns a dict of key to ``Claim``.
+    """
+    now = timezone.now()
+    existing = {
+        record.key: record
+        for record in SyncIdempotencyKey.objects.filter(user=user, key__in=list(fingerprints))
+    }
+    fresh = [
+        SyncIdempotencyKey(
+            user=user,
+            key=key,
+            request_hash=fingerprint,
+            created_at=now,
+            expires_at=now + _ttl(),
+        )
+        for key, fingerprint in fingerprints.items()
+        if key not in existing
+    ]
+    SyncIdempotencyKey.objects.bulk_create(fresh, ignore_conflicts=True)
+    owned = {
+        record.key: record
+        for record in SyncIdempotencyKey.objects.filter(
+            user=user,
+            key__in=[record.key for record in fresh],
+            created_at=now,
+            state=SyncIdempotencyKey.IN_PROGRESS,
+        )
+    }
+
+    claims = {}
+    for key, fingerprint in fingerprints.items():
+        if key in owned and owned[key].request_hash == fingerprint:
+            claims[key] = Claim(CLAIMED, owned[key])
+            continue
+        resolved = _resolve(existing[key], fingerprint, now) if key in existing else None
+        claims[key] = resolved or claim(user, key, fingerprint)
+    return claims
+
+
+def complete(record, response_status, response_body):
+    """Store the response for a claimed key; call inside the transaction that applied it."""
+    updated = SyncIdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+        state=SyncIdempotencyKey.COMPLETED,
+        response_status=response_status,
+        response_body=response_body,
+    )
+    if not updated:
+        raise ClaimLost(f'Idempotency key {record.key} was claimed by another request')
+
+
+def complete_many(completions):
+    """
+    Store responses for several claimed keys with one bulk UPDATE.
+
+    ``completions`` is a list of ``(record, response_status, response_body)``.
+    Call inside the transaction that applied them; the claims are locked and
+    fenced first so a lapsed claim rolls the whole batch back.
+    """
+    if not completions:
+        return
+    records = [record for record, _, _ in completions]
+    current = dict(
+        SyncIdempotencyKey.objects.select_for_update()
+        .filter(pk__in=[record.pk for record in records])
+        .values_list('pk', 'created_at')
+    )
+    for record, response_status, response_body in completions:
+        if current.get(record.pk) != record.created_at:
+            raise ClaimLost(f'Idempotency key {record.key} was claimed by another request')
+        record.state = SyncIdempotencyKey.COMPLETED
+        record.response_status = response_status
+        record.response_body = response_body
+    SyncIdempotencyKey.objects.bulk_update(records, ['state', 'response_status', 'response_body'], batch_size=500)
+
+
+def release(record):
+    """Drop a claim whose request failed so the client can retry with the same key."""
+    SyncIdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+
+def release_many(records):
+    q = Q()
+    for record in records:
+        q |= Q(pk=record.pk, created_at=record.created_at)
+    if records:
+        SyncIdempotencyKey.objects.filter(q).delete()
+
+
+def purge_expired(batch_size=5000, now=None):
+    """Delete expired keys in primary-key batches. Returns the number removed."""
+    qs = SyncIdempotencyKey.objects.filter(expires_at__lte=now or timezone.now())
+    deleted = 0
+    while True:
+        batch = list(qs.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += SyncIdempotencyKey.objects.filter(id__in=batch).delete()[0]
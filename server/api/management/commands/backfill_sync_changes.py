@@ -0,0 +1,72 @@
+"""
+Django management command to seed the sync change log from existing rows
+Writes an upsert change for every tracked entity that has none yet, so clients
+can start from after_seq=0. Run once after deploying the change log; re-running
+only fills gaps.
+Usage: python manage.py backfill_sync_changes [--user ID] [--entity LessonProgress] [--dry-run]
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import SyncChange
+from api.sync_log import TRACKED_ENTITIES, record_changes
+
+
+class Command(BaseCommand):
+    help = 'Record upsert changes for tracked entities missing from the sync change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only backfill this user ID (can be repeated)',
+        )
+        parser.add_argument(
+            '--entity',
+            action='append',
+            dest='entities',
+            choices=sorted(TRACKED_ENTITIES),
+            help='Only backfill this entity type (can be repeated)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many changes would be recorded without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        entities = options['entities'] or sorted(TRACKED_ENTITIES)
+        dry_run = options['dry_run']
+
+        users = User.objects.all().order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+            if not users.exists():
+                raise CommandError('No matching users found')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be written'))
+
+        recorded = 0
+        for user_id in users.values_list('id', flat=True).iterator():
+            for entity in entities:
+                model, _, owner_lookup = TRACKED_ENTITIES[entity]
+                logged = SyncChange.objects.filter(user_id=user_id, entity=entity).values_list('entity_id', flat=True)
+                missing = list(
+                    model.objects.filter(**{owner_lookup: user_id})
+                    .exclude(pk__in=logged)
+                    .order_by('pk')
+                    .values_list('pk', flat=True)
+                )
+                if not missing:
+                    continue
+                if dry_run:
+                    self.stdout.write(f'  Would record {len(missing)} {entity} changes for user {user_id}')
+                else:
+                    record_changes(user_id, entity, missing)
+                recorded += len(missing)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Recorded {recorded} sync changes'))
@@ -0,0 +1,116 @@
+"""
+Django management command to compare the upload paths of
+adults/pronunciation/practice for one recording: base64 data URL in JSON,
+multipart file part and raw audio/* body. Reports wall time and peak Python
+memory allocated while the view runs. Recordings go to a temporary
+MEDIA_ROOT and database changes are rolled back.
+Usage: python manage.py benchmark_audio_upload [--size-mb 5] [--runs 3]
+"""
+
+import base64
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.client import MULTIPART_CONTENT, encode_multipart, BOUNDARY
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import submit_pronunciation_practice
+
+PATH = '/api/adults/pronunciation/practice'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark base64 JSON vs streamed pronunciation audio uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size-mb',
+            type=float,
+            default=5.0,
+            help='Size of the recording in MB (default: 5)',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Runs per upload path; the best is reported (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        size = int(options['size_mb'] * 1024 * 1024)
+        if size < 1 or options['runs'] < 1:
+            raise CommandError('--size-mb and --runs must be positive')
+
+        audio = os.urandom(size)
+        factory = APIRequestFactory(HTTP_HOST='localhost')
+        requests = {
+            'base64 JSON': lambda: factory.post(PATH, json.dumps({
+                'target_text': 'She sells sea shells',
+                'user_audio_url': 'data:audio/webm;base64,' + base64.b64encode(audio).decode(),
+            }), content_type='application/json'),
+            'multipart': lambda: factory.post(PATH, encode_multipart(BOUNDARY, {
+                'target_text': 'She sells sea shells',
+                'audio': _NamedBytes(audio, 'take.webm'),
+            }), content_type=MULTIPART_CONTENT),
+            'raw audio/webm': lambda: factory.post(
+                f'{PATH}?target_text=She+sells+sea+shells', audio, content_type='audio/webm'
+            ),
+        }
+
+        media_root = tempfile.mkdtemp()
+        self.stdout.write(f'⏱️  Uploading a {size / (1024 * 1024):.1f} MB recording...')
+        try:
+            with override_settings(MEDIA_ROOT=media_root, PRONUNCIATION_AUDIO_MAX_BYTES=size + 1024):
+                for label, build in requests.items():
+                    best_time = best_peak = None
+                    for _ in range(options['runs']):
+                        elapsed, peak, body_size = self._run(build())
+                        best_time = elapsed if best_time is None else min(best_time, elapsed)
+                        best_peak = peak if best_peak is None else min(best_peak, peak)
+                    self.stdout.write(
+                        f'  {label:<15} body {body_size / (1024 * 1024):6.2f} MB  '
+                        f'{best_time * 1000:8.1f} ms  peak {best_peak / (1024 * 1024):7.2f} MB'
+                    )
+        finally:
+            shutil.rmtree(media_root)
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete (all changes rolled back)'))
+
+    def _run(self, request):
+        body_size = int(request.META['CONTENT_LENGTH'])
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'audio-bench-{uuid.uuid4().hex[:12]}', password=None)
+            force_authenticate(request, user=user)
+            # The request body already exists; only what the view allocates is measured
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = submit_pronunciation_practice(request)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            transaction.set_rollback(True)
+        if response.status_code != 201:
+            raise CommandError(f'Upload failed with {response.status_code}: {response.data}')
+        return elapsed, peak, body_size
+
+
+class _NamedBytes:
+    """File-like bytes with a name and content type for encode_multipart."""
+
+    content_type = 'audio/webm'
+
+    def __init__(self, data, name):
+        self.data = data
+        self.name = name
+
+    def read(self):
+        return self.data
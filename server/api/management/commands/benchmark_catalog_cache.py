@@ -0,0 +1,166 @@
+"""
+Django management command to measure the shared catalog cache. Each catalog
+endpoint is requested repeatedly with the cache turned off and with the
+configured catalog backend (CATALOG_CACHE_BACKEND), without ETags, as on a
+client's first visit. The command reports the time and database queries per
+request and checks that cached responses match uncached ones, including right
+after an edit. Rows and cache entries written to the database are rolled back.
+Usage: python manage.py benchmark_catalog_cache [--rows 100] [--requests 50]
+"""
+
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import catalog_cache, content_versions
+from api.models import (
+    Achievement, CommonLesson, CulturalIntelligenceModule, DictionaryEntry, EmailTemplate, KidsLesson, Lesson,
+    MicrolearningModule, VideoLesson,
+)
+
+# (URL name, args, query parameters, model edited to check freshness)
+ENDPOINTS = [
+    ('lessons-list', [], {}, Lesson),
+    ('kids-lessons', [], {}, KidsLesson),
+    ('achievements-list', [], {}, Achievement),
+    ('videos-list', [], {}, VideoLesson),
+    ('adults-common-lessons', [], {}, CommonLesson),
+    ('adults-microlearning-modules', [], {}, MicrolearningModule),
+    ('cultural-modules', [], {}, CulturalIntelligenceModule),
+    ('email-templates', [], {}, EmailTemplate),
+    ('dictionary-search', [], {'q': 'word'}, DictionaryEntry),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark catalog endpoints with and without the shared catalog cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100,
+            help='Rows per catalog (default: 100)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Requests per endpoint and mode; the median is reported (default: 50)',
+        )
+
+    def handle(self, *args, **options):
+        rows, requests = options['rows'], options['requests']
+        if rows < 1 or requests < 1:
+            raise CommandError('--rows and --requests must be positive')
+
+        backend = settings.CACHES[catalog_cache.CACHE_ALIAS]['BACKEND']
+        self.stdout.write(f'🗄️  Requesting {len(ENDPOINTS)} catalog endpoints {requests} times each ({backend})...')
+        off = {**settings.CACHES, catalog_cache.CACHE_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with transaction.atomic(), override_settings(CONDITIONAL_GET=False):
+            tag = uuid.uuid4().hex[:8]
+            user = User.objects.create_user(username=f'catalog-bench-{tag}', password=None)
+            self._catalog(tag, rows)
+            # bulk_create sends no signals
+            for _, _, _, model in ENDPOINTS:
+                content_versions.bump_table(model)
+            client = APIClient(HTTP_HOST='localhost')
+            client.force_authenticate(user=user)
+
+            total_off = total_on = 0.0
+            for name, args, params, model in ENDPOINTS:
+                url = reverse(name, args=args)
+                with override_settings(CACHES=off):
+                    plain, ms_off, queries_off = self._measure(client, url, params, requests)
+                cached, ms_on, queries_on = self._measure(client, url, params, requests)
+                if cached != plain:
+                    raise CommandError(f'{name}: the cached response differs from the uncached one')
+
+                row = model.objects.filter(pk__in=model.objects.order_by('-pk').values('pk')[:1]).get()
+                row.save()
+                with override_settings(CACHES=off):
+                    plain = client.get(url, params).content
+                if client.get(url, params).content != plain:
+                    raise CommandError(f'{name}: a stale response was served after an edit')
+
+                total_off += ms_off
+                total_on += ms_on
+                self.stdout.write(
+                    f'  {name:<30} {ms_off:7.2f} -> {ms_on:6.2f} ms ({ms_off / ms_on:4.1f}x)  '
+                    f'{queries_off:2d} -> {queries_on} queries  {len(plain) / 1024:7.1f} KB'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total_off:.1f} ms -> {total_on:.1f} ms for one request to every catalog, '
+            f'no stale responses after edits (all changes rolled back)'
+        ))
+
+    def _measure(self, client, url, params, requests):
+        # The first request fills the cache; the rest show what every other worker sees
+        content = client.get(url, params).content
+        timings = []
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url, params)
+                timings.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+        return content, statistics.median(timings) * 1000, len(queries)
+
+    def _catalog(self, tag, rows):
+        Lesson.objects.bulk_create([
+            Lesson(slug=f'bench-{tag}-{n}', title=f'Lesson {n}', description='Everyday English ' * 8,
+                   lesson_type='beginner', content_type='vocabulary', order=n)
+            for n in range(rows)
+        ])
+        KidsLesson.objects.bulk_create([
+            KidsLesson(slug=f'bench-{tag}-{n}', title=f'Kids lesson {n}', lesson_type='vocabulary')
+            for n in range(rows)
+        ])
+        Achievement.objects.bulk_create([
+            Achievement(achievement_id=f'bench-{tag}-{n}', title=f'Achievement {n}', description='Keep going',
+                        icon='⭐', category=Achievement.CATEGORY_CHOICES[0][0], tier=Achievement.TIER_CHOICES[0][0],
+                        requirement_type='count', requirement_target=n + 1, requirement_metric='lessonsCompleted')
+            for n in range(rows)
+        ])
+        VideoLesson.objects.bulk_create([
+            VideoLesson(slug=f'bench-{tag}-{n}', title=f'Video {n}', description='Small talk at work ' * 6,
+                        video_url='https://example.com/video', duration=300, order=n, tags=['work', 'talk'])
+            for n in range(rows)
+        ])
+        CommonLesson.objects.bulk_create([
+            CommonLesson(slug=f'bench-{tag}-{n}', title=f'Common lesson {n}', description='Everyday grammar',
+                         category='grammar', order=n)
+            for n in range(rows)
+        ])
+        MicrolearningModule.objects.bulk_create([
+            MicrolearningModule(slug=f'bench-{tag}-{n}', title=f'Module {n}', description='Quick tip',
+                                category='quick_tip', order=n)
+            for n in range(rows)
+        ])
+        CulturalIntelligenceModule.objects.bulk_create([
+            CulturalIntelligenceModule(slug=f'bench-{tag}-{n}', title=f'Module {n}', description='Meeting customs',
+                                       category=CulturalIntelligenceModule.CATEGORY_CHOICES[0][0])
+            for n in range(rows)
+        ])
+        EmailTemplate.objects.bulk_create([
+            EmailTemplate(template_id=f'bench-{tag}-{n}', title=f'Template {n}', description='Follow up',
+                          template_type=EmailTemplate.TEMPLATE_TYPE_CHOICES[0][0], subject_template='Re: {topic}',
+                          body_template='Dear {name},\n\nThank you for meeting with me. ' * 5, order=n)
+            for n in range(rows)
+        ])
+        DictionaryEntry.objects.bulk_create([
+            DictionaryEntry(word=f'word-{tag}-{n}', definitions=['A word used in the benchmark'],
+                            examples=['Use the word in a sentence.'], category='casual')
+            for n in range(rows)
+        ])
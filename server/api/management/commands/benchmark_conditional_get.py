@@ -0,0 +1,187 @@
+"""
+Django management command to replay a synthetic client trace against the
+ETag-enabled catalog and dashboard endpoints. Simulated users poll the
+catalogs and their dashboard on each screen and keep the ETags they were
+given. Between polls they practise (a dashboard write), open templates and
+modules (view counters that the lists show), and an admin occasionally
+edits a lesson or video. The same trace runs without and with conditional
+GET. The command reports the 304 hit rate per endpoint, response bytes and
+the CPU time spent answering the polls. Changes are rolled back.
+Usage: python manage.py benchmark_conditional_get [--users 40] [--polls 4000] [--seed 3]
+"""
+
+import random
+import time
+import uuid
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.category_progress import update_category_progress_from_activity
+from api.models import (
+    Achievement, CulturalIntelligenceModule, EmailTemplate, KidsLesson, Lesson, VideoLesson,
+)
+
+# Endpoint URL name -> share of polls
+POLLS = {
+    'lessons-list': 15,
+    'kids-lessons': 10,
+    'achievements-list': 10,
+    'videos-list': 15,
+    'cultural-modules': 10,
+    'email-templates': 10,
+    'adults-dashboard': 30,
+}
+
+
+class Command(BaseCommand):
+    help = 'Replay a client trace against ETag-enabled endpoints and report 304 hit rates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=40,
+            help='Simulated users (default: 40)',
+        )
+        parser.add_argument(
+            '--polls',
+            type=int,
+            default=4000,
+            help='Catalog and dashboard requests in the trace (default: 4000)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=3,
+            help='Random seed for the trace (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['polls'] < 1:
+            raise CommandError('--users and --polls must be positive')
+
+        trace = self._trace(options['users'], options['polls'], random.Random(options['seed']))
+        self.stdout.write(
+            f'🔁 Replaying {options["polls"]} polls from {options["users"]} users '
+            f'({sum(1 for event in trace if event[0] != "poll")} writes in between)...'
+        )
+        results = {}
+        for label, enabled in (('without ETags', False), ('with ETags', True)):
+            with transaction.atomic(), override_settings(CONDITIONAL_GET=enabled):
+                results[label] = self._replay(trace, options['users'])
+                transaction.set_rollback(True)
+
+        for label, (cpu, sent, hits, polls) in results.items():
+            self.stdout.write(
+                f'  {label:<13} CPU {cpu * 1000:8.0f} ms  {sent / 1024:9.1f} KB sent  '
+                f'{sum(hits.values()) / polls * 100:5.1f}% answered with 304'
+            )
+        cpu_off, sent_off, _, _ = results['without ETags']
+        cpu_on, sent_on, hits, _ = results['with ETags']
+        for name in POLLS:
+            polled = sum(1 for event in trace if event[:2] == ('poll', name))
+            self.stdout.write(f'    {name:<18} {hits[name] / max(polled, 1) * 100:5.1f}% of {polled} polls')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {(1 - cpu_on / cpu_off) * 100:.0f}% less CPU and {(1 - sent_on / sent_off) * 100:.0f}% fewer bytes '
+            f'for the same trace (all changes rolled back)'
+        ))
+
+    def _trace(self, users, polls, rng):
+        trace = []
+        names, weights = list(POLLS), list(POLLS.values())
+        while len([event for event in trace if event[0] == 'poll']) < polls:
+            user = rng.randrange(users)
+            roll = rng.random()
+            if roll < 0.04:
+                trace.append(('practice', None, user))
+            elif roll < 0.06:
+                trace.append(('open', rng.choice(['email-template-detail', 'cultural-module-detail']), user))
+            elif roll < 0.062:
+                trace.append(('edit', rng.choice([Lesson, VideoLesson]), user))
+            else:
+                trace.append(('poll', rng.choices(names, weights)[0], user))
+        return trace
+
+    def _replay(self, trace, user_count):
+        tag = uuid.uuid4().hex[:8]
+        users = [User.objects.create_user(username=f'etag-bench-{tag}-{n}', password=None) for n in range(user_count)]
+        self._catalog(tag)
+        templates = list(EmailTemplate.objects.filter(template_id__startswith=f'bench-{tag}'))
+        modules = list(CulturalIntelligenceModule.objects.filter(slug__startswith=f'bench-{tag}'))
+        client = APIClient(HTTP_HOST='localhost')
+        etags = {}
+        hits = Counter()
+        cpu = 0.0
+        sent = polls = 0
+        rng = random.Random(0)
+
+        for kind, what, index in trace:
+            user = users[index]
+            client.force_authenticate(user=user)
+            if kind == 'practice':
+                update_category_progress_from_activity(user, 'adults_beginner', points=5, score=80, lessons=1)
+            elif kind == 'open':
+                if what == 'email-template-detail':
+                    client.get(reverse(what, args=[rng.choice(templates).id]))
+                else:
+                    client.get(reverse(what, args=[rng.choice(modules).slug]))
+            elif kind == 'edit':
+                row = what.objects.filter(slug__startswith=f'bench-{tag}').order_by('?').first()
+                row.title = f'{row.title} (edited)'
+                row.save()
+            else:
+                headers = {}
+                if (index, what) in etags:
+                    headers['HTTP_IF_NONE_MATCH'] = etags[(index, what)]
+                started = time.process_time()
+                response = client.get(reverse(what), **headers)
+                cpu += time.process_time() - started
+                polls += 1
+                sent += len(response.content)
+                if response.status_code == 304:
+                    hits[what] += 1
+                elif response.status_code != 200:
+                    raise CommandError(f'{what} returned {response.status_code}')
+                if response.has_header('ETag'):
+                    etags[(index, what)] = response['ETag']
+        return cpu, sent, hits, polls
+
+    def _catalog(self, tag):
+        Lesson.objects.bulk_create([
+            Lesson(slug=f'bench-{tag}-{n}', title=f'Lesson {n}', description='Everyday English ' * 8,
+                   lesson_type='beginner', content_type='vocabulary', order=n, payload={'steps': list(range(20))})
+            for n in range(100)
+        ])
+        KidsLesson.objects.bulk_create([
+            KidsLesson(slug=f'bench-{tag}-{n}', title=f'Kids lesson {n}', lesson_type='vocabulary')
+            for n in range(40)
+        ])
+        Achievement.objects.bulk_create([
+            Achievement(achievement_id=f'bench-{tag}-{n}', title=f'Achievement {n}', description='Keep going',
+                        icon='⭐', category=Achievement.CATEGORY_CHOICES[0][0], tier=Achievement.TIER_CHOICES[0][0],
+                        requirement_type='count', requirement_target=n + 1, requirement_metric='lessonsCompleted')
+            for n in range(60)
+        ])
+        VideoLesson.objects.bulk_create([
+            VideoLesson(slug=f'bench-{tag}-{n}', title=f'Video {n}', description='Small talk at work ' * 6,
+                        video_url='https://example.com/video', duration=300, order=n, tags=['work', 'talk'])
+            for n in range(50)
+        ])
+        CulturalIntelligenceModule.objects.bulk_create([
+            CulturalIntelligenceModule(slug=f'bench-{tag}-{n}', title=f'Module {n}', description='Meeting customs',
+                                       category=CulturalIntelligenceModule.CATEGORY_CHOICES[0][0],
+                                       content={'dos': ['Be on time'] * 10, 'donts': ['Interrupt'] * 10})
+            for n in range(30)
+        ])
+        EmailTemplate.objects.bulk_create([
+            EmailTemplate(template_id=f'bench-{tag}-{n}', title=f'Template {n}', description='Follow up',
+                          template_type=EmailTemplate.TEMPLATE_TYPE_CHOICES[0][0], subject_template='Re: {topic}',
+                          body_template='Dear {name},\n\nThank you for meeting with me. ' * 5, order=n)
+            for n in range(30)
+        ])
@@ -0,0 +1,63 @@
+"""
+Django management command to measure the CPU cost of building a Gemini game payload
+Times api.gemini.build_game_payload for every game type, both for an opening
+turn (no user input) and for a follow-up turn with conversation history.
+Logging stays as configured, so log formatting and writes are included.
+Usage: python manage.py benchmark_game_prompts [--iterations 2000]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import gemini
+
+GAME_TYPES = (
+    'tongue-twister', 'word-chain', 'story-telling', 'pronunciation-challenge',
+    'conversation-practice', 'debate-club', 'critical-thinking', 'research-challenge',
+    'presentation-master', 'ethics-discussion', 'innovation-lab', 'leadership-challenge',
+)
+
+HISTORY = [
+    {'role': 'assistant', 'content': 'Ready for a fun challenge? Here is your tongue twister: Red bug, red bug!'},
+    {'role': 'user', 'content': 'Red bug red bug red bug'},
+    {'role': 'assistant', 'content': 'Wow! You said that so clearly! Great job! Want another one?'},
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request CPU time of building kids Gemini game prompts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Payloads built per scenario (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if iterations < 1:
+            raise CommandError('--iterations must be positive')
+
+        scenarios = (
+            ('opening turn', [
+                {'gameType': game_type, 'context': {'age': age, 'level': 'beginner'}}
+                for game_type in GAME_TYPES for age in (5, 7, 10)
+            ]),
+            ('follow-up turn', [
+                {'gameType': game_type, 'userInput': 'Yes please, another one!', 'conversationHistory': HISTORY,
+                 'context': {'age': age, 'level': 'intermediate'}}
+                for game_type in GAME_TYPES for age in (5, 7, 10)
+            ]),
+        )
+        self.stdout.write(f'⏱️  Building {iterations} payloads per scenario...')
+        for label, requests in scenarios:
+            started = time.process_time()
+            for i in range(iterations):
+                gemini.build_game_payload(requests[i % len(requests)])
+            elapsed = time.process_time() - started
+            self.stdout.write(f'  {label:<15} {elapsed / iterations * 1e6:9.1f} µs CPU per request')
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
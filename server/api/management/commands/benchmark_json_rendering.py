@@ -0,0 +1,142 @@
+"""
+Django management command to compare DRF's stdlib JSON renderer and parser
+with the orjson-backed pair in api/renderers.py on real response bodies.
+sync_changes, admin_analytics and kids_story_words are called against rows
+created inside a transaction that is rolled back; each response is then
+rendered and parsed with both backends, which must produce the same JSON.
+Usage: python manage.py benchmark_json_rendering [--scale 1] [--repeat 50]
+"""
+
+import io
+import json
+import statistics
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import renderers, views
+from api.models import (
+    KidsAchievement, Lesson, LessonProgress, PracticeSession, StoryEnrollment, StoryWord, VocabularyWord,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark stdlib vs orjson rendering and parsing of API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=1,
+            help='Multiplier for the number of rows behind each response (default: 1)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Renders and parses per backend; the median is reported (default: 50)',
+        )
+
+    def handle(self, *args, **options):
+        scale, repeat = options['scale'], options['repeat']
+        if scale < 1 or repeat < 1:
+            raise CommandError('--scale and --repeat must be positive')
+        if not renderers.available():
+            self.stdout.write(self.style.WARNING('⚠️  orjson is not installed; both backends use the stdlib'))
+
+        factory = APIRequestFactory(HTTP_HOST='localhost')
+        with transaction.atomic():
+            learner, admin = self._fixtures(scale)
+            cases = [
+                ('sync_changes', views.sync_changes, learner, '/api/sync/changes'),
+                ('admin_analytics', views.admin_analytics, admin, '/api/admin/analytics?days=365'),
+                ('kids_story_words', views.kids_story_words, learner, '/api/kids/stories/words'),
+            ]
+            bodies = []
+            for label, view, user, path in cases:
+                request = factory.get(path)
+                force_authenticate(request, user=user)
+                response = view(request)
+                if response.status_code != 200:
+                    raise CommandError(f'{label} returned {response.status_code}')
+                bodies.append((label, response.data))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'⏱️  Rendering and parsing each response {repeat} times...')
+        for label, data in bodies:
+            stdlib_bytes = JSONRenderer().render(data)
+            fast_bytes = renderers.ORJSONRenderer().render(data)
+            if json.loads(stdlib_bytes) != json.loads(fast_bytes):
+                raise CommandError(f'{label}: the backends rendered different JSON')
+
+            render_std = self._median(lambda: JSONRenderer().render(data), repeat)
+            render_fast = self._median(lambda: renderers.ORJSONRenderer().render(data), repeat)
+            parse_std = self._median(lambda: JSONParser().parse(io.BytesIO(stdlib_bytes)), repeat)
+            parse_fast = self._median(lambda: renderers.ORJSONParser().parse(io.BytesIO(stdlib_bytes)), repeat)
+            self.stdout.write(
+                f'  {label:<17} {len(stdlib_bytes) / 1024:8.1f} KB  '
+                f'render {render_std:7.2f} -> {render_fast:6.2f} ms ({render_std / render_fast:4.1f}x)  '
+                f'parse {parse_std:7.2f} -> {parse_fast:6.2f} ms ({parse_std / parse_fast:4.1f}x)'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete (all changes rolled back)'))
+
+    def _median(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    def _fixtures(self, scale):
+        tag = uuid.uuid4().hex[:8]
+        learner = User.objects.create_user(username=f'json-bench-{tag}', password=None)
+        admin = User.objects.create_user(username=f'json-bench-admin-{tag}', password=None, is_staff=True)
+
+        lessons = Lesson.objects.bulk_create([
+            Lesson(slug=f'json-bench-{tag}-{n}', title=f'Lesson {n}', lesson_type='beginner',
+                   content_type=['vocabulary', 'pronunciation', 'grammar'][n % 3], order=n)
+            for n in range(50 * scale)
+        ])
+        LessonProgress.objects.bulk_create([
+            LessonProgress(user=learner, lesson=lesson, completed=n % 2 == 0, score=60 + n % 40,
+                           time_spent_minutes=n % 30, attempts=1 + n % 4, pronunciation_score=71.5,
+                           details={'answers': [n % 4 for _ in range(10)]})
+            for n, lesson in enumerate(lessons)
+        ])
+        PracticeSession.objects.bulk_create([
+            PracticeSession(user=learner, session_type='pronunciation', duration_minutes=5 + n % 20,
+                            score=50 + n % 50, points_earned=n % 30, words_practiced=n % 15,
+                            details={'target_text': 'She sells sea shells by the seashore', 'attempt': n})
+            for n in range(300 * scale)
+        ])
+        VocabularyWord.objects.bulk_create([
+            VocabularyWord(user=learner, word=f'word{n}', definition='A word met while practising',
+                           example_sentence='I used the word in a sentence today.', mastery_level=n % 100,
+                           times_practiced=n % 12, category='travel')
+            for n in range(500 * scale)
+        ])
+        KidsAchievement.objects.bulk_create([
+            KidsAchievement(user=learner, name=f'Achievement {n}', icon='⭐', progress=n * 5 % 100)
+            for n in range(20)
+        ])
+
+        stories = [f'json-bench-{tag}-story-{n}' for n in range(30 * scale)]
+        StoryEnrollment.objects.bulk_create([
+            StoryEnrollment(user=learner, story_id=story, story_title=f'Story {n}', story_type='forest',
+                            completed=True, words_extracted=True, score=90)
+            for n, story in enumerate(stories)
+        ])
+        StoryWord.objects.bulk_create([
+            StoryWord(story_id=story, story_title='Magic Forest', word=f'leaf{n}', hint='It falls from a tree',
+                      emoji='🍃', difficulty='easy', category='nature')
+            for story in stories for n in range(40)
+        ])
+        return learner, admin
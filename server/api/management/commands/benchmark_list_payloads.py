@@ -0,0 +1,176 @@
+"""
+Django management command to measure what sparse fieldsets save on the list
+endpoints that carry large JSON columns. Each endpoint is requested with its
+heavy fields asked for explicitly (the old response) and with its default or
+sparse field set, and the command reports response bytes, view time and the
+bytes of JSON columns the list no longer reads from the database. Rows are
+created inside a transaction that is rolled back.
+Usage: python manage.py benchmark_list_payloads [--rows 200] [--turns 20] [--runs 3]
+"""
+
+import json
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import views
+from api.models import (
+    CommonLesson, KidsGameSession, KidsLesson, Lesson, MicrolearningModule, TeenGameSession,
+)
+from api.serializers import (
+    CommonLessonSerializer, KidsGameSessionSerializer, KidsLessonSerializer, LessonSerializer,
+    MicrolearningModuleSerializer, TeenGameSessionSerializer,
+)
+
+
+def _exercises(count, index):
+    return {
+        'intro': f'Lesson {index} introduction. ' * 10,
+        'exercises': [
+            {
+                'id': n,
+                'prompt': f'Read the sentence and choose the best word for gap {n}.',
+                'options': ['however', 'therefore', 'meanwhile', 'although'],
+                'answer': n % 4,
+                'explanation': 'Linking words join two ideas and show how they relate. ' * 3,
+            }
+            for n in range(count)
+        ],
+    }
+
+
+def _conversation(turns):
+    history = []
+    for n in range(turns):
+        history.append({'role': 'assistant', 'content': f'Round {n}: can you describe your favourite place to visit and why?'})
+        history.append({'role': 'user', 'content': 'I like the beach because the water is calm and I can swim with my family.'})
+    return {'conversationHistory': history, 'feedback': 'Great sentences, try using more describing words.'}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark response and column bytes saved by sparse list fieldsets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=200,
+            help='Rows per list endpoint (default: 200)',
+        )
+        parser.add_argument(
+            '--turns',
+            type=int,
+            default=20,
+            help='Conversation turns stored per game session (default: 20)',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Requests per variant; the fastest is reported (default: 3)',
+        )
+
+    def handle(self, *args, **options):
+        rows, turns, runs = options['rows'], options['turns'], options['runs']
+        if rows < 1 or turns < 1 or runs < 1:
+            raise CommandError('--rows, --turns and --runs must be positive')
+
+        factory = APIRequestFactory(HTTP_HOST='localhost')
+        tag = uuid.uuid4().hex[:8]
+        self.stdout.write(f'📦 Comparing full and sparse list responses over {rows} rows each...')
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'payload-bench-{tag}', password=None)
+            self._create_rows(user, tag, rows, turns)
+
+            def full(serializer):
+                return 'fields=' + ','.join(serializer.Meta.fields)
+
+            cases = [
+                ('lessons', views.lessons_list, Lesson, LessonSerializer,
+                 f'type=kids_4_10&{full(LessonSerializer)}', 'type=kids_4_10'),
+                ('kids/lessons', views.kids_lessons, KidsLesson, KidsLessonSerializer, full(KidsLessonSerializer), ''),
+                ('adults/common-lessons', views.adults_common_lessons, CommonLesson, CommonLessonSerializer,
+                 full(CommonLessonSerializer), ''),
+                ('adults/microlearning', views.adults_microlearning_modules, MicrolearningModule,
+                 MicrolearningModuleSerializer, full(MicrolearningModuleSerializer), ''),
+                ('kids/games/session', views.kids_game_session, KidsGameSession, KidsGameSessionSerializer,
+                 f'limit={rows}&{full(KidsGameSessionSerializer)}', f'limit={rows}'),
+                ('teen/games/session', views.teen_game_session, TeenGameSession, TeenGameSessionSerializer,
+                 '', 'exclude=details'),
+            ]
+            total_full = total_sparse = total_column = 0
+            for label, view, model, serializer, full_query, sparse_query in cases:
+                full_bytes, full_ms = self._measure(factory, view, user, label, full_query, runs)
+                sparse_bytes, sparse_ms = self._measure(factory, view, user, label, sparse_query, runs)
+                column_bytes = self._column_bytes(model, serializer, user)
+                total_full += full_bytes
+                total_sparse += sparse_bytes
+                total_column += column_bytes
+                self.stdout.write(
+                    f'  {label:<22} {full_bytes / 1024:8.1f} KB -> {sparse_bytes / 1024:7.1f} KB '
+                    f'({100 * (1 - sparse_bytes / full_bytes):4.1f}% less)  '
+                    f'{full_ms:6.1f} ms -> {sparse_ms:6.1f} ms  '
+                    f'{column_bytes / 1024:8.1f} KB of {"/".join(serializer.Meta.heavy_fields)} not read'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'  total: {total_full / 1024:.1f} KB -> {total_sparse / 1024:.1f} KB on the wire, '
+            f'{total_column / 1024:.1f} KB of JSON columns left in the database'
+        )
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete (all changes rolled back)'))
+
+    def _create_rows(self, user, tag, rows, turns):
+        Lesson.objects.bulk_create([
+            Lesson(slug=f'bench-{tag}-{n}', title=f'Lesson {n}', description='Linking words in context',
+                   lesson_type='kids_4_10', content_type='vocabulary', order=n, payload=_exercises(30, n))
+            for n in range(rows)
+        ])
+        KidsLesson.objects.bulk_create([
+            KidsLesson(slug=f'bench-{tag}-{n}', title=f'Kids lesson {n}', lesson_type='vocabulary',
+                       payload=_exercises(15, n))
+            for n in range(rows)
+        ])
+        CommonLesson.objects.bulk_create([
+            CommonLesson(slug=f'bench-{tag}-{n}', title=f'Common lesson {n}', description='Everyday grammar',
+                         category='grammar', order=n, content=_exercises(30, n))
+            for n in range(rows)
+        ])
+        MicrolearningModule.objects.bulk_create([
+            MicrolearningModule(slug=f'bench-{tag}-{n}', title=f'Module {n}', description='Quick tip',
+                                category='quick_tip', order=n, content=_exercises(8, n))
+            for n in range(rows)
+        ])
+        for model in (KidsGameSession, TeenGameSession):
+            model.objects.bulk_create([
+                model(user=user, game_type='conversation', game_title=f'Chat {n}', score=80, rounds=turns,
+                      completed=True, details=_conversation(turns))
+                for n in range(rows)
+            ])
+
+    def _measure(self, factory, view, user, label, query, runs):
+        best = None
+        for _ in range(runs):
+            request = factory.get(f'/api/{label}?{query}')
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = view(request)
+            response.render()
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{label} returned {response.status_code}')
+            best = elapsed if best is None else min(best, elapsed)
+        return len(response.content), best * 1000
+
+    def _column_bytes(self, model, serializer, user):
+        queryset = model.objects.all()
+        if any(field.name == 'user' for field in model._meta.fields):
+            queryset = queryset.filter(user=user)
+        total = 0
+        for values in queryset.values_list(*serializer.Meta.heavy_fields):
+            total += sum(len(json.dumps(value)) for value in values)
+        return total
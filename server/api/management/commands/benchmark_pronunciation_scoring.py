@@ -0,0 +1,160 @@
+"""
+Django management command to measure pronunciation scoring latency on a corpus
+of synthetic recordings. Each clip is a WAV of voiced syllable bursts with
+word gaps, pauses and background noise, generated for a random sentence, so
+its true syllable count is known. Reports per-clip latency scored inline and
+through the scoring pool (including process hand-off) against a p95 target,
+plus how far detected syllable counts are from the truth.
+Usage: python manage.py benchmark_pronunciation_scoring [--clips 200] [--workers 2] [--target-p95-ms 250]
+"""
+
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api import pronunciation_scoring
+
+WORDS = [
+    'she', 'sells', 'sea', 'shells', 'by', 'the', 'seashore', 'peter', 'piper', 'picked', 'a', 'peck',
+    'of', 'pickled', 'peppers', 'how', 'much', 'wood', 'would', 'woodchuck', 'chuck', 'beautiful',
+    'important', 'meeting', 'tomorrow', 'morning', 'presentation', 'quarterly', 'results', 'please',
+    'confirm', 'availability', 'conversation', 'practice', 'every', 'day',
+]
+
+
+def synthesize(words, syllables_per_second=4.0, pause=0.0, noise=0.005, seed=0):
+    """
+    16 kHz mono samples for ``words``: one voiced burst per expected syllable,
+    a short gap after each word and ``pause`` seconds of silence between words.
+    """
+    rng = np.random.default_rng(seed)
+    rate = pronunciation_scoring.SAMPLE_RATE
+    parts = [np.zeros(int(0.4 * rate))]
+    for word in words:
+        for _ in range(pronunciation_scoring.count_syllables(word)):
+            t = np.arange(int(rate / syllables_per_second)) / rate
+            f0 = rng.uniform(100, 240)
+            harmonics = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+            parts.append(0.3 * np.hanning(len(t)) ** 0.8 * harmonics)
+        parts.append(np.zeros(int(rng.uniform(0.03, 0.08) * rate)))
+        if pause:
+            parts.append(np.zeros(int(pause * rate)))
+    parts.append(np.zeros(int(0.4 * rate)))
+    samples = np.concatenate(parts)
+    return (samples + noise * rng.standard_normal(len(samples))).astype(np.float32)
+
+
+def write_wav(path, samples):
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(pronunciation_scoring.SAMPLE_RATE)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+
+
+def _percentile_ms(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Benchmark pronunciation scoring latency on synthetic recordings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clips',
+            type=int,
+            default=200,
+            help='Number of synthetic clips (default: 200)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Scoring processes (default: 2)',
+        )
+        parser.add_argument(
+            '--target-p95-ms',
+            type=float,
+            default=250.0,
+            help='p95 latency per clip to pass, in ms (default: 250)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=7,
+            help='Random seed for the corpus (default: 7)',
+        )
+
+    def handle(self, *args, **options):
+        if options['clips'] < 1 or options['workers'] < 1:
+            raise CommandError('--clips and --workers must be positive')
+
+        rng = random.Random(options['seed'])
+        corpus_dir = tempfile.mkdtemp()
+        try:
+            self.stdout.write(f'🎙️  Generating {options["clips"]} synthetic clips...')
+            corpus = []
+            seconds = 0.0
+            for index in range(options['clips']):
+                words = rng.choices(WORDS, k=rng.randint(2, 15))
+                samples = synthesize(
+                    words,
+                    syllables_per_second=rng.uniform(2.5, 7.0),
+                    pause=rng.choice([0.0, 0.0, 0.2, 0.5]),
+                    noise=rng.choice([0.001, 0.005, 0.02]),
+                    seed=index,
+                )
+                path = os.path.join(corpus_dir, f'clip{index}.wav')
+                write_wav(path, samples)
+                corpus.append((path, ' '.join(words)))
+                seconds += len(samples) / pronunciation_scoring.SAMPLE_RATE
+            self.stdout.write(f'  {seconds:.0f} s of audio, {seconds / len(corpus):.1f} s per clip on average')
+
+            inline, errors = [], []
+            for path, text in corpus:
+                started = time.perf_counter()
+                result = pronunciation_scoring.score_file(path, text)
+                inline.append(time.perf_counter() - started)
+                metrics = result['metrics']
+                errors.append(abs(metrics['detected_syllables'] - metrics['expected_syllables']) / metrics['expected_syllables'])
+            self._report('inline', inline)
+
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+                # Warm the workers up so process start and NumPy import are not counted
+                list(pool.map(pronunciation_scoring.score_file, *zip(*corpus[:options['workers']])))
+
+                pooled = []
+                for path, text in corpus:
+                    started = time.perf_counter()
+                    pool.submit(pronunciation_scoring.score_file, path, text).result()
+                    pooled.append(time.perf_counter() - started)
+                self._report('pool', pooled)
+
+                started = time.perf_counter()
+                list(pool.map(pronunciation_scoring.score_file, *zip(*corpus)))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'  throughput with {options["workers"]} workers: {len(corpus) / elapsed:.0f} clips/s')
+        finally:
+            shutil.rmtree(corpus_dir)
+
+        self.stdout.write(f'  syllable count error: {np.mean(errors) * 100:.1f}% mean, {np.max(errors) * 100:.1f}% worst')
+        p95 = _percentile_ms(pooled, 95)
+        if p95 <= options['target_p95_ms']:
+            self.stdout.write(self.style.SUCCESS(f'✅ p95 {p95:.1f} ms is within the {options["target_p95_ms"]:.0f} ms target'))
+        else:
+            self.stdout.write(self.style.ERROR(f'❌ p95 {p95:.1f} ms is over the {options["target_p95_ms"]:.0f} ms target'))
+
+    def _report(self, label, latencies):
+        self.stdout.write(
+            f'  {label:<7} p50 {_percentile_ms(latencies, 50):7.1f} ms  '
+            f'p95 {_percentile_ms(latencies, 95):7.1f} ms  max {max(latencies) * 1000:7.1f} ms'
+        )
@@ -0,0 +1,92 @@
+"""
+Django management command to compare replaying an offline queue one operation
+at a time through sync/upsert against a single sync/upsert/batch request
+Runs against the configured database inside a transaction that is rolled back.
+Usage: python manage.py benchmark_sync_upsert [--operations 500]
+"""
+
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Lesson
+from api.views import idempotent_upsert, idempotent_upsert_batch
+
+
+class Command(BaseCommand):
+    help = 'Benchmark individual vs batched offline sync upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=500,
+            help='Number of queued operations to replay (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        count = options['operations']
+        if count < 1 or count > 500:
+            raise CommandError('--operations must be between 1 and 500')
+
+        self.factory = APIRequestFactory()
+        self.stdout.write(f'⏱️  Replaying {count} queued operations...')
+        for label, runner in (('individual', self._run_individual), ('batched', self._run_batched)):
+            with transaction.atomic():
+                user, operations = self._fixtures(count)
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    runner(user, operations)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f'  {label:<10} {elapsed * 1000:9.1f} ms  {len(queries.captured_queries):6d} queries'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete (all changes rolled back)'))
+
+    def _fixtures(self, count):
+        suffix = uuid.uuid4().hex[:12]
+        user = User.objects.create_user(username=f'sync-bench-{suffix}', password=None)
+        lessons = [
+            Lesson.objects.create(
+                slug=f'sync-bench-{suffix}-{i}',
+                title=f'Sync benchmark {i}',
+                lesson_type='beginner',
+                content_type='vocabulary',
+            )
+            for i in range(10)
+        ]
+        operations = []
+        for i in range(count):
+            if i % 3 == 0:
+                operation = {'entity_type': 'PracticeSession', 'operation': 'create',
+                             'data': {'session_type': 'vocabulary', 'duration_minutes': 5, 'score': 75}}
+            elif i % 3 == 1:
+                operation = {'entity_type': 'VocabularyWord', 'operation': 'create',
+                             'data': {'word': f'word{i}', 'definition': 'benchmark'}}
+            else:
+                operation = {'entity_type': 'LessonProgress', 'operation': 'update',
+                             'data': {'lesson': lessons[i % 10].id, 'score': i % 100, 'completed': i % 2 == 0}}
+            operation['idempotency_key'] = f'bench-{suffix}-{i}'
+            operations.append(operation)
+        return user, operations
+
+    def _run_individual(self, user, operations):
+        for operation in operations:
+            payload = {k: v for k, v in operation.items() if k != 'idempotency_key'}
+            request = self.factory.post(
+                '/api/sync/upsert', payload, format='json', HTTP_IDEMPOTENCY_KEY=operation['idempotency_key']
+            )
+            force_authenticate(request, user=user)
+            idempotent_upsert(request)
+
+    def _run_batched(self, user, operations):
+        request = self.factory.post('/api/sync/upsert/batch', {'operations': operations}, format='json')
+        force_authenticate(request, user=user)
+        idempotent_upsert_batch(request)
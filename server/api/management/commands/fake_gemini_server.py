@@ -0,0 +1,130 @@
+"""
+Django management command to run a stand-in for the Gemini API
+Answers generateContent with a canned game turn after a fixed delay, and
+streamGenerateContent with the same turn split into SSE chunks spread over that
+delay, so the kids game proxy can be load-tested without an API key or quota.
+Point the servers under test at it with GEMINI_API_BASE=http://127.0.0.1:<port>
+and any GEMINI_API_KEY. --fail-status/--fail-rate make a share of calls fail,
+to watch the circuit breaker trip and recover.
+Usage: python manage.py fake_gemini_server [--port 9100] [--delay 5] [--chunks 8] [--fail-status 503 --fail-rate 0.5]
+"""
+
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+CANNED_TURN = {
+    'content': 'Ready for a fun challenge? Here is your tongue twister: Red bug, red bug! Try saying it 3 times fast!',
+    'gameInstruction': 'Say this tongue twister 3 times: Red bug, red bug',
+}
+
+
+def _candidate(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]}
+
+
+def make_handler(delay, chunks=8, turn=CANNED_TURN, fail_status=503, fail_rate=0.0):
+    """
+    Request handler class answering after ``delay`` seconds (streamed in
+    ``chunks`` pieces). A ``fail_rate`` share of calls get ``fail_status``.
+    """
+    reply = json.dumps(turn)
+    failure = json.dumps({'error': {'code': fail_status, 'message': 'Injected failure'}}).encode()
+    body = json.dumps(_candidate(reply)).encode()
+    size = -(-len(reply) // chunks)
+    pieces = [reply[i:i + size] for i in range(0, len(reply), size)]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if fail_rate and random.random() < fail_rate:
+                time.sleep(delay)
+                self._reply(fail_status, failure)
+                return
+            if ':streamGenerateContent' in self.path:
+                self._stream()
+                return
+            time.sleep(delay)
+            self._reply(200, body)
+
+        def _reply(self, code, content):
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for piece in pieces:
+                time.sleep(delay / len(pieces))
+                event = f'data: {json.dumps(_candidate(piece))}\r\n\r\n'.encode()
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(event), event))
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = 'Serve a slow fake Gemini API for load tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=9100,
+            help='Port to listen on (default: 9100)',
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=5.0,
+            help='Seconds each reply takes to generate (default: 5)',
+        )
+        parser.add_argument(
+            '--chunks',
+            type=int,
+            default=8,
+            help='Pieces a streamed reply is split into (default: 8)',
+        )
+        parser.add_argument(
+            '--fail-status',
+            type=int,
+            default=503,
+            help='Status returned by injected failures (default: 503)',
+        )
+        parser.add_argument(
+            '--fail-rate',
+            type=float,
+            default=0.0,
+            help='Share of calls, 0-1, that fail with --fail-status (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        delay = options['delay']
+        handler = make_handler(
+            delay, max(options['chunks'], 1), fail_status=options['fail_status'], fail_rate=options['fail_rate']
+        )
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), handler)
+        server.daemon_threads = True
+        self.stdout.write(self.style.SUCCESS(
+            f'🤖 Fake Gemini listening on http://127.0.0.1:{options["port"]} ({delay}s per response)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
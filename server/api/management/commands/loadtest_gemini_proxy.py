@@ -0,0 +1,104 @@
+"""
+Django management command to check that slow AI game turns do not starve the rest of the API
+Measures throughput of an unrelated endpoint on its own, then again while
+simulated players keep the kids Gemini game endpoint busy. Run it against a
+deployment whose Gemini calls go to fake_gemini_server.
+Usage: python manage.py loadtest_gemini_proxy --game-url http://127.0.0.1/api/kids/gemini/game
+       --probe-url http://127.0.0.1/api/health [--players 40] [--duration 20]
+"""
+
+import asyncio
+import statistics
+import time
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Load-test the Gemini game proxy and report throughput of an unrelated endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--game-url', required=True, help='URL of the kids Gemini game endpoint')
+        parser.add_argument('--probe-url', required=True, help='URL of an unrelated endpoint to measure')
+        parser.add_argument(
+            '--players',
+            type=int,
+            default=40,
+            help='Concurrent players sending game turns (default: 40)',
+        )
+        parser.add_argument(
+            '--probe-concurrency',
+            type=int,
+            default=4,
+            help='Concurrent clients hitting the probe endpoint (default: 4)',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=20.0,
+            help='Seconds to run each phase (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        if options['players'] < 1 or options['probe_concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--players, --probe-concurrency and --duration must be positive')
+
+        baseline = asyncio.run(self._phase(options, players=0))
+        loaded = asyncio.run(self._phase(options, players=options['players']))
+
+        self.stdout.write(f'📊 Probe {options["probe_url"]}')
+        self._report('idle', baseline, options['duration'])
+        self._report(f'{options["players"]} players', loaded, options['duration'])
+        games = loaded['games']
+        self.stdout.write(
+            f'  game turns: {games["ok"]} ok, {games["failed"]} failed '
+            f'({games["ok"] / options["duration"]:.1f}/s)'
+        )
+        if baseline['latencies'] and loaded['latencies']:
+            ratio = len(loaded['latencies']) / len(baseline['latencies'])
+            if ratio >= 0.8:
+                self.stdout.write(self.style.SUCCESS(f'✅ Probe throughput under load: {ratio:.0%} of idle'))
+            else:
+                self.stdout.write(self.style.WARNING(f'⚠️  Probe throughput under load: {ratio:.0%} of idle'))
+
+    def _report(self, label, result, duration):
+        latencies = result['latencies']
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f'  {label:<14} no successful probe requests ({result["errors"]} errors)'))
+            return
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 20 else max(latencies)
+        self.stdout.write(
+            f'  {label:<14} {len(latencies) / duration:8.1f} req/s  '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  '
+            f'{result["errors"]} errors'
+        )
+
+    async def _phase(self, options, players):
+        deadline = time.monotonic() + options['duration']
+        result = {'latencies': [], 'errors': 0, 'games': {'ok': 0, 'failed': 0}}
+        limits = httpx.Limits(max_connections=players + options['probe_concurrency'])
+        async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+            async def probe():
+                while time.monotonic() < deadline:
+                    started = time.monotonic()
+                    try:
+                        response = await client.get(options['probe_url'])
+                        response.raise_for_status()
+                        result['latencies'].append(time.monotonic() - started)
+                    except httpx.HTTPError:
+                        result['errors'] += 1
+
+            async def play(player):
+                turn = {'gameType': 'tongue-twister', 'userInput': '', 'context': {'age': 7, 'level': 'beginner'}}
+                while time.monotonic() < deadline:
+                    try:
+                        response = await client.post(options['game_url'], json=turn)
+                        result['games']['ok' if response.status_code == 200 else 'failed'] += 1
+                    except httpx.HTTPError:
+                        result['games']['failed'] += 1
+
+            tasks = [probe() for _ in range(options['probe_concurrency'])]
+            tasks += [play(player) for player in range(players)]
+            await asyncio.gather(*tasks)
+        return result
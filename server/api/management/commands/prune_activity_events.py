@@ -0,0 +1,70 @@
+"""
+Django management command to enforce retention on the ActivityEvent log
+Practice sessions dominate the log, so they get a shorter window than
+registrations and lesson completions. Schedule this daily.
+Usage: python manage.py prune_activity_events [--days 90] [--practice-days 30] [--dry-run]
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.activity_log import prune_events
+from api.models import ActivityEvent
+
+
+class Command(BaseCommand):
+    help = 'Delete ActivityEvent rows older than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Keep events from the last N days (default: 90)',
+        )
+        parser.add_argument(
+            '--practice-days',
+            type=int,
+            default=30,
+            help='Keep practice session events from the last N days (default: 30)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many events would be deleted without deleting them',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['practice_days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days, --practice-days and --batch-size must be positive')
+
+        now = timezone.now()
+        windows = [
+            (now - timedelta(days=options['practice_days']), [ActivityEvent.PRACTICE_SESSION]),
+            (now - timedelta(days=options['days']), None),
+        ]
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No events will be deleted'))
+            expired = ActivityEvent.objects.none()
+            for before, verbs in windows:
+                qs = ActivityEvent.objects.filter(timestamp__lt=before)
+                if verbs:
+                    qs = qs.filter(verb__in=verbs)
+                expired = expired | qs
+            self.stdout.write(f'  Would delete {expired.count()} events')
+            return
+
+        deleted = 0
+        for before, verbs in windows:
+            deleted += prune_events(before, verbs=verbs, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Deleted {deleted} expired activity events'))
@@ -0,0 +1,51 @@
+"""
+Django management command to drop old delete tombstones from the sync change log
+Clients whose cursor is older than a pruned tombstone get 410 from sync/changes
+and resync from after_seq=0. Schedule this daily.
+Usage: python manage.py prune_sync_tombstones [--days 90] [--dry-run]
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.models import SyncChange
+from api.sync_log import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Delete sync change log tombstones older than the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Keep tombstones from the last N days (default: 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many tombstones would be deleted without deleting them',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be positive')
+
+        before = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No tombstones will be deleted'))
+            expired = SyncChange.objects.filter(op=SyncChange.DELETE, changed_at__lt=before).count()
+            self.stdout.write(f'  Would delete {expired} tombstones')
+            return
+
+        deleted = prune_tombstones(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Deleted {deleted} sync tombstones'))
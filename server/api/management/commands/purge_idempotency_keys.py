@@ -0,0 +1,43 @@
+"""
+Django management command to delete expired sync idempotency keys
+Keys are kept for SYNC_IDEMPOTENCY_TTL seconds (24 hours by default) so offline
+clients can safely retry; schedule this hourly or daily.
+Usage: python manage.py purge_idempotency_keys [--batch-size 5000] [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.idempotency import purge_expired
+from api.models import SyncIdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete SyncIdempotencyKey rows whose TTL has passed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per statement (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many keys would be deleted without deleting them',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        now = timezone.now()
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No keys will be deleted'))
+            expired = SyncIdempotencyKey.objects.filter(expires_at__lte=now).count()
+            self.stdout.write(f'  Would delete {expired} expired idempotency keys')
+            return
+
+        deleted = purge_expired(batch_size=options['batch_size'], now=now)
+        self.stdout.write(self.style.SUCCESS(f'✅ Deleted {deleted} expired idempotency keys'))
@@ -0,0 +1,72 @@
+"""
+Django management command to recompute CategoryProgress from the source tables
+Activity endpoints keep CategoryProgress current with small deltas; run this after
+deploying, after bulk imports, or periodically to correct any drift.
+Usage: python manage.py reconcile_category_progress [--user ID] [--category young_kids]
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.category_progress import (
+    ALL_CATEGORIES, CATEGORY_PROGRESS_DEFAULTS, sync_category_progress,
+)
+from api.models import CategoryProgress
+
+
+class Command(BaseCommand):
+    help = 'Recompute CategoryProgress rows from lessons, practice and game tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only reconcile this user ID (can be repeated)',
+        )
+        parser.add_argument(
+            '--category',
+            action='append',
+            dest='categories',
+            choices=ALL_CATEGORIES,
+            help='Only reconcile this category (can be repeated)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which users would be reconciled without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        categories = options['categories'] or ALL_CATEGORIES
+        dry_run = options['dry_run']
+
+        users = User.objects.all().order_by('id')
+        if options['user_ids']:
+            users = users.filter(id__in=options['user_ids'])
+            if not users.exists():
+                raise CommandError('No matching users found')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No records will be written'))
+
+        reconciled = 0
+        for user in users.iterator():
+            if dry_run:
+                self.stdout.write(f'  Would reconcile {user.username} (ID: {user.id}): {", ".join(categories)}')
+                reconciled += 1
+                continue
+
+            with transaction.atomic():
+                for category in categories:
+                    category_progress, _ = CategoryProgress.objects.select_for_update().get_or_create(
+                        user=user,
+                        category=category,
+                        defaults=CATEGORY_PROGRESS_DEFAULTS,
+                    )
+                    sync_category_progress(user, category, category_progress)
+            reconciled += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Reconciled CategoryProgress for {reconciled} users'))
@@ -0,0 +1,64 @@
+"""
+Django management command to fill the pools of cached kids game opening turns
+Purges expired and used-up openings, then asks Gemini for openings until each
+selected game/age band/level/opening line pool holds GEMINI_OPENING_POOL_SIZE.
+Run it after a deploy or from cron so first turns are served from the pool.
+Usage: python manage.py refill_game_openings [--game word-chain] [--level beginner] [--dry-run]
+"""
+
+from decouple import config
+from django.core.management.base import BaseCommand, CommandError
+
+from api import game_prompts, opening_cache
+
+
+class Command(BaseCommand):
+    help = 'Purge stale cached game openings and refill the pools from Gemini'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--game',
+            action='append',
+            choices=sorted(game_prompts.INITIAL_PROMPTS),
+            help='Game type to fill (repeatable; default: all games)',
+        )
+        parser.add_argument(
+            '--level',
+            action='append',
+            choices=opening_cache.LEVELS,
+            help='Level to fill (repeatable; default: all levels)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show the pools that would be filled without calling Gemini',
+        )
+
+    def handle(self, *args, **options):
+        games = options['game'] or sorted(game_prompts.INITIAL_PROMPTS)
+        levels = options['level'] or opening_cache.LEVELS
+        openings = [
+            opening_cache.Opening(game_type, group, level, variant, age)
+            for game_type in games
+            for group, age in opening_cache.BAND_AGES.items()
+            for level in levels
+            for variant in range(len(game_prompts.INITIAL_PROMPTS[game_type]))
+        ]
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - Gemini will not be called'))
+            self.stdout.write(
+                f'  Would fill {len(openings)} pools of up to {opening_cache.pool_size()} openings each'
+            )
+            return
+
+        api_key = config('GEMINI_API_KEY', default=None)
+        if not api_key:
+            raise CommandError('GEMINI_API_KEY is not configured')
+
+        purged = opening_cache.purge()
+        self.stdout.write(f'🧹 Purged {purged} stale openings')
+        added = 0
+        for opening in openings:
+            added += opening_cache.refill(opening, api_key)
+        self.stdout.write(self.style.SUCCESS(f'✅ Added {added} openings across {len(openings)} pools'))
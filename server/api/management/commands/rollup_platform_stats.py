@@ -0,0 +1,80 @@
+"""
+Django management command to backfill and close DailyPlatformStats rollups
+Writes keep today's rows current incrementally; systemd_elora_rollup.timer runs this
+nightly (the default re-closes yesterday). Migration 0042 backfills history; --all
+rebuilds it again.
+Usage: python manage.py rollup_platform_stats [--days 2] [--start 2025-01-01 --end 2025-01-31] [--all]
+"""
+
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from api.models import PracticeSession
+from api.platform_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute DailyPlatformStats rows from raw sessions, registrations and completions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Number of finished days before today to recompute (default: 1, i.e. yesterday)',
+        )
+        parser.add_argument('--start', help='First day to recompute (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to recompute (YYYY-MM-DD, defaults to yesterday)')
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Backfill every day since the first registration or practice session',
+        )
+        parser.add_argument(
+            '--include-today',
+            action='store_true',
+            help='Also recompute today (left open so incremental updates continue)',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+
+        try:
+            end = date.fromisoformat(options['end']) if options['end'] else yesterday
+            if options['start']:
+                start = date.fromisoformat(options['start'])
+            elif options['all']:
+                start = self._first_activity_date() or yesterday
+            else:
+                start = today - timedelta(days=max(1, options['days']))
+        except ValueError as exc:
+            raise CommandError(f'Invalid date: {exc}')
+
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        self.stdout.write(f'📊 Rolling up platform stats from {start} to {end}...')
+        day = start
+        closed = 0
+        while day <= end:
+            totals = rebuild_daily_stats(day, close=day < today)
+            closed += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {day}: {totals['sessions']} sessions, {totals['registrations']} registrations")
+            day += timedelta(days=1)
+
+        if options['include_today'] and end < today:
+            rebuild_daily_stats(today, close=False)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {closed} days of platform stats'))
+
+    def _first_activity_date(self):
+        first_session = PracticeSession.objects.aggregate(first=Min('session_date'))['first']
+        first_user = User.objects.aggregate(first=Min('date_joined'))['first']
+        candidates = [timezone.localdate(value) for value in (first_session, first_user) if value]
+        return min(candidates) if candidates else None
@@ -0,0 +1,103 @@
+"""
+Django management command that drains the transactional email outbox
+Runs until stopped (see systemd_elora_mailer.service). It claims due emails in
+batches and sends them over one mail connection, which stays open while there
+is work and is closed when the outbox is idle. Failed emails are retried with
+exponential backoff. Sent emails older than --keep-days are deleted hourly.
+Usage: python manage.py send_outbox_emails [--batch-size 50] [--poll-interval 5] [--once] [--dry-run]
+"""
+
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api import email_outbox
+
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class Command(BaseCommand):
+    help = 'Send queued transactional emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Emails claimed per batch (default: 50)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait when the outbox is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=30,
+            help='Days to keep sent emails before deleting them (default: 30)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send everything that is due, then exit',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many emails are due without sending them',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('DRY RUN MODE - No emails will be sent'))
+            self.stdout.write(f'  {email_outbox.due_count()} emails are due')
+            return
+
+        self.stopping = threading.Event()
+        if not options['once']:
+            signal.signal(signal.SIGTERM, lambda *_: self.stopping.set())
+            signal.signal(signal.SIGINT, lambda *_: self.stopping.set())
+            self.stdout.write(f'📬 Outbox worker started (backend: {settings.EMAIL_BACKEND})')
+
+        connection = get_connection(timeout=getattr(settings, 'EMAIL_TIMEOUT', None))
+        total_sent = total_failed = 0
+        next_purge = 0
+        try:
+            while not self.stopping.is_set():
+                if time.monotonic() >= next_purge:
+                    before = timezone.now() - timedelta(days=options['keep_days'])
+                    purged = email_outbox.purge_sent(before)
+                    if purged:
+                        self.stdout.write(f'🧹 Deleted {purged} sent emails older than {options["keep_days"]} days')
+                    next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+
+                emails = email_outbox.claim_due(options['batch_size'])
+                if emails:
+                    sent, failed = email_outbox.deliver(emails, connection)
+                    total_sent += sent
+                    total_failed += failed
+                    self.stdout.write(f'  Sent {sent}, failed {failed}')
+                    continue
+
+                # Idle: let the mail server's session go rather than have it time out under us
+                connection.close()
+                if options['once']:
+                    break
+                close_old_connections()
+                self.stopping.wait(options['poll_interval'])
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Outbox worker done: {total_sent} sent, {total_failed} failed'))
@@ -0,0 +1,167 @@
+"""
+Media and static file delivery with byte ranges and conditional GETs.
+
+``serve`` replaces ``django.views.static.serve`` in crud/urls.py. It answers:
+
+* ``If-None-Match``/``If-Modified-Since`` with 304, using an ETag built from
+  the file's mtime and size.
+* ``Range: bytes=`` with 206 and just that slice, so players can seek in long
+  videos. Unsatisfiable ranges get 416, and a stale ``If-Range`` gets the
+  whole file.
+* Everything else with a ``FileResponse`` read in 64 KB blocks. gunicorn sends
+  these with sendfile(2) when its file wrapper is available.
+
+When ``MEDIA_ACCEL_REDIRECT`` names an nginx ``internal`` location, media
+responses carry only headers plus ``X-Accel-Redirect``. nginx then sends the
+bytes itself, including ranges, and no worker is held.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+BLOCK_SIZE = 64 * 1024
+CACHE_CONTROL = 'public, max-age=86400'
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _FileSlice:
+    """Read-only view of ``length`` bytes of an open file from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # Lets gunicorn sendfile() the slice: it starts at the current offset for Content-Length bytes
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _content_type(path):
+    content_type, encoding = mimetypes.guess_type(path)
+    # Keep compressed files compressed instead of letting browsers unpack them
+    return {
+        'bzip2': 'application/x-bzip',
+        'gzip': 'application/gzip',
+        'xz': 'application/x-xz',
+    }.get(encoding, content_type or 'application/octet-stream')
+
+
+def etag_for(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single ``bytes=`` range, None to serve
+    the whole file, or ``False`` when the range cannot be satisfied.
+    Multiple ranges are answered with the whole file.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        return False
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, etag, mtime):
+    validator = request.META.get('HTTP_IF_RANGE')
+    if not validator:
+        return True
+    if validator.startswith(('"', 'W/')):
+        return validator == etag
+    return parse_http_date_safe(validator) == mtime
+
+
+def _set_validators(response, etag, mtime):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    response['Cache-Control'] = CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def serve(request, path, document_root, accel_redirect=None):
+    """Serve ``path`` under ``document_root``; ``accel_redirect`` is the nginx internal location prefix."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(document_root, path)
+        stat = os.stat(fullpath)
+    except (SuspiciousFileOperation, ValueError, OSError):
+        raise Http404('File not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('File not found')
+
+    etag = etag_for(stat)
+    mtime = int(stat.st_mtime)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if not_modified is not None:
+        return _set_validators(not_modified, etag, mtime)
+
+    content_type = _content_type(fullpath)
+    if accel_redirect:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_redirect.rstrip('/') + '/' + quote(path)
+        return _set_validators(response, etag, mtime)
+
+    size = stat.st_size
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and _if_range_matches(request, etag, mtime):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return _set_validators(response, etag, mtime)
+
+    start, end = byte_range or (0, size - 1)
+    if request.method == 'HEAD':
+        response = HttpResponse(status=206 if byte_range else 200, content_type=content_type)
+    else:
+        file = open(fullpath, 'rb')
+        file.seek(start)
+        response = FileResponse(
+            _FileSlice(file, end - start + 1) if byte_range else file,
+            status=206 if byte_range else 200,
+            content_type=content_type,
+        )
+        response.block_size = BLOCK_SIZE
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return _set_validators(response, etag, mtime)
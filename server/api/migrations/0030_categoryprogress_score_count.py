@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def copy_total_scores(apps, schema_editor):
+    """Move the running score count out of details so it can be updated atomically."""
+    CategoryProgress = apps.get_model('api', 'CategoryProgress')
+    for progress in CategoryProgress.objects.exclude(details={}).iterator():
+        details = progress.details if isinstance(progress.details, dict) else {}
+        total_scores = details.get('total_scores')
+        if total_scores:
+            progress.score_count = int(total_scores)
+            progress.save(update_fields=['score_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_dictionaryentry_tamil_translations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoryprogress',
+            name='score_count',
+            field=models.IntegerField(default=0, help_text='Number of scores folded into average_score'),
+        ),
+        migrations.RunPython(copy_total_scores, migrations.RunPython.noop),
+    ]
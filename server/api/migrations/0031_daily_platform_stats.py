@@ -0,0 +1,46 @@
+# Generated by Django 4.2.24 on 2026-10-17 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0030_categoryprogress_score_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPlatformStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('session_type', models.CharField(blank=True, default='', max_length=20)),
+                ('sessions', models.IntegerField(default=0)),
+                ('practice_minutes', models.IntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0.0)),
+                ('score_count', models.IntegerField(default=0)),
+                ('high_score_sessions', models.IntegerField(default=0, help_text='Sessions scoring 80 or more')),
+                ('medium_score_sessions', models.IntegerField(default=0, help_text='Sessions scoring 60 to 79')),
+                ('low_score_sessions', models.IntegerField(default=0, help_text='Sessions scoring below 60')),
+                ('active_users', models.IntegerField(default=0, help_text='Distinct users who practiced')),
+                ('registrations', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('is_closed', models.BooleanField(default=False, help_text='Recomputed from raw tables after the day ended')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Platform Stats',
+                'verbose_name_plural': 'Daily Platform Stats',
+                'ordering': ['date', 'session_type'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='practicesession',
+            index=models.Index(fields=['session_date'], name='api_practic_session_0c9324_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailyplatformstats',
+            unique_together={('date', 'session_type')},
+        ),
+    ]
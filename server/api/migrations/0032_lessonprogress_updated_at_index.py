@@ -0,0 +1,24 @@
+# Generated by Django 4.2.24 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0031_daily_platform_stats'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(fields=['updated_at'], name='api_lessonp_updated_79ce0f_idx'),
+        ),
+        # auth_user has no date_joined index; the admin activity feed pages
+        # through registrations newest first on (date_joined, id).
+        migrations.RunSQL(
+            sql="CREATE INDEX `api_auth_user_date_joined_idx` ON `auth_user` (`date_joined`, `id`);",
+            reverse_sql="DROP INDEX `api_auth_user_date_joined_idx` ON `auth_user`;"
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.24 on 2026-10-17 07:22
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+BACKFILL_DAYS = 30
+
+
+def backfill_recent_events(apps, schema_editor):
+    """Seed the log with the last month of activity so the feeds are not empty after deploy."""
+    ActivityEvent = apps.get_model('api', 'ActivityEvent')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    LessonProgress = apps.get_model('api', 'LessonProgress')
+    PracticeSession = apps.get_model('api', 'PracticeSession')
+    since = django.utils.timezone.now() - timedelta(days=BACKFILL_DAYS)
+
+    events = []
+    for user_id, username, joined in User.objects.filter(date_joined__gte=since).values_list(
+        'id', 'username', 'date_joined'
+    ).iterator():
+        events.append(ActivityEvent(
+            actor_id=user_id, actor_name=username, verb='user_registered', object_type='user',
+            object_id=user_id, title=f'New user registered: {username}', timestamp=joined,
+        ))
+    for progress_id, user_id, username, lesson_title, updated in LessonProgress.objects.filter(
+        completed=True, updated_at__gte=since
+    ).values_list('id', 'user_id', 'user__username', 'lesson__title', 'updated_at').iterator():
+        events.append(ActivityEvent(
+            actor_id=user_id, actor_name=username, verb='lesson_completed', object_type='lessonprogress',
+            object_id=progress_id, title=f'{username} completed {lesson_title}'[:255], timestamp=updated,
+        ))
+    for session_id, user_id, username, session_type, minutes, started in PracticeSession.objects.filter(
+        session_date__gte=since
+    ).values_list('id', 'user_id', 'user__username', 'session_type', 'duration_minutes', 'session_date').iterator():
+        events.append(ActivityEvent(
+            actor_id=user_id, actor_name=username, verb='practice_session', object_type='practicesession',
+            object_id=session_id, title=f'{username} practiced {session_type} ({minutes}m)', timestamp=started,
+        ))
+
+    events.sort(key=lambda event: event.timestamp)
+    ActivityEvent.objects.bulk_create(events, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0032_lessonprogress_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('actor_name', models.CharField(max_length=150)),
+                ('verb', models.CharField(choices=[('user_registered', 'User Registered'), ('lesson_completed', 'Lesson Completed'), ('practice_session', 'Practice Session')], max_length=30)),
+                ('object_type', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-timestamp', '-id'],
+                'indexes': [models.Index(fields=['timestamp', 'id'], name='api_activit_timesta_1ef29f_idx'), models.Index(fields=['verb', 'timestamp'], name='api_activit_verb_4a8137_idx'), models.Index(fields=['actor', 'timestamp'], name='api_activit_actor_i_ade07d_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_recent_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.24 on 2026-10-17 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_sync_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='practicesession',
+            name='sync_key',
+            field=models.CharField(blank=True, help_text='Idempotency key of the offline batch operation that created this session', max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='practicesession',
+            constraint=models.UniqueConstraint(fields=('user', 'sync_key'), name='unique_practice_session_sync_key'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.24 on 2026-10-17 07:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_sync_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpstreamCircuit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('state', models.CharField(choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half Open')], default='closed', max_length=10)),
+                ('opened_at', models.DateTimeField(blank=True, null=True)),
+                ('window_started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('window_requests', models.PositiveIntegerField(default=0)),
+                ('window_failures', models.PositiveIntegerField(default=0)),
+                ('total_successes', models.PositiveBigIntegerField(default=0)),
+                ('total_failures', models.PositiveBigIntegerField(default=0)),
+                ('total_rejected', models.PositiveBigIntegerField(default=0)),
+                ('total_opened', models.PositiveIntegerField(default=0, help_text='Times the circuit has tripped open')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UpstreamLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acquired_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('circuit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leases', to='api.upstreamcircuit')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['circuit', 'expires_at'], name='api_upstrea_circuit_390bfb_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.24 on 2026-10-17 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0037_upstream_circuit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameOpening',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_type', models.CharField(max_length=50)),
+                ('age_group', models.CharField(max_length=50)),
+                ('level', models.CharField(max_length=20)),
+                ('variant', models.PositiveSmallIntegerField(help_text='Index into game_prompts.INITIAL_PROMPTS[game_type]')),
+                ('turn', models.JSONField(help_text='Parsed reply, as returned to the game UI')),
+                ('serves', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game_type', 'age_group', 'level', 'variant', 'expires_at'], name='api_gameope_game_ty_713608_idx'), models.Index(fields=['expires_at'], name='api_gameope_expires_d252f2_idx')],
+            },
+        ),
+    ]
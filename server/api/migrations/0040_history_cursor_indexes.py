@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-17 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0039_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kidsfavorite',
+            index=models.Index(fields=['user', 'created_at'], name='api_kidsfav_user_id_149f7a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonprogress',
+            index=models.Index(fields=['user', 'created_at'], name='api_lessonp_user_id_a8e3bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userdictionary',
+            index=models.Index(fields=['user', 'added_at'], name='api_userdic_user_id_9b81f5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vocabularyword',
+            index=models.Index(fields=['user', 'first_learned'], name='api_vocabul_user_id_70fe67_idx'),
+        ),
+    ]
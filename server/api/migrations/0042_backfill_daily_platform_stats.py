@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Min
+from django.utils import timezone
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Roll up every day of existing history so the admin dashboards do not start from zero."""
+    from api.platform_stats import rebuild_daily_stats
+
+    PracticeSession = apps.get_model('api', 'PracticeSession')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    first_session = PracticeSession.objects.aggregate(first=Min('session_date'))['first']
+    first_user = User.objects.aggregate(first=Min('date_joined'))['first']
+    candidates = [timezone.localdate(value) for value in (first_session, first_user) if value]
+    if not candidates:
+        return
+
+    today = timezone.localdate()
+    day = min(candidates)
+    while day <= today:
+        # Today stays open so incremental updates continue
+        rebuild_daily_stats(day, close=day < today)
+        day += timedelta(days=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0041_content_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
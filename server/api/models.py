@@ -3,6 +3,7 @@ from django.db.models import Q
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 import secrets
 from datetime import timedelta
 from django.utils import timezone
@@ -186,6 +187,8 @@ class LessonProgress(models.Model):
         indexes = [
             models.Index(fields=['user', 'completed']),
             models.Index(fields=['last_attempt']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['user', 'created_at']),
         ]
 
     def __str__(self):
@@ -219,12 +222,17 @@ class PracticeSession(models.Model):
     
     details = models.JSONField(default=dict)  # Session-specific data
     session_date = models.DateTimeField(auto_now_add=True)
+    sync_key = models.CharField(max_length=255, null=True, blank=True, help_text="Idempotency key of the offline batch operation that created this session")
 
     class Meta:
         ordering = ['-session_date']
         indexes = [
             models.Index(fields=['user', 'session_date']),
             models.Index(fields=['session_type']),
+            models.Index(fields=['session_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sync_key'], name='unique_practice_session_sync_key'),
         ]
 
     def __str__(self):
@@ -256,6 +264,7 @@ class VocabularyWord(models.Model):
         indexes = [
             models.Index(fields=['user', 'mastery_level']),
             models.Index(fields=['last_practiced']),
+            models.Index(fields=['user', 'first_learned']),
         ]
 
     def __str__(self):
@@ -495,6 +504,7 @@ class KidsFavorite(models.Model):
         unique_together = ("user", "story_id")
         indexes = [
             models.Index(fields=['user']),
+            models.Index(fields=['user', 'created_at']),
         ]
 
     def __str__(self):
@@ -1051,6 +1061,7 @@ class CategoryProgress(models.Model):
     lessons_completed = models.IntegerField(default=0)
     practice_time_minutes = models.IntegerField(default=0)
     average_score = models.FloatField(default=0.0)
+    score_count = models.IntegerField(default=0, help_text="Number of scores folded into average_score")
     
     # Engagement
     last_activity = models.DateTimeField(null=True, blank=True)
@@ -1093,10 +1104,8 @@ class CategoryProgress(models.Model):
         
         # Update average score
         if score > 0:
-            total_scores = self.details.get('total_scores', 0) + 1
-            current_avg = self.average_score
-            self.average_score = ((current_avg * (total_scores - 1)) + score) / total_scores
-            self.details['total_scores'] = total_scores
+            self.score_count += 1
+            self.average_score = ((self.average_score * (self.score_count - 1)) + score) / self.score_count
         
         # Update last activity
         from django.utils import timezone
@@ -1781,6 +1790,7 @@ class UserDictionary(models.Model):
         indexes = [
             models.Index(fields=['user', 'mastery_level']),
             models.Index(fields=['user', 'last_reviewed']),
+            models.Index(fields=['user', 'added_at']),
         ]
         verbose_name = "User Dictionary Entry"
         verbose_name_plural = "User Dictionary Entries"
@@ -2237,4 +2247,306 @@ class SearchHistory(models.Model):
     
     def __str__(self):
         user_str = self.user.username if self.user else "Anonymous"
-        return f"{user_str} - {self.query} - {self.searched_at.date()}"
\ No newline at end of file
+        return f"{user_str} - {self.query} - {self.searched_at.date()}"
+
+# ============= Admin Analytics Rollups =============
+class DailyPlatformStats(models.Model):
+    """
+    Pre-aggregated platform activity per day and practice session type.
+
+    Rows with an empty ``session_type`` hold the day totals, including
+    registrations and lesson completions. Rows are bumped as activity is
+    recorded and recomputed exactly by the ``rollup_platform_stats`` command,
+    which marks finished days as closed.
+    """
+    ALL_TYPES = ''
+
+    date = models.DateField()
+    session_type = models.CharField(max_length=20, blank=True, default='')
+
+    sessions = models.IntegerField(default=0)
+    practice_minutes = models.IntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_count = models.IntegerField(default=0)
+    high_score_sessions = models.IntegerField(default=0, help_text="Sessions scoring 80 or more")
+    medium_score_sessions = models.IntegerField(default=0, help_text="Sessions scoring 60 to 79")
+    low_score_sessions = models.IntegerField(default=0, help_text="Sessions scoring below 60")
+    active_users = models.IntegerField(default=0, help_text="Distinct users who practiced")
+
+    # Day totals only (session_type == '')
+    registrations = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+
+    is_closed = models.BooleanField(default=False, help_text="Recomputed from raw tables after the day ended")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['date', 'session_type']
+        ordering = ['date', 'session_type']
+        verbose_name = "Daily Platform Stats"
+        verbose_name_plural = "Daily Platform Stats"
+
+    def __str__(self):
+        return f"{self.date} {self.session_type or 'all'} ({self.sessions} sessions)"
+
+    @property
+    def avg_score(self):
+        return self.score_sum / self.score_count if self.score_count else 0.0
+
+
+# ============= Activity Log =============
+class ActivityEvent(models.Model):
+    """
+    Append-only log of notable user activity for the recent-activity feeds.
+
+    Rows are written once by the receivers in ``api.signals`` and never
+    updated. The actor name and title are rendered at write time so a feed
+    is read from this table alone; ``prune_activity_events`` enforces
+    retention.
+    """
+    USER_REGISTERED = 'user_registered'
+    LESSON_COMPLETED = 'lesson_completed'
+    PRACTICE_SESSION = 'practice_session'
+    VERB_CHOICES = [
+        (USER_REGISTERED, 'User Registered'),
+        (LESSON_COMPLETED, 'Lesson Completed'),
+        (PRACTICE_SESSION, 'Practice Session'),
+    ]
+
+    # Indexed through (actor, timestamp) below
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_events', db_index=False)
+    actor_name = models.CharField(max_length=150)
+    verb = models.CharField(max_length=30, choices=VERB_CHOICES)
+    object_type = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-timestamp', '-id']
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+            models.Index(fields=['verb', 'timestamp']),
+            models.Index(fields=['actor', 'timestamp']),
+        ]
+
+    def __str__(self):
+        return f"{self.timestamp:%Y-%m-%d %H:%M} {self.verb}: {self.title}"
+
+
+# ============= Offline Sync =============
+class SyncIdempotencyKey(models.Model):
+    """
+    Durable record of an Idempotency-Key sent to ``sync/upsert``.
+
+    A request claims its key by inserting the row (unique per user), applies
+    the change and stores the response in the same transaction, so retries
+    landing on any worker replay the stored response. Expired rows are removed
+    by ``purge_idempotency_keys``.
+    """
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+    STATE_CHOICES = [
+        (IN_PROGRESS, 'In Progress'),
+        (COMPLETED, 'Completed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64, help_text="SHA-256 of the request body")
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=IN_PROGRESS)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ['user', 'key']
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.state})"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class SyncState(models.Model):
+    """Per-user high-water mark of the change log sequence."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='sync_state')
+    last_seq = models.PositiveBigIntegerField(default=0)
+    pruned_seq = models.PositiveBigIntegerField(default=0, help_text="Tombstones at or below this sequence have been pruned")
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.last_seq}"
+
+
+class SyncChange(models.Model):
+    """
+    Latest change to one synced entity of a user, ordered by a per-user sequence.
+
+    Each entity keeps a single row that moves to a new ``seq`` whenever it
+    changes, so ``sync/changes?after_seq=`` returns every entity at most once.
+    Deleted entities stay as ``delete`` tombstones until
+    ``prune_sync_tombstones`` removes them.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OP_CHOICES = [
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_changes', db_index=False)
+    seq = models.PositiveBigIntegerField()
+    entity = models.CharField(max_length=50)
+    entity_id = models.PositiveBigIntegerField()
+    op = models.CharField(max_length=10, choices=OP_CHOICES, default=UPSERT)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'seq'], name='unique_sync_change_seq'),
+            models.UniqueConstraint(fields=['user', 'entity', 'entity_id'], name='unique_sync_change_entity'),
+        ]
+        indexes = [
+            models.Index(fields=['op', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}#{self.seq} {self.op} {self.entity}:{self.entity_id}"
+
+
+class UpstreamCircuit(models.Model):
+    """
+    Circuit breaker state for an external dependency, shared by every worker.
+
+    ``api.circuit_breaker`` locks this row to admit or reject a call, and to
+    record its outcome. The window counters feed the failure-rate check. The
+    ``total_*`` counters only grow and are exposed for monitoring.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    STATE_CHOICES = [
+        (CLOSED, 'Closed'),
+        (OPEN, 'Open'),
+        (HALF_OPEN, 'Half Open'),
+    ]
+
+    name = models.CharField(max_length=50, unique=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=CLOSED)
+    opened_at = models.DateTimeField(null=True, blank=True)
+    window_started_at = models.DateTimeField(default=timezone.now)
+    window_requests = models.PositiveIntegerField(default=0)
+    window_failures = models.PositiveIntegerField(default=0)
+    total_successes = models.PositiveBigIntegerField(default=0)
+    total_failures = models.PositiveBigIntegerField(default=0)
+    total_rejected = models.PositiveBigIntegerField(default=0)
+    total_opened = models.PositiveIntegerField(default=0, help_text="Times the circuit has tripped open")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.state})"
+
+
+class UpstreamLease(models.Model):
+    """One call in flight to an upstream; expired leases are left by workers that died mid-call."""
+    circuit = models.ForeignKey(UpstreamCircuit, on_delete=models.CASCADE, related_name='leases')
+    acquired_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['circuit', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.circuit_id} until {self.expires_at}"
+
+
+class GameOpening(models.Model):
+    """
+    A ready-made opening turn of a kids Gemini game, served by ``api.opening_cache``.
+
+    Openings are pooled by game, age band, level and which canned opening line
+    the child "said". An opening is dropped once it expires or has been served
+    ``GEMINI_OPENING_MAX_SERVES`` times.
+    """
+    game_type = models.CharField(max_length=50)
+    age_group = models.CharField(max_length=50)
+    level = models.CharField(max_length=20)
+    variant = models.PositiveSmallIntegerField(help_text="Index into game_prompts.INITIAL_PROMPTS[game_type]")
+    turn = models.JSONField(help_text="Parsed reply, as returned to the game UI")
+    serves = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['game_type', 'age_group', 'level', 'variant', 'expires_at']),
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.game_type}/{self.age_group}/{self.level}#{self.variant} ({self.serves} serves)"
+
+
+class EmailOutbox(models.Model):
+    """
+    A transactional email waiting for the ``send_outbox_emails`` worker.
+
+    Rows are written in the same transaction as the change that triggers the
+    email, so a rolled-back registration never sends one. The worker claims
+    due rows, sends them over one reused connection and retries failures
+    with exponential backoff until ``EMAIL_OUTBOX_MAX_ATTEMPTS``.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, blank=True, help_text="What the email is for, e.g. 'verification'")
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind or 'email'} to {self.to_email} ({self.status})"
+
+
+# ============= Content Versions =============
+class ContentVersion(models.Model):
+    """
+    Change counter behind the ETags of catalog and dashboard endpoints.
+
+    ``api.content_versions`` keeps one row per catalog table and one per user
+    (covering that user's dashboard data). Model signals bump the counter in the
+    same transaction as the write, so a committed change always changes the ETag.
+    """
+    key = models.CharField(max_length=100, unique=True, help_text="'table:<app.model>' or 'user:<id>'")
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
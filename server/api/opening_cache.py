@@ -0,0 +1,185 @@
+"""
+Pools of ready-made opening turns for the kids Gemini games.
+
+An opening turn has no conversation history and no user input. The child's
+line is one of a handful of canned ones in ``game_prompts.INITIAL_PROMPTS``,
+so the reply only depends on the game, the age band, the level and which
+line was picked. ``lookup`` serves one of up to ``GEMINI_OPENING_POOL_SIZE``
+cached replies for that key instead of calling Gemini.
+
+Openings are stored in GameOpening, so every worker shares the pools. Each
+one is served at most ``GEMINI_OPENING_MAX_SERVES`` times and only for
+``GEMINI_OPENING_TTL`` seconds, so children keep seeing fresh, varied
+openings. When a pool is short, ``schedule_refill`` asks Gemini for more on a
+background thread. The ``refill_game_openings`` command fills pools ahead of
+time and purges expired openings.
+"""
+import logging
+import random
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from decouple import config
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import circuit_breaker, game_prompts, gemini
+from .models import GameOpening
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_MAX_SERVES = 20
+LEVELS = ('beginner', 'intermediate', 'advanced')
+# Age used to fill an age band's pools ahead of time (see refill_game_openings)
+BAND_AGES = {group: upper or 10 for upper, group, _ in game_prompts.AGE_BANDS}
+
+Opening = namedtuple('Opening', ['game_type', 'age_group', 'level', 'variant', 'age'])
+
+_refills = ThreadPoolExecutor(max_workers=1, thread_name_prefix='opening-refill')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, 'GEMINI_OPENING_CACHE', True)
+
+
+def pool_size():
+    return getattr(settings, 'GEMINI_OPENING_POOL_SIZE', DEFAULT_POOL_SIZE)
+
+
+def _max_serves():
+    return getattr(settings, 'GEMINI_OPENING_MAX_SERVES', DEFAULT_MAX_SERVES)
+
+
+def _key(opening):
+    return opening[:4]
+
+
+def _pool(opening):
+    game_type, age_group, level, variant = _key(opening)
+    return GameOpening.objects.filter(game_type=game_type, age_group=age_group, level=level, variant=variant)
+
+
+def _live(qs, now):
+    return qs.filter(expires_at__gt=now, serves__lt=_max_serves())
+
+
+def opening_for(data):
+    """
+    The ``Opening`` a game request asks for, or None when it is not a cacheable
+    opening turn. The canned line is picked here, like ``build_game_payload``
+    would pick it.
+    """
+    if not enabled() or data.get('userInput') or data.get('conversationHistory'):
+        return None
+    game_type = data.get('gameType', 'interactive')
+    context = data.get('context') or {}
+    age = context.get('age', 7)
+    level = context.get('level', 'beginner')
+    if game_type not in game_prompts.INITIAL_PROMPTS or level not in LEVELS:
+        return None
+    if not isinstance(age, int) or isinstance(age, bool):
+        return None
+    variant = random.randrange(len(game_prompts.INITIAL_PROMPTS[game_type]))
+    return Opening(game_type, game_prompts.age_group(age), level, variant, age)
+
+
+def request_data(data, opening):
+    """``data`` with the opening's canned line as the child's input, for ``build_game_payload``."""
+    return {**data, 'userInput': game_prompts.INITIAL_PROMPTS[opening.game_type][opening.variant]}
+
+
+def lookup(opening):
+    """A cached reply for ``opening``, or None on a miss. Short pools are refilled in the background."""
+    now = timezone.now()
+    candidates = list(_live(_pool(opening), now).values_list('pk', 'turn', 'serves'))
+    random.shuffle(candidates)
+    for pk, turn, serves in candidates:
+        # Another worker may have served the last use of this opening meanwhile
+        if GameOpening.objects.filter(pk=pk, serves__lt=_max_serves()).update(serves=F('serves') + 1):
+            if len(candidates) < pool_size() or serves + 1 >= _max_serves():
+                schedule_refill(opening)
+            return turn
+    return None
+
+
+def store(opening, turn):
+    """Add ``turn`` to the opening's pool unless it is already full."""
+    now = timezone.now()
+    if _live(_pool(opening), now).count() >= pool_size():
+        return False
+    game_type, age_group, level, variant = _key(opening)
+    ttl = getattr(settings, 'GEMINI_OPENING_TTL', DEFAULT_TTL_SECONDS)
+    GameOpening.objects.create(
+        game_type=game_type,
+        age_group=age_group,
+        level=level,
+        variant=variant,
+        turn=turn,
+        expires_at=now + timedelta(seconds=ttl),
+    )
+    return True
+
+
+def refill(opening, api_key=None):
+    """
+    Call Gemini until the opening's pool is full. Returns the number added;
+    stops at the first failed call or when the circuit breaker says no.
+    """
+    api_key = api_key or config('GEMINI_API_KEY', default=None)
+    if not api_key:
+        return 0
+    _pool(opening).filter(Q(expires_at__lte=timezone.now()) | Q(serves__gte=_max_serves())).delete()
+
+    added = 0
+    payload_data = request_data({'gameType': opening.game_type, 'context': {'age': opening.age, 'level': opening.level}}, opening)
+    while _live(_pool(opening), timezone.now()).count() < pool_size():
+        try:
+            status_code, result = gemini.generate(gemini.build_game_payload(payload_data), api_key)
+        except (circuit_breaker.Rejected, requests.exceptions.RequestException) as e:
+            logger.warning(f"Opening refill for {opening.game_type} stopped: {str(e)}")
+            break
+        if status_code != 200:
+            logger.warning(f"Opening refill for {opening.game_type} got {status_code} from Gemini")
+            break
+        if not store(opening, gemini.parse_game_response(result, opening.game_type)):
+            break
+        added += 1
+    return added
+
+
+def _run_refill(opening):
+    try:
+        refill(opening)
+    except Exception as e:
+        logger.error(f"Opening refill error: {str(e)}")
+    finally:
+        with _pending_lock:
+            _pending.discard(_key(opening))
+        # The refill thread outlives requests, so nothing else closes its connection
+        connection.close()
+
+
+def schedule_refill(opening):
+    """Refill the opening's pool on the background thread, unless a refill is already queued."""
+    if not getattr(settings, 'GEMINI_OPENING_BACKGROUND_REFILL', True):
+        return
+    with _pending_lock:
+        if _key(opening) in _pending:
+            return
+        _pending.add(_key(opening))
+    _refills.submit(_run_refill, opening)
+
+
+def purge(now=None):
+    """Delete expired and used-up openings. Returns the number removed."""
+    now = now or timezone.now()
+    return GameOpening.objects.filter(Q(expires_at__lte=now) | Q(serves__gte=_max_serves())).delete()[0]
@@ -0,0 +1,135 @@
+"""
+Cursor pagination for user-history list endpoints.
+
+``paginate`` walks a queryset in keyset order. The ordering always ends in
+the primary key, so it is total, and each page is one indexed range query
+(``WHERE (a, b, id) > cursor ... LIMIT n``) however deep the client scrolls.
+The cursor is an opaque token holding the last row's ordering values.
+
+``limit`` picks the page size (``CURSOR_PAGINATION_DEFAULT_LIMIT``, capped at
+``CURSOR_PAGINATION_MAX_LIMIT``). While ``CURSOR_PAGINATION_LEGACY`` is on,
+requests that send neither ``cursor`` nor ``limit`` still get the old
+unpaginated response, so clients can move over before it is switched off.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.urls import replace_query_param
+
+CURSOR_PARAM = 'cursor'
+LIMIT_PARAM = 'limit'
+DEFAULT_LIMIT = 50
+DEFAULT_MAX_LIMIT = 200
+
+
+class InvalidCursor(ParseError):
+    default_detail = 'Invalid cursor'
+    default_code = 'invalid_cursor'
+
+
+class CursorPage:
+    """One page of ``items`` and the cursor for the page after it (None on the last page)."""
+
+    def __init__(self, request, items, next_cursor):
+        self.request = request
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def links(self):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(self.request.build_absolute_uri(), CURSOR_PARAM, self.next_cursor)
+        return {'next': next_url, 'next_cursor': self.next_cursor}
+
+    def response_data(self, results):
+        """Body for endpoints that used to return a bare list."""
+        return {'results': results, **self.links}
+
+
+def legacy_request(request):
+    params = request.query_params
+    return (
+        getattr(settings, 'CURSOR_PAGINATION_LEGACY', True)
+        and CURSOR_PARAM not in params
+        and LIMIT_PARAM not in params
+    )
+
+
+def page_limit(request):
+    default = getattr(settings, 'CURSOR_PAGINATION_DEFAULT_LIMIT', DEFAULT_LIMIT)
+    cap = getattr(settings, 'CURSOR_PAGINATION_MAX_LIMIT', DEFAULT_MAX_LIMIT)
+    try:
+        limit = int(request.query_params.get(LIMIT_PARAM, default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, cap))
+
+
+def _ordering(queryset, ordering):
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    pk = queryset.model._meta.pk.name
+    if fields[-1][0] not in (pk, 'pk'):
+        # Break ties on the primary key, in the direction of the last field
+        fields.append((pk, fields[-1][1]))
+    return fields
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, model, fields):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
+    except (binascii.Error, ValueError, TypeError, ValidationError):
+        raise InvalidCursor()
+
+
+def _after(fields, values):
+    """Rows that sort strictly after ``values``: (a > x) OR (a = x AND b > y) OR ..."""
+    condition = Q()
+    for index, (name, descending) in enumerate(fields):
+        step = {earlier: value for (earlier, _), value in zip(fields[:index], values[:index])}
+        step[f'{name}__{"lt" if descending else "gt"}'] = values[index]
+        condition |= Q(**step)
+    return condition
+
+
+def _cursor_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def paginate(request, queryset, ordering):
+    """
+    The requested page of ``queryset`` in ``ordering`` (field names, ``-`` for
+    descending), or None when the request should get the legacy full list.
+    Raises ``InvalidCursor`` for a cursor this endpoint did not issue.
+    """
+    if legacy_request(request):
+        return None
+
+    fields = _ordering(queryset, ordering)
+    queryset = queryset.order_by(*[f'-{name}' if descending else name for name, descending in fields])
+    token = request.query_params.get(CURSOR_PARAM)
+    if token:
+        queryset = queryset.filter(_after(fields, decode_cursor(token, queryset.model, fields)))
+
+    limit = page_limit(request)
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([_cursor_value(getattr(last, name)) for name, _ in fields])
+    return CursorPage(request, items, next_cursor)
@@ -0,0 +1,224 @@
+"""
+Daily platform rollups for the admin dashboards.
+
+PracticeSession, User and LessonProgress writes bump the matching
+DailyPlatformStats rows through the receivers in ``api.signals``. The admin
+endpoints then read a handful of rollup rows per day instead of rescanning
+the raw tables. ``rebuild_daily_stats`` recomputes a day exactly and is used
+by the ``rollup_platform_stats`` command to backfill and close past days.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import DailyPlatformStats, LessonProgress, PracticeSession
+
+logger = logging.getLogger(__name__)
+
+ALL_TYPES = DailyPlatformStats.ALL_TYPES
+
+
+def day_bounds(day):
+    """Return the aware [start, end) datetimes covering a local calendar day."""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def range_start(day):
+    """Aware datetime at the start of ``day``; lets range filters use the session_date index."""
+    return day_bounds(day)[0]
+
+
+def _score_bucket(score):
+    if score is None:
+        return None
+    if score >= 80:
+        return 'high_score_sessions'
+    if score >= 60:
+        return 'medium_score_sessions'
+    return 'low_score_sessions'
+
+
+def _bump(day, session_type, **deltas):
+    """Add ``deltas`` to one rollup row with a single UPDATE, inserting it on first use."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    updates['updated_at'] = timezone.now()
+    rows = DailyPlatformStats.objects.filter(date=day, session_type=session_type).update(**updates)
+    if rows:
+        return
+    try:
+        with transaction.atomic():
+            DailyPlatformStats.objects.create(date=day, session_type=session_type, **deltas)
+    except IntegrityError:
+        DailyPlatformStats.objects.filter(date=day, session_type=session_type).update(**updates)
+
+
+# ============= Incremental maintenance =============
+def record_practice_session(session):
+    """Fold a newly created PracticeSession into its day and type rows."""
+    record_practice_sessions([session])
+
+
+def record_practice_sessions(sessions):
+    """Fold newly created PracticeSessions in with one bump per (day, session_type) row."""
+    new_ids = [session.pk for session in sessions]
+    by_user_day = defaultdict(list)
+    for session in sessions:
+        by_user_day[(session.user_id, timezone.localdate(session.session_date))].append(session)
+
+    rows = defaultdict(lambda: defaultdict(int))
+    for (user_id, day), day_sessions in by_user_day.items():
+        start, end = day_bounds(day)
+        seen_types = set(
+            PracticeSession.objects.filter(user_id=user_id, session_date__gte=start, session_date__lt=end)
+            .exclude(pk__in=new_ids)
+            .values_list('session_type', flat=True)
+            .distinct()
+        )
+        if not seen_types:
+            rows[(day, ALL_TYPES)]['active_users'] += 1
+
+        for session in day_sessions:
+            if session.session_type not in seen_types:
+                rows[(day, session.session_type)]['active_users'] += 1
+                seen_types.add(session.session_type)
+            for key in ((day, ALL_TYPES), (day, session.session_type)):
+                deltas = rows[key]
+                deltas['sessions'] += 1
+                deltas['practice_minutes'] += session.duration_minutes or 0
+                if session.score is not None:
+                    deltas['score_sum'] += session.score
+                    deltas['score_count'] += 1
+                    deltas[_score_bucket(session.score)] += 1
+
+    for (day, session_type), deltas in rows.items():
+        _bump(day, session_type, **deltas)
+
+
+def record_registration(user):
+    _bump(timezone.localdate(user.date_joined), ALL_TYPES, registrations=1)
+
+
+def record_lesson_completion(progress):
+    _bump(timezone.localdate(progress.updated_at or timezone.now()), ALL_TYPES, completions=1)
+
+
+# ============= Exact recompute =============
+def rebuild_daily_stats(day, close=True):
+    """Recompute every rollup row for ``day`` from the raw tables."""
+    start, end = day_bounds(day)
+    sessions = PracticeSession.objects.filter(session_date__gte=start, session_date__lt=end)
+    aggregates = dict(
+        sessions=Count('id'),
+        practice_minutes=Sum('duration_minutes'),
+        score_sum=Sum('score'),
+        score_count=Count('score'),
+        high_score_sessions=Count('id', filter=Q(score__gte=80)),
+        medium_score_sessions=Count('id', filter=Q(score__gte=60, score__lt=80)),
+        low_score_sessions=Count('id', filter=Q(score__lt=60)),
+        active_users=Count('user_id', distinct=True),
+    )
+
+    rows = {ALL_TYPES: sessions.aggregate(**aggregates)}
+    for row in sessions.values('session_type').annotate(**aggregates).order_by():
+        rows[row.pop('session_type')] = row
+
+    rows[ALL_TYPES]['registrations'] = User.objects.filter(date_joined__gte=start, date_joined__lt=end).count()
+    rows[ALL_TYPES]['completions'] = LessonProgress.objects.filter(
+        completed=True, updated_at__gte=start, updated_at__lt=end
+    ).count()
+
+    with transaction.atomic():
+        DailyPlatformStats.objects.filter(date=day).exclude(session_type__in=list(rows)).delete()
+        for session_type, values in rows.items():
+            values = {field: value or 0 for field, value in values.items()}
+            DailyPlatformStats.objects.update_or_create(
+                date=day,
+                session_type=session_type,
+                defaults=dict(values, is_closed=close),
+            )
+    return rows[ALL_TYPES]
+
+
+# ============= Reads =============
+def get_daily_totals(start_date, end_date):
+    """Day-total rows keyed by date for ``start_date``..``end_date`` inclusive."""
+    rows = DailyPlatformStats.objects.filter(
+        session_type=ALL_TYPES, date__gte=start_date, date__lte=end_date
+    )
+    return {row.date: row for row in rows}
+
+
+def summarize(start_date=None, end_date=None):
+    """Sum the day-total rows over a date range (open-ended when a bound is None)."""
+    qs = DailyPlatformStats.objects.filter(session_type=ALL_TYPES)
+    if start_date:
+        qs = qs.filter(date__gte=start_date)
+    if end_date:
+        qs = qs.filter(date__lte=end_date)
+    totals = qs.aggregate(
+        sessions=Sum('sessions'),
+        practice_minutes=Sum('practice_minutes'),
+        score_sum=Sum('score_sum'),
+        score_count=Sum('score_count'),
+        high_score_sessions=Sum('high_score_sessions'),
+        medium_score_sessions=Sum('medium_score_sessions'),
+        low_score_sessions=Sum('low_score_sessions'),
+        registrations=Sum('registrations'),
+        completions=Sum('completions'),
+    )
+    totals = {field: value or 0 for field, value in totals.items()}
+    totals['avg_score'] = totals['score_sum'] / totals['score_count'] if totals['score_count'] else 0.0
+    totals['avg_duration'] = totals['practice_minutes'] / totals['sessions'] if totals['sessions'] else 0.0
+    return totals
+
+
+def type_distribution(start_date=None, end_date=None):
+    """Per session_type totals over a date range, most sessions first."""
+    qs = DailyPlatformStats.objects.exclude(session_type=ALL_TYPES)
+    if start_date:
+        qs = qs.filter(date__gte=start_date)
+    if end_date:
+        qs = qs.filter(date__lte=end_date)
+    rows = qs.values('session_type').annotate(
+        count=Sum('sessions'),
+        total_time=Sum('practice_minutes'),
+        score_sum=Sum('score_sum'),
+        score_count=Sum('score_count'),
+    ).order_by('-count')
+
+    distribution = []
+    for row in rows:
+        score_count = row.pop('score_count') or 0
+        score_sum = row.pop('score_sum') or 0
+        row['avg_score'] = score_sum / score_count if score_count else None
+        row['avg_duration'] = row['total_time'] / row['count'] if row['count'] else None
+        distribution.append(row)
+    return distribution
+
+
+def monthly_registrations(start_date):
+    """Registrations per 'YYYY-MM' month from ``start_date`` onwards."""
+    counts = defaultdict(int)
+    rows = DailyPlatformStats.objects.filter(
+        session_type=ALL_TYPES, date__gte=start_date, registrations__gt=0
+    ).values_list('date', 'registrations')
+    for day, registrations in rows:
+        counts[day.strftime('%Y-%m')] += registrations
+    return counts
+
+
+def distinct_practicing_users(start_date=None):
+    """Distinct users with a practice session since ``start_date`` (index range scan on session_date)."""
+    qs = PracticeSession.objects.all()
+    if start_date:
+        qs = qs.filter(session_date__gte=range_start(start_date))
+    return qs.values('user_id').distinct().count()
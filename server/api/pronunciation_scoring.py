@@ -0,0 +1,376 @@
+"""
+Offline pronunciation scoring from the recording itself.
+
+``score_file`` decodes a recording to 16 kHz mono and measures it with NumPy:
+
+* speech vs silence from short-time energy against the clip's own noise floor,
+  and voicing from the zero-crossing rate;
+* speaking rate (expected syllables per second, from the first sound to the
+  last) and pause ratio (share of that span spent in pauses of 150 ms or more);
+* the energy envelope's dynamic range and clipping;
+* alignment: syllable nuclei (peaks of the smoothed envelope in voiced
+  frames) against the syllables expected from the target text, both in
+  count and in where they fall along the utterance.
+
+Scoring runs in a process pool (``submit``) so the CPU work happens outside
+the request thread and outside the worker's GIL. The pool uses the spawn start
+method and this module does not touch Django at import time, so workers only
+load NumPy.
+
+WAV is decoded with the standard library. Other formats (the browser's webm/ogg)
+need ``ffmpeg`` on PATH; without it they raise ``UndecodableAudio``.
+"""
+import logging
+import multiprocessing
+import re
+import shutil
+import subprocess
+import threading
+import unicodedata
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+MAX_SECONDS = 120
+DECODE_TIMEOUT_SECONDS = 20
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+MIN_PAUSE_SECONDS = 0.15
+MIN_SEGMENT_SECONDS = 0.05
+MIN_SYLLABLE_SECONDS = 0.10
+VOICED_MAX_ZCR = 0.25
+# Comfortable speaking rate, in syllables per second
+RATE_RANGE = (3.0, 5.5)
+# Acceptable share of the speech span spent pausing
+PAUSE_ALLOWANCE = 0.15
+TARGET_DYNAMIC_RANGE_DB = 25.0
+
+DEFAULT_WORKERS = 2
+DEFAULT_WAIT_SECONDS = 3.0
+
+_VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+# Words, keeping contractions such as "it's" whole
+_WORDS = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+_LATIN = re.compile(r'[a-z]')
+
+
+class UndecodableAudio(Exception):
+    """The recording could not be decoded to PCM."""
+
+
+# ============= Decoding =============
+
+def _decode_wav(path):
+    try:
+        with wave.open(path, 'rb') as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            frames = wav.readframes(min(wav.getnframes(), rate * MAX_SECONDS))
+    except (wave.Error, EOFError):
+        return None
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        # 24-bit and other layouts go through ffmpeg
+        return None
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _decode_ffmpeg(path):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise UndecodableAudio('ffmpeg is not installed')
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-nostdin', '-v', 'error', '-i', path, '-t', str(MAX_SECONDS),
+             '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-'],
+            capture_output=True, timeout=DECODE_TIMEOUT_SECONDS, check=True,
+        )
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        raise UndecodableAudio(f'ffmpeg could not decode {path}: {e}')
+    return np.frombuffer(result.stdout, dtype='<i2').astype(np.float32) / 32768, SAMPLE_RATE
+
+
+def _resample(samples, rate):
+    if rate == SAMPLE_RATE or not len(samples):
+        return samples
+    # Linear interpolation is enough for energy and zero-crossing measurements
+    positions = np.arange(0, len(samples) - 1, rate / SAMPLE_RATE)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode(path):
+    """Samples of ``path`` as float32 mono at ``SAMPLE_RATE``, at most ``MAX_SECONDS`` long."""
+    decoded = _decode_wav(path) if path.lower().endswith('.wav') else None
+    samples, rate = decoded or _decode_ffmpeg(path)
+    return _resample(samples, rate)[:SAMPLE_RATE * MAX_SECONDS]
+
+
+# ============= Text =============
+
+def count_syllables(text):
+    """
+    Rough English syllable count: vowel groups per word, less a silent final e
+    or -ed. Accents are dropped first, so "résumé" counts like "resume". Numbers
+    and words without Latin letters count as one each, and any text counts at
+    least one, so the alignment in ``analyze`` always has a slot.
+    """
+    plain = ''.join(
+        char for char in unicodedata.normalize('NFKD', text.lower()) if not unicodedata.combining(char)
+    )
+    total = 0
+    for word in _WORDS.findall(plain):
+        if word.isdigit() or not _LATIN.search(word):
+            total += 1
+            continue
+        groups = len(_VOWEL_GROUPS.findall(word))
+        silent_e = word.endswith('e') and not word.endswith(('le', 'ee', 'ye'))
+        silent_ed = word.endswith('ed') and not word.endswith(('ted', 'ded'))
+        if (silent_e or silent_ed) and groups > 1:
+            groups -= 1
+        total += max(1, groups)
+    return max(1, total)
+
+
+# ============= Signal analysis =============
+
+def _runs(mask):
+    """``(starts, ends)`` of the True runs in a boolean array (ends exclusive)."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _frame_features(samples):
+    """Per-frame energy (dB) and zero-crossing rate, from running sums over the whole clip."""
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    hop = int(SAMPLE_RATE * HOP_SECONDS)
+    if len(samples) < frame:
+        samples = np.pad(samples, (0, frame - len(samples)))
+    starts = np.arange(0, len(samples) - frame + 1, hop)
+
+    power = np.concatenate(([0.0], np.cumsum(np.square(samples, dtype=np.float64))))
+    energy = (power[starts + frame] - power[starts]) / frame
+    energy_db = 10 * np.log10(energy + 1e-10)
+
+    signs = np.signbit(samples)
+    crossings = np.concatenate(([0], np.cumsum(signs[1:] != signs[:-1])))
+    zcr = (crossings[starts + frame - 1] - crossings[starts]) / (frame - 1)
+    return energy_db, zcr
+
+
+def _close_gaps(mask, frames):
+    """Fill False runs shorter than ``frames`` that sit between True runs."""
+    starts, ends = _runs(~mask)
+    for start, end in zip(starts, ends):
+        if 0 < start and end < len(mask) and end - start < frames:
+            mask[start:end] = True
+    return mask
+
+
+def _syllable_nuclei(envelope, voiced, threshold):
+    """Frame indices of envelope peaks in voiced frames, at least MIN_SYLLABLE_SECONDS apart."""
+    inner = envelope[1:-1]
+    peaks = np.flatnonzero((inner > envelope[:-2]) & (inner >= envelope[2:])) + 1
+    peaks = peaks[voiced[peaks] & (envelope[peaks] > threshold)]
+    spacing = int(MIN_SYLLABLE_SECONDS / HOP_SECONDS)
+    kept = []
+    # Strongest first, so a weak shoulder never displaces the peak it sits on
+    for peak in peaks[np.argsort(-envelope[peaks], kind='stable')]:
+        if all(abs(peak - other) >= spacing for other in kept):
+            kept.append(peak)
+    return np.sort(np.array(kept, dtype=np.intp))
+
+
+def analyze(samples, target_text):
+    """Metrics for 16 kHz mono ``samples`` of someone reading ``target_text``."""
+    duration = len(samples) / SAMPLE_RATE
+    expected = count_syllables(target_text)
+    energy_db, zcr = _frame_features(samples)
+
+    floor = np.percentile(energy_db, 10)
+    loud = np.percentile(energy_db, 95)
+    dynamic_range = float(loud - floor)
+    threshold = floor + max(6.0, 0.3 * dynamic_range)
+    clipping = float(np.mean(np.abs(samples) >= 0.99)) if len(samples) else 0.0
+
+    speech = _close_gaps(energy_db > threshold, int(MIN_PAUSE_SECONDS / HOP_SECONDS))
+    starts, ends = _runs(speech)
+    long_enough = (ends - starts) >= int(MIN_SEGMENT_SECONDS / HOP_SECONDS)
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    metrics = {
+        'duration_seconds': round(duration, 2),
+        'expected_syllables': expected,
+        'dynamic_range_db': round(dynamic_range, 1),
+        'clipping_ratio': round(clipping, 4),
+        'speech_detected': bool(len(starts)),
+    }
+    if not len(starts):
+        return metrics
+
+    span = (ends[-1] - starts[0]) * HOP_SECONDS
+    speaking = (ends - starts).sum() * HOP_SECONDS
+    in_speech = np.zeros_like(speech)
+    for start, end in zip(starts, ends):
+        in_speech[start:end] = True
+    voiced = in_speech & (zcr < VOICED_MAX_ZCR)
+
+    envelope = np.convolve(energy_db, np.ones(5) / 5, mode='same')
+    nuclei = _syllable_nuclei(envelope, voiced, threshold)
+
+    # Where the nuclei land: split the speech span into one slot per expected
+    # syllable and count the slots that got at least one
+    slots = np.floor((nuclei - starts[0]) / max(ends[-1] - starts[0], 1) * expected).astype(np.intp)
+    covered = len(np.unique(np.clip(slots, 0, expected - 1)))
+
+    metrics.update({
+        'speech_seconds': round(float(speaking), 2),
+        'speech_span_seconds': round(float(span), 2),
+        'pause_ratio': round(float(1 - speaking / span) if span else 0.0, 3),
+        'pause_count': int(len(starts) - 1),
+        'speaking_rate': round(float(expected / span), 2) if span else 0.0,
+        'voiced_ratio': round(float(voiced.sum() / max(in_speech.sum(), 1)), 3),
+        'detected_syllables': int(len(nuclei)),
+        'syllable_coverage': round(covered / expected, 3),
+    })
+    return metrics
+
+
+def score(metrics):
+    """``(accuracy, pronunciation, fluency)`` on 0-100 from ``analyze`` metrics."""
+    if not metrics['speech_detected']:
+        return 0.0, 0.0, 0.0
+
+    expected = metrics['expected_syllables']
+    detected = metrics['detected_syllables']
+    count_match = min(detected, expected) / max(detected, expected, 1)
+    coverage = metrics['syllable_coverage']
+    accuracy = 100 * (0.6 * coverage + 0.4 * count_match)
+
+    loudness = min(1.0, metrics['dynamic_range_db'] / TARGET_DYNAMIC_RANGE_DB)
+    pronunciation = 100 * (0.5 * coverage + 0.3 * loudness + 0.2 * metrics['voiced_ratio'])
+    pronunciation -= min(30.0, metrics['clipping_ratio'] * 1000)
+
+    low, high = RATE_RANGE
+    rate = metrics['speaking_rate']
+    off_pace = max(low - rate, rate - high, 0.0)
+    fluency = 100 - min(40.0, 12 * off_pace) - min(40.0, 100 * max(0.0, metrics['pause_ratio'] - PAUSE_ALLOWANCE))
+
+    return tuple(round(float(np.clip(value, 0, 100)), 1) for value in (accuracy, pronunciation, fluency))
+
+
+def advice(metrics):
+    """``(mistakes, suggestions)`` for what the metrics show."""
+    mistakes, suggestions = [], []
+    if not metrics['speech_detected']:
+        mistakes.append("No speech was detected in the recording")
+        suggestions.append("Check your microphone and speak closer to it")
+        return mistakes, suggestions
+
+    low, high = RATE_RANGE
+    if metrics['speaking_rate'] > high:
+        mistakes.append("Speaking too fast")
+        suggestions.append("Slow down so each syllable is fully formed")
+    elif metrics['speaking_rate'] < low:
+        mistakes.append("Speaking too slowly")
+        suggestions.append("Try to keep a steady, natural pace")
+    if metrics['pause_ratio'] > PAUSE_ALLOWANCE:
+        mistakes.append(f"Long pauses ({metrics['pause_count']} breaks)")
+        suggestions.append("Practice pausing only at natural breaks in sentences")
+    if metrics['syllable_coverage'] < 0.7:
+        mistakes.append("Some syllables were dropped or run together")
+        suggestions.append("Enunciate each syllable, especially at the ends of words")
+    if metrics['dynamic_range_db'] < TARGET_DYNAMIC_RANGE_DB / 2:
+        suggestions.append("Speak a little louder or reduce background noise")
+    if metrics['clipping_ratio'] > 0.01:
+        suggestions.append("Move slightly away from the microphone; the recording is distorted")
+    return mistakes, suggestions
+
+
+def score_file(path, target_text):
+    """
+    Decode and score one recording. Runs in the pool; returns
+    ``{'scores': {...}, 'metrics': {...}, 'mistakes': [...], 'suggestions': [...]}``.
+    """
+    metrics = analyze(decode(path), target_text)
+    accuracy, pronunciation, fluency = score(metrics)
+    mistakes, suggestions = advice(metrics)
+    return {
+        'scores': {'accuracy': accuracy, 'pronunciation': pronunciation, 'fluency': fluency},
+        'metrics': metrics,
+        'mistakes': mistakes,
+        'suggestions': suggestions,
+    }
+
+
+# ============= Process pool =============
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def workers():
+    return getattr(settings, 'PRONUNCIATION_SCORING_WORKERS', DEFAULT_WORKERS)
+
+
+def wait_seconds():
+    return getattr(settings, 'PRONUNCIATION_SCORING_WAIT', DEFAULT_WAIT_SECONDS)
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: gunicorn workers run threads, and forked children could inherit held locks
+            _pool = ProcessPoolExecutor(max_workers=workers(), mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _discard(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(path, target_text):
+    """Queue ``score_file`` in the pool; returns its future, or None when scoring is disabled."""
+    if workers() < 1:
+        return None
+    pool = _executor()
+    try:
+        future = pool.submit(score_file, path, target_text)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool once
+        logger.warning("Pronunciation scoring pool was broken; restarting it")
+        _discard(pool)
+        future = _executor().submit(score_file, path, target_text)
+    future.add_done_callback(lambda done: _forget_if_broken(pool, done))
+    return future
+
+
+def _forget_if_broken(pool, future):
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        _discard(pool)
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
@@ -0,0 +1,69 @@
+"""
+orjson-backed JSON renderer and parser for the API.
+
+``ORJSONRenderer`` writes the same JSON as DRF's compact ``JSONRenderer``:
+aware UTC datetimes end in ``Z``, Decimals become numbers, UUIDs strings, and
+\\u2028/\\u2029 are escaped. orjson handles the common types natively; anything
+else (lazy translations, querysets, NumPy values, ...) goes through DRF's
+``JSONEncoder.default``. Indented output, ASCII-only output and values orjson
+rejects (integers over 64 bits, for instance) are rendered by the stdlib path.
+
+``ORJSONParser`` raises the same ``ParseError`` as ``JSONParser`` for bad
+bodies. orjson is optional: without it both classes behave exactly like the
+DRF classes they extend. ``JSON_BACKEND`` in settings chooses between them and
+DRF's own pair.
+"""
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def available():
+    return orjson is not None
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ORJSONParser(parsers.JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
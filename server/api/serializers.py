@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 import os
 from django.conf import settings
+from django.db import models
+from django.db.models import Count
 from .models import (
     UserProfile, Lesson, LessonProgress, PracticeSession,
     VocabularyWord, Achievement, UserAchievement,
@@ -27,6 +29,130 @@ from .models import (
 from django.contrib.auth.password_validation import validate_password
 
 
+# ============= Request-scoped Prefetch =============
+class PrefetchListSerializer(serializers.ListSerializer):
+    """``many=True`` serializer that calls the child's ``prefetch`` once with the whole list."""
+    
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        instances = list(iterable)
+        self.child.prefetch(instances)
+        return [self.child.to_representation(item) for item in instances]
+
+
+class PrefetchMixin:
+    """
+    Per-request prefetch map for SerializerMethodFields that would otherwise
+    query once per object. ``prefetch(instances)`` loads the values for a whole
+    list in one query (set ``list_serializer_class = PrefetchListSerializer`` so
+    ``many=True`` calls it), and ``prefetched(key, obj, load)`` reads them back,
+    calling ``load(obj)`` only for objects that were not prefetched (detail views).
+    
+    The map lives in the serializer context, which nested serializers share, so
+    a parent list can seed it for its nested serializers.
+    """
+    
+    def prefetch(self, instances):
+        pass
+    
+    def request_user(self):
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            return request.user
+        return None
+    
+    def prefetch_map(self, key):
+        return self.context.setdefault('prefetched', {}).setdefault(key, {})
+    
+    def prefetched(self, key, obj, load):
+        values = self.context.get('prefetched', {}).get(key, {})
+        if obj.pk in values:
+            return values[obj.pk]
+        return load(obj)
+    
+    def prefetch_user_rows(self, model, field, instances):
+        """Map each instance to the request user's ``model`` row pointing at it through ``field`` (or None)."""
+        user = self.request_user()
+        if user is None:
+            return
+        values = self.prefetch_map(model)
+        missing = [obj.pk for obj in instances if obj.pk not in values]
+        if not missing:
+            return
+        values.update(dict.fromkeys(missing))
+        for row in model.objects.filter(user=user, **{f'{field}__in': missing}):
+            values[getattr(row, f'{field}_id')] = row
+    
+    def seed_user_rows(self, field, rows):
+        """Record the request user's own ``rows`` as the prefetched rows for the objects they point at."""
+        user = self.request_user()
+        if user is None:
+            return
+        values = self.prefetch_map(type(self).Meta.model)
+        for row in rows:
+            if row.user_id == user.id:
+                values[getattr(row, f'{field}_id')] = row
+
+
+# ============= Sparse Fieldsets =============
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _field_names(request, param):
+    if request is None:
+        return set()
+    value = request.query_params.get(param, '')
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=a,b`` / ``?exclude=c`` for the top-level serializer of a response
+    (or each item of a ``many=True`` one); nested serializers are left alone.
+
+    ``Meta.heavy_fields`` names the large JSON columns. A serializer built with
+    ``slim=True`` (list views) leaves them out unless ``?fields=`` asks for them,
+    and ``sparse_queryset`` defers whichever of them the response will not
+    include, so the blobs are never read from the database.
+    """
+
+    def __init__(self, *args, slim=False, **kwargs):
+        self.slim = slim
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def selected_fields(cls, request, slim=False):
+        names = list(cls.Meta.fields)
+        wanted = _field_names(request, FIELDS_PARAM)
+        unwanted = _field_names(request, EXCLUDE_PARAM)
+        if wanted:
+            names = [name for name in names if name in wanted or name == 'id']
+        elif slim:
+            names = [name for name in names if name not in getattr(cls.Meta, 'heavy_fields', ())]
+        return [name for name in names if name not in unwanted]
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request, slim=False):
+        selected = cls.selected_fields(request, slim)
+        skipped = [name for name in getattr(cls.Meta, 'heavy_fields', ()) if name not in selected]
+        return queryset.defer(*skipped) if skipped else queryset
+
+    def _is_response_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self._is_response_root():
+            return fields
+        selected = set(self.selected_fields(request, self.slim))
+        return {name: field for name, field in fields.items() if name in selected}
+
+
 # ============= Authentication Serializers =============
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile data"""
@@ -177,7 +303,7 @@ class LoginSerializer(serializers.Serializer):
 
 
 # ============= Learning Content Serializers =============
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for lessons"""
     class Meta:
         model = Lesson
@@ -187,6 +313,7 @@ class LessonSerializer(serializers.ModelSerializer):
             'order', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        heavy_fields = ['payload']
 
 
 class LessonProgressSerializer(serializers.ModelSerializer):
@@ -272,7 +399,7 @@ class UserAchievementSerializer(serializers.ModelSerializer):
 
 # ============= Teen Serializers =============
 class TeenProgressSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenProgress
@@ -286,7 +413,7 @@ class TeenProgressSerializer(serializers.ModelSerializer):
 
 
 class TeenStoryProgressSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenStoryProgress
@@ -299,7 +426,7 @@ class TeenStoryProgressSerializer(serializers.ModelSerializer):
 
 
 class TeenVocabularyPracticeSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenVocabularyPractice
@@ -311,7 +438,7 @@ class TeenVocabularyPracticeSerializer(serializers.ModelSerializer):
 
 
 class TeenPronunciationPracticeSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenPronunciationPractice
@@ -323,7 +450,7 @@ class TeenPronunciationPracticeSerializer(serializers.ModelSerializer):
 
 
 class TeenFavoriteSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenFavorite
@@ -332,7 +459,7 @@ class TeenFavoriteSerializer(serializers.ModelSerializer):
 
 
 class TeenAchievementSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenAchievement
@@ -340,8 +467,8 @@ class TeenAchievementSerializer(serializers.ModelSerializer):
         read_only_fields = ['unlocked_at', 'updated_at']
 
 
-class TeenGameSessionSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+class TeenGameSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenGameSession
@@ -351,10 +478,11 @@ class TeenGameSessionSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        heavy_fields = ['details']
 
 
 class TeenCertificateSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = TeenCertificate
@@ -363,14 +491,15 @@ class TeenCertificateSerializer(serializers.ModelSerializer):
 
 
 # ============= Kids Serializers (Keep existing) =============
-class KidsLessonSerializer(serializers.ModelSerializer):
+class KidsLessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = KidsLesson
         fields = ["id", "slug", "title", "lesson_type", "payload", "is_active", "created_at", "updated_at"]
+        heavy_fields = ["payload"]
 
 
 class KidsProgressSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsProgress
@@ -378,7 +507,7 @@ class KidsProgressSerializer(serializers.ModelSerializer):
 
 
 class KidsAchievementSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsAchievement
@@ -386,7 +515,7 @@ class KidsAchievementSerializer(serializers.ModelSerializer):
 
 
 class KidsTrophySerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsTrophy
@@ -395,7 +524,7 @@ class KidsTrophySerializer(serializers.ModelSerializer):
 
 
 class KidsCertificateSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsCertificate
@@ -404,7 +533,7 @@ class KidsCertificateSerializer(serializers.ModelSerializer):
 
 # ============= Kids Story Management Serializers =============
 class StoryEnrollmentSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = StoryEnrollment
@@ -437,7 +566,7 @@ class StoryPhraseSerializer(serializers.ModelSerializer):
 
 
 class KidsFavoriteSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsFavorite
@@ -446,7 +575,7 @@ class KidsFavoriteSerializer(serializers.ModelSerializer):
 
 
 class KidsVocabularyPracticeSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsVocabularyPractice
@@ -458,7 +587,7 @@ class KidsVocabularyPracticeSerializer(serializers.ModelSerializer):
 
 
 class KidsPronunciationPracticeSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsPronunciationPractice
@@ -469,8 +598,8 @@ class KidsPronunciationPracticeSerializer(serializers.ModelSerializer):
         read_only_fields = ["last_practiced", "created_at"]
 
 
-class KidsGameSessionSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+class KidsGameSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = KidsGameSession
@@ -480,6 +609,7 @@ class KidsGameSessionSerializer(serializers.ModelSerializer):
             "created_at", "updated_at"
         ]
         read_only_fields = ["created_at", "updated_at"]
+        heavy_fields = ["details"]
 
 
 class ParentalControlSettingsSerializer(serializers.ModelSerializer):
@@ -717,7 +847,7 @@ class PracticeCommentSerializer(serializers.ModelSerializer):
 
 
 # ============= Adults Common Features Serializers =============
-class CommonLessonSerializer(serializers.ModelSerializer):
+class CommonLessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for common lessons shared across adult levels"""
     thumbnail_url = serializers.SerializerMethodField()
     
@@ -730,6 +860,7 @@ class CommonLessonSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'views', 'completion_count', 'average_score', 'created_at', 'updated_at']
+        heavy_fields = ['content']
     
     def get_thumbnail_url(self, obj):
         if obj.thumbnail:
@@ -755,7 +886,7 @@ class CommonLessonEnrollmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'enrolled_at', 'last_accessed']
 
 
-class WeeklyChallengeSerializer(serializers.ModelSerializer):
+class WeeklyChallengeSerializer(PrefetchMixin, serializers.ModelSerializer):
     """Serializer for weekly challenges"""
     user_progress = serializers.SerializerMethodField()
     
@@ -768,13 +899,18 @@ class WeeklyChallengeSerializer(serializers.ModelSerializer):
             'is_active', 'user_progress', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = PrefetchListSerializer
+    
+    def prefetch(self, instances):
+        self.prefetch_user_rows(UserWeeklyChallenge, 'challenge', instances)
     
     def get_user_progress(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            user_challenge = UserWeeklyChallenge.objects.filter(
-                user=request.user, challenge=obj
-            ).first()
+        user = self.request_user()
+        if user:
+            user_challenge = self.prefetched(
+                UserWeeklyChallenge, obj,
+                lambda challenge: UserWeeklyChallenge.objects.filter(user=user, challenge=challenge).first()
+            )
             if user_challenge:
                 return {
                     'enrolled': True,
@@ -786,7 +922,7 @@ class WeeklyChallengeSerializer(serializers.ModelSerializer):
         return {'enrolled': False}
 
 
-class UserWeeklyChallengeSerializer(serializers.ModelSerializer):
+class UserWeeklyChallengeSerializer(PrefetchMixin, serializers.ModelSerializer):
     """Serializer for user weekly challenge participation"""
     challenge = WeeklyChallengeSerializer(read_only=True)
     challenge_id = serializers.IntegerField(write_only=True, required=False)
@@ -799,6 +935,11 @@ class UserWeeklyChallengeSerializer(serializers.ModelSerializer):
             'points_earned', 'details', 'updated_at'
         ]
         read_only_fields = ['id', 'enrolled_at', 'updated_at']
+        list_serializer_class = PrefetchListSerializer
+    
+    def prefetch(self, instances):
+        # Each enrollment is the nested challenge's user_progress
+        self.seed_user_rows('challenge', instances)
 
 
 class LearningGoalSerializer(serializers.ModelSerializer):
@@ -854,7 +995,7 @@ class SpacedRepetitionItemSerializer(serializers.ModelSerializer):
         return max(0, delta.days)
 
 
-class MicrolearningModuleSerializer(serializers.ModelSerializer):
+class MicrolearningModuleSerializer(SparseFieldsMixin, PrefetchMixin, serializers.ModelSerializer):
     """Serializer for microlearning modules"""
     thumbnail_url = serializers.SerializerMethodField()
     user_progress = serializers.SerializerMethodField()
@@ -868,17 +1009,23 @@ class MicrolearningModuleSerializer(serializers.ModelSerializer):
             'user_progress', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'views', 'completion_count', 'created_at', 'updated_at']
+        list_serializer_class = PrefetchListSerializer
+        heavy_fields = ['content']
+    
+    def prefetch(self, instances):
+        self.prefetch_user_rows(MicrolearningProgress, 'module', instances)
     
     def get_thumbnail_url(self, obj):
         # Can be extended if thumbnails are added
         return None
     
     def get_user_progress(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            progress = MicrolearningProgress.objects.filter(
-                user=request.user, module=obj
-            ).first()
+        user = self.request_user()
+        if user:
+            progress = self.prefetched(
+                MicrolearningProgress, obj,
+                lambda module: MicrolearningProgress.objects.filter(user=user, module=module).first()
+            )
             if progress:
                 return {
                     'completed': progress.completed,
@@ -888,7 +1035,7 @@ class MicrolearningModuleSerializer(serializers.ModelSerializer):
         return None
 
 
-class MicrolearningProgressSerializer(serializers.ModelSerializer):
+class MicrolearningProgressSerializer(PrefetchMixin, serializers.ModelSerializer):
     """Serializer for microlearning progress"""
     module = MicrolearningModuleSerializer(read_only=True)
     module_id = serializers.IntegerField(write_only=True, required=False)
@@ -900,6 +1047,10 @@ class MicrolearningProgressSerializer(serializers.ModelSerializer):
             'score', 'time_spent_minutes', 'attempts', 'last_accessed', 'created_at'
         ]
         read_only_fields = ['id', 'last_accessed', 'created_at']
+        list_serializer_class = PrefetchListSerializer
+    
+    def prefetch(self, instances):
+        self.seed_user_rows('module', instances)
 
 
 class ProgressAnalyticsSerializer(serializers.ModelSerializer):
@@ -947,7 +1098,7 @@ class UserDictionarySerializer(serializers.ModelSerializer):
 
 
 # ============= Flashcard Serializers =============
-class FlashcardDeckSerializer(serializers.ModelSerializer):
+class FlashcardDeckSerializer(PrefetchMixin, serializers.ModelSerializer):
     """Serializer for flashcard decks"""
     cards_count = serializers.SerializerMethodField()
     
@@ -958,9 +1109,18 @@ class FlashcardDeckSerializer(serializers.ModelSerializer):
             'total_cards', 'mastered_cards', 'cards_count', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'total_cards', 'mastered_cards', 'created_at', 'updated_at']
+        list_serializer_class = PrefetchListSerializer
+    
+    def prefetch(self, instances):
+        ids = [deck.pk for deck in instances]
+        counts = dict(
+            Flashcard.objects.filter(deck_id__in=ids).order_by()
+            .values('deck_id').annotate(count=Count('id')).values_list('deck_id', 'count')
+        )
+        self.prefetch_map('cards_count').update({pk: counts.get(pk, 0) for pk in ids})
     
     def get_cards_count(self, obj):
-        return obj.cards.count()
+        return self.prefetched('cards_count', obj, lambda deck: deck.cards.count())
 
 
 class FlashcardSerializer(serializers.ModelSerializer):
@@ -1098,7 +1258,7 @@ class PronunciationPracticeSerializer(serializers.ModelSerializer):
 
 
 # ============= Cultural Intelligence Serializers =============
-class CulturalIntelligenceModuleSerializer(serializers.ModelSerializer):
+class CulturalIntelligenceModuleSerializer(PrefetchMixin, serializers.ModelSerializer):
     """Serializer for cultural intelligence modules"""
     thumbnail_url = serializers.SerializerMethodField()
     user_progress = serializers.SerializerMethodField()
@@ -1111,6 +1271,10 @@ class CulturalIntelligenceModuleSerializer(serializers.ModelSerializer):
             'is_active', 'order', 'user_progress', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'views', 'completion_count', 'created_at', 'updated_at']
+        list_serializer_class = PrefetchListSerializer
+    
+    def prefetch(self, instances):
+        self.prefetch_user_rows(CulturalIntelligenceProgress, 'module', instances)
     
     def get_thumbnail_url(self, obj):
         if obj.thumbnail:
@@ -1120,11 +1284,12 @@ class CulturalIntelligenceModuleSerializer(serializers.ModelSerializer):
         return None
     
     def get_user_progress(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            progress = CulturalIntelligenceProgress.objects.filter(
-                user=request.user, module=obj
-            ).first()
+        user = self.request_user()
+        if user:
+            progress = self.prefetched(
+                CulturalIntelligenceProgress, obj,
+                lambda module: CulturalIntelligenceProgress.objects.filter(user=user, module=module).first()
+            )
             if progress:
                 return {
                     'completed': progress.completed,
@@ -1135,7 +1300,7 @@ class CulturalIntelligenceModuleSerializer(serializers.ModelSerializer):
         return None
 
 
-class CulturalIntelligenceProgressSerializer(serializers.ModelSerializer):
+class CulturalIntelligenceProgressSerializer(PrefetchMixin, serializers.ModelSerializer):
     """Serializer for cultural intelligence progress"""
     module = CulturalIntelligenceModuleSerializer(read_only=True)
     module_id = serializers.IntegerField(write_only=True, required=False)
@@ -1148,6 +1313,10 @@ class CulturalIntelligenceProgressSerializer(serializers.ModelSerializer):
             'last_accessed', 'created_at'
         ]
         read_only_fields = ['id', 'last_accessed', 'created_at']
+        list_serializer_class = PrefetchListSerializer
+    
+    def prefetch(self, instances):
+        self.seed_user_rows('module', instances)
 
 
 # ============= Search History Serializers =============
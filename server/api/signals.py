@@ -0,0 +1,120 @@
+"""
+Model signal receivers that keep derived tables in step with writes.
+Connected from ApiConfig.ready().
+"""
+import logging
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import activity_log, content_versions, platform_stats, sync_log
+from .models import LessonProgress, PracticeSession, SyncChange
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=PracticeSession)
+def practice_session_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    try:
+        platform_stats.record_practice_session(instance)
+    except Exception as e:
+        logger.error(f"Failed to update daily platform stats for practice session {instance.pk}: {str(e)}")
+    try:
+        activity_log.record_practice_session(instance)
+    except Exception as e:
+        logger.error(f"Failed to log activity for practice session {instance.pk}: {str(e)}")
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    try:
+        platform_stats.record_registration(instance)
+    except Exception as e:
+        logger.error(f"Failed to update daily platform stats for user {instance.pk}: {str(e)}")
+    try:
+        activity_log.record_registration(instance)
+    except Exception as e:
+        logger.error(f"Failed to log activity for user {instance.pk}: {str(e)}")
+
+
+@receiver(pre_save, sender=LessonProgress)
+def lesson_progress_completing(sender, instance, raw=False, **kwargs):
+    """Remember whether this save turns the lesson from incomplete to complete."""
+    instance._newly_completed = False
+    if raw or not instance.completed:
+        return
+    if instance.pk is None:
+        instance._newly_completed = True
+        return
+    was_completed = LessonProgress.objects.filter(pk=instance.pk).values_list('completed', flat=True).first()
+    instance._newly_completed = not was_completed
+
+
+@receiver(post_save, sender=LessonProgress)
+def lesson_progress_saved(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_newly_completed', False):
+        return
+    try:
+        platform_stats.record_lesson_completion(instance)
+    except Exception as e:
+        logger.error(f"Failed to update daily platform stats for lesson progress {instance.pk}: {str(e)}")
+    try:
+        activity_log.record_lesson_completion(instance)
+    except Exception as e:
+        logger.error(f"Failed to log activity for lesson progress {instance.pk}: {str(e)}")
+
+
+def tracked_entity_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        sync_log.record_instance(instance)
+    except Exception as e:
+        logger.error(f"Failed to record sync change for {sender.__name__} {instance.pk}: {str(e)}")
+
+
+def tracked_entity_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting the user removes their change log too; writing tombstones would
+    # insert rows that reference the user being deleted.
+    if isinstance(origin, User):
+        return
+    try:
+        sync_log.record_instance(instance, op=SyncChange.DELETE)
+    except Exception as e:
+        logger.error(f"Failed to record sync tombstone for {sender.__name__} {instance.pk}: {str(e)}")
+
+
+for _model in sync_log.ENTITY_BY_MODEL:
+    post_save.connect(tracked_entity_saved, sender=_model, dispatch_uid=f'sync_log_save_{_model.__name__}')
+    post_delete.connect(tracked_entity_deleted, sender=_model, dispatch_uid=f'sync_log_delete_{_model.__name__}')
+
+
+def catalog_changed(sender, **kwargs):
+    try:
+        content_versions.bump_table(sender)
+    except Exception as e:
+        logger.error(f"Failed to bump content version for {sender.__name__}: {str(e)}")
+
+
+def user_content_changed(sender, instance, origin=None, **kwargs):
+    # Rows deleted along with their user need no new version
+    if isinstance(origin, User):
+        return
+    try:
+        content_versions.bump_user(instance.user_id)
+    except Exception as e:
+        logger.error(f"Failed to bump content version for {sender.__name__} {instance.pk}: {str(e)}")
+
+
+for _model in content_versions.CATALOG_MODELS:
+    post_save.connect(catalog_changed, sender=_model, dispatch_uid=f'content_version_save_{_model.__name__}')
+    post_delete.connect(catalog_changed, sender=_model, dispatch_uid=f'content_version_delete_{_model.__name__}')
+
+for _model in content_versions.USER_MODELS:
+    post_save.connect(user_content_changed, sender=_model, dispatch_uid=f'user_content_save_{_model.__name__}')
+    post_delete.connect(user_content_changed, sender=_model, dispatch_uid=f'user_content_delete_{_model.__name__}')
@@ -0,0 +1,238 @@
+"""
+Grouped, bulk application of offline sync operations.
+
+``sync/upsert/batch`` hands the operations it has claimed to ``apply_batch``.
+The function groups them by entity type. LessonProgress, VocabularyWord and
+PracticeSession operations are applied with one read of the existing rows and
+one ``bulk_create``/``bulk_update`` per type. Any other entity type goes
+through the single-operation handler under its own savepoint.
+
+``bulk_create`` and ``bulk_update`` send no model signals, so the platform
+rollups, the activity log and the sync change log are updated here explicitly.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from . import activity_log, platform_stats, sync_log
+from .models import Lesson, LessonProgress, PracticeSession, VocabularyWord
+from .serializers import LessonProgressSerializer, PracticeSessionSerializer, VocabularyWordSerializer
+
+BULK_ENTITY_TYPES = ('LessonProgress', 'VocabularyWord', 'PracticeSession')
+
+
+def _field_values(model, data, exclude=()):
+    """Coerce ``data`` onto editable concrete fields of ``model``, ignoring unknown keys."""
+    values = {}
+    for key, value in data.items():
+        if key in exclude:
+            continue
+        try:
+            field = model._meta.get_field(key)
+        except FieldDoesNotExist:
+            continue
+        if not field.concrete or field.primary_key or field.is_relation or not field.editable:
+            continue
+        values[field.attname] = field.to_python(value)
+    return values
+
+
+def _result(entity, obj, created, data):
+    return (status.HTTP_201_CREATED if created else status.HTTP_200_OK), {
+        'entity': entity,
+        'entity_id': obj.id,
+        'operation': 'created' if created else 'updated',
+        'data': data,
+    }
+
+
+def _error(message):
+    return status.HTTP_400_BAD_REQUEST, {"error": message}
+
+
+def _apply_lesson_progress(user, items, results):
+    lesson_ids = {}
+    for index, _, data in items:
+        try:
+            lesson_ids[index] = int(data['lesson'])
+        except (TypeError, ValueError):
+            results[index] = _error('lesson must be a lesson id')
+    lessons = Lesson.objects.in_bulk(set(lesson_ids.values()))
+    existing = {
+        progress.lesson_id: progress
+        for progress in LessonProgress.objects.filter(user=user, lesson_id__in=list(lessons))
+    }
+    was_completed = {lesson_id: progress.completed for lesson_id, progress in existing.items()}
+
+    new, touched, fields, applied = {}, set(), set(), []
+    for index, _, data in items:
+        if index in results:
+            continue
+        lesson = lessons.get(lesson_ids[index])
+        if lesson is None:
+            results[index] = _error('Lesson matching query does not exist.')
+            continue
+        try:
+            values = _field_values(LessonProgress, data, exclude=('lesson', 'user'))
+        except ValidationError as e:
+            results[index] = _error(e.messages)
+            continue
+        created = lesson.id not in existing and lesson.id not in new
+        if created:
+            new[lesson.id] = LessonProgress(user=user, lesson=lesson)
+        progress = existing.get(lesson.id) or new[lesson.id]
+        for attname, value in values.items():
+            setattr(progress, attname, value)
+        fields.update(values)
+        touched.add(lesson.id)
+        applied.append((index, lesson.id, created))
+
+    if not applied:
+        return
+    updated = [progress for lesson_id, progress in existing.items() if lesson_id in touched]
+    if updated:
+        now = timezone.now()
+        for progress in updated:
+            progress.updated_at = now
+            progress.last_attempt = now
+        LessonProgress.objects.bulk_update(updated, sorted(fields | {'updated_at', 'last_attempt'}))
+    LessonProgress.objects.bulk_create(list(new.values()))
+
+    saved = {
+        progress.lesson_id: progress
+        for progress in LessonProgress.objects.filter(user=user, lesson_id__in=touched).select_related('user', 'lesson')
+    }
+    for index, lesson_id, created in applied:
+        progress = saved[lesson_id]
+        results[index] = _result('LessonProgress', progress, created, LessonProgressSerializer(progress).data)
+    sync_log.record_changes(user.id, 'LessonProgress', [progress.id for progress in saved.values()])
+    for lesson_id in touched:
+        progress = saved[lesson_id]
+        if progress.completed and not was_completed.get(lesson_id, False):
+            platform_stats.record_lesson_completion(progress)
+            activity_log.record_lesson_completion(progress)
+
+
+def _apply_vocabulary(user, items, results):
+    words = {index: str(data.get('word', '')).lower() for index, _, data in items}
+    existing = {
+        vocab.word: vocab
+        for vocab in VocabularyWord.objects.filter(user=user, word__in=set(words.values()))
+    }
+
+    new, touched, fields, applied = {}, set(), set(), []
+    for index, _, data in items:
+        word = words[index]
+        try:
+            values = _field_values(VocabularyWord, data, exclude=('word', 'user'))
+        except ValidationError as e:
+            results[index] = _error(e.messages)
+            continue
+        created = word not in existing and word not in new
+        if created:
+            new[word] = VocabularyWord(user=user, word=word)
+        vocab = existing.get(word) or new[word]
+        for attname, value in values.items():
+            setattr(vocab, attname, value)
+        fields.update(values)
+        touched.add(word)
+        applied.append((index, word, created))
+
+    if not applied:
+        return
+    updated = [vocab for word, vocab in existing.items() if word in touched]
+    if updated:
+        now = timezone.now()
+        for vocab in updated:
+            vocab.last_practiced = now
+        VocabularyWord.objects.bulk_update(updated, sorted(fields | {'last_practiced'}))
+    VocabularyWord.objects.bulk_create(list(new.values()))
+
+    saved = {vocab.word: vocab for vocab in VocabularyWord.objects.filter(user=user, word__in=touched)}
+    sync_log.record_changes(user.id, 'VocabularyWord', [vocab.id for vocab in saved.values()])
+    for index, word, created in applied:
+        vocab = saved[word]
+        results[index] = _result('VocabularyWord', vocab, created, VocabularyWordSerializer(vocab).data)
+
+
+def _apply_practice_sessions(user, items, results):
+    # Sessions have no natural key, so the operation's idempotency key is stored
+    # on the row to read back ids that MySQL's bulk INSERT does not return.
+    keys = [key for _, key, _ in items]
+    already_applied = set(
+        PracticeSession.objects.filter(user=user, sync_key__in=keys).values_list('sync_key', flat=True)
+    )
+
+    new, applied = [], []
+    for index, key, data in items:
+        if key not in already_applied:
+            serializer = PracticeSessionSerializer(data=data)
+            if not serializer.is_valid():
+                results[index] = _error(serializer.errors)
+                continue
+            new.append(PracticeSession(user=user, sync_key=key, **serializer.validated_data))
+        applied.append((index, key))
+
+    if not applied:
+        return
+    PracticeSession.objects.bulk_create(new)
+
+    saved = {
+        session.sync_key: session
+        for session in PracticeSession.objects.filter(
+            user=user, sync_key__in=[key for _, key in applied]
+        ).select_related('user', 'lesson')
+    }
+    for index, key in applied:
+        session = saved[key]
+        results[index] = _result('PracticeSession', session, True, PracticeSessionSerializer(session).data)
+
+    created = [saved[session.sync_key] for session in new]
+    if created:
+        sync_log.record_changes(user.id, 'PracticeSession', [session.id for session in created])
+        platform_stats.record_practice_sessions(created)
+        activity_log.record_practice_sessions(created)
+
+
+def apply_batch(user, operations, apply_one):
+    """
+    Apply ``operations``, a list of ``(index, idempotency_key, payload)``.
+
+    ``apply_one(user, payload)`` handles entity types without a bulk path.
+    Returns a dict of index to ``(status_code, body)``. Failed operations are
+    not applied, and they do not affect the others.
+    """
+    results = {}
+    groups = defaultdict(list)
+    others = []
+    for index, key, payload in operations:
+        entity_type = payload.get('entity_type')
+        data = payload.get('data') or {}
+        if not entity_type or payload.get('operation') not in ['create', 'update']:
+            results[index] = _error('entity_type and operation are required')
+        elif not isinstance(data, dict):
+            results[index] = _error('data must be an object')
+        elif entity_type == 'LessonProgress' and data.get('lesson'):
+            groups[entity_type].append((index, key, data))
+        elif entity_type in ('VocabularyWord', 'PracticeSession'):
+            groups[entity_type].append((index, key, data))
+        else:
+            others.append((index, payload))
+
+    if groups['LessonProgress']:
+        _apply_lesson_progress(user, groups['LessonProgress'], results)
+    if groups['VocabularyWord']:
+        _apply_vocabulary(user, groups['VocabularyWord'], results)
+    if groups['PracticeSession']:
+        _apply_practice_sessions(user, groups['PracticeSession'], results)
+
+    for index, payload in others:
+        with transaction.atomic():
+            status_code, body = apply_one(user, payload)
+            if status_code >= 400:
+                transaction.set_rollback(True)
+        results[index] = (status_code, body)
+    return results
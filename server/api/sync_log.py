@@ -0,0 +1,194 @@
+"""
+Per-user change log behind ``sync/changes?after_seq=``.
+
+Every write to a tracked entity moves that entity's SyncChange row to the
+user's next sequence number. The receivers in ``api.signals`` handle saves
+and deletes; code that writes through ``bulk_create``, ``bulk_update`` or
+``QuerySet.update`` calls ``record_change``/``record_changes`` itself.
+
+Sequence numbers come from SyncState.last_seq. It is incremented in the same
+transaction that writes the change row, so the counter row lock makes
+changes for one user commit in sequence order. A reader that has seen
+``seq`` therefore never misses a smaller one committed later.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    UserProfile, LessonProgress, PracticeSession, VocabularyWord, KidsProgress, KidsAchievement,
+    TeenProgress, TeenStoryProgress, TeenVocabularyPractice, TeenPronunciationPractice, TeenFavorite,
+    TeenAchievement, TeenGameSession, TeenCertificate, CategoryProgress, SpacedRepetitionItem,
+    FlashcardDeck, Flashcard, SyncChange, SyncState,
+)
+from .serializers import (
+    UserProfileSerializer, LessonProgressSerializer, PracticeSessionSerializer, VocabularyWordSerializer,
+    KidsProgressSerializer, KidsAchievementSerializer, TeenProgressSerializer, TeenStoryProgressSerializer,
+    TeenVocabularyPracticeSerializer, TeenPronunciationPracticeSerializer, TeenFavoriteSerializer,
+    TeenAchievementSerializer, TeenGameSessionSerializer, TeenCertificateSerializer,
+    CategoryProgressSerializer, SpacedRepetitionItemSerializer, FlashcardDeckSerializer, FlashcardSerializer,
+)
+
+logger = logging.getLogger(__name__)
+
+# Entity name -> (model, serializer, owner lookup used to find the user)
+TRACKED_ENTITIES = {
+    'UserProfile': (UserProfile, UserProfileSerializer, 'user_id'),
+    'LessonProgress': (LessonProgress, LessonProgressSerializer, 'user_id'),
+    'PracticeSession': (PracticeSession, PracticeSessionSerializer, 'user_id'),
+    'VocabularyWord': (VocabularyWord, VocabularyWordSerializer, 'user_id'),
+    'KidsProgress': (KidsProgress, KidsProgressSerializer, 'user_id'),
+    'KidsAchievement': (KidsAchievement, KidsAchievementSerializer, 'user_id'),
+    'TeenProgress': (TeenProgress, TeenProgressSerializer, 'user_id'),
+    'TeenStoryProgress': (TeenStoryProgress, TeenStoryProgressSerializer, 'user_id'),
+    'TeenVocabularyPractice': (TeenVocabularyPractice, TeenVocabularyPracticeSerializer, 'user_id'),
+    'TeenPronunciationPractice': (TeenPronunciationPractice, TeenPronunciationPracticeSerializer, 'user_id'),
+    'TeenFavorite': (TeenFavorite, TeenFavoriteSerializer, 'user_id'),
+    'TeenAchievement': (TeenAchievement, TeenAchievementSerializer, 'user_id'),
+    'TeenGameSession': (TeenGameSession, TeenGameSessionSerializer, 'user_id'),
+    'TeenCertificate': (TeenCertificate, TeenCertificateSerializer, 'user_id'),
+    'CategoryProgress': (CategoryProgress, CategoryProgressSerializer, 'user_id'),
+    'SpacedRepetitionItem': (SpacedRepetitionItem, SpacedRepetitionItemSerializer, 'user_id'),
+    'FlashcardDeck': (FlashcardDeck, FlashcardDeckSerializer, 'user_id'),
+    'Flashcard': (Flashcard, FlashcardSerializer, 'deck__user_id'),
+}
+ENTITY_BY_MODEL = {model: name for name, (model, _, _) in TRACKED_ENTITIES.items()}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class ChangesPruned(Exception):
+    """The requested cursor is older than the oldest retained tombstone."""
+
+
+def owner_id(instance):
+    """User id owning a tracked instance (Flashcards belong to their deck's user)."""
+    if isinstance(instance, Flashcard):
+        return FlashcardDeck.objects.filter(pk=instance.deck_id).values_list('user_id', flat=True).first()
+    return instance.user_id
+
+
+def _allocate(user_id, count):
+    """Reserve ``count`` sequence numbers; returns the first. Must run inside a transaction."""
+    if not SyncState.objects.filter(user_id=user_id).update(last_seq=F('last_seq') + count):
+        try:
+            with transaction.atomic():
+                SyncState.objects.create(user_id=user_id, last_seq=count)
+            return 1
+        except IntegrityError:
+            SyncState.objects.filter(user_id=user_id).update(last_seq=F('last_seq') + count)
+    return SyncState.objects.filter(user_id=user_id).values_list('last_seq', flat=True).get() - count + 1
+
+
+def record_changes(user_id, entity, entity_ids, op=SyncChange.UPSERT):
+    """Move the change rows of ``entity_ids`` to fresh sequence numbers."""
+    entity_ids = list(dict.fromkeys(entity_ids))
+    if not user_id or not entity_ids:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        first_seq = _allocate(user_id, len(entity_ids))
+        seqs = {entity_id: first_seq + offset for offset, entity_id in enumerate(entity_ids)}
+        existing = list(SyncChange.objects.filter(user_id=user_id, entity=entity, entity_id__in=entity_ids))
+        for change in existing:
+            change.seq = seqs.pop(change.entity_id)
+            change.op = op
+            change.changed_at = now
+        if existing:
+            SyncChange.objects.bulk_update(existing, ['seq', 'op', 'changed_at'])
+        SyncChange.objects.bulk_create([
+            SyncChange(user_id=user_id, seq=seq, entity=entity, entity_id=entity_id, op=op, changed_at=now)
+            for entity_id, seq in seqs.items()
+        ])
+
+
+def record_change(user_id, entity, entity_id, op=SyncChange.UPSERT):
+    record_changes(user_id, entity, [entity_id], op)
+
+
+def record_instance(instance, op=SyncChange.UPSERT):
+    entity = ENTITY_BY_MODEL.get(type(instance))
+    if entity:
+        record_change(owner_id(instance), entity, instance.pk, op)
+
+
+def current_seq(user):
+    return SyncState.objects.filter(user=user).values_list('last_seq', flat=True).first() or 0
+
+
+def changes_after(user, after_seq, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return ``(changes, next_seq, has_more)`` for changes with ``seq > after_seq``.
+
+    The log is read with one range scan on (user, seq); entity rows are then
+    loaded with one query per entity type present on the page.
+    """
+    state = SyncState.objects.filter(user=user).values('last_seq', 'pruned_seq').first()
+    if state and 0 < after_seq < state['pruned_seq']:
+        raise ChangesPruned(f'Changes up to seq {state["pruned_seq"]} have been pruned')
+
+    rows = list(
+        SyncChange.objects.filter(user=user, seq__gt=after_seq).order_by('seq')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    ids_by_entity = defaultdict(list)
+    for row in rows:
+        if row.op == SyncChange.UPSERT and row.entity in TRACKED_ENTITIES:
+            ids_by_entity[row.entity].append(row.entity_id)
+    objects = {}
+    for entity, ids in ids_by_entity.items():
+        model = TRACKED_ENTITIES[entity][0]
+        objects[entity] = model.objects.in_bulk(ids)
+
+    changes = []
+    for row in rows:
+        obj = objects.get(row.entity, {}).get(row.entity_id)
+        if row.op == SyncChange.UPSERT and obj is not None:
+            serializer = TRACKED_ENTITIES[row.entity][1]
+            changes.append({
+                'seq': row.seq,
+                'entity': row.entity,
+                'entity_id': row.entity_id,
+                'operation': SyncChange.UPSERT,
+                'data': serializer(obj).data,
+                'changed_at': row.changed_at.isoformat(),
+            })
+        else:
+            # Deleted, or deleted after this row was written and before its tombstone
+            changes.append({
+                'seq': row.seq,
+                'entity': row.entity,
+                'entity_id': row.entity_id,
+                'operation': SyncChange.DELETE,
+                'data': None,
+                'changed_at': row.changed_at.isoformat(),
+            })
+
+    next_seq = rows[-1].seq if rows else after_seq
+    return changes, next_seq, has_more
+
+
+def prune_tombstones(before, batch_size=5000):
+    """
+    Delete tombstones older than ``before`` and raise each affected user's
+    ``pruned_seq`` so clients with older cursors are told to resync in full.
+    """
+    qs = SyncChange.objects.filter(op=SyncChange.DELETE, changed_at__lt=before)
+    deleted = 0
+    while True:
+        batch = list(qs.order_by('id').values_list('id', 'user_id', 'seq')[:batch_size])
+        if not batch:
+            return deleted
+        highest = {}
+        for _, user_id, seq in batch:
+            highest[user_id] = max(seq, highest.get(user_id, 0))
+        with transaction.atomic():
+            for user_id, seq in highest.items():
+                SyncState.objects.filter(user_id=user_id, pruned_seq__lt=seq).update(pruned_seq=seq)
+            deleted += SyncChange.objects.filter(id__in=[row[0] for row in batch]).delete()[0]
@@ -1,9 +1,66 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import shutil
+import smtplib
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from http.server import ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest.mock import AsyncMock, patch
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.urls import reverse
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+import numpy as np
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 from rest_framework.test import APITestCase, APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from . import (
+    audio_uploads, catalog_cache, circuit_breaker, content_versions, email_outbox, game_prompts, gemini,
+    idempotency, media, opening_cache, pagination, pronunciation_scoring, renderers, sync_log, views,
+)
+from .category_progress import update_category_progress_from_activity
+from .idempotency import request_fingerprint
+from .management.commands.benchmark_pronunciation_scoring import synthesize, write_wav
+from .management.commands.fake_gemini_server import make_handler
+from .platform_stats import rebuild_daily_stats
+from .serializers import MicrolearningModuleSerializer, MicrolearningProgressSerializer
 
-from .models import UserNotification, KidsCertificate, KidsAchievement
+from .models import (
+    UserNotification, KidsCertificate, KidsAchievement, CategoryProgress,
+    KidsGameSession, KidsProgress, PracticeSession, DailyPlatformStats,
+    Lesson, LessonProgress, ActivityEvent, SyncIdempotencyKey, VocabularyWord,
+    SyncChange, SyncState, TeenFavorite, FlashcardDeck, Flashcard, UpstreamCircuit, UpstreamLease,
+    GameOpening, EmailOutbox, EmailVerificationToken, PronunciationPractice,
+    WeeklyChallenge, UserWeeklyChallenge, MicrolearningModule, MicrolearningProgress,
+    CulturalIntelligenceModule, CulturalIntelligenceProgress, SpacedRepetitionItem, TeenStoryProgress,
+    KidsLesson, TeenGameSession, CommonLesson, EmailTemplate, PersonalizedRecommendation, DictionaryEntry,
+)
 
 
 class NotificationIntegrationTests(APITestCase):
@@ -52,3 +109,2011 @@ class NotificationIntegrationTests(APITestCase):
         self.assertEqual(notification.notification_type, 'achievement')
         self.assertIn('Story Master', notification.title)
         self.assertEqual(notification.metadata.get('name'), 'Story Master')
+
+
+class CategoryProgressMaintenanceTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='kid', email='kid@example.com', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_read_endpoint_does_not_write(self):
+        url = reverse('get-all-category-progress')
+
+        # Authentication is forced, so only the CategoryProgress SELECT runs
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+        self.assertFalse(CategoryProgress.objects.filter(user=self.user).exists())
+
+    def test_game_session_applies_delta(self):
+        url = reverse('kids-game-session')
+        payload = {
+            'game_type': 'rhyme',
+            'score': 80,
+            'points_earned': 40,
+            'duration_seconds': 120,
+            'completed': True,
+        }
+
+        self.client.post(url, payload, format='json')
+        self.client.post(url, payload, format='json')
+
+        progress = CategoryProgress.objects.get(user=self.user, category='young_kids')
+        self.assertEqual(progress.total_points, 80)
+        self.assertEqual(progress.games_completed, 2)
+        self.assertEqual(progress.practice_time_minutes, 4)
+
+    def test_reconcile_command_recomputes_from_sources(self):
+        KidsProgress.objects.create(user=self.user, points=120)
+        KidsGameSession.objects.create(user=self.user, game_type='rhyme', completed=True, duration_seconds=300)
+        CategoryProgress.objects.create(user=self.user, category='young_kids', games_completed=99)
+
+        call_command('reconcile_category_progress', user_ids=[self.user.id], categories=['young_kids'], stdout=StringIO())
+
+        progress = CategoryProgress.objects.get(user=self.user, category='young_kids')
+        self.assertEqual(progress.total_points, 120)
+        self.assertEqual(progress.games_completed, 1)
+
+
+class CategoryProgressAtomicUpdateTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='racer', email='racer@example.com', password='password123')
+
+    def test_existing_row_is_updated_in_one_statement(self):
+        CategoryProgress.objects.create(user=self.user, category='teen_kids', average_score=50.0, score_count=1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            update_category_progress_from_activity(self.user, 'teen_kids', points=10, score=100, games=1, streak=3)
+
+        # The remaining queries record the change in the sync change log
+        progress_writes = [q['sql'] for q in ctx.captured_queries if 'api_categoryprogress' in q['sql']]
+        self.assertEqual(len(progress_writes), 2)
+        self.assertTrue(progress_writes[0].startswith('UPDATE'))
+
+        progress = CategoryProgress.objects.get(user=self.user, category='teen_kids')
+        self.assertEqual(progress.total_points, 10)
+        self.assertEqual(progress.games_completed, 1)
+        self.assertEqual(progress.total_streak, 3)
+        self.assertEqual(progress.score_count, 2)
+        self.assertAlmostEqual(progress.average_score, 75.0)
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_parallel_writers_do_not_lose_updates(self):
+        writers, calls_per_writer = 8, 10
+        barrier = threading.Barrier(writers)
+        errors = []
+
+        def write():
+            try:
+                barrier.wait()
+                for _ in range(calls_per_writer):
+                    update_category_progress_from_activity(self.user, 'young_kids', points=5, score=80, games=1)
+            except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        progress = CategoryProgress.objects.get(user=self.user, category='young_kids')
+        total_calls = writers * calls_per_writer
+        self.assertEqual(progress.total_points, 5 * total_calls)
+        self.assertEqual(progress.games_completed, total_calls)
+        self.assertEqual(progress.score_count, total_calls)
+        self.assertAlmostEqual(progress.average_score, 80.0)
+
+
+class DailyPlatformStatsTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password123', is_staff=True)
+        self.learner = User.objects.create_user(username='learner', email='learner@example.com', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _practice(self, session_type, minutes, score):
+        return PracticeSession.objects.create(
+            user=self.learner, session_type=session_type, duration_minutes=minutes, score=score
+        )
+
+    def test_writes_maintain_rollup_matching_rebuild(self):
+        self._practice('vocabulary', 10, 90)
+        self._practice('vocabulary', 20, 70)
+        self._practice('pronunciation', 5, 40)
+
+        day = timezone.localdate()
+        incremental = {
+            row.session_type: (row.sessions, row.practice_minutes, row.score_sum, row.active_users, row.registrations)
+            for row in DailyPlatformStats.objects.filter(date=day)
+        }
+        self.assertEqual(incremental[''], (3, 35, 200.0, 1, 2))
+        self.assertEqual(incremental['vocabulary'], (2, 30, 160.0, 1, 0))
+
+        rebuild_daily_stats(day, close=False)
+        rebuilt = {
+            row.session_type: (row.sessions, row.practice_minutes, row.score_sum, row.active_users, row.registrations)
+            for row in DailyPlatformStats.objects.filter(date=day)
+        }
+        self.assertEqual(rebuilt, incremental)
+
+    def test_admin_analytics_reads_rollup(self):
+        self._practice('vocabulary', 10, 90)
+        self._practice('grammar', 30, 50)
+
+        response = self.client.get(reverse('admin-analytics'), {'days': 7})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = response.data['time_series'][-1]
+        self.assertEqual(today['sessions'], 2)
+        self.assertEqual(today['practice_time_minutes'], 40)
+        self.assertEqual(today['avg_score'], 70.0)
+        self.assertEqual(response.data['practice']['period']['active_users'], 1)
+        self.assertEqual(response.data['practice']['quality_metrics']['low_score'], 1)
+
+        dashboard = self.client.get(reverse('admin-dashboard-stats'))
+        self.assertEqual(dashboard.status_code, status.HTTP_200_OK)
+        self.assertEqual(dashboard.data['practice']['total_sessions'], 2)
+        self.assertEqual(dashboard.data['users']['new_today'], 2)
+
+        practice = self.client.get(reverse('admin-practice-stats'))
+        self.assertEqual(practice.status_code, status.HTTP_200_OK)
+        self.assertEqual(practice.data['recent']['time_last_7_minutes'], 40)
+
+
+class AdminPracticeStatsQueryTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _add_learners(self, count, offset=0):
+        for i in range(offset, offset + count):
+            learner = User.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password123')
+            for minutes in range(1, i + 2):
+                PracticeSession.objects.create(user=learner, session_type='vocabulary', duration_minutes=minutes, score=80)
+
+    def _count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('admin-practice-stats'), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_is_independent_of_user_count(self):
+        self._add_learners(3)
+        baseline, _ = self._count_queries()
+
+        self._add_learners(5, offset=3)
+        queries, response = self._count_queries()
+
+        self.assertEqual(queries, baseline)
+        self.assertEqual(response.data['active_users_pagination']['total'], 8)
+
+    def test_active_users_sorted_and_paginated_in_sql(self):
+        self._add_learners(4)
+
+        _, response = self._count_queries({'page': 2, 'page_size': 3})
+
+        users = response.data['active_users']
+        self.assertEqual([u['username'] for u in users], ['learner0'])
+        self.assertEqual(users[0]['practice_stats']['total_sessions'], 1)
+
+        _, response = self._count_queries({'page_size': 2})
+        top = response.data['active_users'][0]
+        self.assertEqual(top['username'], 'learner3')
+        self.assertEqual(top['practice_stats']['total_sessions'], 4)
+        self.assertEqual(top['practice_stats']['total_time_minutes'], 10)
+        self.assertEqual(top['practice_stats']['sessions_last_30'], 4)
+        self.assertEqual(response.data['active_users_pagination']['pages'], 2)
+
+
+class AdminUsersListQueryTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        for i in range(5):
+            learner = User.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password123')
+            for _ in range(i):
+                PracticeSession.objects.create(user=learner, session_type='grammar', duration_minutes=5, score=70)
+
+    def test_counts_are_annotated(self):
+        # COUNT for the total plus one annotated page query
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('admin-users-list'), {'page_size': 10})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sessions = {u['username']: u['total_sessions'] for u in response.data['users']}
+        self.assertEqual(sessions['learner3'], 3)
+        self.assertEqual(sessions['admin'], 0)
+
+    def test_estimated_total_for_unfiltered_grid(self):
+        cache.clear()
+        response = self.client.get(reverse('admin-users-list'), {'total': 'estimated'})
+
+        self.assertTrue(response.data['pagination']['total_is_estimate'])
+        self.assertEqual(response.data['pagination']['total'], 6)
+
+        filtered = self.client.get(reverse('admin-users-list'), {'total': 'estimated', 'search': 'learner'})
+        self.assertFalse(filtered.data['pagination']['total_is_estimate'])
+        self.assertEqual(filtered.data['pagination']['total'], 5)
+
+
+class AdminActivitiesFeedTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        lesson = Lesson.objects.create(slug='feed-lesson', title='Feed Lesson', lesson_type='kids_4_10', content_type='vocabulary')
+        base = timezone.now() - timedelta(days=10)
+        for i in range(6):
+            learner = User.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password123')
+            # Pairs of users share a timestamp so ties must break on id
+            User.objects.filter(pk=learner.pk).update(date_joined=base + timedelta(hours=i // 2))
+            progress = LessonProgress.objects.create(user=learner, lesson=lesson, completed=i % 2 == 0)
+            LessonProgress.objects.filter(pk=progress.pk).update(updated_at=base + timedelta(hours=i // 2))
+        User.objects.filter(pk=self.admin.pk).update(date_joined=base - timedelta(days=1))
+
+    def _walk(self, **params):
+        seen = []
+        cursor = None
+        while True:
+            query = dict(params, page_size=4)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(reverse('admin-activities-list'), query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(a['id'] for a in response.data['activities'])
+            cursor = response.data['pagination']['next_cursor']
+            if not cursor:
+                return seen
+
+    def test_cursor_walk_returns_every_activity_once(self):
+        seen = self._walk()
+
+        self.assertEqual(len(seen), 13)
+        self.assertEqual(len(set(seen)), 13)
+        self.assertEqual(seen[-1], f'user_{self.admin.pk}')
+
+    def test_cursor_walk_matches_page_numbers(self):
+        by_page = []
+        for page in range(1, 5):
+            response = self.client.get(reverse('admin-activities-list'), {'page': page, 'page_size': 4})
+            by_page.extend(a['id'] for a in response.data['activities'])
+
+        self.assertEqual(response.data['pagination']['total'], 13)
+        self.assertEqual(response.data['pagination']['pages'], 4)
+        self.assertEqual(by_page, self._walk())
+
+    def test_status_filter_applies_to_both_sources(self):
+        seen = self._walk(status='completed')
+
+        self.assertEqual(len(seen), 3)
+        self.assertTrue(all(activity_id.startswith('progress_') for activity_id in seen))
+
+    def test_page_cost_does_not_grow_with_depth(self):
+        first = self.client.get(reverse('admin-activities-list'), {'page_size': 2})
+        cursor = first.data['pagination']['next_cursor']
+
+        # One query per source; the cursor skips the totals
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('admin-activities-list'), {'page_size': 2, 'cursor': cursor})
+        self.assertEqual(len(response.data['activities']), 2)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('admin-activities-list'), {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ActivityEventLogTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='password123', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.learner = User.objects.create_user(username='learner', email='learner@example.com', password='password123')
+        self.lesson = Lesson.objects.create(slug='log-lesson', title='Log Lesson', lesson_type='kids_4_10', content_type='vocabulary')
+
+    def test_writes_are_logged_once(self):
+        PracticeSession.objects.create(user=self.learner, session_type='grammar', duration_minutes=5, score=70)
+        progress = LessonProgress.objects.create(user=self.learner, lesson=self.lesson, completed=True)
+        progress.score = 90
+        progress.save()
+
+        verbs = list(ActivityEvent.objects.filter(actor=self.learner).values_list('verb', flat=True))
+        self.assertCountEqual(verbs, [
+            ActivityEvent.USER_REGISTERED, ActivityEvent.PRACTICE_SESSION, ActivityEvent.LESSON_COMPLETED,
+        ])
+        completed = ActivityEvent.objects.get(verb=ActivityEvent.LESSON_COMPLETED)
+        self.assertEqual(completed.title, 'learner completed Log Lesson')
+        self.assertEqual(completed.object_id, progress.pk)
+
+    def test_dashboard_reads_recent_activity_from_log(self):
+        PracticeSession.objects.create(user=self.learner, session_type='grammar', duration_minutes=5, score=70)
+
+        response = self.client.get(reverse('admin-dashboard-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        recent = response.data['recent_activities']
+        self.assertEqual(recent[0]['type'], ActivityEvent.PRACTICE_SESSION)
+        self.assertEqual(recent[0]['title'], 'learner practiced grammar (5m)')
+        self.assertEqual(recent[0]['icon'], 'clock')
+
+    def test_prune_applies_retention_per_verb(self):
+        ActivityEvent.objects.all().delete()
+        now = timezone.now()
+        for verb, age in [
+            (ActivityEvent.PRACTICE_SESSION, 10),
+            (ActivityEvent.PRACTICE_SESSION, 40),
+            (ActivityEvent.USER_REGISTERED, 40),
+            (ActivityEvent.USER_REGISTERED, 100),
+        ]:
+            ActivityEvent.objects.create(
+                actor=self.learner, actor_name='learner', verb=verb, object_type='user',
+                object_id=self.learner.pk, title=verb, timestamp=now - timedelta(days=age),
+            )
+
+        call_command('prune_activity_events', '--dry-run', stdout=StringIO())
+        self.assertEqual(ActivityEvent.objects.count(), 4)
+
+        call_command('prune_activity_events', '--batch-size', '1', stdout=StringIO())
+        remaining = sorted(
+            (event.verb, (now - event.timestamp).days) for event in ActivityEvent.objects.all()
+        )
+        self.assertEqual(remaining, [
+            (ActivityEvent.PRACTICE_SESSION, 10),
+            (ActivityEvent.USER_REGISTERED, 40),
+        ])
+
+
+class SyncIdempotencyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', email='learner@example.com', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.payload = {
+            'entity_type': 'PracticeSession',
+            'operation': 'create',
+            'data': {'session_type': 'grammar', 'duration_minutes': 5, 'score': 70},
+        }
+
+    def _upsert(self, key, payload=None):
+        return self.client.post(
+            reverse('sync-upsert'), payload or self.payload, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_stored_response_without_process_cache(self):
+        first = self._upsert('retry-1')
+        # A retry served by another worker shares nothing but the database
+        cache.clear()
+        second = self._upsert('retry-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(PracticeSession.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(SyncIdempotencyKey.objects.get(key='retry-1').state, SyncIdempotencyKey.COMPLETED)
+
+    def test_in_flight_duplicate_is_told_to_retry(self):
+        now = timezone.now()
+        SyncIdempotencyKey.objects.create(
+            user=self.user, key='busy', request_hash=request_fingerprint(self.payload),
+            created_at=now, expires_at=now + timedelta(days=1),
+        )
+
+        response = self._upsert('busy')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(PracticeSession.objects.filter(user=self.user).exists())
+
+    def test_abandoned_claim_is_taken_over(self):
+        stale = timezone.now() - timedelta(minutes=5)
+        SyncIdempotencyKey.objects.create(
+            user=self.user, key='crashed', request_hash=request_fingerprint(self.payload),
+            created_at=stale, expires_at=stale + timedelta(days=1),
+        )
+
+        response = self._upsert('crashed')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PracticeSession.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reuse_with_different_payload_is_rejected(self):
+        self._upsert('reused')
+        other = dict(self.payload, data={'session_type': 'vocabulary', 'duration_minutes': 3, 'score': 50})
+
+        response = self._upsert('reused', other)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_failed_request_releases_key(self):
+        invalid = dict(self.payload, data={'session_type': 'grammar'})
+
+        response = self._upsert('invalid', invalid)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SyncIdempotencyKey.objects.filter(key='invalid').exists())
+
+    def test_purge_removes_only_expired_keys(self):
+        now = timezone.now()
+        for key, expires_at in [('old', now - timedelta(hours=1)), ('live', now + timedelta(hours=1))]:
+            SyncIdempotencyKey.objects.create(
+                user=self.user, key=key, request_hash='x', state=SyncIdempotencyKey.COMPLETED,
+                created_at=now - timedelta(days=1), expires_at=expires_at,
+            )
+
+        call_command('purge_idempotency_keys', stdout=StringIO())
+
+        self.assertEqual(list(SyncIdempotencyKey.objects.values_list('key', flat=True)), ['live'])
+
+
+class SyncIdempotencyConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='racer', email='racer@example.com', password='password123')
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_only_one_concurrent_request_claims_a_key(self):
+        workers = 8
+        barrier = threading.Barrier(workers)
+        outcomes = []
+
+        def race():
+            try:
+                barrier.wait()
+                outcomes.append(idempotency.claim(self.user, 'same-key', 'hash').outcome)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=race) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes.count(idempotency.CLAIMED), 1)
+        self.assertEqual(outcomes.count(idempotency.IN_FLIGHT), workers - 1)
+
+
+class SyncBatchUpsertTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='learner', email='learner@example.com', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.lesson = Lesson.objects.create(slug='batch-lesson', title='Batch Lesson', lesson_type='kids_4_10', content_type='vocabulary')
+
+    def _operations(self, count, prefix='op'):
+        operations = []
+        for i in range(count):
+            if i % 3 == 0:
+                operation = {'entity_type': 'PracticeSession', 'operation': 'create',
+                             'data': {'session_type': 'grammar', 'duration_minutes': 5, 'score': 70}}
+            elif i % 3 == 1:
+                operation = {'entity_type': 'VocabularyWord', 'operation': 'create',
+                             'data': {'word': f'Word{i}', 'definition': 'a word'}}
+            else:
+                operation = {'entity_type': 'LessonProgress', 'operation': 'update',
+                             'data': {'lesson': self.lesson.id, 'score': i, 'completed': True}}
+            operations.append(dict(operation, idempotency_key=f'{prefix}-{i}'))
+        return operations
+
+    def _batch(self, operations):
+        return self.client.post(reverse('sync-upsert-batch'), {'operations': operations}, format='json')
+
+    def test_batch_applies_operations_with_per_item_results(self):
+        response = self._batch(self._operations(6))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['index'] for r in response.data['results']], list(range(6)))
+        self.assertEqual(response.data['summary']['applied'], 6)
+        self.assertEqual(PracticeSession.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(set(VocabularyWord.objects.filter(user=self.user).values_list('word', flat=True)), {'word1', 'word4'})
+        progress = LessonProgress.objects.get(user=self.user, lesson=self.lesson)
+        self.assertEqual(progress.score, 5)
+        # First touch of the lesson creates it, the second updates it
+        self.assertEqual(response.data['results'][2]['body']['operation'], 'created')
+        self.assertEqual(response.data['results'][5]['body']['operation'], 'updated')
+        # Side effects normally sent through signals still happen
+        self.assertEqual(ActivityEvent.objects.filter(verb=ActivityEvent.PRACTICE_SESSION).count(), 2)
+        self.assertEqual(ActivityEvent.objects.filter(verb=ActivityEvent.LESSON_COMPLETED).count(), 1)
+        self.assertEqual(DailyPlatformStats.objects.get(date=timezone.localdate(), session_type='').sessions, 2)
+
+    def test_replayed_batch_is_not_applied_twice(self):
+        operations = self._operations(6)
+        first = self._batch(operations)
+        second = self._batch(operations)
+
+        self.assertEqual(PracticeSession.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            [r['body'] for r in second.data['results']],
+            [r['body'] for r in first.data['results']],
+        )
+
+    def test_single_and_batch_endpoints_share_keys(self):
+        operation = self._operations(1)[0]
+        payload = {k: v for k, v in operation.items() if k != 'idempotency_key'}
+        self.client.post(reverse('sync-upsert'), payload, format='json', HTTP_IDEMPOTENCY_KEY=operation['idempotency_key'])
+
+        response = self._batch([operation])
+
+        self.assertEqual(response.data['results'][0]['status'], status.HTTP_201_CREATED)
+        self.assertEqual(PracticeSession.objects.filter(user=self.user).count(), 1)
+
+    def test_invalid_item_fails_alone_and_releases_its_key(self):
+        operations = self._operations(3)
+        operations[0]['data'] = {'session_type': 'grammar'}
+
+        response = self._batch(operations)
+
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses[0], status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(statuses[1:], [status.HTTP_201_CREATED, status.HTTP_201_CREATED])
+        self.assertFalse(SyncIdempotencyKey.objects.filter(key='op-0').exists())
+
+    def test_batch_query_count_does_not_grow_with_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self._batch(self._operations(30, prefix='small'))
+        # Same starting state for the larger batch: a fresh learner on a fresh day
+        DailyPlatformStats.objects.all().delete()
+        self.client.force_authenticate(user=User.objects.create_user(username='other', password='password123'))
+        with CaptureQueriesContext(connection) as large:
+            self._batch(self._operations(90, prefix='large'))
+
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+
+class SyncChangeLogTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='syncer', email='syncer@example.com', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.lesson = Lesson.objects.create(slug='sync-lesson', title='Sync Lesson', lesson_type='kids_4_10', content_type='vocabulary')
+        # Drop whatever user creation logged so tests start from an empty log
+        SyncChange.objects.filter(user=self.user).delete()
+
+    def _changes(self, after_seq=0, limit=None):
+        params = {'after_seq': after_seq}
+        if limit:
+            params['limit'] = limit
+        return self.client.get(reverse('sync-changes'), params)
+
+    def test_writes_are_logged_with_increasing_seq(self):
+        VocabularyWord.objects.create(user=self.user, word='apple', definition='a fruit')
+        TeenFavorite.objects.create(user=self.user, story_id='story-1')
+        deck = FlashcardDeck.objects.create(user=self.user, title='Deck')
+        Flashcard.objects.create(deck=deck, front='apple', back='a fruit', next_review_date=timezone.now())
+
+        response = self._changes()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entities = [c['entity'] for c in response.data['changes']]
+        self.assertEqual(entities, ['VocabularyWord', 'TeenFavorite', 'FlashcardDeck', 'Flashcard'])
+        seqs = [c['seq'] for c in response.data['changes']]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(response.data['next_seq'], seqs[-1])
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(response.data['changes'][0]['data']['word'], 'apple')
+
+    def test_pages_resume_from_next_seq(self):
+        for i in range(5):
+            VocabularyWord.objects.create(user=self.user, word=f'word{i}', definition='a word')
+
+        first = self._changes(limit=2)
+        second = self._changes(after_seq=first.data['next_seq'], limit=2)
+        third = self._changes(after_seq=second.data['next_seq'], limit=2)
+
+        self.assertTrue(first.data['has_more'])
+        self.assertTrue(second.data['has_more'])
+        self.assertFalse(third.data['has_more'])
+        words = [c['data']['word'] for page in (first, second, third) for c in page.data['changes']]
+        self.assertEqual(words, [f'word{i}' for i in range(5)])
+
+    def test_entity_updated_twice_appears_once_at_its_latest_seq(self):
+        word = VocabularyWord.objects.create(user=self.user, word='apple', definition='a fruit')
+        TeenFavorite.objects.create(user=self.user, story_id='story-1')
+        word.definition = 'a red fruit'
+        word.save()
+
+        changes = self._changes().data['changes']
+
+        self.assertEqual([c['entity'] for c in changes], ['TeenFavorite', 'VocabularyWord'])
+        self.assertEqual(changes[1]['data']['definition'], 'a red fruit')
+
+    def test_delete_leaves_a_tombstone(self):
+        word = VocabularyWord.objects.create(user=self.user, word='apple', definition='a fruit')
+        cursor = self._changes().data['next_seq']
+        word_id = word.id
+        word.delete()
+
+        changes = self._changes(after_seq=cursor).data['changes']
+
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['operation'], SyncChange.DELETE)
+        self.assertEqual(changes[0]['entity_id'], word_id)
+        self.assertIsNone(changes[0]['data'])
+
+    def test_category_progress_and_batch_writes_are_logged(self):
+        update_category_progress_from_activity(self.user, 'teen_kids', points=10, score=100, games=1)
+        update_category_progress_from_activity(self.user, 'teen_kids', points=10, score=100, games=1)
+        self.client.post(reverse('sync-upsert-batch'), {'operations': [
+            {'entity_type': 'VocabularyWord', 'operation': 'create',
+             'data': {'word': 'pear', 'definition': 'a fruit'}, 'idempotency_key': 'log-1'},
+            {'entity_type': 'LessonProgress', 'operation': 'update',
+             'data': {'lesson': self.lesson.id, 'score': 80}, 'idempotency_key': 'log-2'},
+        ]}, format='json')
+
+        changes = self._changes().data['changes']
+
+        entities = sorted(c['entity'] for c in changes)
+        self.assertEqual(entities, ['CategoryProgress', 'LessonProgress', 'VocabularyWord'])
+        progress = next(c for c in changes if c['entity'] == 'CategoryProgress')
+        self.assertEqual(progress['data']['total_points'], 20)
+
+    def test_cursor_older_than_pruned_tombstones_is_gone(self):
+        word = VocabularyWord.objects.create(user=self.user, word='apple', definition='a fruit')
+        cursor = self._changes().data['next_seq']
+        word.delete()
+        VocabularyWord.objects.create(user=self.user, word='pear', definition='a fruit')
+
+        call_command('prune_sync_tombstones', days=1, stdout=StringIO())
+        self.assertEqual(SyncChange.objects.filter(op=SyncChange.DELETE).count(), 1)
+        SyncChange.objects.filter(op=SyncChange.DELETE).update(changed_at=timezone.now() - timedelta(days=2))
+        call_command('prune_sync_tombstones', days=1, stdout=StringIO())
+
+        self.assertFalse(SyncChange.objects.filter(op=SyncChange.DELETE).exists())
+        self.assertEqual(self._changes(after_seq=cursor).status_code, status.HTTP_410_GONE)
+        # A full resync from zero still works
+        fresh = self._changes()
+        self.assertEqual([c['data']['word'] for c in fresh.data['changes']], ['pear'])
+
+    def test_backfill_records_rows_written_before_the_log_existed(self):
+        VocabularyWord.objects.create(user=self.user, word='apple', definition='a fruit')
+        SyncChange.objects.all().delete()
+        SyncState.objects.all().delete()
+
+        call_command('backfill_sync_changes', user_ids=[self.user.id], stdout=StringIO())
+        call_command('backfill_sync_changes', user_ids=[self.user.id], stdout=StringIO())
+
+        self.assertEqual(SyncChange.objects.filter(user=self.user, entity='VocabularyWord').count(), 1)
+        self.assertEqual(sync_log.current_seq(self.user), SyncChange.objects.filter(user=self.user).count())
+
+    def test_invalid_after_seq_is_rejected(self):
+        response = self.client.get(reverse('sync-changes'), {'after_seq': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_legacy_since_mode_reports_current_seq(self):
+        VocabularyWord.objects.create(user=self.user, word='apple', definition='a fruit')
+
+        response = self.client.get(reverse('sync-changes'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['next_seq'], sync_log.current_seq(self.user))
+
+
+@patch.dict(os.environ, {'GEMINI_API_KEY': 'test-key'})
+class GeminiAsyncProxyTests(TransactionTestCase):
+    def _request(self, body):
+        return AsyncRequestFactory().post('/api/kids/gemini/game', body, content_type='application/json')
+
+    def _turn(self, text):
+        return {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+
+    def test_payload_maps_history_roles(self):
+        payload = gemini.build_game_payload({
+            'gameType': 'word-chain',
+            'userInput': 'cat',
+            'conversationHistory': [{'role': 'assistant', 'content': 'Say a word!'}],
+        })
+
+        self.assertEqual([c['role'] for c in payload['contents']], ['model', 'user'])
+        self.assertTrue(payload['contents'][-1]['parts'][0]['text'].endswith('\n\ncat'))
+
+    def test_upstream_turn_is_parsed_like_the_sync_view(self):
+        turn = json.dumps({'content': '**Great** job!', 'feedback': 'Keep going', 'points': 20})
+        with patch.object(gemini, 'generate_async', AsyncMock(return_value=(200, self._turn(turn)))):
+            response = asyncio.run(views.kids_gemini_game_async(self._request({'gameType': 'word-chain', 'userInput': 'tiger'})))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = json.loads(response.content)
+        self.assertEqual(body['content'], 'Great job!\n\nKeep going')
+        self.assertEqual(body['points'], 20)
+
+    def test_upstream_auth_error_maps_to_503(self):
+        error = {'status': 403, 'error': {'message': 'API key invalid'}}
+        with patch.object(gemini, 'generate_async', AsyncMock(return_value=(403, error))):
+            response = asyncio.run(views.kids_gemini_game_async(self._request({'gameType': 'word-chain'})))
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(json.loads(response.content)['error'], 'AUTH_ERROR')
+
+    @override_settings(GEMINI_MAX_CONCURRENCY=1, GEMINI_QUEUE_TIMEOUT=0.01)
+    def test_full_pool_turns_requests_away(self):
+        async def call_with_pool_taken():
+            client, slots = gemini._async_pool()
+            await slots.acquire()
+            try:
+                return await views.kids_gemini_game_async(self._request({'gameType': 'word-chain'}))
+            finally:
+                slots.release()
+                await client.aclose()
+
+        response = asyncio.run(call_with_pool_taken())
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+@patch.dict(os.environ, {'GEMINI_API_KEY': 'test-key'})
+class GeminiStreamingTests(TransactionTestCase):
+    TURN = {'content': 'You said **red bug** so well!', 'feedback': 'Keep going!', 'points': 30, 'gameEnd': True}
+    SPOKEN = 'You said red bug so well!\n\nKeep going!'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.upstream = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(0.6, chunks=6, turn=cls.TURN))
+        cls.upstream.daemon_threads = True
+        threading.Thread(target=cls.upstream.serve_forever, daemon=True).start()
+        cls.settings_override = override_settings(GEMINI_API_BASE=f'http://127.0.0.1:{cls.upstream.server_port}')
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.upstream.shutdown()
+        cls.upstream.server_close()
+        super().tearDownClass()
+
+    def _events(self, timed_chunks):
+        events = []
+        for at, chunk in timed_chunks:
+            for block in chunk.decode().split('\n\n'):
+                if block:
+                    name, data = block.split('\n')
+                    events.append((at, name[len('event: '):], json.loads(data[len('data: '):])))
+        return events
+
+    def _check(self, started, events):
+        deltas = [data['text'] for _, name, data in events if name == 'delta']
+        self.assertGreater(len(deltas), 1)
+        self.assertEqual(''.join(deltas), self.SPOKEN)
+        # The first words arrive well before generation finishes
+        self.assertLess(events[0][0] - started, (events[-1][0] - started) / 2)
+        _, name, final = events[-1]
+        self.assertEqual(name, 'done')
+        self.assertEqual(final['points'], 30)
+        self.assertTrue(final['gameEnd'])
+        self.assertEqual(final['feedback'], 'Keep going!')
+
+    def test_spoken_text_survives_arbitrary_chunking(self):
+        reply = json.dumps({'gameInstruction': 'Say "hi"', 'content': 'Caf\u00e9 "time"\nnow', 'points': 5, 'nextStep': 'Next!'})
+        stream = gemini.SpokenTextStream('word-chain')
+
+        spoken = ''.join(stream.feed(char) for char in reply)
+
+        self.assertEqual(spoken, 'Caf\u00e9 "time"\nnow\n\nNext!')
+        self.assertEqual(stream.result()['points'], 5)
+
+    def test_sync_view_relays_chunks_as_events(self):
+        started = time.monotonic()
+        response = APIClient().post(
+            reverse('kids-gemini-game'), {'gameType': 'word-chain', 'userInput': 'red bug', 'stream': True}, format='json'
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self._check(started, self._events((time.monotonic(), chunk) for chunk in response.streaming_content))
+
+    def test_async_view_relays_chunks_as_events(self):
+        async def stream():
+            request = AsyncRequestFactory().post(
+                '/api/kids/gemini/game', {'gameType': 'word-chain', 'userInput': 'red bug', 'stream': True},
+                content_type='application/json',
+            )
+            response = await views.kids_gemini_game_async(request)
+            chunks = [(time.monotonic(), chunk) async for chunk in response.streaming_content]
+            await gemini._async_pool()[0].aclose()
+            return chunks
+
+        started = time.monotonic()
+        self._check(started, self._events(asyncio.run(stream())))
+
+
+def _counted_upstream(handler, hits):
+    """Serve ``handler`` on a free port in the background, appending to ``hits`` per request."""
+    counted = type('Counted', (handler,), {'do_POST': lambda self: (hits.append(self.path), handler.do_POST(self))})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), counted)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@patch.dict(os.environ, {'GEMINI_API_KEY': 'test-key'})
+@override_settings(UPSTREAM_CIRCUITS={'gemini': {'min_requests': 4, 'failure_rate': 0.5, 'open_seconds': 30}})
+class UpstreamCircuitBreakerTests(APITestCase):
+    TURN = {'content': 'Nice try!', 'points': 10}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hits = []
+        cls.servers = {
+            name: _counted_upstream(make_handler(0, turn=cls.TURN, fail_status=503, fail_rate=fail_rate), cls.hits)
+            for name, fail_rate in (('healthy', 0.0), ('failing', 1.0))
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        for server in cls.servers.values():
+            server.shutdown()
+            server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.hits.clear()
+
+    def _play(self, upstream):
+        with override_settings(GEMINI_API_BASE=f'http://127.0.0.1:{self.servers[upstream].server_port}'):
+            return self.client.post(reverse('kids-gemini-game'), {'gameType': 'word-chain', 'userInput': 'cat'}, format='json')
+
+    def test_repeated_failures_open_the_circuit(self):
+        for _ in range(4):
+            self.assertEqual(self._play('failing').status_code, status.HTTP_502_BAD_GATEWAY)
+        self.assertEqual(len(self.hits), 4)
+
+        response = self._play('failing')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data['error'], 'UPSTREAM_UNAVAILABLE')
+        self.assertGreater(int(response['Retry-After']), 25)
+        self.assertEqual(len(self.hits), 4)
+        circuit = UpstreamCircuit.objects.get(name=circuit_breaker.GEMINI)
+        self.assertEqual((circuit.state, circuit.total_opened, circuit.total_rejected), (UpstreamCircuit.OPEN, 1, 1))
+        self.assertFalse(UpstreamLease.objects.exists())
+
+    def test_client_errors_do_not_count_as_upstream_failures(self):
+        self.assertTrue(gemini._healthy(400))
+        self.assertFalse(gemini._healthy(429))
+        self.assertFalse(gemini._healthy(0))
+
+    def test_probe_after_open_period_closes_the_circuit(self):
+        for _ in range(4):
+            self._play('failing')
+        UpstreamCircuit.objects.filter(name=circuit_breaker.GEMINI).update(opened_at=timezone.now() - timedelta(seconds=31))
+
+        response = self._play('healthy')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['points'], 10)
+        circuit = UpstreamCircuit.objects.get(name=circuit_breaker.GEMINI)
+        self.assertEqual((circuit.state, circuit.window_requests), (UpstreamCircuit.CLOSED, 0))
+
+    def test_failed_probe_reopens_the_circuit(self):
+        for _ in range(4):
+            self._play('failing')
+        UpstreamCircuit.objects.filter(name=circuit_breaker.GEMINI).update(opened_at=timezone.now() - timedelta(seconds=31))
+
+        self.assertEqual(self._play('failing').status_code, status.HTTP_502_BAD_GATEWAY)
+
+        circuit = UpstreamCircuit.objects.get(name=circuit_breaker.GEMINI)
+        self.assertEqual((circuit.state, circuit.total_opened), (UpstreamCircuit.OPEN, 2))
+        self.assertEqual(self._play('healthy').status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @override_settings(UPSTREAM_CIRCUITS={'gemini': {'max_in_flight': 2}})
+    def test_in_flight_cap_is_shared_and_expired_leases_are_reclaimed(self):
+        held = [circuit_breaker.acquire(circuit_breaker.GEMINI) for _ in range(2)]
+
+        response = self._play('healthy')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data['error'], 'BUSY')
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.hits, [])
+
+        # A worker that died mid-call leaves its lease behind until it expires
+        UpstreamLease.objects.filter(pk=held[0].pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self._play('healthy').status_code, status.HTTP_200_OK)
+
+    def test_admin_endpoint_reports_circuits(self):
+        self._play('healthy')
+        admin = User.objects.create_superuser(username='ops', email='ops@example.com', password='password123')
+        self.client.force_authenticate(user=admin)
+
+        response = self.client.get(reverse('admin-upstreams'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [circuit] = response.data['circuits']
+        self.assertEqual(circuit['name'], circuit_breaker.GEMINI)
+        self.assertEqual(circuit['state'], UpstreamCircuit.CLOSED)
+        self.assertEqual(circuit['in_flight'], 0)
+        self.assertEqual(circuit['totals']['successes'], 1)
+
+    def test_admin_endpoint_requires_admin(self):
+        self.client.force_authenticate(user=User.objects.create_user(username='kid', password='password123'))
+
+        self.assertEqual(self.client.get(reverse('admin-upstreams')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@patch.dict(os.environ, {'GEMINI_API_KEY': 'test-key'})
+@override_settings(GEMINI_OPENING_BACKGROUND_REFILL=False, GEMINI_OPENING_POOL_SIZE=2, GEMINI_OPENING_MAX_SERVES=3)
+class GameOpeningCacheTests(APITestCase):
+    TURN = {'content': 'Hello friend! Let us play word chain. I say **cat**!', 'points': 0}
+    OPENING = {'gameType': 'word-chain', 'context': {'age': 7, 'level': 'beginner'}}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.hits = []
+        cls.upstream = _counted_upstream(make_handler(0, chunks=3, turn=cls.TURN), cls.hits)
+        cls.settings_override = override_settings(GEMINI_API_BASE=f'http://127.0.0.1:{cls.upstream.server_port}')
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.upstream.shutdown()
+        cls.upstream.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.hits.clear()
+        # Always pick the first canned opening line so requests share one pool
+        patcher = patch.object(opening_cache.random, 'randrange', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _play(self, body):
+        return self.client.post(reverse('kids-gemini-game'), body, format='json')
+
+    def test_opening_is_served_from_the_pool_after_a_miss(self):
+        first = self._play(self.OPENING)
+        second = self._play(self.OPENING)
+
+        self.assertEqual(len(self.hits), 1)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(second.data['content'], 'Hello friend! Let us play word chain. I say cat!')
+        opening = GameOpening.objects.get()
+        self.assertEqual((opening.game_type, opening.age_group, opening.level, opening.variant, opening.serves),
+                         ('word-chain', 'early elementary', 'beginner', 0, 1))
+
+    def test_miss_sends_the_chosen_opening_line_upstream(self):
+        with patch.object(gemini, 'generate', wraps=gemini.generate) as generate:
+            self._play(self.OPENING)
+
+        text = generate.call_args[0][0]['contents'][-1]['parts'][0]['text']
+        self.assertTrue(text.endswith('\n\n' + game_prompts.INITIAL_PROMPTS['word-chain'][0]))
+
+    def test_turns_with_input_or_history_are_not_cached(self):
+        self._play({**self.OPENING, 'userInput': 'cat'})
+        self._play({**self.OPENING, 'conversationHistory': [{'role': 'assistant', 'content': 'Hi!'}]})
+        self._play({**self.OPENING, 'context': {'age': 7, 'level': 'expert'}})
+
+        self.assertEqual(len(self.hits), 3)
+        self.assertFalse(GameOpening.objects.exists())
+
+    def test_age_band_shares_a_pool(self):
+        self._play(self.OPENING)
+        self._play({**self.OPENING, 'context': {'age': 8, 'level': 'beginner'}})
+        self._play({**self.OPENING, 'context': {'age': 5, 'level': 'beginner'}})
+
+        self.assertEqual(len(self.hits), 2)
+
+    def test_used_up_and_expired_openings_are_not_served(self):
+        for _ in range(4):
+            self._play(self.OPENING)
+        self.assertEqual(len(self.hits), 1)
+        self._play(self.OPENING)
+        self.assertEqual(len(self.hits), 2)
+
+        GameOpening.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self._play(self.OPENING)
+        self.assertEqual(len(self.hits), 3)
+        self.assertEqual(opening_cache.purge(), 2)
+
+    def test_refill_fills_the_pool_up_to_its_size(self):
+        opening = opening_cache.opening_for(self.OPENING)
+
+        self.assertEqual(opening_cache.refill(opening, 'test-key'), 2)
+        self.assertEqual(opening_cache.refill(opening, 'test-key'), 0)
+        self.assertEqual(len(self.hits), 2)
+
+    def test_hit_on_a_short_pool_schedules_a_refill(self):
+        self._play(self.OPENING)
+
+        with patch.object(opening_cache, 'schedule_refill') as schedule_refill:
+            self._play(self.OPENING)
+
+        schedule_refill.assert_called_once()
+        self.assertEqual(schedule_refill.call_args[0][0].variant, 0)
+
+    def test_streamed_opening_is_replayed_from_the_pool(self):
+        self._play(self.OPENING)
+
+        response = self._play({**self.OPENING, 'stream': True})
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = b''.join(response.streaming_content).decode().strip().split('\n\n')
+        self.assertEqual(events[0].split('\n')[0], 'event: delta')
+        self.assertEqual(json.loads(events[-1].split('\n')[1][len('data: '):])['content'], self.TURN['content'].replace('**', ''))
+        self.assertEqual(len(self.hits), 1)
+
+    def test_refill_command_dry_run_counts_pools(self):
+        out = StringIO()
+        call_command('refill_game_openings', '--game', 'word-chain', '--dry-run', stdout=out)
+
+        self.assertIn('Would fill 45 pools', out.getvalue())
+
+
+class UnreachableEmailBackend(locmem.EmailBackend):
+    """A mail host that refuses connections."""
+    def open(self):
+        raise ConnectionRefusedError('Connection refused')
+
+
+class CountingEmailBackend(locmem.EmailBackend):
+    """locmem backend that records each connection and rejects addresses containing 'bounce'."""
+    connections = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections.append(self)
+
+    def send_messages(self, messages):
+        if any('bounce' in address for message in messages for address in message.to):
+            raise smtplib.SMTPRecipientsRefused({})
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_HOST_USER='elora', EMAIL_HOST_PASSWORD='secret', DEFAULT_FROM_EMAIL='noreply@elora.test',
+    EMAIL_OUTBOX_RETRY_BASE=60, EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+)
+class EmailOutboxTests(APITestCase):
+    def _register(self, email='newkid@example.com'):
+        return self.client.post(reverse('register'), {
+            'name': 'New Kid', 'email': email, 'password': 'Str0ng-pass-123', 'confirm_password': 'Str0ng-pass-123',
+        }, format='json')
+
+    def _drain(self):
+        out = StringIO()
+        call_command('send_outbox_emails', '--once', '--batch-size', '2', stdout=out)
+        return out.getvalue()
+
+    def test_registration_queues_the_verification_email(self):
+        response = self._register()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['email_sent'])
+        self.assertEqual(mail.outbox, [])
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.kind, email.to_email, email.status), ('verification', 'newkid@example.com', EmailOutbox.PENDING))
+        token = EmailVerificationToken.objects.get(user__email='newkid@example.com')
+        self.assertIn(token.token, email.body)
+
+        self.assertIn('1 sent, 0 failed', self._drain())
+        [sent] = mail.outbox
+        self.assertEqual(sent.to, ['newkid@example.com'])
+        self.assertEqual(sent.alternatives[0][1], 'text/html')
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.SENT)
+
+    @override_settings(EMAIL_BACKEND='api.tests.UnreachableEmailBackend')
+    def test_registration_does_not_wait_on_the_mail_host(self):
+        response = self._register()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['email_sent'])
+        self.assertEqual(EmailOutbox.objects.get().attempts, 0)
+
+    @override_settings(EMAIL_BACKEND='api.tests.UnreachableEmailBackend')
+    def test_failures_back_off_exponentially_then_give_up(self):
+        self._register()
+        email = EmailOutbox.objects.get()
+
+        for attempt, delay in ((1, 60), (2, 120)):
+            started = timezone.now()
+            self._drain()
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (EmailOutbox.PENDING, attempt))
+            self.assertIn('Connection refused', email.last_error)
+            self.assertAlmostEqual((email.next_attempt_at - started).total_seconds(), delay, delta=5)
+            # Not due again until the backoff has passed
+            self._drain()
+            self.assertEqual(EmailOutbox.objects.get().attempts, attempt)
+            EmailOutbox.objects.update(next_attempt_at=timezone.now())
+
+        self._drain()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.FAILED, 3))
+
+    @override_settings(EMAIL_BACKEND='api.tests.CountingEmailBackend')
+    def test_worker_reuses_one_connection_and_isolates_failures(self):
+        CountingEmailBackend.connections.clear()
+        for address in ('a@example.com', 'bounce@example.com', 'b@example.com', 'c@example.com'):
+            email_outbox.enqueue(address, 'Hello', 'Body')
+
+        self.assertIn('3 sent, 1 failed', self._drain())
+
+        self.assertEqual(len(CountingEmailBackend.connections), 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(EmailOutbox.objects.get(to_email='bounce@example.com').status, EmailOutbox.PENDING)
+
+    def test_file_backend_writes_each_message(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend', EMAIL_FILE_PATH=directory):
+                self._register()
+                self._drain()
+                written = ''.join(open(os.path.join(directory, name)).read() for name in os.listdir(directory))
+
+        self.assertIn('To: newkid@example.com', written)
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.SENT)
+
+    def test_failed_registration_queues_nothing(self):
+        response = self.client.post(reverse('register'), {
+            'name': 'New Kid', 'email': 'newkid@example.com', 'password': 'Str0ng-pass-123', 'confirm_password': 'different',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class MediaDeliveryTests(SimpleTestCase):
+    SIZE = 8 * 1024 * 1024
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.root, 'videos'))
+        cls.content = bytes(range(256)) * (cls.SIZE // 256)
+        with open(os.path.join(cls.root, 'videos', 'lesson one.mp4'), 'wb') as f:
+            f.write(cls.content)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def _get(self, path='videos/lesson one.mp4', method='get', accel_redirect=None, **headers):
+        request = getattr(RequestFactory(), method)(f'/media/{path}', **headers)
+        return media.serve(request, path, self.root, accel_redirect=accel_redirect)
+
+    def _body(self, response):
+        chunks = list(response.streaming_content)
+        response.close()
+        return chunks, b''.join(chunks)
+
+    def test_full_file_is_streamed_in_large_blocks(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response['Content-Length'], str(self.SIZE))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        chunks, body = self._body(response)
+        self.assertEqual(body, self.content)
+        self.assertEqual(len(chunks), self.SIZE // media.BLOCK_SIZE)
+
+    def test_range_request_returns_only_that_slice(self):
+        response = self._get(HTTP_RANGE='bytes=5000000-6048575')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 5000000-6048575/{self.SIZE}')
+        self.assertEqual(response['Content-Length'], '1048576')
+        self.assertEqual(self._body(response)[1], self.content[5000000:6048576])
+
+    def test_open_ended_and_suffix_ranges(self):
+        tail = self._get(HTTP_RANGE=f'bytes={self.SIZE - 100}-')
+        suffix = self._get(HTTP_RANGE='bytes=-500')
+        past_end = self._get(HTTP_RANGE=f'bytes=10-{self.SIZE * 2}')
+
+        self.assertEqual(self._body(tail)[1], self.content[-100:])
+        self.assertEqual(suffix['Content-Range'], f'bytes {self.SIZE - 500}-{self.SIZE - 1}/{self.SIZE}')
+        self.assertEqual(self._body(suffix)[1], self.content[-500:])
+        self.assertEqual(past_end['Content-Length'], str(self.SIZE - 10))
+        past_end.close()
+
+    def test_unsatisfiable_range_gets_416(self):
+        response = self._get(HTTP_RANGE=f'bytes={self.SIZE}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{self.SIZE}')
+
+    def test_suffix_range_of_an_empty_file_gets_416(self):
+        open(os.path.join(self.root, 'videos', 'empty.mp4'), 'wb').close()
+        response = self._get('videos/empty.mp4', HTTP_RANGE='bytes=-5')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_malformed_or_multiple_ranges_get_the_whole_file(self):
+        for header in ('bytes=0-10,20-30', 'items=0-10', 'bytes=50-10'):
+            response = self._get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 200, header)
+            response.close()
+
+    def test_conditional_get_returns_304(self):
+        first = self._get()
+        first.close()
+
+        by_etag = self._get(HTTP_IF_NONE_MATCH=first['ETag'])
+        by_date = self._get(HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag['ETag'], first['ETag'])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        etag = self._get()['ETag']
+
+        fresh = self._get(HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE=etag)
+        stale = self._get(HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE='"outdated"')
+
+        self.assertEqual(fresh.status_code, 206)
+        self.assertEqual(stale.status_code, 200)
+        fresh.close()
+        stale.close()
+
+    def test_head_sends_headers_only(self):
+        response = self._get(method='head', HTTP_RANGE='bytes=0-99')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(response.content, b'')
+
+    def test_accel_redirect_hands_the_file_to_nginx(self):
+        response = self._get(accel_redirect='/protected-media/', HTTP_RANGE='bytes=0-99')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/videos/lesson%20one.mp4')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(response.content, b'')
+
+    def test_paths_outside_the_root_are_not_served(self):
+        for path in ('../etc/passwd', 'videos', 'videos/missing.mp4'):
+            with self.assertRaises(Http404):
+                self._get(path)
+
+    def test_media_urls_use_the_range_aware_view(self):
+        self.assertIs(resolve('/media/videos/lesson.mp4').func, media.serve)
+
+
+class PronunciationUploadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='speaker', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root, PRONUNCIATION_AUDIO_MAX_BYTES=1024 * 1024, PRONUNCIATION_SCORING_WORKERS=0
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.audio = os.urandom(300 * 1024)
+        self.name = hashlib.sha256(self.audio).hexdigest()
+
+    def _stored(self):
+        return sorted(os.listdir(os.path.join(self.media_root, audio_uploads.AUDIO_DIR)))
+
+    def test_multipart_upload_is_stored_under_its_content_hash(self):
+        response = self.client.post(reverse('submit-pronunciation-practice'), {
+            'target_text': 'She sells sea shells',
+            'user_audio_duration': '2.5',
+            'audio': SimpleUploadedFile('take1.webm', self.audio, content_type='audio/webm'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['user_audio_url'], f'/media/pronunciation_recordings/{self.name}.webm')
+        self.assertEqual(response.data['data']['user_audio_duration'], 2.5)
+        self.assertEqual(self._stored(), [f'{self.name}.webm'])
+        with open(os.path.join(self.media_root, audio_uploads.AUDIO_DIR, f'{self.name}.webm'), 'rb') as f:
+            self.assertEqual(f.read(), self.audio)
+
+    def test_raw_audio_body_takes_fields_from_the_query_string(self):
+        response = self.client.generic(
+            'POST', reverse('submit-pronunciation-practice') + '?target_text=Red+lorry&user_audio_duration=1.5',
+            self.audio, content_type='audio/ogg',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['target_text'], 'Red lorry')
+        self.assertEqual(self._stored(), [f'{self.name}.ogg'])
+
+    def test_base64_data_url_is_still_accepted_and_deduplicated(self):
+        data_url = 'data:audio/webm;base64,' + base64.b64encode(self.audio).decode()
+        for _ in range(2):
+            response = self.client.post(reverse('submit-pronunciation-practice'), {
+                'target_text': 'She sells sea shells', 'user_audio_url': data_url,
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(response.data['data']['user_audio_url'], f'/media/pronunciation_recordings/{self.name}.webm')
+        self.assertEqual(self._stored(), [f'{self.name}.webm'])
+
+    def test_stored_recordings_are_readable_by_the_web_server(self):
+        stored = os.path.join(self.media_root, audio_uploads.AUDIO_DIR, f'{self.name}.webm')
+        audio_uploads.save_stream(BytesIO(self.audio), 'audio/webm')
+        self.assertEqual(os.stat(stored).st_mode & 0o777, 0o644)
+        os.unlink(stored)
+
+        with override_settings(FILE_UPLOAD_PERMISSIONS=0o640):
+            audio_uploads.save_data_url('data:audio/webm;base64,' + base64.b64encode(self.audio).decode())
+        self.assertEqual(os.stat(stored).st_mode & 0o777, 0o640)
+
+    def test_oversized_recordings_are_refused_without_leftovers(self):
+        big = os.urandom(1024 * 1024 + 1)
+
+        response = self.client.post(reverse('submit-pronunciation-practice'), {
+            'target_text': 'Too long', 'audio': SimpleUploadedFile('long.webm', big, content_type='audio/webm'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # A body that understates its size is cut off while streaming
+        with self.assertRaises(audio_uploads.AudioTooLarge):
+            audio_uploads.save_stream(BytesIO(big), 'audio/webm')
+        with self.assertRaises(audio_uploads.AudioTooLarge):
+            audio_uploads.save_data_url('data:audio/webm;base64,' + base64.b64encode(big).decode())
+        self.assertEqual(self._stored(), [])
+        self.assertFalse(PronunciationPractice.objects.exists())
+
+    def test_multipart_part_over_the_cap_stops_the_upload(self):
+        handler = audio_uploads.AudioUploadHandler()
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('audio', 'long.webm', 'audio/webm', None)
+        handler.receive_data_chunk(b'x' * (1024 * 1024), 0)
+
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b'x', 1024 * 1024)
+        self.assertIsInstance(handler.error, audio_uploads.AudioTooLarge)
+        self.assertEqual(self._stored(), [])
+
+
+class PronunciationScoringTests(APITestCase):
+    TEXT = 'She sells sea shells by the seashore'
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='scorer', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, PRONUNCIATION_SCORING_WORKERS=1, PRONUNCIATION_SCORING_WAIT=30)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(pronunciation_scoring.shutdown)
+
+    def _wav(self, samples):
+        path = os.path.join(self.media_root, 'take.wav')
+        write_wav(path, samples)
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_syllables_are_counted_from_the_text(self):
+        self.assertEqual(pronunciation_scoring.count_syllables(self.TEXT), 8)
+        self.assertEqual(pronunciation_scoring.count_syllables('Peter Piper picked a peck'), 7)
+
+    def test_targets_without_latin_letters_still_align(self):
+        self.assertEqual(pronunciation_scoring.count_syllables('123'), 1)
+        self.assertEqual(pronunciation_scoring.count_syllables('?!'), 1)
+        # Accents neither split words nor add syllables
+        for accented, plain in (('résumé', 'resume'), ('piñata', 'pinata'), ('naïve', 'naive')):
+            self.assertEqual(
+                pronunciation_scoring.count_syllables(accented), pronunciation_scoring.count_syllables(plain), accented
+            )
+        self.assertEqual(pronunciation_scoring.count_syllables('piñata'), 3)
+
+        metrics = pronunciation_scoring.analyze(synthesize(['one', 'two', 'three']), '123')
+        self.assertTrue(metrics['speech_detected'])
+        self.assertEqual(metrics['expected_syllables'], 1)
+        self.assertGreater(metrics['syllable_coverage'], 0)
+        self.assertGreater(min(pronunciation_scoring.score(metrics)), 0)
+
+    def test_steady_reading_finds_every_syllable(self):
+        metrics = pronunciation_scoring.analyze(synthesize(self.TEXT.lower().split()), self.TEXT)
+
+        self.assertTrue(metrics['speech_detected'])
+        self.assertEqual(metrics['detected_syllables'], 8)
+        self.assertEqual(metrics['syllable_coverage'], 1.0)
+        self.assertEqual(metrics['pause_count'], 0)
+        accuracy, pronunciation, fluency = pronunciation_scoring.score(metrics)
+        self.assertGreaterEqual(min(accuracy, pronunciation, fluency), 90)
+
+    def test_long_pauses_cost_fluency(self):
+        steady = pronunciation_scoring.analyze(synthesize(self.TEXT.lower().split()), self.TEXT)
+        halting = pronunciation_scoring.analyze(synthesize(self.TEXT.lower().split(), pause=0.6), self.TEXT)
+
+        self.assertEqual(halting['pause_count'], 6)
+        self.assertGreater(halting['pause_ratio'], 0.5)
+        self.assertLess(pronunciation_scoring.score(halting)[2], pronunciation_scoring.score(steady)[2] - 30)
+        self.assertIn("Practice pausing only at natural breaks in sentences", pronunciation_scoring.advice(halting)[1])
+
+    def test_silence_scores_zero(self):
+        metrics = pronunciation_scoring.analyze(np.zeros(pronunciation_scoring.SAMPLE_RATE * 2, dtype=np.float32), self.TEXT)
+
+        self.assertFalse(metrics['speech_detected'])
+        self.assertEqual(pronunciation_scoring.score(metrics), (0.0, 0.0, 0.0))
+
+    def test_uploaded_recording_is_scored_in_the_pool(self):
+        audio = self._wav(synthesize(self.TEXT.lower().split()))
+
+        response = self.client.post(reverse('submit-pronunciation-practice'), {
+            'target_text': self.TEXT,
+            'audio': SimpleUploadedFile('take.wav', audio, content_type='audio/wav'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.data['data']
+        expected = pronunciation_scoring.score_file(audio_uploads.local_path(data['user_audio_url']), self.TEXT)
+        self.assertEqual(data['phonetic_analysis']['scoring'], 'signal')
+        self.assertEqual(data['phonetic_analysis']['signal'], expected['metrics'])
+        self.assertEqual(data['accuracy_score'], expected['scores']['accuracy'])
+        self.assertEqual(data['fluency_score'], expected['scores']['fluency'])
+        self.assertEqual(data['user_audio_duration'], expected['metrics']['duration_seconds'])
+
+    def test_slow_scoring_is_stored_when_it_finishes(self):
+        audio = self._wav(synthesize(self.TEXT.lower().split(), pause=0.6))
+        path = os.path.join(self.media_root, 'take.wav')
+        practice = PronunciationPractice.objects.create(
+            user=self.user, target_text=self.TEXT, **views._pronunciation_result(self.TEXT, pending=True)
+        )
+        self.assertEqual(practice.phonetic_analysis['scoring'], 'pending')
+
+        future = Future()
+        future.set_result(pronunciation_scoring.score_file(path, self.TEXT))
+        views._store_pronunciation_scoring(practice.id, threading.get_ident(), future)
+
+        practice.refresh_from_db()
+        self.assertEqual(practice.phonetic_analysis['scoring'], 'signal')
+        self.assertEqual(practice.fluency_score, future.result()['scores']['fluency'])
+        self.assertIn("Long pauses (6 breaks)", practice.mistakes)
+
+    def test_undecodable_recording_falls_back_to_the_text_estimate(self):
+        response = self.client.post(reverse('submit-pronunciation-practice'), {
+            'target_text': self.TEXT,
+            'audio': SimpleUploadedFile('take.wav', b'not a wav file', content_type='audio/wav'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['data']['phonetic_analysis']['scoring'], 'text')
+        self.assertEqual(response.data['data']['accuracy_score'], 75.0)
+
+
+class SerializerQueryCountTests(APITestCase):
+    """List endpoints cost the same number of queries however many rows they return."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='lister', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.created = 0
+
+    def _assert_constant_queries(self, url, add_rows):
+        add_rows(2)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        add_rows(4)
+        with self.assertNumQueries(len(few)):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def _next(self):
+        self.created += 1
+        return self.created
+
+    def _challenges(self, count, enroll=True):
+        today = timezone.now().date()
+        for _ in range(count):
+            n = self._next()
+            challenge = WeeklyChallenge.objects.create(
+                challenge_id=f'challenge-{n}', title=f'Challenge {n}', description='Practice daily',
+                category='speaking', start_date=today - timedelta(days=1), end_date=today + timedelta(days=6),
+                requirement_type='lessons_completed', requirement_value=5,
+            )
+            if enroll and n % 2:
+                UserWeeklyChallenge.objects.create(user=self.user, challenge=challenge, current_progress=n)
+
+    def _microlearning(self, count):
+        for _ in range(count):
+            n = self._next()
+            module = MicrolearningModule.objects.create(
+                slug=f'tip-{n}', title=f'Tip {n}', description='A quick tip', category='quick_tip', is_featured=True,
+            )
+            if n % 2:
+                MicrolearningProgress.objects.create(user=self.user, module=module, completed=True, score=n)
+
+    def _cultural(self, count):
+        for _ in range(count):
+            n = self._next()
+            module = CulturalIntelligenceModule.objects.create(
+                slug=f'etiquette-{n}', title=f'Etiquette {n}', description='Meeting customs', category='business_etiquette',
+            )
+            CulturalIntelligenceProgress.objects.create(user=self.user, module=module, score=n)
+
+    def _lessons(self, count):
+        for _ in range(count):
+            n = self._next()
+            lesson = Lesson.objects.create(slug=f'lesson-{n}', title=f'Lesson {n}', lesson_type='kids_4_10', content_type='vocabulary')
+            LessonProgress.objects.create(user=self.user, lesson=lesson, score=n)
+            PracticeSession.objects.create(user=self.user, session_type='vocabulary', lesson=lesson, score=n)
+
+    def test_weekly_challenges(self):
+        response = self._assert_constant_queries(reverse('adults-weekly-challenges'), self._challenges)
+
+        progress = {item['challenge_id']: item['user_progress'] for item in response.data['challenges']}
+        self.assertEqual(progress['challenge-1'], {
+            'enrolled': True, 'completed': False, 'progress': 1, 'progress_percentage': 0.0, 'points_earned': 0,
+        })
+        self.assertEqual(progress['challenge-2'], {'enrolled': False})
+
+    def test_my_weekly_challenges(self):
+        self._assert_constant_queries(reverse('adults-my-weekly-challenges'), self._challenges)
+
+    def test_microlearning_modules(self):
+        response = self._assert_constant_queries(reverse('adults-microlearning-modules'), self._microlearning)
+
+        progress = {item['slug']: item['user_progress'] for item in response.data['modules']}
+        self.assertEqual(progress['tip-1'], {'completed': True, 'score': 1.0, 'attempts': 0})
+        self.assertIsNone(progress['tip-2'])
+
+    def test_microlearning_featured(self):
+        self._assert_constant_queries(reverse('adults-microlearning-featured'), self._microlearning)
+
+    def test_cultural_modules_and_progress(self):
+        response = self._assert_constant_queries(reverse('cultural-modules'), self._cultural)
+        self.assertEqual(response.data['data'][0]['user_progress']['score'], 1.0)
+
+        self.created = 100
+        response = self._assert_constant_queries(reverse('cultural-progress'), self._cultural)
+        nested = {item['module']['slug']: item['module']['user_progress']['score'] for item in response.data['data']}
+        self.assertEqual(nested['etiquette-101'], 101.0)
+
+        # Single objects still load their own progress
+        detail = self.client.get(reverse('cultural-module-detail', args=['etiquette-1']))
+        self.assertEqual(detail.data['data']['user_progress']['score'], 1.0)
+
+    def test_flashcard_decks(self):
+        def decks(count):
+            for _ in range(count):
+                n = self._next()
+                deck = FlashcardDeck.objects.create(user=self.user, title=f'Deck {n}')
+                for side in range(n % 3):
+                    Flashcard.objects.create(deck=deck, front=f'front {side}', back='back', next_review_date=timezone.now().date())
+
+        response = self._assert_constant_queries(reverse('flashcard-decks'), decks)
+
+        counts = {item['title']: item['cards_count'] for item in response.data['data']}
+        self.assertEqual(counts, {f'Deck {n}': n % 3 for n in range(1, 7)})
+
+    def test_my_progress_and_practice_history(self):
+        self._assert_constant_queries(reverse('my-progress'), self._lessons)
+        response = self._assert_constant_queries(reverse('practice-history'), self._lessons)
+        self.assertEqual(response.data[0]['user_username'], 'lister')
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='historian', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+    def _walk(self, url, key='results', limit=2):
+        """Follow next_cursor to the end; returns the ids in page order and the number of pages."""
+        ids, pages, params = [], 0, {'limit': limit}
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages += 1
+            ids.extend(item['id'] for item in response.data[key])
+            if not response.data['next_cursor']:
+                self.assertIsNone(response.data['next'])
+                return ids, pages
+            self.assertIn(f"cursor={response.data['next_cursor']}", response.data['next'])
+            params = {'limit': limit, 'cursor': response.data['next_cursor']}
+
+    def test_pages_cover_the_legacy_list_once_in_order_despite_ties(self):
+        sessions = [KidsGameSession.objects.create(user=self.user, game_type='rhyme') for _ in range(7)]
+        # Several sessions share a timestamp: the primary key breaks the tie
+        same_moment = timezone.now() - timedelta(hours=1)
+        KidsGameSession.objects.filter(id__in=[s.id for s in sessions[1:5]]).update(created_at=same_moment)
+
+        legacy = self.client.get(reverse('kids-game-session'))
+        self.assertIsInstance(legacy.data, list)
+
+        ids, pages = self._walk(reverse('kids-game-session'))
+        self.assertEqual(pages, 4)
+        self.assertEqual(sorted(ids), sorted(s.id for s in sessions))
+        expected = KidsGameSession.objects.filter(user=self.user).order_by('-created_at', '-id')
+        self.assertEqual(ids, list(expected.values_list('id', flat=True)))
+
+    def test_multi_field_ordering_matches_the_catalog_order(self):
+        for n in range(6):
+            Lesson.objects.create(
+                slug=f'lesson-{n}', title=f'Lesson {n}', lesson_type=['kids_4_10', 'kids_11_17'][n % 2],
+                content_type='vocabulary', order=n // 3,
+            )
+
+        legacy = [item['id'] for item in self.client.get(reverse('lessons-list')).data]
+        ids, _ = self._walk(reverse('lessons-list'), limit=4)
+        self.assertEqual(ids, legacy)
+
+    def test_envelope_endpoints_keep_their_shape(self):
+        today = timezone.now().date()
+        for n in range(5):
+            SpacedRepetitionItem.objects.create(
+                user=self.user, item_type='vocabulary', item_id=str(n), item_content=f'word {n}',
+                next_review_date=today - timedelta(days=n % 2),
+            )
+
+        response = self.client.get(reverse('adults-spaced-repetition-due'), {'limit': 3})
+        self.assertTrue(response.data['success'])
+        self.assertEqual(response.data['count'], 3)
+        self.assertIsNotNone(response.data['next_cursor'])
+        ids, _ = self._walk(reverse('adults-spaced-repetition-due'), key='items')
+        self.assertEqual(len(set(ids)), 5)
+
+        legacy = self.client.get(reverse('adults-spaced-repetition-due'))
+        self.assertEqual(legacy.data['count'], 5)
+        self.assertNotIn('next_cursor', legacy.data)
+
+    def test_limit_is_capped_and_legacy_mode_can_be_switched_off(self):
+        for n in range(5):
+            TeenStoryProgress.objects.create(user=self.user, story_id=f'story-{n}', story_title=f'Story {n}')
+
+        with override_settings(CURSOR_PAGINATION_MAX_LIMIT=3, CURSOR_PAGINATION_DEFAULT_LIMIT=2):
+            self.assertEqual(len(self.client.get(reverse('teen-story-progress'), {'limit': 1000}).data['results']), 3)
+            self.assertEqual(len(self.client.get(reverse('teen-story-progress')).data), 5)
+            with override_settings(CURSOR_PAGINATION_LEGACY=False):
+                response = self.client.get(reverse('teen-story-progress'))
+        self.assertEqual([item['story_id'] for item in response.data['results']], ['story-0', 'story-1'])
+
+    def test_invalid_cursor_is_rejected(self):
+        for url in (reverse('my-progress'), reverse('vocabulary'), reverse('kids-favorites'), reverse('my-dictionary')):
+            response = self.client.get(url, {'cursor': 'not-a-cursor'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, url)
+
+        # A cursor from an endpoint with a different ordering does not fit either
+        token = pagination.encode_cursor(['kids_4_10', 0, 1, 5])
+        self.assertEqual(self.client.get(reverse('my-progress'), {'cursor': token}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sparse', password='password123')
+        self.client.force_authenticate(user=self.user)
+        self.history = {'conversationHistory': [{'role': 'user', 'content': 'Hello there'}] * 20}
+
+    def _get(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return response, ' '.join(query['sql'] for query in queries.captured_queries)
+
+    def test_catalog_lists_leave_heavy_columns_out_unless_asked(self):
+        Lesson.objects.create(slug='linking', title='Linking words', lesson_type='kids_4_10',
+                              content_type='vocabulary', payload={'exercises': [1, 2, 3]})
+        KidsLesson.objects.create(slug='animals', title='Animals', lesson_type='vocabulary', payload={'words': ['cat']})
+        CommonLesson.objects.create(slug='tenses', title='Tenses', description='Past and present',
+                                    category='grammar', content={'sections': ['past']})
+        MicrolearningModule.objects.create(slug='tip', title='Tip', description='Quick', category='quick_tip',
+                                           is_featured=True, content={'steps': ['one']})
+        cases = [
+            (reverse('lessons-list'), 'payload', lambda data: data),
+            (reverse('kids-lessons'), 'payload', lambda data: data),
+            (reverse('adults-common-lessons'), 'content', lambda data: data['lessons']),
+            (reverse('adults-microlearning-modules'), 'content', lambda data: data['modules']),
+            (reverse('adults-microlearning-featured'), 'content', lambda data: data['modules']),
+        ]
+        for url, heavy, items in cases:
+            response, sql = self._get(url)
+            self.assertNotIn(heavy, items(response.data)[0], url)
+            self.assertIn('title', items(response.data)[0], url)
+            self.assertNotIn(f'"{heavy}"', sql, url)
+
+            response, sql = self._get(url, {'fields': f'title,{heavy}'})
+            self.assertEqual(set(items(response.data)[0]), {'id', 'title', heavy}, url)
+            self.assertIn(f'"{heavy}"', sql, url)
+
+        # The detail view still returns the lesson content
+        response = self.client.get(reverse('lesson-detail', args=['linking']))
+        self.assertEqual(response.data['payload'], {'exercises': [1, 2, 3]})
+
+    def test_paginated_game_sessions_are_slim_but_legacy_list_keeps_history(self):
+        KidsGameSession.objects.create(user=self.user, game_type='conversation', details=self.history)
+        url = reverse('kids-game-session')
+
+        legacy, _ = self._get(url)
+        self.assertEqual(legacy.data[0]['details'], self.history)
+
+        page, sql = self._get(url, {'limit': 10})
+        self.assertNotIn('details', page.data['results'][0])
+        self.assertNotIn('"details"', sql)
+
+        page, _ = self._get(url, {'limit': 10, 'fields': 'game_type,details'})
+        self.assertEqual(page.data['results'][0]['details'], self.history)
+
+    def test_exclude_drops_fields_and_defers_the_column(self):
+        TeenGameSession.objects.create(user=self.user, game_type='debate-club', details=self.history)
+        response, sql = self._get(reverse('teen-game-session'), {'exclude': 'details,rounds'})
+        self.assertNotIn('details', response.data[0])
+        self.assertNotIn('rounds', response.data[0])
+        self.assertIn('game_type', response.data[0])
+        self.assertNotIn('"details"', sql)
+
+        response, _ = self._get(reverse('teen-game-session'))
+        self.assertEqual(response.data[0]['details'], self.history)
+
+    def test_nested_serializers_ignore_the_query(self):
+        module = MicrolearningModule.objects.create(slug='tip', title='Tip', description='Quick',
+                                                    category='quick_tip', content={'steps': ['one']})
+        progress = MicrolearningProgress.objects.create(user=self.user, module=module)
+        request = Request(RequestFactory().get('/', {'fields': 'title'}))
+        data = MicrolearningProgressSerializer(progress, context={'request': request}).data
+        self.assertEqual(data['module']['content'], {'steps': ['one']})
+        data = MicrolearningModuleSerializer(module, context={'request': request}).data
+        self.assertEqual(set(data), {'id', 'title'})
+
+class JSONRenderingTests(SimpleTestCase):
+    def _payload(self):
+        utc = timezone.now().replace(microsecond=123456)
+        return ReturnDict({
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'created_at': utc,
+            'local': utc.astimezone(dt_timezone(timedelta(hours=5, minutes=30))),
+            'naive': datetime(2024, 1, 2, 3, 4, 5),
+            'day': date(2024, 2, 29),
+            'at': dt_time(7, 30),
+            'price': Decimal('12.50'),
+            'label': gettext_lazy('Lessons'),
+            'text': 'Café ☕ line\u2028separator',
+            'counts': {1: 'one', 2: 'two'},
+            'scores': ReturnList([np.int64(3), np.float64(0.5)], serializer=None),
+            'raw': b'bytes',
+            'nested': [{'ok': True, 'none': None, 'ratio': 0.1}],
+        }, serializer=None)
+
+    def test_orjson_output_matches_the_drf_renderer(self):
+        data = self._payload()
+        self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'\\u2028', renderers.ORJSONRenderer().render(data))
+
+    def test_stdlib_fallback(self):
+        data = self._payload()
+        with patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.ORJSONRenderer().render(data), JSONRenderer().render(data))
+            self.assertEqual(renderers.ORJSONParser().parse(BytesIO(b'{"a": [1, 2]}')), {'a': [1, 2]})
+        # Values orjson cannot encode go through the stdlib as well
+        self.assertEqual(renderers.ORJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+        self.assertEqual(renderers.ORJSONRenderer().render(None), b'')
+
+    def test_parser_matches_the_drf_parser(self):
+        parser = renderers.ORJSONParser()
+        body = '{"word": "naïve", "score": 9.5, "tags": ["a"]}'
+        self.assertEqual(parser.parse(BytesIO(body.encode())), {'word': 'naïve', 'score': 9.5, 'tags': ['a']})
+        self.assertEqual(parser.parse(BytesIO(body.encode('latin-1')), parser_context={'encoding': 'latin-1'})['word'], 'naïve')
+        for bad in (b'{"a": ', b'{"a": NaN}', b'\xff'):
+            with self.assertRaises(ParseError):
+                parser.parse(BytesIO(bad))
+
+    def test_settings_select_the_backend(self):
+        self.assertEqual(settings.JSON_BACKEND, 'orjson')
+        self.assertEqual(api_settings.DEFAULT_RENDERER_CLASSES, [renderers.ORJSONRenderer])
+        self.assertIn(renderers.ORJSONParser, api_settings.DEFAULT_PARSER_CLASSES)
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='poller', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+    def _revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_catalog_is_answered_with_304_before_the_query(self):
+        lesson = Lesson.objects.create(slug='linking', title='Linking words', lesson_type='kids_4_10', content_type='vocabulary')
+        url = reverse('lessons-list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertIn('Last-Modified', first)
+        etag = first['ETag']
+
+        with self.assertNumQueries(1):
+            again = self._revalidate(url, etag)
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(again['ETag'], etag)
+        self.assertEqual(again.content, b'')
+
+        # Other filters and field sets are other representations
+        self.assertNotEqual(self.client.get(url, {'type': 'kids_4_10'})['ETag'], etag)
+        self.assertEqual(self._revalidate(url, etag, fields='title').status_code, status.HTTP_200_OK)
+
+        lesson.title = 'Linking words 2'
+        lesson.save()
+        edited = self._revalidate(url, etag)
+        self.assertEqual(edited.status_code, status.HTTP_200_OK)
+        self.assertEqual(edited.data[0]['title'], 'Linking words 2')
+
+        lesson.delete()
+        self.assertEqual(self._revalidate(url, edited['ETag']).data, [])
+
+    def test_each_catalog_endpoint_revalidates(self):
+        EmailTemplate.objects.create(template_id='follow-up', title='Follow up', description='After a meeting',
+                                     template_type='follow_up', subject_template='Re: {topic}', body_template='Hi')
+        for name in ('kids-lessons', 'achievements-list', 'videos-list', 'email-templates'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK, name)
+            self.assertEqual(self._revalidate(reverse(name), response['ETag']).status_code, status.HTTP_304_NOT_MODIFIED, name)
+
+        # Opening a template counts a use, which the list shows
+        etag = self.client.get(reverse('email-templates'))['ETag']
+        template = EmailTemplate.objects.get()
+        self.client.get(reverse('email-template-detail', args=[template.id]))
+        response = self._revalidate(reverse('email-templates'), etag)
+        self.assertEqual(response.data['data'][0]['usage_count'], 1)
+
+    def test_per_user_responses_follow_the_users_own_rows(self):
+        module = CulturalIntelligenceModule.objects.create(
+            slug='etiquette', title='Etiquette', description='Meeting customs', category='business_etiquette',
+        )
+        other = User.objects.create_user(username='other', password='password123')
+        url = reverse('cultural-modules')
+        mine = self.client.get(url)
+        self.assertIn('private', mine['Cache-Control'])
+        self.assertIn('Authorization', mine['Vary'])
+        self.assertNotIn('Last-Modified', mine)
+        self.client.force_authenticate(user=other)
+        theirs = self.client.get(url)
+        self.assertNotEqual(mine['ETag'], theirs['ETag'])
+
+        CulturalIntelligenceProgress.objects.create(user=self.user, module=module, score=80)
+        self.assertEqual(self._revalidate(url, theirs['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.force_authenticate(user=self.user)
+        response = self._revalidate(url, mine['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['data'][0]['user_progress']['score'], 80)
+
+    def test_dashboard_changes_with_progress_date_and_expiring_recommendations(self):
+        url = reverse('adults-dashboard')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self._revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        update_category_progress_from_activity(self.user, 'adults_beginner', points=10, score=90, lessons=1)
+        etag = self._revalidate(url, etag)['ETag']
+        # Later activity updates the row with QuerySet.update(), which sends no signal
+        update_category_progress_from_activity(self.user, 'adults_beginner', points=10, score=90, lessons=1)
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.data['dashboard']['progress_summary']['adults_beginner']['total_points'], 20)
+        etag = response['ETag']
+
+        PersonalizedRecommendation.objects.create(
+            user=self.user, recommendation_type='lesson', title='Try this', description='Next lesson',
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.data['dashboard']['recommendations']['pending'], 1)
+        etag = response['ETag']
+
+        later = timezone.now() + timedelta(hours=2)
+        with patch('django.utils.timezone.now', return_value=later):
+            response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['dashboard']['recommendations']['pending'], 0)
+
+    def test_errors_and_if_modified_since_alone_are_not_cached(self):
+        KidsLesson.objects.create(slug='animals', title='Animals', lesson_type='vocabulary')
+        first = self.client.get(reverse('kids-lessons'))
+        response = self.client.get(reverse('kids-lessons'), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with patch.object(views.Lesson.objects, 'filter', side_effect=RuntimeError('database is down')):
+            response = self.client.get(reverse('lessons-list'))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertNotIn('ETag', response)
+
+        with override_settings(CONDITIONAL_GET=False):
+            self.assertNotIn('ETag', self.client.get(reverse('kids-lessons')))
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        caches[catalog_cache.CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(username='browser', password='password123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_catalog_is_served_from_the_shared_cache_until_an_admin_edit(self):
+        for n in range(3):
+            Lesson.objects.create(slug=f'lesson-{n}', title=f'Lesson {n}', lesson_type='beginner',
+                                  content_type='vocabulary', order=n)
+        url = reverse('lessons-list')
+        first = self.client.get(url)
+        self.assertEqual(len(first.data), 3)
+
+        # The version counters, then the cached entry
+        with self.assertNumQueries(2):
+            again = self.client.get(url)
+        self.assertEqual(again.data, first.data)
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+        admin = User.objects.create_superuser(username='editor', email='editor@example.com', password='password123')
+        self.client.force_login(admin)
+        lesson = Lesson.objects.get(slug='lesson-0')
+        response = self.client.post(reverse('admin:api_lesson_changelist'), {
+            'action': 'delete_selected', '_selected_action': [lesson.id], 'post': 'yes',
+        })
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual([item['slug'] for item in self.client.get(url).data], ['lesson-1', 'lesson-2'])
+
+        Lesson.objects.filter(slug='lesson-1').update(title='Renamed without a signal')
+        content_versions.bump_table(Lesson)
+        self.assertEqual(self.client.get(url).data[0]['title'], 'Renamed without a signal')
+
+    def test_added_catalogs_are_cached_and_follow_edits(self):
+        CommonLesson.objects.create(slug='grammar', title='Grammar', description='Tenses', category='grammar')
+        entry = DictionaryEntry.objects.create(word='meeting', definitions=['A gathering of people'])
+        cases = [
+            (reverse('adults-common-lessons'), {}, CommonLesson.objects.get(), 'title', lambda data: data['lessons'][0]['title']),
+            (reverse('dictionary-search'), {'q': 'meet'}, entry, 'category', lambda data: data['data'][0]['category']),
+            (reverse('dictionary-lookup', args=['meeting']), {}, entry, 'phonetic', lambda data: data['data']['phonetic']),
+        ]
+        for url, params, row, field, read in cases:
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_200_OK, url)
+            with self.assertNumQueries(2):
+                self.client.get(url, params)
+            setattr(row, field, 'edited')
+            row.save()
+            self.assertEqual(read(self.client.get(url, params).data), 'edited', url)
+
+        # Misses and bad requests are not stored
+        self.assertEqual(self.client.get(reverse('dictionary-lookup', args=['agenda'])).status_code, status.HTTP_404_NOT_FOUND)
+        DictionaryEntry.objects.create(word='agenda', definitions=['A list of topics'])
+        self.assertEqual(self.client.get(reverse('dictionary-lookup', args=['agenda'])).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('dictionary-search')).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_per_user_catalogs_keep_each_users_progress(self):
+        module = MicrolearningModule.objects.create(slug='tip', title='Quick tip', description='Small talk',
+                                                    category='quick_tip', is_featured=True)
+        other = User.objects.create_user(username='other-browser', password='password123')
+        url = reverse('adults-microlearning-modules')
+        self.assertIsNone(self.client.get(url).data['modules'][0]['user_progress'])
+
+        MicrolearningProgress.objects.create(user=self.user, module=module, completed=True, score=90)
+        self.assertEqual(self.client.get(url).data['modules'][0]['user_progress']['score'], 90)
+        self.client.force_authenticate(user=other)
+        self.assertIsNone(self.client.get(url).data['modules'][0]['user_progress'])
+        self.assertIsNone(self.client.get(reverse('adults-microlearning-featured')).data['modules'][0]['user_progress'])
+
+    def test_unavailable_cache_falls_back_to_the_view(self):
+        KidsLesson.objects.create(slug='colours', title='Colours', lesson_type='vocabulary')
+        backend = caches[catalog_cache.CACHE_ALIAS]
+        with patch.object(backend, 'get', side_effect=RuntimeError('cache is down')), \
+                patch.object(catalog_cache.logger, 'error') as logged:
+            response = self.client.get(reverse('kids-lessons'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['slug'], 'colours')
+        logged.assert_called_once()
+
+        with patch.object(backend, 'set', side_effect=RuntimeError('cache is down')), \
+                patch.object(catalog_cache.logger, 'error') as logged:
+            self.assertEqual(self.client.get(reverse('kids-lessons')).status_code, status.HTTP_200_OK)
+        logged.assert_called_once()
+
+
+class GamePromptRegistryTests(SimpleTestCase):
+    def test_prompt_is_rendered_for_age_band_and_level(self):
+        prompt = game_prompts.system_prompt('word-chain', 5, 'beginner')
+
+        self.assertIn('with a 5-year-old child (age group: preschool/kindergarten)', prompt)
+        self.assertIn("The child's level is beginner.", prompt)
+        self.assertIn('Use ONLY very simple words', prompt)
+        self.assertIn('Word Chain game with a 5-year-old child', prompt)
+        self.assertIn('{ "gameInstruction": ', prompt)
+        self.assertNotIn('\x00', prompt)
+
+    def test_unknown_game_uses_base_prompt(self):
+        prompt = game_prompts.system_prompt('no-such-game', 9, 'advanced')
+
+        self.assertEqual(prompt, game_prompts.BASE_PROMPT.format(
+            age=9, level='advanced', age_group='elementary', complexity='moderate'
+        ))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -45,6 +46,7 @@ urlpatterns = [
     
     # ============= Teen Specific =============
     path('teen/dashboard', views.teen_dashboard, name='teen-dashboard'),
+    path('teen/story/progress', views.teen_story_progress, name='teen-story-progress'),
     
     # ============= Page Eligibility =============
     path('page-eligibility/', views.get_all_page_eligibilities, name='get-all-page-eligibilities'),
@@ -79,7 +81,8 @@ urlpatterns = [
     path('kids/parental-controls/settings', views.kids_parental_controls_settings, name='kids-parental-controls-settings'),
     path('kids/parental-controls/pin', views.kids_parental_controls_pin, name='kids-parental-controls-pin'),
     path('kids/analytics', views.kids_analytics, name='kids-analytics'),
-    path('kids/gemini/game', views.kids_gemini_game, name='kids-gemini-game'),
+    # The ASGI pool (crud/asgi.py) serves the non-blocking variant
+    path('kids/gemini/game', views.kids_gemini_game_async if settings.GEMINI_ASYNC_PROXY else views.kids_gemini_game, name='kids-gemini-game'),
     
     # ============= Kids Story Management =============
     path('kids/stories/enrollments', views.kids_story_enrollments, name='kids-story-enrollments'),
@@ -105,11 +108,13 @@ urlpatterns = [
     # ============= Sync & Offline Support =============
     path('sync/changes', views.sync_changes, name='sync-changes'),
     path('sync/upsert', views.idempotent_upsert, name='sync-upsert'),
+    path('sync/upsert/batch', views.idempotent_upsert_batch, name='sync-upsert-batch'),
     
     # ============= Admin Endpoints =============
     path('admin/settings', views.admin_settings, name='admin-settings'),
     path('admin/avatar', views.admin_avatar_upload, name='admin-avatar-upload'),
     path('admin/dashboard/stats', views.admin_dashboard_stats, name='admin-dashboard-stats'),
+    path('admin/upstreams', views.admin_upstreams, name='admin-upstreams'),
     path('admin/activities', views.admin_activities_list, name='admin-activities-list'),
     path('admin/activities/<str:activity_id>', views.admin_activity_detail, name='admin-activity-detail'),
     path('admin/users', views.admin_users_list, name='admin-users-list'),
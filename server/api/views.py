@@ -2,10 +2,10 @@ from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import check_password, make_password
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Avg, Sum, Count, Q, F, Max
+from django.db import connection, transaction
+from django.db.models import Avg, Sum, Count, Q, F, Max, Min, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
 from django.utils.text import slugify
-from collections import defaultdict
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -14,18 +14,21 @@ from rest_framework import status
 from datetime import datetime, timedelta
 from math import ceil
 import logging
-from django.core.mail import send_mail, EmailMultiAlternatives
+from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
 from django.template.loader import render_to_string
 from django.core.cache import cache
+from django.http import JsonResponse
+from asgiref.sync import sync_to_async
 from decouple import config
 import google.oauth2.id_token
 import google.auth.transport.requests
 import requests
+import httpx
 import json
-import re
-import random
+import functools
+import threading
 
 from .serializers import (
     RegisterSerializer, LoginSerializer, UserSerializer, UserProfileSerializer,
@@ -76,7 +79,13 @@ from .models import (
     DictionaryEntry, UserDictionary, FlashcardDeck, Flashcard, FlashcardReview,
     DailyGoal, UserToolbarPreference, MultiModePracticeSession,
     EmailTemplate, EmailPracticeSession, PronunciationPractice,
-    CulturalIntelligenceModule, CulturalIntelligenceProgress, SearchHistory
+    CulturalIntelligenceModule, CulturalIntelligenceProgress, SearchHistory, ActivityEvent
+)
+from . import activity_log, audio_uploads, catalog_cache, circuit_breaker, content_versions, email_outbox, gemini, idempotency, opening_cache, pagination, platform_stats, pronunciation_scoring, sync_batch, sync_log
+from .activity_feed import FeedSource, InvalidCursor, decode_cursor, fetch_page
+from .category_progress import (
+    ALL_CATEGORIES, ADULT_CATEGORIES, get_category_progress_rows,
+    sync_category_progress, update_category_progress_from_activity,
 )
 
 logger = logging.getLogger(__name__)
@@ -106,370 +115,6 @@ def get_category_from_lesson_type(lesson_type: str) -> str:
     return mapping.get(lesson_type, 'adults_beginner')
 
 
-def sync_category_progress(user, category, category_progress):
-    """Sync category progress with existing progress data from source tables - SAVES TO MYSQL"""
-    try:
-        from django.utils import timezone
-        
-        logger.debug(f"Syncing category progress for user {user.id}, category {category}")
-        
-        if category == 'young_kids':
-            kids_progress = KidsProgress.objects.filter(user=user).first()
-            logger.debug(f"YoungKids: Found KidsProgress: {kids_progress is not None}")
-            if kids_progress:
-                logger.debug(f"YoungKids: Points={kids_progress.points}, Streak={kids_progress.streak}")
-                category_progress.total_points = kids_progress.points or 0
-                category_progress.total_streak = kids_progress.streak or 0
-                details = kids_progress.details or {}
-                
-                # Count completed stories
-                story_enrollments = details.get('storyEnrollments', [])
-                if not story_enrollments:
-                    # Also check StoryEnrollment table
-                    story_enrollments_db = StoryEnrollment.objects.filter(user=user, completed=True)
-                    stories_count = story_enrollments_db.count()
-                    logger.debug(f"YoungKids: Found {stories_count} completed stories from StoryEnrollment table")
-                    category_progress.stories_completed = stories_count
-                else:
-                    stories_completed_count = len([
-                        s for s in story_enrollments
-                        if s.get('completed', False)
-                    ])
-                    logger.debug(f"YoungKids: Found {stories_completed_count} completed stories from details")
-                    category_progress.stories_completed = stories_completed_count
-                category_progress.lessons_completed = category_progress.stories_completed  # Also set lessons_completed for consistency
-                
-                # Count vocabulary words
-                vocab_dict = details.get('vocabulary', {})
-                if not vocab_dict:
-                    # Also check KidsVocabularyPractice table
-                    vocab_count = KidsVocabularyPractice.objects.filter(user=user).count()
-                    logger.debug(f"YoungKids: Found {vocab_count} vocabulary words from KidsVocabularyPractice table")
-                    category_progress.vocabulary_words = vocab_count
-                else:
-                    vocab_count = len(vocab_dict)
-                    logger.debug(f"YoungKids: Found {vocab_count} vocabulary words from details")
-                    category_progress.vocabulary_words = vocab_count
-                
-                # Count pronunciation attempts
-                pron_dict = details.get('pronunciation', {})
-                if not pron_dict:
-                    # Also check KidsPronunciationPractice table
-                    pron_count = KidsPronunciationPractice.objects.filter(user=user).count()
-                    logger.debug(f"YoungKids: Found {pron_count} pronunciation attempts from KidsPronunciationPractice table")
-                    category_progress.pronunciation_attempts = pron_count
-                else:
-                    pron_count = len(pron_dict)
-                    logger.debug(f"YoungKids: Found {pron_count} pronunciation attempts from details")
-                    category_progress.pronunciation_attempts = pron_count
-                
-                # Count games
-                games_dict = details.get('games', {})
-                if games_dict:
-                    games_count = games_dict.get('attempts', 0)
-                    logger.debug(f"YoungKids: Found {games_count} games from details")
-                    category_progress.games_completed = games_count
-                else:
-                    # Also check KidsGameSession table
-                    games_count = KidsGameSession.objects.filter(user=user, completed=True).count()
-                    logger.info(f"YoungKids: Found {games_count} games from KidsGameSession table")
-                    category_progress.games_completed = games_count
-                
-                # Update last activity if there's any progress
-                if category_progress.total_points > 0 or category_progress.stories_completed > 0:
-                    category_progress.last_activity = timezone.now()
-                
-                # Calculate average score from practice sessions
-                if category_progress.pronunciation_attempts > 0:
-                    pron_practices = KidsPronunciationPractice.objects.filter(user=user)
-                    if pron_practices.exists():
-                        scores = [p.best_score for p in pron_practices if p.best_score > 0]
-                        if scores:
-                            category_progress.average_score = sum(scores) / len(scores)
-                            logger.info(f"YoungKids: Calculated average score: {category_progress.average_score}")
-                
-                # Calculate practice time from various sources
-                practice_time_minutes = 0
-                
-                # 1. From game sessions (duration_seconds converted to minutes)
-                game_sessions = KidsGameSession.objects.filter(user=user)
-                game_time_seconds = sum(g.duration_seconds for g in game_sessions if g.duration_seconds)
-                practice_time_minutes += game_time_seconds // 60
-                logger.info(f"YoungKids: Game sessions time: {game_time_seconds // 60} minutes")
-                
-                # 2. Estimate from pronunciation attempts (2 minutes per attempt)
-                if category_progress.pronunciation_attempts > 0:
-                    pron_time = category_progress.pronunciation_attempts * 2
-                    practice_time_minutes += pron_time
-                    logger.info(f"YoungKids: Pronunciation time estimate: {pron_time} minutes")
-                
-                # 3. Estimate from story completions (5 minutes per story)
-                if category_progress.stories_completed > 0:
-                    story_time = category_progress.stories_completed * 5
-                    practice_time_minutes += story_time
-                    logger.info(f"YoungKids: Story time estimate: {story_time} minutes")
-                
-                # 4. Estimate from vocabulary practice (1 minute per word)
-                if category_progress.vocabulary_words > 0:
-                    vocab_time = min(category_progress.vocabulary_words * 1, 60)  # Cap at 60 minutes
-                    practice_time_minutes += vocab_time
-                    logger.info(f"YoungKids: Vocabulary time estimate: {vocab_time} minutes")
-                
-                category_progress.practice_time_minutes = practice_time_minutes
-                logger.info(f"YoungKids: Total practice time: {practice_time_minutes} minutes")
-                
-                logger.info(f"YoungKids: Saving - Points={category_progress.total_points}, Stories={category_progress.stories_completed}, Vocab={category_progress.vocabulary_words}, Time={practice_time_minutes}min")
-                category_progress.save()  # ← SAVE TO MYSQL
-            else:
-                logger.warning(f"YoungKids: No KidsProgress found for user {user.id}")
-        
-        elif category == 'teen_kids':
-            teen_progress = TeenProgress.objects.filter(user=user).first()
-            logger.info(f"TeenKids: Found TeenProgress: {teen_progress is not None}")
-            if teen_progress:
-                logger.info(f"TeenKids: Points={teen_progress.points}, Streak={teen_progress.streak}, Missions={teen_progress.missions_completed}")
-                category_progress.total_points = teen_progress.points or 0
-                category_progress.total_streak = teen_progress.streak or 0
-                category_progress.stories_completed = teen_progress.missions_completed or 0
-                category_progress.lessons_completed = teen_progress.missions_completed or 0  # Also set lessons_completed for consistency
-                category_progress.vocabulary_words = teen_progress.vocabulary_attempts or 0
-                category_progress.pronunciation_attempts = teen_progress.pronunciation_attempts or 0
-                category_progress.games_completed = teen_progress.games_attempts or 0
-                
-                # Calculate average score from practice sessions
-                if category_progress.pronunciation_attempts > 0:
-                    pron_practices = TeenPronunciationPractice.objects.filter(user=user)
-                    if pron_practices.exists():
-                        scores = [p.best_score for p in pron_practices if p.best_score > 0]
-                        if scores:
-                            category_progress.average_score = sum(scores) / len(scores)
-                            logger.info(f"TeenKids: Calculated average score: {category_progress.average_score}")
-                
-                # Calculate practice time from various sources
-                practice_time_minutes = 0
-                
-                # 1. From game sessions (if TeenGameSession exists, use it; otherwise estimate)
-                # Check if TeenGameSession model exists
-                try:
-                    from api.models import TeenGameSession
-                    game_sessions = TeenGameSession.objects.filter(user=user)
-                    if hasattr(TeenGameSession, 'duration_seconds'):
-                        game_time_seconds = sum(g.duration_seconds for g in game_sessions if g.duration_seconds)
-                        practice_time_minutes += game_time_seconds // 60
-                        logger.info(f"TeenKids: Game sessions time: {game_time_seconds // 60} minutes")
-                except (ImportError, AttributeError):
-                    # If TeenGameSession doesn't exist, estimate from games_attempts
-                    if category_progress.games_completed > 0:
-                        game_time = category_progress.games_completed * 3  # 3 minutes per game
-                        practice_time_minutes += game_time
-                        logger.info(f"TeenKids: Game time estimate: {game_time} minutes")
-                
-                # 2. Estimate from pronunciation attempts (2.5 minutes per attempt for teens)
-                if category_progress.pronunciation_attempts > 0:
-                    pron_time = category_progress.pronunciation_attempts * 2.5
-                    practice_time_minutes += int(pron_time)
-                    logger.info(f"TeenKids: Pronunciation time estimate: {int(pron_time)} minutes")
-                
-                # 3. Estimate from story/mission completions (7 minutes per mission for teens)
-                if category_progress.stories_completed > 0:
-                    story_time = category_progress.stories_completed * 7
-                    practice_time_minutes += story_time
-                    logger.info(f"TeenKids: Mission time estimate: {story_time} minutes")
-                
-                # 4. Estimate from vocabulary practice (1.5 minutes per word for teens)
-                if category_progress.vocabulary_words > 0:
-                    vocab_time = min(int(category_progress.vocabulary_words * 1.5), 90)  # Cap at 90 minutes
-                    practice_time_minutes += vocab_time
-                    logger.info(f"TeenKids: Vocabulary time estimate: {vocab_time} minutes")
-                
-                category_progress.practice_time_minutes = practice_time_minutes
-                logger.info(f"TeenKids: Total practice time: {practice_time_minutes} minutes")
-                
-                # Update last activity
-                if category_progress.total_points > 0 or category_progress.stories_completed > 0:
-                    category_progress.last_activity = timezone.now()
-                
-                logger.info(f"TeenKids: Saving - Points={category_progress.total_points}, Missions={category_progress.stories_completed}, Vocab={category_progress.vocabulary_words}, Time={practice_time_minutes}min")
-                category_progress.save()  # ← SAVE TO MYSQL
-            else:
-                logger.warning(f"TeenKids: No TeenProgress found for user {user.id}")
-        
-        # For adult categories, sync from LessonProgress
-        elif category in ['adults_beginner', 'adults_intermediate', 'adults_advanced']:
-            lesson_type_map = {
-                'adults_beginner': 'beginner',
-                'adults_intermediate': 'intermediate',
-                'adults_advanced': 'advanced'
-            }
-            lesson_type = lesson_type_map.get(category)
-            if lesson_type:
-                lessons = LessonProgress.objects.filter(
-                    user=user,
-                    lesson__lesson_type=lesson_type
-                )
-                completed_lessons = lessons.filter(completed=True)
-                category_progress.lessons_completed = completed_lessons.count()
-                
-                # Calculate points from completed lessons
-                points_from_lessons = 0
-                for lesson in completed_lessons:
-                    if lesson.score:
-                        points_from_lessons += int(lesson.score / 10)
-                        if lesson.score == 100:
-                            points_from_lessons += 20  # Perfect score bonus
-                    points_from_lessons += min(10, lesson.time_spent_minutes // 5)  # Time bonus
-                
-                category_progress.total_points = points_from_lessons
-                category_progress.practice_time_minutes = sum(l.time_spent_minutes for l in lessons)
-                
-                # Calculate average score
-                scores = [l.score for l in completed_lessons if l.score > 0]
-                if scores:
-                    category_progress.average_score = sum(scores) / len(scores)
-                
-                # Count vocabulary words for this level
-                vocab_count = VocabularyWord.objects.filter(user=user).count()
-                category_progress.vocabulary_words = vocab_count
-                
-                # Update last activity
-                if category_progress.lessons_completed > 0:
-                    last_lesson = completed_lessons.order_by('-last_attempt').first()
-                    if last_lesson:
-                        category_progress.last_activity = last_lesson.last_attempt
-                    else:
-                        category_progress.last_activity = timezone.now()
-                
-                category_progress.save()  # ← SAVE TO MYSQL
-        
-        # For IELTS/PTE category
-        elif category == 'ielts_pte':
-            # Check if user has any IELTS/PTE lessons
-            ielts_lessons = LessonProgress.objects.filter(
-                user=user,
-                lesson__lesson_type__in=['ielts', 'pte']
-            )
-            completed_ielts = ielts_lessons.filter(completed=True)
-            category_progress.lessons_completed = completed_ielts.count()
-            
-            if completed_ielts.exists():
-                points_from_lessons = 0
-                for lesson in completed_ielts:
-                    if lesson.score:
-                        points_from_lessons += int(lesson.score / 10)
-                    points_from_lessons += min(10, lesson.time_spent_minutes // 5)
-                
-                category_progress.total_points = points_from_lessons
-                category_progress.practice_time_minutes = sum(l.time_spent_minutes for l in ielts_lessons)
-                
-                scores = [l.score for l in completed_ielts if l.score > 0]
-                if scores:
-                    category_progress.average_score = sum(scores) / len(scores)
-                
-                last_lesson = completed_ielts.order_by('-last_attempt').first()
-                if last_lesson:
-                    category_progress.last_activity = last_lesson.last_attempt
-                else:
-                    category_progress.last_activity = timezone.now()
-                
-                category_progress.save()  # ← SAVE TO MYSQL
-        
-        logger.info(f"Synced category progress for user {user.id}, category {category}")
-    except Exception as e:
-        logger.error(f"Error syncing category progress: {str(e)}")
-        import traceback
-        traceback.print_exc()
-
-
-def update_category_progress_from_activity(
-    user,
-    category: str,
-    points: int = 0,
-    time_minutes: int = 0,
-    score: float = 0,
-    lessons: int = 0,
-    stories: int = 0,
-    vocabulary_words: int = 0,
-    pronunciation_attempts: int = 0,
-    games: int = 0,
-    streak: int = None
-):
-    """
-    Update CategoryProgress in MySQL database from any activity.
-    This function ensures all progress is saved to the database.
-    """
-    try:
-        category_progress, created = CategoryProgress.objects.get_or_create(
-            user=user,
-            category=category,
-            defaults={
-                'total_points': 0,
-                'total_streak': 0,
-                'lessons_completed': 0,
-                'practice_time_minutes': 0,
-                'average_score': 0.0,
-                'progress_percentage': 0.0,
-                'level': 1,
-                'stories_completed': 0,
-                'vocabulary_words': 0,
-                'pronunciation_attempts': 0,
-                'games_completed': 0,
-            }
-        )
-        
-        # If newly created, sync with existing data first
-        if created:
-            sync_category_progress(user, category, category_progress)
-            # Reload to get synced data
-            category_progress.refresh_from_db()
-        
-        # Update metrics - ALL CHANGES ARE SAVED TO MYSQL
-        from django.utils import timezone
-        
-        if points > 0:
-            category_progress.total_points = (category_progress.total_points or 0) + points
-        if time_minutes > 0:
-            category_progress.practice_time_minutes = (category_progress.practice_time_minutes or 0) + time_minutes
-        if lessons > 0:
-            category_progress.lessons_completed = (category_progress.lessons_completed or 0) + lessons
-        if stories > 0:
-            category_progress.stories_completed = (category_progress.stories_completed or 0) + stories
-        if vocabulary_words > 0:
-            category_progress.vocabulary_words = (category_progress.vocabulary_words or 0) + vocabulary_words
-        if pronunciation_attempts > 0:
-            category_progress.pronunciation_attempts = (category_progress.pronunciation_attempts or 0) + pronunciation_attempts
-        if games > 0:
-            category_progress.games_completed = (category_progress.games_completed or 0) + games
-        if streak is not None:
-            category_progress.total_streak = max(category_progress.total_streak or 0, streak)
-        
-        # Update average score if score provided
-        if score > 0:
-            # Ensure details is a dict (safety check)
-            if not isinstance(category_progress.details, dict):
-                category_progress.details = {}
-            total_scores = category_progress.details.get('total_scores', 0) + 1
-            current_avg = category_progress.average_score or 0.0
-            # Calculate new average: (old_avg * (n-1) + new_score) / n
-            if total_scores == 1:
-                category_progress.average_score = score
-            else:
-                category_progress.average_score = ((current_avg * (total_scores - 1)) + score) / total_scores
-            category_progress.details['total_scores'] = total_scores
-        
-        # Always update last activity timestamp
-        category_progress.last_activity = timezone.now()
-        
-        # SAVE TO MYSQL DATABASE - This executes UPDATE SQL statement
-        category_progress.save()  # ← WRITES TO MYSQL DATABASE TABLE
-        
-        logger.info(f"CategoryProgress updated for user {user.id}, category {category}: {points} points, {lessons} lessons")
-        
-    except Exception as e:
-        logger.error(f"Error updating CategoryProgress: {str(e)}")
-        # Don't fail the main operation if category progress update fails
-        pass
-
-
 def calculate_level(points):
     """Calculate user level from points"""
     import math
@@ -567,12 +212,12 @@ def create_or_update_user_notification(
 
 
 # ============= Authentication Views =============
-def send_verification_email(user, verification_token):
-    """Send verification email to user"""
+def queue_verification_email(user, verification_token):
+    """Queue the verification email for the outbox worker; returns False if email is not configured"""
     try:
         # Log current email backend for debugging
         email_backend = getattr(settings, 'EMAIL_BACKEND', 'unknown')
-        logger.debug(f"send_verification_email: Using backend: {email_backend}")
+        logger.debug(f"queue_verification_email: Using backend: {email_backend}")
         
         # Create verification URL - dynamically determine frontend URL
         frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173')
@@ -621,59 +266,37 @@ This is an automated email. Please do not reply to this message.
         else:
             # For SMTP backend, credentials are required
             if not settings.DEFAULT_FROM_EMAIL:
-                logger.error("DEFAULT_FROM_EMAIL is not configured. Cannot send verification email.")
+                logger.error("DEFAULT_FROM_EMAIL is not configured. Cannot queue verification email.")
                 logger.error("Please set DEFAULT_FROM_EMAIL in your .env file")
                 return False
             
             if not settings.EMAIL_HOST_USER:
-                logger.error("EMAIL_HOST_USER is not configured. Cannot send verification email.")
+                logger.error("EMAIL_HOST_USER is not configured. Cannot queue verification email.")
                 logger.error("Please set EMAIL_HOST_USER in your .env file")
                 return False
             
             if not settings.EMAIL_HOST_PASSWORD:
-                logger.error("EMAIL_HOST_PASSWORD is not configured. Cannot send verification email.")
+                logger.error("EMAIL_HOST_PASSWORD is not configured. Cannot queue verification email.")
                 logger.error("Please set EMAIL_HOST_PASSWORD in your .env file")
                 return False
             
             from_email = settings.DEFAULT_FROM_EMAIL
         
-        # Create email message with both plain text and HTML versions
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_message,
-            from_email=from_email,
-            to=[user.email]
-        )
-        msg.attach_alternative(html_message, "text/html")
-        
-        # Send the email
-        try:
-            result = msg.send(fail_silently=False)
-            email_backend = getattr(settings, 'EMAIL_BACKEND', '')
-            
-            # Log success (only log if using SMTP, console backend logs automatically)
-            if 'console' not in email_backend.lower():
-                logger.info(f"Verification email sent successfully to {user.email}")
-            
-            return True
-        except Exception as send_error:
-            error_msg = str(send_error)
-            logger.error(f"Failed to send verification email to {user.email}: {error_msg}")
-            
-            # Check for common SMTP errors
-            if 'authentication failed' in error_msg.lower() or 'invalid credentials' in error_msg.lower():
-                logger.error("SMTP Authentication failed. Check EMAIL_HOST_USER and EMAIL_HOST_PASSWORD in .env")
-            elif 'connection refused' in error_msg.lower() or 'could not connect' in error_msg.lower():
-                logger.error(f"Could not connect to SMTP server {settings.EMAIL_HOST}:{settings.EMAIL_PORT}. Check network/firewall.")
-            elif 'ssl' in error_msg.lower() or 'tls' in error_msg.lower():
-                logger.error("SSL/TLS error. Check EMAIL_USE_TLS setting and SMTP server configuration.")
-            
-            import traceback
-            logger.error(traceback.format_exc())
-            return False
+        # The send_outbox_emails worker delivers it once the registration commits
+        with transaction.atomic():
+            email_outbox.enqueue(
+                to_email=user.email,
+                subject=subject,
+                body=plain_message,
+                html_body=html_message,
+                from_email=from_email,
+                kind='verification',
+            )
+        logger.info(f"Verification email queued for {user.email}")
+        return True
         
     except Exception as e:
-        logger.error(f"Failed to send verification email to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue verification email to {user.email}: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         return False
@@ -714,17 +337,18 @@ def register(request):
                         "user_active": False
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
-                # Update user password if provided
-                if 'password' in serializer_data:
-                    existing_user.set_password(serializer_data['password'])
-                    existing_user.save()
-                
-                # Generate new verification token
-                verification_token = EmailVerificationToken.generate_token(existing_user)
-                logger.info(f"Generated new verification token for inactive user {existing_user.email}")
-                
-                # Send verification email
-                email_sent = send_verification_email(existing_user, verification_token)
+                with transaction.atomic():
+                    # Update user password if provided
+                    if 'password' in serializer_data:
+                        existing_user.set_password(serializer_data['password'])
+                        existing_user.save()
+                    
+                    # Generate new verification token
+                    verification_token = EmailVerificationToken.generate_token(existing_user)
+                    logger.info(f"Generated new verification token for inactive user {existing_user.email}")
+                    
+                    # Queue verification email; it is only sent if this transaction commits
+                    email_sent = queue_verification_email(existing_user, verification_token)
                 
                 user_serializer = UserSerializer(existing_user)
                 
@@ -746,18 +370,19 @@ def register(request):
         serializer = RegisterSerializer(data=request.data)
         
         if serializer.is_valid():
-            user = serializer.save()
-            
-            # Check if profile already exists
-            if not UserProfile.objects.filter(user=user).exists():
-                UserProfile.objects.create(user=user)
-            
-            # Create verification token
-            verification_token = EmailVerificationToken.generate_token(user)
-            logger.info(f"Created verification token for user {user.email}")
-            
-            # Send verification email
-            email_sent = send_verification_email(user, verification_token)
+            with transaction.atomic():
+                user = serializer.save()
+                
+                # Check if profile already exists
+                if not UserProfile.objects.filter(user=user).exists():
+                    UserProfile.objects.create(user=user)
+                
+                # Create verification token
+                verification_token = EmailVerificationToken.generate_token(user)
+                logger.info(f"Created verification token for user {user.email}")
+                
+                # Queue verification email; it is only sent if this transaction commits
+                email_sent = queue_verification_email(user, verification_token)
             
             # Serialize user with profile
             user_serializer = UserSerializer(user)
@@ -1204,6 +829,8 @@ def get_survey_steps(request):
 # ============= Lesson Views =============
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@content_versions.conditional(Lesson)
+@catalog_cache.cached(Lesson)
 def lessons_list(request):
     """Get all lessons, optionally filtered"""
     try:
@@ -1217,9 +844,18 @@ def lessons_list(request):
         if content_type:
             queryset = queryset.filter(content_type=content_type)
         
-        serializer = LessonSerializer(queryset, many=True)
-        return Response(serializer.data)
+        # The list leaves out lesson payloads; lesson_detail returns them
+        queryset = LessonSerializer.sparse_queryset(queryset, request, slim=True)
+        context = {'request': request}
+        page = pagination.paginate(request, queryset, ('lesson_type', 'order', 'difficulty_level'))
+        if page is None:
+            serializer = LessonSerializer(queryset, many=True, slim=True, context=context)
+            return Response(serializer.data)
+        serializer = LessonSerializer(page.items, many=True, slim=True, context=context)
+        return Response(page.response_data(serializer.data))
     
+    except pagination.InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Lessons list error: {str(e)}")
         return Response({
@@ -1254,13 +890,19 @@ def my_progress(request):
     try:
         lesson_type = request.query_params.get('type')
         
-        queryset = LessonProgress.objects.filter(user=request.user)
+        queryset = LessonProgress.objects.filter(user=request.user).select_related('lesson')
         if lesson_type:
             queryset = queryset.filter(lesson__lesson_type=lesson_type)
         
-        serializer = LessonProgressSerializer(queryset, many=True)
-        return Response(serializer.data)
+        page = pagination.paginate(request, queryset, ('-created_at',))
+        if page is None:
+            serializer = LessonProgressSerializer(queryset, many=True)
+            return Response(serializer.data)
+        serializer = LessonProgressSerializer(page.items, many=True)
+        return Response(page.response_data(serializer.data))
     
+    except pagination.InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Progress error: {str(e)}")
         return Response({
@@ -1293,6 +935,7 @@ def record_lesson_progress(request):
             lesson=lesson
         )
         
+        was_completed = progress.completed
         serializer = LessonProgressSerializer(progress, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -1335,7 +978,7 @@ def record_lesson_progress(request):
                 points=points,
                 time_minutes=time_spent,
                 score=score,
-                lessons=1 if request.data.get('completed', False) else 0,
+                lessons=1 if progress.completed and not was_completed else 0,
                 streak=profile.current_streak
             )
             
@@ -1445,7 +1088,7 @@ def practice_history(request):
         limit = int(request.query_params.get('limit', 50))
         session_type = request.query_params.get('type')
         
-        queryset = PracticeSession.objects.filter(user=request.user)
+        queryset = PracticeSession.objects.filter(user=request.user).select_related('user', 'lesson')
         
         if session_type:
             queryset = queryset.filter(session_type=session_type)
@@ -1478,8 +1121,12 @@ def vocabulary(request):
             if min_mastery:
                 queryset = queryset.filter(mastery_level__gte=float(min_mastery))
             
-            serializer = VocabularyWordSerializer(queryset, many=True)
-            return Response(serializer.data)
+            page = pagination.paginate(request, queryset, ('-first_learned',))
+            if page is None:
+                serializer = VocabularyWordSerializer(queryset, many=True)
+                return Response(serializer.data)
+            serializer = VocabularyWordSerializer(page.items, many=True)
+            return Response(page.response_data(serializer.data))
         
         elif request.method == 'POST':
             word = request.data.get('word', '').lower()
@@ -1510,10 +1157,20 @@ def vocabulary(request):
                 accuracy = vocab.times_correct / max(vocab.times_practiced, 1)
                 vocab.mastery_level = min(100, accuracy * 100)
                 vocab.save()
+            else:
+                # Adult categories all count the learner's whole word list
+                for category in ADULT_CATEGORIES:
+                    update_category_progress_from_activity(
+                        user=request.user,
+                        category=category,
+                        vocabulary_words=1
+                    )
             
             serializer = VocabularyWordSerializer(vocab)
             return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
     
+    except pagination.InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Vocabulary error: {str(e)}")
         return Response({
@@ -1557,6 +1214,8 @@ def vocabulary_detail(request, word_id):
 # ============= Achievement Views =============
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@content_versions.conditional(Achievement)
+@catalog_cache.cached(Achievement)
 def achievements_list(request):
     """Get all available achievements"""
     try:
@@ -2125,39 +1784,21 @@ def _build_teen_dashboard_payload(user) -> dict:
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def teen_dashboard(request):
-    # Sync CategoryProgress with TeenProgress to ensure data is always in sync
-    try:
-        category_progress, created = CategoryProgress.objects.get_or_create(
-            user=request.user,
-            category='teen_kids',
-            defaults={
-                'total_points': 0,
-                'total_streak': 0,
-                'lessons_completed': 0,
-                'practice_time_minutes': 0,
-                'average_score': 0.0,
-                'progress_percentage': 0.0,
-                'level': 1,
-                'stories_completed': 0,
-                'vocabulary_words': 0,
-                'pronunciation_attempts': 0,
-                'games_completed': 0,
-            }
-        )
-        # Always sync to ensure data is up to date
-        sync_category_progress(request.user, 'teen_kids', category_progress)
-        category_progress.save()
-        logger.info(f"Synced teen_kids CategoryProgress for user {request.user.id}: {category_progress.total_points} points, {category_progress.stories_completed} stories")
-    except Exception as e:
-        logger.error(f"Error syncing teen_kids CategoryProgress: {str(e)}")
-        # Continue even if sync fails
-        import traceback
-        traceback.print_exc()
-    
     payload = _build_teen_dashboard_payload(request.user)
     return Response(payload)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def teen_story_progress(request):
+    """Page through the user's mission progress (the dashboard still embeds all of it)."""
+    story_progress = TeenStoryProgress.objects.filter(user=request.user).order_by('story_id')
+    page = pagination.paginate(request, story_progress, ('story_id',))
+    if page is None:
+        return Response(TeenStoryProgressSerializer(story_progress, many=True).data)
+    return Response(page.response_data(TeenStoryProgressSerializer(page.items, many=True).data))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def teen_story_start(request):
@@ -2478,7 +2119,8 @@ def teen_game_session(request):
     if request.method == 'GET':
         # Get all game sessions for the user
         sessions = TeenGameSession.objects.filter(user=request.user).order_by('-created_at')
-        serializer = TeenGameSessionSerializer(sessions, many=True)
+        sessions = TeenGameSessionSerializer.sparse_queryset(sessions, request)
+        serializer = TeenGameSessionSerializer(sessions, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     # POST - Record a game session
@@ -2603,9 +2245,12 @@ def teen_my_certificates(request):
 # ============= Kids Endpoints (Keep existing) =============
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@content_versions.conditional(KidsLesson)
+@catalog_cache.cached(KidsLesson)
 def kids_lessons(request):
     qs = KidsLesson.objects.filter(is_active=True).order_by('id')
-    serializer = KidsLessonSerializer(qs, many=True)
+    qs = KidsLessonSerializer.sparse_queryset(qs, request, slim=True)
+    serializer = KidsLessonSerializer(qs, many=True, slim=True, context={'request': request})
     return Response(serializer.data)
 
 
@@ -2617,32 +2262,39 @@ def kids_progress_get(request):
     return Response(serializer.data)
 
 
+def _kids_progress_counters(progress: KidsProgress) -> dict:
+    """Counters from KidsProgress that feed the young_kids CategoryProgress row."""
+    details = progress.details or {}
+    return {
+        'points': progress.points or 0,
+        'stories': len([
+            s for s in details.get('storyEnrollments', [])
+            if s.get('completed', False)
+        ]),
+        'vocabulary_words': len(details.get('vocabulary', {})),
+        'pronunciation_attempts': len(details.get('pronunciation', {})),
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def kids_progress_update(request):
     obj, _ = KidsProgress.objects.get_or_create(user=request.user)
+    before = _kids_progress_counters(obj)
     serializer = KidsProgressSerializer(instance=obj, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
         
-        # Update CategoryProgress in MySQL database
-        # Sync all data from KidsProgress to CategoryProgress
-        details = obj.details or {}
-        stories_completed = len([
-            s for s in details.get('storyEnrollments', [])
-            if s.get('completed', False)
-        ])
-        vocabulary_words = len(details.get('vocabulary', {}))
-        pronunciation_attempts = len(details.get('pronunciation', {}))
-        
+        # Update CategoryProgress in MySQL database with what changed in this update
+        after = _kids_progress_counters(obj)
         update_category_progress_from_activity(
             user=request.user,
             category='young_kids',
-            points=obj.points or 0,
+            points=after['points'] - before['points'],
             streak=obj.streak or 0,
-            stories=stories_completed,
-            vocabulary_words=vocabulary_words,
-            pronunciation_attempts=pronunciation_attempts
+            stories=after['stories'] - before['stories'],
+            vocabulary_words=after['vocabulary_words'] - before['vocabulary_words'],
+            pronunciation_attempts=after['pronunciation_attempts'] - before['pronunciation_attempts']
         )
         
         return Response(serializer.data)
@@ -2880,8 +2532,12 @@ def kids_favorites(request):
     """Get, add, or remove favorite stories"""
     if request.method == 'GET':
         favorites = KidsFavorite.objects.filter(user=request.user).order_by('-created_at')
-        serializer = KidsFavoriteSerializer(favorites, many=True)
-        return Response(serializer.data)
+        page = pagination.paginate(request, favorites, ('-created_at',))
+        if page is None:
+            serializer = KidsFavoriteSerializer(favorites, many=True)
+            return Response(serializer.data)
+        serializer = KidsFavoriteSerializer(page.items, many=True)
+        return Response(page.response_data(serializer.data))
     
     elif request.method == 'POST':
         story_id = request.data.get('story_id')
@@ -3052,8 +2708,16 @@ def kids_game_session(request):
     if request.method == 'GET':
         # Get all game sessions for the user
         sessions = KidsGameSession.objects.filter(user=request.user).order_by('-created_at')
-        serializer = KidsGameSessionSerializer(sessions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        context = {'request': request}
+        if pagination.legacy_request(request):
+            # Older clients read the conversation history out of the full list
+            sessions = KidsGameSessionSerializer.sparse_queryset(sessions, request)
+            serializer = KidsGameSessionSerializer(sessions, many=True, context=context)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        sessions = KidsGameSessionSerializer.sparse_queryset(sessions, request, slim=True)
+        page = pagination.paginate(request, sessions, ('-created_at',))
+        serializer = KidsGameSessionSerializer(page.items, many=True, slim=True, context=context)
+        return Response(page.response_data(serializer.data), status=status.HTTP_200_OK)
     
     if request.method == 'DELETE':
         # Delete a game session (history only, points are preserved)
@@ -3203,6 +2867,7 @@ def kids_gemini_game(request):
     Proxy endpoint for Gemini API - generates AI-powered games for kids.
     API key is stored server-side, never exposed to clients.
     Works with both authenticated and local users.
+    Send "stream": true to receive the reply as Server-Sent Events (see api/gemini.py).
     """
     try:
         # Get Gemini API key from environment
@@ -3221,738 +2886,54 @@ def kids_gemini_game(request):
         game_type = request.data.get('gameType', 'interactive')
         
         logger.info(f"Gemini API key found, generating game for type: {game_type}")
-        user_input = request.data.get('userInput', '')
-        conversation_history = request.data.get('conversationHistory', [])
-        context = request.data.get('context', {})
-        
-        # Debug logging
-        logger.info(f"DEBUG: user_input = '{user_input}'")
-        logger.info(f"DEBUG: conversation_history length = {len(conversation_history) if conversation_history else 0}")
-        if conversation_history:
-            for idx, msg in enumerate(conversation_history[-3:]):  # Last 3 messages
-                logger.info(f"DEBUG: History[{idx}]: role={msg.get('role')}, content={str(msg.get('content', ''))[:50]}...")
-        
-        # Build system prompt
-        age = context.get('age', 7)
-        level = context.get('level', 'beginner')
-        
-        # Determine age group for more targeted prompts
-        if age <= 6:
-            age_group = "preschool/kindergarten"
-            complexity = "very simple"
-        elif age <= 8:
-            age_group = "early elementary"
-            complexity = "simple"
-        else:
-            age_group = "elementary"
-            complexity = "moderate"
-        
-        base_prompt = f"""You are a warm, friendly, and encouraging AI teacher playing fun educational games with a {age}-year-old child (age group: {age_group}) learning English. The child's level is {level}. 
-
-CRITICAL GUIDELINES:
-- Use ONLY {complexity} words and short sentences appropriate for ages 4-10
-- Be EXTREMELY patient, positive, and enthusiastic - use exclamation marks for excitement!
-- Speak like you're talking to a friend, not a teacher - be fun and playful
-- LISTEN carefully to what the child says and UNDERSTAND THE MEANING, even if grammar isn't perfect
-- Always respond naturally and conversationally - never sound robotic
-- Vary your questions and content - don't repeat the same prompts
-- IMPORTANT: Do NOT use any emojis (no 🎉, 🌟, 🎤, 👋, 🤔, etc.) - emojis will be read aloud and sound strange
-- IMPORTANT: Do NOT use any markdown formatting like **, *, __, _, `, # etc. Use only plain text.
-- NEVER wrap your JSON response in code blocks (no ```json or ```). Return pure JSON only.
-- Always return valid JSON that can be parsed directly"""
-        
-        # Game-specific prompts - comprehensive and age-appropriate for 4-10 year olds
-        game_prompts = {
-            'tongue-twister': f"""{base_prompt}
-
-You are playing a FUN Tongue Twister game with a {age}-year-old child. Make it exciting and playful!
-
-AGE-APPROPRIATE TONGUE TWISTERS:
-- For ages 4-5: "Red bug, red bug" / "Big pig, big pig" / "Fun sun, fun sun" / "Cat hat, cat hat" / "Dog log, dog log"
-- For ages 6-7: "Red lorry, yellow lorry" / "Toy boat, toy boat" / "Big bug bit" / "Sheep sleep" / "Fish wish"
-- For ages 8-9: "She sells seashells" / "Peter Piper picked" / "How much wood" / "Betty Botter bought" / "Fuzzy Wuzzy was"
-- For ages 9-10: "Six slippery snails" / "Unique New York" / "Three free throws" / "Red leather, yellow leather"
-
-VARIETY IS KEY - Use different tongue twisters each time! Rotate through:
-- Animal tongue twisters (cats, dogs, pigs, bugs, fish)
-- Color tongue twisters (red, yellow, blue, green)
-- Food tongue twisters (cookies, cakes, bread)
-- Action tongue twisters (run, jump, play, swim)
-- Nature tongue twisters (sun, moon, stars, trees)
-
-GAME FLOW:
-1. First, introduce the tongue twister with excitement: "Ready for a fun challenge? Here's your tongue twister: [phrase]! Try saying it 3 times fast!"
-2. After the child attempts it, give SPECIFIC, ENCOURAGING feedback:
-   - If they did well: "Wow! You said that so clearly! Great job!"
-   - If they struggled: "Good try! Let's practice together. Say it slowly: [word by word breakdown]"
-   - Always be positive and supportive
-
-GAME ENDING:
-- The game automatically ends after 8 minutes of play time from when the user started
-- If the child asks to end the game (says things like "end game", "finish", "stop", "done", "done for today", "I'm done", "let's stop", "finish game", "end this game"), you should END THE GAME immediately
-- When ending the game (either by time or user request), give a warm, encouraging summary: "Great job practicing today! You did amazing with [number] tongue twisters! We'll play again soon!"
-- Set "gameEnd": true in your JSON response when ending the game
-
-IMPORTANT: Award points (15-50) ONLY AFTER the child attempts the tongue twister, NOT when giving the initial tongue twister.
-IMPORTANT: Do NOT use any emojis in your responses - they will be read aloud and sound strange.
-
-Format your response as JSON:
-For first prompt: {{ "content": "Ready for a fun challenge? Here's your tongue twister: [age-appropriate phrase]! Try saying it 3 times fast!", "gameInstruction": "Say this tongue twister 3 times: [phrase]" }}
-After child attempts: {{ "content": "[Encouraging, specific feedback WITHOUT emojis]", "points": [15-50 based on performance], "feedback": "[Additional encouragement]" }}
-When ending game: {{ "content": "[Warm ending message summarizing their progress]", "gameEnd": true, "points": [final points] }}""",
-            
-            'word-chain': f"""{base_prompt}
-
-You are playing an EXCITING Word Chain game with a {age}-year-old child. Make it like a fun word adventure!
-
-AGE-APPROPRIATE WORD CATEGORIES:
-- For ages 4-6: Simple nouns (cat, dog, sun, moon, ball, car, hat, cup, toy, boy, girl, mom, dad)
-- For ages 7-8: Common words (bird, tree, fish, book, bus, bag, box, pig, cow, duck, frog, bee)
-- For ages 9-10: More varied vocabulary (animal, color, food, friend, happy, school, water, flower, music, dance)
-
-VARIETY IS KEY - Use different word categories each round:
-- Animals: cat → tiger → rabbit → turtle → elephant
-- Colors: red → dark → king → green → night
-- Food: apple → egg → grape → eat → tomato
-- Nature: sun → nest → tree → earth → house
-- Actions: run → nap → play → yes → swim
-- Body parts: hand → dog → girl → leg → game
-- Toys: ball → leg → game → egg → gift
-
-GAME FLOW:
-1. Start with an exciting word: "Let's play Word Chain! I'll say a word, then you say a word that starts with the last letter! Ready? My word is: [word]! What word starts with [letter]?"
-2. After each word, celebrate and continue: "Awesome! [Their word] ends with [letter], so I'll say [new word]! Now you say a word starting with [new letter]!"
-3. Keep the energy high and make it feel like a game, not a test
-
-GAME ENDING:
-- The game automatically ends after 8 minutes of play time from when the user started
-- If the child asks to end the game (says things like "end game", "finish", "stop", "done", "done for today", "I'm done", "let's stop", "finish game", "end this game"), you should END THE GAME immediately
-- When ending the game (either by time or user request), give a warm, encouraging summary: "Wonderful word chain game! You connected [number] words together! Great vocabulary practice!"
-- Set "gameEnd": true in your JSON response when ending the game
-
-IMPORTANT: Always award points (20-45) for correct word chains. If they make a mistake, gently help: "Hmm, that word starts with [letter], but we need a word starting with [correct letter]. Can you think of one?"
-IMPORTANT: Do NOT use any emojis in your responses - they will be read aloud and sound strange.
-
-Format your response as JSON:
-{{ "gameInstruction": "Say a word starting with the letter [X]", "content": "Great! I said [word]. Now you say a word starting with [letter]! What can you think of?", "feedback": "Excellent! That's a perfect word!", "points": 30 }}
-When ending game: {{ "content": "[Warm ending message summarizing their progress]", "gameEnd": true, "points": [final points] }}""",
-            
-            'story-telling': f"""{base_prompt}
-
-You are playing a CREATIVE Story Telling game with a {age}-year-old child. Make storytelling magical and fun!
-
-STORY THEMES TO ROTATE (age-appropriate):
-- For ages 4-6: Talking animals, magical toys, friendly monsters, colorful adventures, simple quests
-- For ages 7-8: Superhero adventures, space explorers, underwater worlds, treasure hunts, time travel
-- For ages 9-10: Mystery solving, fantasy kingdoms, science experiments, friendship stories, discovery quests
-
-STORY STARTER IDEAS (vary each time):
-1. "Once upon a time, there was a little [animal/character] who loved [activity]. One sunny day, [character] discovered..."
-2. "In a magical forest, a brave [character] found a mysterious [object]. When [character] touched it..."
-3. "Deep in the ocean, a friendly [sea creature] was looking for [something]. Suddenly, [character] saw..."
-4. "On a faraway planet, a curious [character] met a [creature]. Together, they decided to..."
-5. "In a magical garden, a tiny [character] found a glowing [object]. The [object] could..."
-
-STORY ELEMENTS TO INCLUDE:
-- Characters: animals, kids, magical creatures, superheroes, robots, fairies, dinosaurs
-- Settings: forests, oceans, space, castles, gardens, schools, playgrounds, magical lands
-- Problems: finding something, helping a friend, solving a puzzle, going on an adventure, learning something new
-- Solutions: working together, being brave, using creativity, asking for help, discovering something special
-
-GAME FLOW:
-1. Start with an exciting story beginning (2-3 sentences max): "Let me start a magical story for you! [Story beginning with simple words]"
-2. Ask engaging questions: "What happens next? What does [character] do? What do you think [character] finds?"
-3. Build on their ideas: "Wow! That's so creative! So [character] [their idea]... and then what?"
-4. Keep the story flowing naturally - don't correct grammar harshly, just model correct language
-
-GAME ENDING:
-- The game automatically ends after 8 minutes of play time from when the user started
-- If the child asks to end the game (says things like "end game", "finish", "stop", "done", "done for today", "I'm done", "let's stop", "finish game", "end this game"), you should END THE GAME immediately
-- When ending the game (either by time or user request), give a warm, encouraging summary: "What an amazing story we created together! You're such a creative storyteller! Let's save this story and continue another time!"
-- Set "gameEnd": true in your JSON response when ending the game
-
-IMPORTANT: Always award points (25-50) for creative story contributions. Celebrate their imagination!
-IMPORTANT: Do NOT use any emojis in your responses - they will be read aloud and sound strange.
-
-Format your response as JSON:
-{{ "gameInstruction": "Continue the story! What happens next?", "content": "Once upon a time, there was a brave little [character] who loved [activity]. One day, [character] went on an adventure to [place] and discovered something amazing... What do you think [character] found?", "nextStep": "Tell me what happens next in the story!", "feedback": "What an exciting story! I love your creativity!", "points": 40 }}
-When ending game: {{ "content": "[Warm ending message summarizing their story]", "gameEnd": true, "points": [final points] }}""",
-            
-            'pronunciation-challenge': f"""{base_prompt}
-
-You are playing a FUN Pronunciation Challenge game with a {age}-year-old child. Make it feel like a game, not a test!
-
-AGE-APPROPRIATE WORD LISTS (rotate through different categories):
-
-For ages 4-6 (Beginner - CVC words):
-- Animals: Cat, Dog, Pig, Cow, Duck, Bee, Ant, Bug
-- Objects: Ball, Car, Bus, Cup, Hat, Bag, Box, Pen, Key, Toy
-- Actions: Run, Jump, Hop, Sit, Stand, Clap, Wave
-- Colors: Red, Blue, Green, Yellow, Pink, Black, White
-- Body: Hand, Foot, Eye, Ear, Nose, Leg, Arm
-
-For ages 7-8 (Intermediate):
-- Animals: Bird, Fish, Frog, Bear, Lion, Tiger, Rabbit, Turtle
-- Objects: Book, Tree, Star, Moon, Sun, Flower, Water, Music
-- Actions: Dance, Sing, Play, Read, Write, Draw, Swim, Fly
-- Nature: Cloud, Rain, Wind, Snow, Fire, Earth, Sky, Ocean
-- Food: Apple, Bread, Cookie, Candy, Pizza, Banana, Orange
-
-For ages 9-10 (Advanced - challenging sounds):
-- Th sounds: Three, Thumb, Think, Thank, Throw, Through
-- Ch sounds: Chair, Cheese, Church, Choose, Change
-- Sh sounds: Shoe, Ship, Shop, Shine, Share, Shout
-- R blends: Frog, Tree, Train, Truck, Brush, Crash
-- L blends: Blue, Clap, Flag, Glass, Plant, Slide
-
-VARIETY IS KEY - Rotate through:
-- Different word categories (animals, colors, actions, objects, nature)
-- Different sound patterns (beginning sounds, ending sounds, blends)
-- Different difficulty levels based on their performance
-
-GAME FLOW:
-1. Introduce the word with excitement: "Let's practice saying this word: [WORD]! Can you say it 3 times? Ready? [WORD]!"
-2. After they attempt, give SPECIFIC feedback:
-   - If correct: "Perfect! You said [word] so clearly! Great pronunciation!"
-   - If needs work: "Good try! Let's practice together. Say it slowly: [break down sounds]. Now try again!"
-   - Always be encouraging and break words into sounds if needed
-
-GAME ENDING:
-- The game automatically ends after 8 minutes of play time from when the user started
-- If the child asks to end the game (says things like "end game", "finish", "stop", "done", "done for today", "I'm done", "let's stop", "finish game", "end this game"), you should END THE GAME immediately
-- When ending the game (either by time or user request), give a warm, encouraging summary: "Excellent pronunciation practice today! You practiced [number] words and your speaking is getting better and better!"
-- Set "gameEnd": true in your JSON response when ending the game
-
-IMPORTANT: ONLY award points (15-45) AFTER hearing the child's pronunciation attempt. For the INITIAL prompt, give the word WITHOUT feedback or points.
-IMPORTANT: Do NOT use any emojis in your responses - they will be read aloud and sound strange.
-
-Format your response as JSON:
-For initial word: {{ "gameInstruction": "Say this word 3 times clearly", "content": "Let's practice pronunciation! Here's your word: [WORD]! Can you say it 3 times? Ready? [WORD]!" }}
-After child speaks: {{ "content": "[Specific, encouraging feedback about their pronunciation WITHOUT emojis]", "feedback": "[Additional tips if needed]", "points": [15-45 based on quality] }}
-When ending game: {{ "content": "[Warm ending message summarizing their progress]", "gameEnd": true, "points": [final points] }}""",
-            
-            'conversation-practice': f"""{base_prompt}
-
-You are having a WARM, FRIENDLY conversation with a {age}-year-old child. Make it feel like chatting with a friend!
-
-CONVERSATION TOPICS TO ROTATE (age-appropriate):
-
-For ages 4-6:
-- Favorite things: "What's your favorite color? What's your favorite animal? What's your favorite food?"
-- Daily life: "What did you do today? What's your favorite toy? Do you have a pet?"
-- Family: "Tell me about your family! Do you have brothers or sisters? What do you like to do with your family?"
-- Play: "What games do you like to play? What's your favorite thing to do outside? Do you like to draw?"
-
-For ages 7-8:
-- Interests: "What's your favorite subject in school? What sports do you like? What's your favorite book or movie?"
-- Friends: "Tell me about your friends! What do you like to do together? What makes a good friend?"
-- Hobbies: "What do you like to do in your free time? Do you play any instruments? What's your favorite hobby?"
-- Dreams: "What do you want to be when you grow up? If you could have any superpower, what would it be?"
-
-For ages 9-10:
-- School: "What's your favorite subject? What's the most interesting thing you learned recently? What do you like about school?"
-- Activities: "What clubs or activities are you in? What's your favorite sport or game? What do you do on weekends?"
-- Opinions: "What's your favorite book and why? What's the best movie you've seen? What makes you happy?"
-- Future: "What are you excited about? What would you like to learn? What's your biggest dream?"
-
-VARIETY IS KEY - Ask different questions each time:
-- Mix personal questions with creative questions
-- Ask follow-up questions based on their answers
-- Show genuine interest in their responses
-- Connect their answers to new questions
-
-GAME FLOW:
-1. Start with an enthusiastic greeting and question: "Hi there! I'm so excited to chat with you! Let me ask you something fun: [question]"
-2. Listen carefully to their response and show interest: "Wow, that's so cool! Tell me more about [their answer]!"
-3. Ask follow-up questions naturally: "That sounds amazing! What do you like most about [their answer]?"
-4. Keep the conversation flowing - don't just ask questions, share reactions and build on their answers
-
-GAME ENDING:
-- The game automatically ends after 8 minutes of play time from when the user started
-- If the child asks to end the game (says things like "end game", "finish", "stop", "done", "done for today", "I'm done", "let's stop", "finish game", "end this game"), you should END THE GAME immediately
-- When ending the game (either by time or user request), give a warm, encouraging summary: "It was so nice chatting with you today! You shared such interesting things! Let's talk again soon!"
-- Set "gameEnd": true in your JSON response when ending the game
-
-IMPORTANT: Always award points (20-40) for engaging responses. Understand their meaning even if grammar isn't perfect. Gently model correct language without being critical.
-IMPORTANT: Do NOT use any emojis in your responses - they will be read aloud and sound strange.
-
-Format your response as JSON:
-{{ "content": "Hi there! I'm so excited to chat with you! Let me ask you something fun: [age-appropriate question]? What do you think?", "feedback": "That's so interesting! Tell me more!", "points": 25 }}
-When ending game: {{ "content": "[Warm ending message]", "gameEnd": true, "points": [final points] }}""",
-
-            'debate-club': f"""{base_prompt}
-
-You are coaching a DEBATE CLUB style conversation for a {age}-year-old learner (upper elementary / early teen).
-
-FLOW:
-1. Introduce the motion and clearly explain what "for" and "against" mean.
-2. Ask the learner to pick a side (or assign them one) and give 2 reasons.
-3. Offer a counterargument and invite a rebuttal.
-4. Encourage them to summarize their stance with a confident closing sentence.
-
-COACHING STYLE:
-- Encourage evidence, examples, or personal experiences.
-- Suggest advanced vocabulary ("beneficial", "consequence", "perspective").
-- Stay positive; phrase corrections as questions: "What about...?"
-
-POINTS:
-- Award 25-45 points for clear arguments, creative rebuttals, or thoughtful conclusions.
-- Give bonus points for empathy ("I understand the other side...").
-
-ENDING:
-- Summarize their strongest point and suggest one improvement for next time.
-- Set "gameEnd": true when ending.
-
-FORMAT:
-{{ "gameInstruction": "Argue FOR longer school breaks.", "content": "Here’s your topic...", "feedback": "Great reasoning because...", "points": 35 }}""",
-
-            'critical-thinking': f"""{base_prompt}
-
-You are facilitating a CRITICAL THINKING challenge for a {age}-year-old learner ready for deeper puzzles.
-
-FLOW:
-1. Present a short scenario or puzzle that needs logic, prediction, or strategy.
-2. Ask them to explain their reasoning, not just the answer.
-3. Offer a twist (new evidence, different rule, another viewpoint) to extend thinking.
-4. Celebrate creative reasoning and ask reflective questions.
-
-POINTS:
-- Award 20-40 points based on clarity, creativity, and persistence.
-- Provide hints rather than saying "wrong".
-
-ENDING:
-- Summarize the strategies they used and suggest another brain teaser for later.
-
-FORMAT:
-{{ "content": "Puzzle: You have two ropes that each take 1 hour to burn...", "feedback": "Nice logic! You noticed...", "nextStep": "What if you had three ropes?", "points": 30 }}""",
-
-            'research-challenge': f"""{base_prompt}
-
-You are guiding a RESEARCH CHALLENGE for a {age}-year-old learner who wants to explore academic topics.
-
-FLOW:
-1. Present a concise research prompt (space travel, renewable energy, famous inventions).
-2. Ask what they already know and what they need to find out.
-3. Provide key facts (mention sources or credible organizations) and ask them to structure the info (intro → evidence → conclusion).
-4. Encourage them to include one statistic or quote.
-
-POINTS:
-- Award 25-45 points for organized summaries, clear evidence, or thoughtful comparisons.
-
-ENDING:
-- Suggest a follow-up question or a source to read later.
-
-FORMAT:
-{{ "gameInstruction": "Explain why coral reefs matter.", "content": "Start with why they are important...", "feedback": "Great use of evidence!", "points": 35 }}""",
-
-            'presentation-master': f"""{base_prompt}
-
-You are coaching a PRESENTATION MASTER session for a {age}-year-old learner preparing speeches or pitches.
-
-FLOW:
-1. Ask for topic and audience.
-2. Help craft a powerful hook, organize 2-3 key points, and end with a memorable call-to-action.
-3. Give feedback on tone, pacing, vocabulary, and transitions.
-4. Encourage them to repeat improved sentences in their own voice.
-
-POINTS:
-- Award 20-40 points per section for structure, clarity, and confidence.
-
-ENDING:
-- Highlight strengths and provide one actionable improvement.
-
-FORMAT:
-{{ "gameInstruction": "Give your opening hook about green energy.", "content": "Try starting with a surprising fact...", "feedback": "Fantastic energy! Next, outline two key points.", "points": 30 }}""",
-
-            'ethics-discussion': f"""{base_prompt}
-
-You are hosting an ETHICS DISCUSSION for a {age}-year-old learner exploring values and choices.
-
-FLOW:
-1. Present an age-appropriate dilemma (AI art ownership, social media privacy, fair play in sports).
-2. Ask who benefits, who might be harmed, and what values conflict.
-3. Encourage them to explore multiple sides before choosing a stance.
-4. Use “What if...?” prompts to deepen empathy and reasoning.
-
-POINTS:
-- Award 25-40 points for nuanced reasoning, empathy, or creative compromises.
-
-ENDING:
-- Summarize their viewpoint and suggest a reflective journal prompt.
-
-FORMAT:
-{{ "content": "Scenario: Your school wants AI to grade essays...", "feedback": "Thoughtful point about fairness!", "nextStep": "Consider how teachers might feel.", "points": 35 }}""",
-
-            'innovation-lab': f"""{base_prompt}
-
-You are running an INNOVATION LAB challenge for a {age}-year-old learner ready to design solutions.
-
-FLOW:
-1. Present a problem to solve (reduce cafeteria waste, build a focus gadget, design a greener city).
-2. Ask them to describe users, features, and what makes the idea unique.
-3. Encourage iteration ("How would version 2.0 be better?").
-4. Invite them to pitch the idea in two sentences.
-
-POINTS:
-- Award 25-45 points for originality, empathy for users, or practical thinking.
-
-ENDING:
-- Summarize why the idea matters and suggest a prototype step.
-
-FORMAT:
-{{ "gameInstruction": "Invent a tool that helps teens stay organized.", "content": "Describe the features, users, and how it helps.", "feedback": "Great idea! Consider adding...", "points": 40 }}""",
-
-            'leadership-challenge': f"""{base_prompt}
-
-You are guiding a LEADERSHIP CHALLENGE scenario for a {age}-year-old learner.
-
-FLOW:
-1. Present the leadership situation (leading a club, managing a project, resolving a conflict).
-2. Ask what leadership style they would use and why.
-3. Introduce hurdles (time crunch, disagreements, limited resources) and ask how they'd respond.
-4. Encourage reflection on lessons learned and how they'd support teammates.
-
-POINTS:
-- Award 20-40 points for thoughtful decisions, empathy, and clear plans.
-
-ENDING:
-- Highlight their leadership strengths and suggest one new strategy to try.
-
-FORMAT:
-{{ "content": "Scenario: You lead the robotics team and two members disagree...", "feedback": "Great idea to hold a listening session.", "nextStep": "How will you assign tasks afterward?", "points": 30 }}"""
-        }
-        
-        system_prompt = game_prompts.get(game_type, base_prompt)
-        
-        # Build user message - initial prompts for each game type (varied and age-appropriate)
-        if not user_input:
-            # Vary initial prompts to keep games fresh and engaging
-            tongue_twister_prompts = [
-                "Hi! I'm ready to play tongue twisters! Give me a fun one that's perfect for kids my age!",
-                "Yay! Tongue twisters are so fun! Can you give me a cool one to practice?",
-                "Hello! Let's play tongue twisters! I'm excited to try a new one!",
-                "Hi there! I love tongue twisters! Give me a fun challenge!",
-                "Ready to play! Give me an awesome tongue twister to practice!"
-            ]
-            
-            word_chain_prompts = [
-                "Hi! Let's play word chain! I'm ready to connect words together!",
-                "Yay! Word chain is my favorite! Give me a word to start!",
-                "Hello! Let's play word chain! What word should we begin with?",
-                "Hi there! I'm excited to play word chain! Give me a simple word!",
-                "Ready! Let's play word chain! What's our first word?"
-            ]
-            
-            story_telling_prompts = [
-                "Hi! Let's create an amazing story together! Start something exciting!",
-                "Yay! Story time! Can you start a magical adventure for me?",
-                "Hello! I love stories! Let's make up a fun one together!",
-                "Hi there! Let's tell a story! Start with something cool!",
-                "Ready! I want to hear a story! Can you begin an adventure?"
-            ]
-            
-            pronunciation_prompts = [
-                "Hi! Let's practice pronunciation! Give me a word to practice saying!",
-                "Yay! Pronunciation practice! What word should I try?",
-                "Hello! I'm ready to practice! Give me a fun word!",
-                "Hi there! Let's practice saying words! What should I try?",
-                "Ready! I want to practice pronunciation! Give me a word!"
-            ]
-            
-            conversation_prompts = [
-                "Hi! Let's have a fun chat! Ask me something interesting!",
-                "Yay! I love talking! What would you like to know about me?",
-                "Hello! Let's chat! Ask me a fun question!",
-                "Hi there! I'm excited to talk! What do you want to know?",
-                "Ready! Let's have a conversation! Ask me something cool!"
-            ]
-            
-            debate_prompts = [
-                "Give me a debate topic and tell me which side to take!",
-                "I'm ready to debate! What's the motion today?",
-                "Coach me through a quick debate topic!"
-            ]
-            
-            critical_prompts = [
-                "Challenge me with a tricky scenario that needs logical thinking!",
-                "Give me a brain teaser or a puzzle to solve!",
-                "I'm ready for a critical thinking question!"
-            ]
-            
-            research_prompts = [
-                "Assign me a quick research topic to summarize!",
-                "Give me something interesting to research and explain!",
-                "What's a science or tech topic I can break down?"
-            ]
-            
-            presentation_prompts = [
-                "Help me rehearse a presentation opening!",
-                "I need to practice a speech—can you guide me?",
-                "Coach me through presenting a project!"
-            ]
-            
-            ethics_prompts = [
-                "Give me an ethics dilemma to think about.",
-                "Let's discuss a tricky decision with pros and cons!",
-                "What values are in conflict in this situation?"
-            ]
-            
-            innovation_prompts = [
-                "Challenge me to invent something new!",
-                "Give me a problem to solve with a creative product.",
-                "Let's design the next big idea—what's the mission?"
-            ]
-            
-            leadership_prompts = [
-                "Give me a leadership scenario to solve!",
-                "I'm ready to manage a team challenge—what's happening?",
-                "Coach me through a leadership dilemma."
-            ]
-            
-            initial_prompts = {
-                'tongue-twister': random.choice(tongue_twister_prompts),
-                'word-chain': random.choice(word_chain_prompts),
-                'story-telling': random.choice(story_telling_prompts),
-                'pronunciation-challenge': random.choice(pronunciation_prompts),
-                'conversation-practice': random.choice(conversation_prompts),
-                'debate-club': random.choice(debate_prompts),
-                'critical-thinking': random.choice(critical_prompts),
-                'research-challenge': random.choice(research_prompts),
-                'presentation-master': random.choice(presentation_prompts),
-                'ethics-discussion': random.choice(ethics_prompts),
-                'innovation-lab': random.choice(innovation_prompts),
-                'leadership-challenge': random.choice(leadership_prompts)
-            }
-            user_input = initial_prompts.get(game_type, 'Let\'s play a fun English learning game together!')
-        
-        # Build messages for Gemini API (correct format)
-        # Gemini API expects contents array with alternating user/model messages
-        contents = []
-        
-        # Add conversation history if provided (with proper role mapping)
-        if conversation_history and len(conversation_history) > 0:
-            for msg in conversation_history[-10:]:  # Last 10 messages for context
-                role = msg.get('role', 'user')
-                # Map 'assistant' to 'model' for Gemini API
-                gemini_role = 'model' if role == 'assistant' else 'user'
-                contents.append({
-                    'role': gemini_role,
-                    'parts': [{'text': str(msg.get('content', ''))}]
-                })
-        
-        # Combine system prompt and user input into the user message
-        combined_text = f"{system_prompt}\n\n{user_input}"
-        contents.append({
-            'role': 'user',
-            'parts': [{'text': combined_text}]
-        })
+        data = request.data
         
-        # Debug logging for payload construction
-        logger.info(f"DEBUG: Adding user_input to payload: '{user_input[:100]}...'")
-        logger.info(f"DEBUG: Total contents count: {len(contents)}")
-        for idx, msg in enumerate(contents):
-            logger.info(f"DEBUG: Contents[{idx}]: role={msg.get('role')}, text={str(msg.get('parts', [{}])[0].get('text', ''))[:100]}...")
-        
-        # Call Gemini API - using Gemini 2.5 Flash (stable and fast)
-        model_name = 'gemini-2.5-flash'
-        
-        # Build payload
-        payload = {
-            'contents': contents,
-            'generationConfig': {
-                'temperature': 0.8,
-                'topK': 40,
-                'topP': 0.95,
-                'maxOutputTokens': 1024,
-            },
-            'safetySettings': [
-                {
-                    'category': 'HARM_CATEGORY_HARASSMENT',
-                    'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                },
-                {
-                    'category': 'HARM_CATEGORY_HATE_SPEECH',
-                    'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                },
-                {
-                    'category': 'HARM_CATEGORY_SEXUALLY_EXPLICIT',
-                    'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                },
-                {
-                    'category': 'HARM_CATEGORY_DANGEROUS_CONTENT',
-                    'threshold': 'BLOCK_MEDIUM_AND_ABOVE'
-                }
-            ]
-        }
+        # Opening turns are served from the shared pool when one is ready
+        opening = opening_cache.opening_for(data)
+        if opening:
+            cached = opening_cache.lookup(opening)
+            if cached:
+                if data.get('stream'):
+                    return gemini.event_stream_response(gemini.replay_events(cached))
+                return Response(cached, status=status.HTTP_200_OK)
+            data = opening_cache.request_data(data, opening)
+        
+        payload = gemini.build_game_payload(data)
+        
+        if data.get('stream'):
+            if opening:
+                opening_cache.schedule_refill(opening)
+            status_code, upstream = gemini.open_stream(payload, gemini_api_key)
+            if status_code != 200:
+                status_code, error_message = gemini.failure_details(upstream)
+                logger.error(f"Gemini API error: {status_code} - {error_message}")
+                body, http_status = gemini.error_response(status_code, error_message)
+                return Response(body, status=http_status)
+            return gemini.event_stream_response(gemini.stream_events(upstream, game_type))
         
         # Try v1 API first (more stable), fallback to v1beta if needed
-        api_versions_to_try = ['v1', 'v1beta']
-        response = None
-        last_error = None
+        status_code, result = gemini.generate(payload, gemini_api_key)
         
-        for api_version in api_versions_to_try:
-            try:
-                api_url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model_name}:generateContent?key={gemini_api_key}"
-                
-                logger.info(f"Calling Gemini API: {api_version}/models/{model_name}")
-                
-                response = requests.post(api_url, json=payload, timeout=30)
-                
-                if response.status_code == 200:
-                    logger.info(f"Success with {api_version}/models/{model_name}")
-                    break
-                elif response.status_code == 404:
-                    # Model not found in this version, try next version
-                    logger.warning(f"Model {model_name} not found in {api_version}, trying v1beta")
-                    last_error = {
-                        'status': response.status_code,
-                        'error': response.json() if response.text else {}
-                    }
-                    response = None
-                    continue
-                else:
-                    # Other error
-                    last_error = {
-                        'status': response.status_code,
-                        'error': response.json() if response.text else {}
-                    }
-                    logger.error(f"Gemini API error: {response.status_code} - {last_error.get('error', {})}")
-                    break
-            except requests.exceptions.RequestException as e:
-                last_error = {'status': 0, 'error': {'message': str(e)}}
-                logger.error(f"Request exception with {api_version}: {str(e)}")
-                response = None
-                continue
-        
-        # Check if we got a successful response
-        if not response or response.status_code != 200:
-            if last_error:
-                error_data = last_error.get('error', {})
-                error_message = error_data.get('message', 'Unknown error') if isinstance(error_data, dict) else str(error_data)
-                status_code = last_error.get('status', 500)
-            elif response:
-                error_data = response.json() if response.text else {}
-                error_message = error_data.get('error', {}).get('message', 'Unknown error')
-                status_code = response.status_code
-            else:
-                error_message = 'Failed to connect to Gemini API'
-                status_code = 503
-                
+        if status_code != 200:
+            status_code, error_message = gemini.failure_details(result)
             logger.error(f"Gemini API error: {status_code} - {error_message}")
             
-            # Provide more helpful error message
-            if status_code == 400:
-                return Response({
-                    "message": f"Invalid API request: {error_message}. Please check configuration.",
-                    "error": "API_ERROR",
-                    "details": error_message
-                }, status=status.HTTP_400_BAD_REQUEST)
-            elif status_code == 401 or status_code == 403:
-                return Response({
-                    "message": "AI service authentication failed. Please check API key configuration.",
-                    "error": "AUTH_ERROR",
-                    "details": error_message
-                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-            else:
-                return Response({
-                    "message": "Your Gamer temporarily unavailable. Please try again later.",
-                    "error": "API_ERROR",
-                    "details": error_message
-                }, status=status.HTTP_502_BAD_GATEWAY)
-        
-        data = response.json()
-        content = data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', 'Sorry, I could not generate a response.')
-        
-        # Helper function to clean markdown formatting
-        def clean_markdown(text):
-            if not text:
-                return text
-            # Remove common markdown formatting - order matters!
-            text = text.replace('**', '')  # Remove bold
-            text = text.replace('*', '')  # Remove any remaining asterisks
-            text = text.replace('__', '')  # Remove underline
-            text = text.replace('_', '')  # Remove any remaining underscores
-            text = text.replace('`', '')  # Remove code formatting
-            text = text.replace('#', '')  # Remove headers
-            # Don't remove parentheses as they might be part of the text
-            # Don't remove brackets to preserve readability
-            return text.strip()
-        
-        # Try to parse JSON from response
-        parsed_response = {
-            'content': content.strip(),
-            'gameInstruction': None,
-            'questions': None,
-            'feedback': None,
-            'nextStep': None,
-            'points': 0
-        }
+            body, http_status = gemini.error_response(status_code, error_message)
+            return Response(body, status=http_status)
         
-        # Try to extract JSON from response
-        try:
-            json_match = content.strip().replace('```json', '').replace('```', '').strip()
-            if json_match.startswith('{'):
-                parsed = json.loads(json_match)
-                
-                # Build natural language content from JSON fields
-                # For tongue-twister game, only use content field (no gameInstruction or feedback)
-                message_parts = []
-                
-                # Add main content if available (always use this)
-                if parsed.get('content'):
-                    message_parts.append(parsed.get('content'))
-                
-                # For other games, add feedback and nextStep if available
-                game_type = request.data.get('gameType', 'interactive')
-                if game_type != 'tongue-twister':
-                    # Add feedback if available (not for tongue-twister)
-                    if parsed.get('feedback'):
-                        message_parts.append(parsed.get('feedback'))
-                    
-                    # Add nextStep if available
-                    if parsed.get('nextStep'):
-                        message_parts.append(parsed.get('nextStep'))
-                
-                # Combine into a single natural message
-                combined_content = '\n\n'.join(filter(None, message_parts))
-                
-                parsed_response.update({
-                    'content': clean_markdown(combined_content if combined_content else parsed.get('content', parsed_response['content'])),
-                    'gameInstruction': clean_markdown(parsed.get('gameInstruction') if parsed.get('gameInstruction') else None),
-                    'questions': parsed.get('questions'),
-                    'feedback': clean_markdown(parsed.get('feedback') if parsed.get('feedback') else None),
-                    'nextStep': clean_markdown(parsed.get('nextStep') if parsed.get('nextStep') else None),
-                    'points': parsed.get('points', 0)
-                })
-        except (json.JSONDecodeError, AttributeError):
-            # If JSON parsing fails, clean up raw content to remove JSON markers
-            cleaned_content = content.strip()
-            # Remove JSON code blocks if present
-            if '```json' in cleaned_content:
-                # Try to extract just the text content
-                parts = cleaned_content.split('```')
-                if len(parts) > 1:
-                    # Get the part outside code blocks
-                    text_parts = [p.strip() for p in parts if p.strip() and not p.strip().startswith('json')]
-                    cleaned_content = '\n\n'.join(text_parts) if text_parts else cleaned_content
-            
-            # If cleaned_content still looks like raw JSON, try to extract text from it
-            if cleaned_content.startswith('{') and ('content' in cleaned_content or 'feedback' in cleaned_content):
-                # Try to extract plain text by removing JSON structure
-                # Find all string values in JSON
-                matches = re.findall(r'"([^"]+)":\s*"([^"]+)"', cleaned_content)
-                text_parts = []
-                for key, value in matches:
-                    # Only include non-metadata fields (not points or other JSON keys)
-                    if key in ['content', 'feedback', 'nextStep', 'gameInstruction']:
-                        text_parts.append(value)
-                if text_parts:
-                    cleaned_content = ' '.join(text_parts)
-            
-            parsed_response['content'] = clean_markdown(cleaned_content)
+        parsed_response = gemini.parse_game_response(result, game_type)
+        if opening and opening_cache.store(opening, parsed_response):
+            opening_cache.schedule_refill(opening)
         
         return Response(parsed_response, status=status.HTTP_200_OK)
     
+    except circuit_breaker.Rejected as e:
+        logger.warning(f"Gemini call rejected by circuit breaker: {e.reason}")
+        body, http_status = gemini.rejected_response(e)
+        response = Response(body, status=http_status)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    
     except requests.exceptions.Timeout:
         logger.error("Gemini API timeout")
         return Response({
@@ -3975,6 +2956,102 @@ FORMAT:
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+async def kids_gemini_game_async(request):
+    """
+    Non-blocking variant of kids_gemini_game, served by the ASGI pool (crud/asgi.py).
+    The upstream call awaits on a pooled keep-alive client, so a slow Gemini
+    response holds a coroutine instead of a whole worker.
+    """
+    if request.method != 'POST':
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    try:
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+    except ValueError as e:
+        return JsonResponse({"detail": f"JSON parse error - {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        gemini_api_key = config('GEMINI_API_KEY', default=None)
+        
+        if not gemini_api_key:
+            logger.error("GEMINI_API_KEY not configured in environment")
+            return JsonResponse({
+                "message": "AI service not configured. Please set GEMINI_API_KEY in your server configuration.",
+                "error": "API_KEY_MISSING",
+                "details": "The GEMINI_API_KEY environment variable is not set. Please configure it to enable AI games."
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        game_type = data.get('gameType', 'interactive')
+        
+        opening = opening_cache.opening_for(data)
+        if opening:
+            cached = await sync_to_async(opening_cache.lookup)(opening)
+            if cached:
+                if data.get('stream'):
+                    return gemini.event_stream_response(gemini.replay_events_async(cached))
+                return JsonResponse(cached, status=status.HTTP_200_OK)
+            data = opening_cache.request_data(data, opening)
+        
+        payload = gemini.build_game_payload(data)
+        
+        if data.get('stream'):
+            if opening:
+                opening_cache.schedule_refill(opening)
+            status_code, result = await gemini.open_stream_async(payload, gemini_api_key)
+            if status_code == 200:
+                return gemini.event_stream_response(gemini.stream_events_async(result, game_type))
+        else:
+            status_code, result = await gemini.generate_async(payload, gemini_api_key)
+        
+        if status_code != 200:
+            status_code, error_message = gemini.failure_details(result)
+            logger.error(f"Gemini API error: {status_code} - {error_message}")
+            body, http_status = gemini.error_response(status_code, error_message)
+            return JsonResponse(body, status=http_status)
+        
+        parsed_response = gemini.parse_game_response(result, game_type)
+        if opening and await sync_to_async(opening_cache.store)(opening, parsed_response):
+            opening_cache.schedule_refill(opening)
+        
+        return JsonResponse(parsed_response, status=status.HTTP_200_OK)
+    
+    except gemini.GeminiBusy:
+        logger.warning("Gemini proxy at capacity, rejecting game turn")
+        response = JsonResponse({
+            "message": "Lots of players right now! Please try again in a moment.",
+            "error": "BUSY"
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
+        return response
+    
+    except circuit_breaker.Rejected as e:
+        logger.warning(f"Gemini call rejected by circuit breaker: {e.reason}")
+        body, http_status = gemini.rejected_response(e)
+        response = JsonResponse(body, status=http_status)
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    
+    except httpx.TimeoutException:
+        logger.error("Gemini API timeout")
+        return JsonResponse({
+            "message": "AI service took too long to respond. Please try again.",
+            "error": "TIMEOUT"
+        }, status=status.HTTP_504_GATEWAY_TIMEOUT)
+    
+    except Exception as e:
+        logger.error(f"Gemini game error: {str(e)}")
+        return JsonResponse({
+            "message": "An unexpected error occurred. Please try again later.",
+            "error": "INTERNAL_ERROR"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Set directly: Django 4.2's csrf_exempt() wraps views in a sync function
+kids_gemini_game_async.csrf_exempt = True
+
+
 # ============= Waitlist Views =============
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -4007,9 +3084,43 @@ def waitlist_signup(request):
 def sync_changes(request):
     """
     Get changes since last sync (for offline-first synchronization)
-    Returns all entities that have been modified since the given timestamp
+    With ?after_seq=N&limit=M, pages through the per-user change log (including
+    delete tombstones) in sequence order; resume from the returned next_seq.
+    Without after_seq, returns all entities modified since the ?since timestamp.
     """
     try:
+        if 'after_seq' in request.query_params:
+            try:
+                after_seq = int(request.query_params.get('after_seq') or 0)
+                limit = int(request.query_params.get('limit', sync_log.DEFAULT_PAGE_SIZE))
+                if after_seq < 0:
+                    raise ValueError('after_seq must not be negative')
+                if limit < 1 or limit > sync_log.MAX_PAGE_SIZE:
+                    limit = sync_log.DEFAULT_PAGE_SIZE
+            except (ValueError, TypeError):
+                return Response({
+                    "message": "after_seq and limit must be integers"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                changes, next_seq, has_more = sync_log.changes_after(request.user, after_seq, limit)
+            except sync_log.ChangesPruned as e:
+                return Response({
+                    "message": "Cursor is too old; resync from after_seq=0",
+                    "error": str(e),
+                    "resync_required": True
+                }, status=status.HTTP_410_GONE)
+            
+            return Response({
+                'changes': changes,
+                'total': len(changes),
+                'after_seq': after_seq,
+                'next_seq': next_seq,
+                'has_more': has_more
+            })
+        
+        # Taken before the scans so nothing written during them is skipped by a later after_seq
+        next_seq = sync_log.current_seq(request.user)
         since = request.query_params.get('since')
         
         if since:
@@ -4119,7 +3230,8 @@ def sync_changes(request):
             'changes': changes,
             'total': len(changes),
             'since': since or since_dt.isoformat(),
-            'next_cursor': timezone.now().isoformat()
+            'next_cursor': timezone.now().isoformat(),
+            'next_seq': next_seq
         })
     
     except Exception as e:
@@ -4129,6 +3241,162 @@ def sync_changes(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _apply_sync_upsert(user, payload):
+    """Apply one offline sync operation; returns ``(status_code, body)``."""
+    entity_type = payload.get('entity_type')
+    entity_id = payload.get('entity_id')
+    operation = payload.get('operation')  # 'create' or 'update'
+    data = payload.get('data', {})
+    
+    if not entity_type or operation not in ['create', 'update']:
+        return status.HTTP_400_BAD_REQUEST, {
+            "error": "entity_type and operation are required"
+        }
+    
+    # Route to appropriate handler
+    result = None
+    
+    if entity_type == 'LessonProgress' and data.get('lesson'):
+        # Upsert lesson progress
+        try:
+            from .models import Lesson
+            lesson = Lesson.objects.get(id=data['lesson'])
+            progress, created = LessonProgress.objects.get_or_create(
+                user=user,
+                lesson=lesson
+            )
+            
+            # Update fields
+            for key, value in data.items():
+                if key != 'lesson' and hasattr(progress, key):
+                    setattr(progress, key, value)
+            progress.save()
+            
+            result = {
+                'entity': 'LessonProgress',
+                'entity_id': progress.id,
+                'operation': 'created' if created else 'updated',
+                'data': LessonProgressSerializer(progress).data
+            }
+        except Exception as e:
+            return status.HTTP_400_BAD_REQUEST, {
+                "error": str(e)
+            }
+    
+    elif entity_type == 'PracticeSession':
+        # Upsert practice session
+        serializer = PracticeSessionSerializer(data=data)
+        if serializer.is_valid():
+            instance = serializer.save(user=user)
+            result = {
+                'entity': 'PracticeSession',
+                'entity_id': instance.id,
+                'operation': 'created',
+                'data': PracticeSessionSerializer(instance).data
+            }
+        else:
+            return status.HTTP_400_BAD_REQUEST, {
+                "error": serializer.errors
+            }
+    
+    elif entity_type == 'VocabularyWord':
+        # Upsert vocabulary word
+        word = data.get('word', '').lower()
+        vocab, created = VocabularyWord.objects.get_or_create(
+            user=user,
+            word=word,
+            defaults=data
+        )
+        if not created:
+            # Update existing
+            for key, value in data.items():
+                if hasattr(vocab, key) and key != 'word':
+                    setattr(vocab, key, value)
+            vocab.save()
+        
+        result = {
+            'entity': 'VocabularyWord',
+            'entity_id': vocab.id,
+            'operation': 'created' if created else 'updated',
+            'data': VocabularyWordSerializer(vocab).data
+        }
+    
+    elif entity_type == 'KidsProgress':
+        # Upsert kids progress
+        obj, created = KidsProgress.objects.get_or_create(user=user)
+        before = _kids_progress_counters(obj)
+        serializer = KidsProgressSerializer(obj, data=data, partial=True)
+        if serializer.is_valid():
+            serializer.save()
+            after = _kids_progress_counters(obj)
+            update_category_progress_from_activity(
+                user=user,
+                category='young_kids',
+                points=after['points'] - before['points'],
+                streak=obj.streak or 0,
+                stories=after['stories'] - before['stories'],
+                vocabulary_words=after['vocabulary_words'] - before['vocabulary_words'],
+                pronunciation_attempts=after['pronunciation_attempts'] - before['pronunciation_attempts']
+            )
+            result = {
+                'entity': 'KidsProgress',
+                'entity_id': obj.id,
+                'operation': 'updated',
+                'data': serializer.data
+            }
+        else:
+            return status.HTTP_400_BAD_REQUEST, {
+                "error": serializer.errors
+            }
+    
+    elif entity_type == 'KidsAchievement':
+        # Upsert kids achievement
+        name = data.get('name')
+        if name:
+            ach, created = KidsAchievement.objects.get_or_create(
+                user=user,
+                name=name
+            )
+            was_unlocked = ach.unlocked
+            serializer = KidsAchievementSerializer(ach, data=data, partial=True)
+            if serializer.is_valid():
+                updated_achievement = serializer.save()
+                result = {
+                    'entity': 'KidsAchievement',
+                    'entity_id': ach.id,
+                    'operation': 'created' if created else 'updated',
+                    'data': serializer.data
+                }
+                target = updated_achievement if isinstance(updated_achievement, KidsAchievement) else ach
+                is_now_unlocked = bool(target.unlocked)
+                if not was_unlocked and is_now_unlocked:
+                    slug = slugify(target.name or 'achievement')
+                    frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173').rstrip('/')
+                    action_url = f"{frontend_url}/profile#overview"
+                    notification_title = f"{target.name} achievement unlocked"
+                    notification_message = "Fantastic progress! You've just unlocked a new achievement — keep the momentum going."
+                    create_or_update_user_notification(
+                        user,
+                        notification_type='achievement',
+                        title=notification_title,
+                        message=notification_message,
+                        icon=target.icon or '🌟',
+                        action_url=action_url,
+                        event_key=f"achievement:{slug}",
+                        metadata={
+                            'name': target.name,
+                            'progress': target.progress,
+                            'icon': target.icon,
+                        }
+                    )
+    
+    if result:
+        return status.HTTP_201_CREATED if result['operation'] == 'created' else status.HTTP_200_OK, result
+    return status.HTTP_400_BAD_REQUEST, {
+        "error": f"Unknown entity type: {entity_type}"
+    }
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def idempotent_upsert(request):
@@ -4143,163 +3411,159 @@ def idempotent_upsert(request):
             return Response({
                 "error": "Idempotency-Key header is required"
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check cache for duplicate request
-        cache_key = f"sync_{request.user.id}_{idempotency_key}"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info(f"Returning cached response for idempotency key: {idempotency_key}")
-            return Response(cached_response)
-        
-        # Process the request
-        entity_type = request.data.get('entity_type')
-        entity_id = request.data.get('entity_id')
-        operation = request.data.get('operation')  # 'create' or 'update'
-        data = request.data.get('data', {})
-        
-        if not entity_type or operation not in ['create', 'update']:
+        if len(idempotency_key) > 255:
             return Response({
-                "error": "entity_type and operation are required"
+                "error": "Idempotency-Key must be at most 255 characters"
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Route to appropriate handler
-        result = None
-        
-        if entity_type == 'LessonProgress' and data.get('lesson'):
-            # Upsert lesson progress
-            try:
-                from .models import Lesson
-                lesson = Lesson.objects.get(id=data['lesson'])
-                progress, created = LessonProgress.objects.get_or_create(
-                    user=request.user,
-                    lesson=lesson
-                )
-                
-                # Update fields
-                for key, value in data.items():
-                    if key != 'lesson' and hasattr(progress, key):
-                        setattr(progress, key, value)
-                progress.save()
-                
-                result = {
-                    'entity': 'LessonProgress',
-                    'entity_id': progress.id,
-                    'operation': 'created' if created else 'updated',
-                    'data': LessonProgressSerializer(progress).data
-                }
-            except Exception as e:
-                return Response({
-                    "error": str(e)
-                }, status=status.HTTP_400_BAD_REQUEST)
+        # Claim the key in the shared store so retries on any worker are deduplicated
+        claim = idempotency.claim(request.user, idempotency_key, idempotency.request_fingerprint(request.data))
+        if claim.outcome == idempotency.REPLAY:
+            logger.info(f"Returning stored response for idempotency key: {idempotency_key}")
+            return Response(claim.record.response_body, status=claim.record.response_status)
+        if claim.outcome == idempotency.MISMATCH:
+            return Response({
+                "error": "Idempotency-Key was already used for a different request"
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if claim.outcome == idempotency.IN_FLIGHT:
+            response = Response({
+                "error": "A request with this Idempotency-Key is still being processed"
+            }, status=status.HTTP_409_CONFLICT)
+            response['Retry-After'] = '1'
+            return response
+        
+        record = claim.record
+        try:
+            # The change and the stored response commit together
+            with transaction.atomic():
+                status_code, body = _apply_sync_upsert(request.user, request.data)
+                if status_code < 400:
+                    idempotency.complete(record, status_code, body)
+                else:
+                    transaction.set_rollback(True)
+        except idempotency.ClaimLost:
+            response = Response({
+                "error": "A request with this Idempotency-Key is still being processed"
+            }, status=status.HTTP_409_CONFLICT)
+            response['Retry-After'] = '1'
+            return response
+        except Exception:
+            idempotency.release(record)
+            raise
+        
+        if status_code >= 400:
+            # Failed requests are not remembered; the client may retry with the same key
+            idempotency.release(record)
+        return Response(body, status=status_code)
+    
+    except Exception as e:
+        logger.error(f"Idempotent upsert error: {str(e)}")
+        return Response({
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+SYNC_BATCH_MAX_OPERATIONS = 500
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def idempotent_upsert_batch(request):
+    """
+    Batch variant of idempotent_upsert for replaying an offline queue
+    Body: {"operations": [{"idempotency_key", "entity_type", "operation", "data"}, ...]}
+    Every operation is deduplicated on its own key; results come back per item, in order.
+    """
+    try:
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response({
+                "error": "operations must be a non-empty list"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > SYNC_BATCH_MAX_OPERATIONS:
+            return Response({
+                "error": f"At most {SYNC_BATCH_MAX_OPERATIONS} operations are allowed per batch"
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        elif entity_type == 'PracticeSession':
-            # Upsert practice session
-            serializer = PracticeSessionSerializer(data=data)
-            if serializer.is_valid():
-                instance = serializer.save(user=request.user)
-                result = {
-                    'entity': 'PracticeSession',
-                    'entity_id': instance.id,
-                    'operation': 'created',
-                    'data': PracticeSessionSerializer(instance).data
-                }
+        results = {}
+        keys = {}
+        fingerprints = {}
+        for index, operation in enumerate(operations):
+            key = operation.get('idempotency_key') if isinstance(operation, dict) else None
+            if not key or not isinstance(key, str) or len(key) > 255:
+                results[index] = (status.HTTP_400_BAD_REQUEST, {
+                    "error": "Each operation needs an idempotency_key of at most 255 characters"
+                })
+            elif key in fingerprints:
+                results[index] = (status.HTTP_400_BAD_REQUEST, {
+                    "error": "Duplicate idempotency_key in batch"
+                })
             else:
-                return Response({
-                    "error": serializer.errors
-                }, status=status.HTTP_400_BAD_REQUEST)
-        
-        elif entity_type == 'VocabularyWord':
-            # Upsert vocabulary word
-            word = data.get('word', '').lower()
-            vocab, created = VocabularyWord.objects.get_or_create(
-                user=request.user,
-                word=word,
-                defaults=data
-            )
-            if not created:
-                # Update existing
-                for key, value in data.items():
-                    if hasattr(vocab, key) and key != 'word':
-                        setattr(vocab, key, value)
-                vocab.save()
-            
-            result = {
-                'entity': 'VocabularyWord',
-                'entity_id': vocab.id,
-                'operation': 'created' if created else 'updated',
-                'data': VocabularyWordSerializer(vocab).data
-            }
-        
-        elif entity_type == 'KidsProgress':
-            # Upsert kids progress
-            obj, created = KidsProgress.objects.get_or_create(user=request.user)
-            serializer = KidsProgressSerializer(obj, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                result = {
-                    'entity': 'KidsProgress',
-                    'entity_id': obj.id,
-                    'operation': 'updated',
-                    'data': serializer.data
-                }
+                # Same fingerprint as the single-operation endpoint's request body
+                payload = {k: v for k, v in operation.items() if k != 'idempotency_key'}
+                keys[index] = key
+                fingerprints[key] = idempotency.request_fingerprint(payload)
+        
+        claims = idempotency.claim_many(request.user, fingerprints)
+        claimed = []
+        for index, key in keys.items():
+            claim = claims[key]
+            if claim.outcome == idempotency.REPLAY:
+                results[index] = (claim.record.response_status, claim.record.response_body)
+            elif claim.outcome == idempotency.MISMATCH:
+                results[index] = (status.HTTP_422_UNPROCESSABLE_ENTITY, {
+                    "error": "Idempotency-Key was already used for a different request"
+                })
+            elif claim.outcome == idempotency.IN_FLIGHT:
+                results[index] = (status.HTTP_409_CONFLICT, {
+                    "error": "A request with this Idempotency-Key is still being processed"
+                })
             else:
-                return Response({
-                    "error": serializer.errors
-                }, status=status.HTTP_400_BAD_REQUEST)
+                payload = {k: v for k, v in operations[index].items() if k != 'idempotency_key'}
+                claimed.append((index, key, payload))
         
-        elif entity_type == 'KidsAchievement':
-            # Upsert kids achievement
-            name = data.get('name')
-            if name:
-                ach, created = KidsAchievement.objects.get_or_create(
-                    user=request.user,
-                    name=name
-                )
-                was_unlocked = ach.unlocked
-                serializer = KidsAchievementSerializer(ach, data=data, partial=True)
-                if serializer.is_valid():
-                    updated_achievement = serializer.save()
-                    result = {
-                        'entity': 'KidsAchievement',
-                        'entity_id': ach.id,
-                        'operation': 'created' if created else 'updated',
-                        'data': serializer.data
-                    }
-                    target = updated_achievement if isinstance(updated_achievement, KidsAchievement) else ach
-                    is_now_unlocked = bool(target.unlocked)
-                    if not was_unlocked and is_now_unlocked:
-                        slug = slugify(target.name or 'achievement')
-                        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:5173').rstrip('/')
-                        action_url = f"{frontend_url}/profile#overview"
-                        notification_title = f"{target.name} achievement unlocked"
-                        notification_message = "Fantastic progress! You've just unlocked a new achievement — keep the momentum going."
-                        create_or_update_user_notification(
-                            request.user,
-                            notification_type='achievement',
-                            title=notification_title,
-                            message=notification_message,
-                            icon=target.icon or '🌟',
-                            action_url=action_url,
-                            event_key=f"achievement:{slug}",
-                            metadata={
-                                'name': target.name,
-                                'progress': target.progress,
-                                'icon': target.icon,
-                            }
-                        )
-        
-        if result:
-            # Cache the response for 24 hours
-            cache.set(cache_key, result, 86400)  # 24 hours
-            return Response(result, status=status.HTTP_201_CREATED if result['operation'] == 'created' else status.HTTP_200_OK)
-        else:
-            return Response({
-                "error": f"Unknown entity type: {entity_type}"
-            }, status=status.HTTP_400_BAD_REQUEST)
+        records = [claims[key].record for _, key, _ in claimed]
+        try:
+            # All changes and their stored responses commit together
+            with transaction.atomic():
+                applied = sync_batch.apply_batch(request.user, claimed, _apply_sync_upsert)
+                idempotency.complete_many([
+                    (claims[key].record,) + applied[index]
+                    for index, key, _ in claimed
+                    if applied[index][0] < 400
+                ])
+        except idempotency.ClaimLost:
+            response = Response({
+                "error": "Some operations in this batch are still being processed"
+            }, status=status.HTTP_409_CONFLICT)
+            response['Retry-After'] = '1'
+            return response
+        except Exception:
+            idempotency.release_many(records)
+            raise
+        
+        # Failed operations are not remembered; the client may retry them with the same key
+        idempotency.release_many([
+            claims[key].record for index, key, _ in claimed if applied[index][0] >= 400
+        ])
+        results.update(applied)
+        
+        return Response({
+            'results': [{
+                'index': index,
+                'idempotency_key': keys.get(index),
+                'status': results[index][0],
+                'body': results[index][1],
+            } for index in range(len(operations))],
+            'summary': {
+                'applied': sum(1 for index, _, _ in claimed if applied[index][0] < 400),
+                'failed': sum(1 for code, _ in results.values() if code >= 400),
+                'total': len(operations),
+            }
+        })
     
     except Exception as e:
-        logger.error(f"Idempotent upsert error: {str(e)}")
+        logger.error(f"Idempotent batch upsert error: {str(e)}")
         return Response({
             "error": str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -4408,6 +3672,33 @@ def is_admin_user(user):
     return user.is_authenticated and (user.is_staff or user.is_superuser)
 
 
+def _user_count_subquery(model, **filters):
+    """Correlated COUNT(*) of ``model`` rows for the outer User, usable in annotate()."""
+    counts = model.objects.filter(user=OuterRef('pk'), **filters).order_by().values('user').annotate(
+        count=Count('pk')
+    ).values('count')[:1]
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _estimated_row_count(model):
+    """Cheap row count for large tables: InnoDB's statistics estimate on MySQL, otherwise a cached COUNT(*)."""
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return int(row[0])
+    cache_key = f"row_count:{model._meta.db_table}"
+    count = cache.get(cache_key)
+    if count is None:
+        count = model.objects.count()
+        cache.set(cache_key, count, 300)
+    return count
+
+
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
 def admin_settings(request):
@@ -4499,6 +3790,25 @@ def admin_avatar_upload(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_upstreams(request):
+    """Circuit breaker state and in-flight calls for each external dependency"""
+    if not is_admin_user(request.user):
+        return Response({
+            "message": "Unauthorized. Admin access required."
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        return Response({"circuits": circuit_breaker.snapshot()}, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Admin upstreams error: {str(e)}")
+        return Response({
+            "message": "Failed to load upstream status",
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def admin_dashboard_stats(request):
@@ -4516,34 +3826,30 @@ def admin_dashboard_stats(request):
         except (TypeError, ValueError):
             months = 12
 
+        today = timezone.localdate()
+        last7 = today - timedelta(days=7)
+        last30 = today - timedelta(days=30)
+
         # User statistics
         total_users = User.objects.count()
         active_users = User.objects.filter(is_active=True).count()
-        new_users_today = User.objects.filter(date_joined__date=timezone.now().date()).count()
-        new_users_this_month = User.objects.filter(
-            date_joined__gte=timezone.now().replace(day=1)
-        ).count()
-        
-        # User growth by month (last N months)
-        user_growth = []
+
+        # User growth by month (last N months), read from the daily rollup
+        month_starts = []
         for i in range(months - 1, -1, -1):
-            month_start = (timezone.now() - timedelta(days=30*i)).replace(day=1)
-            if i == 0:
-                month_end = timezone.now()
-            else:
-                next_month = month_start + timedelta(days=32)
-                month_end = next_month.replace(day=1) - timedelta(days=1)
-            
-            count = User.objects.filter(
-                date_joined__gte=month_start,
-                date_joined__lte=month_end
-            ).count()
-            
-            user_growth.append({
-                'month': month_start.strftime('%Y-%m'),
-                'month_name': month_start.strftime('%B %Y'),
-                'count': count
-            })
+            month_start = (today - timedelta(days=30*i)).replace(day=1)
+            if month_start not in month_starts:
+                month_starts.append(month_start)
+        registrations_by_month = platform_stats.monthly_registrations(month_starts[0])
+        user_growth = [{
+            'month': month_start.strftime('%Y-%m'),
+            'month_name': month_start.strftime('%B %Y'),
+            'count': registrations_by_month.get(month_start.strftime('%Y-%m'), 0)
+        } for month_start in month_starts]
+
+        today_totals = platform_stats.get_daily_totals(today, today).get(today)
+        new_users_today = today_totals.registrations if today_totals else 0
+        new_users_this_month = registrations_by_month.get(today.strftime('%Y-%m'), 0)
         
         # Lesson statistics
         total_lessons = Lesson.objects.count()
@@ -4551,24 +3857,20 @@ def admin_dashboard_stats(request):
         total_progress = LessonProgress.objects.count()
         completed_lessons = LessonProgress.objects.filter(completed=True).count()
         # recent completion windows
-        today = timezone.now().date()
-        last7 = today - timedelta(days=7)
-        last30 = today - timedelta(days=30)
-        completed_last_7 = LessonProgress.objects.filter(completed=True, updated_at__date__gte=last7).count()
-        completed_last_30 = LessonProgress.objects.filter(completed=True, updated_at__date__gte=last30).count()
+        completed_last_7 = platform_stats.summarize(last7, today)['completions']
+        completed_last_30 = platform_stats.summarize(last30, today)['completions']
         
         # Practice statistics
-        total_sessions = PracticeSession.objects.count()
-        total_practice_time = PracticeSession.objects.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
+        practice_totals = platform_stats.summarize()
+        total_sessions = practice_totals['sessions']
+        total_practice_time = practice_totals['practice_minutes']
 
         # Engagement (common dashboard KPIs)
         # Engagement windows reuse last7/last30 above
-        dau_7 = PracticeSession.objects.filter(session_date__date__gte=last7).values('user_id').distinct().count()
-        dau_30 = PracticeSession.objects.filter(session_date__date__gte=last30).values('user_id').distinct().count()
-        avg_session_minutes = PracticeSession.objects.aggregate(avg=Avg('duration_minutes'))['avg'] or 0
-        avg_score = PracticeSession.objects.aggregate(avg=Avg('score'))['avg'] or 0
+        dau_7 = platform_stats.distinct_practicing_users(last7)
+        dau_30 = platform_stats.distinct_practicing_users(last30)
+        avg_session_minutes = practice_totals['avg_duration']
+        avg_score = practice_totals['avg_score']
 
         # Verification & surveys
         verified_users = User.objects.filter(is_active=True).count()
@@ -4617,47 +3919,19 @@ def admin_dashboard_stats(request):
             else:
                 detailed['unspecified'] += 1
         
-        # Recent activity (last 50 activities)
-        recent_activities = []
-        
-        # Recent user registrations
-        recent_users = User.objects.order_by('-date_joined')[:10]
-        for user in recent_users:
-            recent_activities.append({
-                'type': 'user_registered',
-                'title': f'New user registered: {user.username}',
-                'user': user.username,
-                'timestamp': user.date_joined.isoformat(),
-                'icon': 'user-plus'
-            })
-        
-        # Recent lesson completions
-        recent_completions = LessonProgress.objects.filter(
-            completed=True
-        ).order_by('-updated_at')[:10]
-        for progress in recent_completions:
-            recent_activities.append({
-                'type': 'lesson_completed',
-                'title': f'{progress.user.username} completed {progress.lesson.title}',
-                'user': progress.user.username,
-                'timestamp': progress.updated_at.isoformat(),
-                'icon': 'check-circle'
-            })
-
-        # Recent practice sessions
-        recent_sessions = PracticeSession.objects.order_by('-session_date')[:10]
-        for s in recent_sessions:
-            recent_activities.append({
-                'type': 'practice_session',
-                'title': f'{s.user.username} practiced {s.session_type} ({s.duration_minutes}m)',
-                'user': s.user.username,
-                'timestamp': s.session_date.isoformat(),
-                'icon': 'clock'
-            })
-        
-        # Sort by timestamp
-        recent_activities.sort(key=lambda x: x['timestamp'], reverse=True)
-        recent_activities = recent_activities[:50]
+        # Recent activity: one range scan over the append-only activity log
+        activity_icons = {
+            ActivityEvent.USER_REGISTERED: 'user-plus',
+            ActivityEvent.LESSON_COMPLETED: 'check-circle',
+            ActivityEvent.PRACTICE_SESSION: 'clock',
+        }
+        recent_activities = [{
+            'type': event.verb,
+            'title': event.title,
+            'user': event.actor_name,
+            'timestamp': event.timestamp.isoformat(),
+            'icon': activity_icons.get(event.verb, 'activity')
+        } for event in activity_log.recent_events(limit=20)]
         
         # Level distribution
         level_distribution = UserProfile.objects.values('level').annotate(
@@ -4700,7 +3974,7 @@ def admin_dashboard_stats(request):
                 'survey_completion_rate': survey_completion_rate
             },
             'levels': detailed,
-            'recent_activities': recent_activities[:20]
+            'recent_activities': recent_activities
         }
         
         return Response(stats)
@@ -4777,7 +4051,17 @@ def admin_users_list(request):
                 # Fallback to old level filter for backward compatibility
                 queryset = queryset.filter(profile__level=level_filter)
         
-        total = queryset.count()
+        # For the unfiltered grid, ?total=estimated skips the full COUNT(*) on large User tables
+        filtered = bool(search or active_filter or level_filter)
+        total_is_estimate = not filtered and request.query_params.get('total') == 'estimated'
+        total = _estimated_row_count(User) if total_is_estimate else queryset.count()
+        
+        # Per-user counts come from correlated subqueries instead of three COUNTs per row
+        queryset = queryset.annotate(
+            lessons_completed=_user_count_subquery(LessonProgress, completed=True),
+            total_sessions=_user_count_subquery(PracticeSession),
+            vocabulary_count=_user_count_subquery(VocabularyWord),
+        ).order_by('id')
         
         # Pagination
         start = (page - 1) * page_size
@@ -4805,9 +4089,9 @@ def admin_users_list(request):
                     'age_range': profile.age_range if profile else None,
                     'learning_purpose': profile.learning_purpose if profile else [],
                 } if profile else None,
-                'lessons_completed': LessonProgress.objects.filter(user=user, completed=True).count(),
-                'total_sessions': PracticeSession.objects.filter(user=user).count(),
-                'vocabulary_count': VocabularyWord.objects.filter(user=user).count()
+                'lessons_completed': user.lessons_completed,
+                'total_sessions': user.total_sessions,
+                'vocabulary_count': user.vocabulary_count
             })
         
         return Response({
@@ -4816,6 +4100,7 @@ def admin_users_list(request):
                 'page': page,
                 'page_size': page_size,
                 'total': total,
+                'total_is_estimate': total_is_estimate,
                 'pages': (total + page_size - 1) // page_size
             }
         })
@@ -5004,9 +4289,7 @@ def admin_activities_list(request):
                 page_size = 50
         except (ValueError, TypeError):
             page = 1
-            page_size = 50
-        
-        activities = []
+            page_size = 50
         
         # Helper function to get date range
         def get_date_range(year_str, month_str=None):
@@ -5076,38 +4359,9 @@ def admin_activities_list(request):
             # Users without profiles
             user_query = user_query.filter(profile__isnull=True)
         
-        # Get recent users based on filters
-        # Note: We'll apply pagination after combining with lesson progress
-        recent_users = list(user_query.order_by('-date_joined')[:1000])  # Limit to prevent memory issues
-        
-        for user in recent_users:
-            try:
-                profile = getattr(user, 'profile', None)
-            except Exception:
-                profile = None
-            
-            # Determine status
-            if user.is_active and profile and hasattr(profile, 'survey_completed_at') and profile.survey_completed_at:
-                user_status = 'completed'
-            elif user.is_active:
-                user_status = 'in_process'
-            elif not user.is_active:
-                user_status = 'need_info'
-            else:
-                user_status = 'unassigned'
-            
-            activities.append({
-                'id': f'user_{user.id}',
-                'name': f"{user.first_name} {user.last_name}".strip() or user.username,
-                'type': 'user_registration',
-                'email': user.email,
-                'date_of_birth': None,  # Not stored in current model
-                'mrn': f'USR{user.id:04d}',  # User reference number
-                'service_date': user.date_joined.strftime('%m/%d/%Y') if user.date_joined else None,
-                'assigned_date': user.date_joined.strftime('%m/%d/%Y') if user.date_joined else None,
-                'status': user_status,
-                'document_id': f'usr_{user.id}'
-            })
+        # Both sources are read newest first with keyset pagination, so a page
+        # touches at most page_size + 1 rows per source however deep it is.
+        sources = [FeedSource(0, user_query.select_related('profile'), 'date_joined')]
         
         # Also include lesson progress entries
         if status_filter in ['all', 'completed', 'in_process']:
@@ -5131,69 +4385,100 @@ def admin_activities_list(request):
             elif status_filter == 'in_process':
                 progress_query = progress_query.filter(completed=False)
             
-            # Get recent progress (limit to prevent memory issues)
-            recent_progress = list(progress_query.order_by('-updated_at')[:1000])
-            
-            for progress in recent_progress:
+            sources.append(FeedSource(1, progress_query, 'updated_at'))
+        
+        cursor = request.query_params.get('cursor')
+        try:
+            decoded_cursor = decode_cursor(cursor) if cursor else None
+        except InvalidCursor as e:
+            return Response({
+                "message": "Invalid cursor",
+                "error": str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Page numbers are still honoured for older clients; a cursor takes precedence
+        offset = 0 if decoded_cursor else (page - 1) * page_size
+        page_items, next_cursor = fetch_page(sources, decoded_cursor, limit=page_size, offset=offset)
+        
+        activities = []
+        for rank, obj in page_items:
+            if rank == 0:
+                user = obj
                 try:
-                    full_name = f"{progress.user.first_name or ''} {progress.user.last_name or ''}".strip()
-                    user_email = progress.user.email
-                    user_username = progress.user.username
+                    profile = getattr(user, 'profile', None)
                 except Exception:
-                    full_name = ''
-                    user_email = ''
-                    user_username = 'Unknown'
+                    profile = None
                 
-                try:
-                    lesson_id = progress.lesson.id if progress.lesson else 0
-                    lesson_created = progress.lesson.created_at if progress.lesson and progress.lesson.created_at else None
-                except Exception:
-                    lesson_id = 0
-                    lesson_created = None
+                # Determine status
+                if user.is_active and profile and hasattr(profile, 'survey_completed_at') and profile.survey_completed_at:
+                    user_status = 'completed'
+                elif user.is_active:
+                    user_status = 'in_process'
+                elif not user.is_active:
+                    user_status = 'need_info'
+                else:
+                    user_status = 'unassigned'
                 
                 activities.append({
-                    'id': f'progress_{progress.id}',
-                    'name': full_name or user_username,
-                    'type': 'lesson_progress',
-                    'email': user_email,
-                    'date_of_birth': None,
-                    'mrn': f'LSN{lesson_id:04d}',
-                    'service_date': lesson_created.strftime('%m/%d/%Y') if lesson_created else None,
-                    'assigned_date': progress.updated_at.strftime('%m/%d/%Y') if progress.updated_at else None,
-                    'status': 'completed' if progress.completed else 'in_process',
-                    'document_id': f'prg_{progress.id}'
+                    'id': f'user_{user.id}',
+                    'name': f"{user.first_name} {user.last_name}".strip() or user.username,
+                    'type': 'user_registration',
+                    'email': user.email,
+                    'date_of_birth': None,  # Not stored in current model
+                    'mrn': f'USR{user.id:04d}',  # User reference number
+                    'service_date': user.date_joined.strftime('%m/%d/%Y') if user.date_joined else None,
+                    'assigned_date': user.date_joined.strftime('%m/%d/%Y') if user.date_joined else None,
+                    'status': user_status,
+                    'document_id': f'usr_{user.id}'
                 })
-        
-        # Sort by date (most recent first)
-        # Handle None dates gracefully
-        def sort_key(x):
-            date_str = x.get('assigned_date', '')
-            if not date_str or date_str == 'None' or date_str == 'N/A':
-                return ''
+                continue
+            
+            progress = obj
             try:
-                # Convert MM/DD/YYYY to sortable format
-                parts = date_str.split('/')
-                if len(parts) == 3:
-                    return f"{parts[2]}-{parts[0].zfill(2)}-{parts[1].zfill(2)}"
-                return date_str
-            except:
-                return date_str
-        
-        activities.sort(key=sort_key, reverse=True)
+                full_name = f"{progress.user.first_name or ''} {progress.user.last_name or ''}".strip()
+                user_email = progress.user.email
+                user_username = progress.user.username
+            except Exception:
+                full_name = ''
+                user_email = ''
+                user_username = 'Unknown'
+            
+            try:
+                lesson_id = progress.lesson.id if progress.lesson else 0
+                lesson_created = progress.lesson.created_at if progress.lesson and progress.lesson.created_at else None
+            except Exception:
+                lesson_id = 0
+                lesson_created = None
+            
+            activities.append({
+                'id': f'progress_{progress.id}',
+                'name': full_name or user_username,
+                'type': 'lesson_progress',
+                'email': user_email,
+                'date_of_birth': None,
+                'mrn': f'LSN{lesson_id:04d}',
+                'service_date': lesson_created.strftime('%m/%d/%Y') if lesson_created else None,
+                'assigned_date': progress.updated_at.strftime('%m/%d/%Y') if progress.updated_at else None,
+                'status': 'completed' if progress.completed else 'in_process',
+                'document_id': f'prg_{progress.id}'
+            })
         
-        # Pagination
-        total = len(activities)
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_activities = activities[start:end]
+        # Totals cost one COUNT per source, so only page-number requests pay for them
+        total = None
+        pages = None
+        if not decoded_cursor:
+            total = sum(source.queryset.count() for source in sources)
+            pages = (total + page_size - 1) // page_size
         
         return Response({
-            'activities': paginated_activities,
+            'activities': activities,
             'pagination': {
                 'page': page,
                 'page_size': page_size,
                 'total': total,
-                'pages': (total + page_size - 1) // page_size
+                'pages': pages,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         })
     
@@ -5860,61 +5145,35 @@ def admin_analytics(request):
     
     try:
         days = int(request.query_params.get('days', 30))
-        end_date = timezone.now().date()
+        end_date = timezone.localdate()
         start_date = end_date - timedelta(days=days)
         
-        # Daily user registrations
-        daily_registrations = defaultdict(int)
-        registrations = User.objects.filter(
-            date_joined__date__gte=start_date,
-            date_joined__date__lte=end_date
-        )
-        for user in registrations:
-            date_str = user.date_joined.date().isoformat()
-            daily_registrations[date_str] += 1
-        
-        # Daily lesson completions
-        daily_completions = defaultdict(int)
-        completions = LessonProgress.objects.filter(
-            completed=True,
-            updated_at__date__gte=start_date,
-            updated_at__date__lte=end_date
-        )
-        for progress in completions:
-            date_str = progress.updated_at.date().isoformat()
-            daily_completions[date_str] += 1
-        
-        # Daily practice sessions with detailed metrics
-        daily_sessions = defaultdict(int)
-        daily_practice_time = defaultdict(int)
-        daily_practice_scores = defaultdict(list)
-        sessions = PracticeSession.objects.filter(
-            session_date__date__gte=start_date,
-            session_date__date__lte=end_date
-        )
-        for session in sessions:
-            date_str = session.session_date.date().isoformat()
-            daily_sessions[date_str] += 1
-            daily_practice_time[date_str] += session.duration_minutes or 0
-            # Score is required in model, but include it anyway
-            if hasattr(session, 'score') and session.score is not None:
-                daily_practice_scores[date_str].append(session.score)
+        # Daily registrations, completions and practice metrics from the rollup
+        daily_totals = platform_stats.get_daily_totals(start_date, end_date)
         
         # Build time series data with practice metrics
         time_series = []
+        practice_trends = []
         current_date = start_date
         while current_date <= end_date:
             date_str = current_date.isoformat()
-            scores = daily_practice_scores.get(date_str, [])
-            avg_score = sum(scores) / len(scores) if scores else 0
+            day = daily_totals.get(current_date)
+            avg_score = day.avg_score if day else 0
             time_series.append({
                 'date': date_str,
-                'registrations': int(daily_registrations.get(date_str, 0)),
-                'completions': int(daily_completions.get(date_str, 0)),
-                'sessions': int(daily_sessions.get(date_str, 0)),
-                'practice_time_minutes': int(daily_practice_time.get(date_str, 0)),
+                'registrations': day.registrations if day else 0,
+                'completions': day.completions if day else 0,
+                'sessions': day.sessions if day else 0,
+                'practice_time_minutes': day.practice_minutes if day else 0,
                 'avg_score': float(round(avg_score, 2))
             })
+            practice_trends.append({
+                'date': date_str,
+                'sessions': day.sessions if day else 0,
+                'avg_score': float(round(avg_score, 2)),
+                'total_time_minutes': day.practice_minutes if day else 0,
+                'active_users': day.active_users if day else 0
+            })
             current_date += timedelta(days=1)
         
         # Lesson type distribution
@@ -5941,81 +5200,40 @@ def admin_analytics(request):
         
         # ============= Practice Analytics =============
         # Overall practice statistics
-        total_sessions = PracticeSession.objects.count()
-        total_practice_time = PracticeSession.objects.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        avg_session_duration = PracticeSession.objects.aggregate(
-            avg=Avg('duration_minutes')
-        )['avg'] or 0
-        avg_practice_score = PracticeSession.objects.aggregate(
-            avg=Avg('score')
-        )['avg'] or 0
+        overall = platform_stats.summarize()
+        total_sessions = overall['sessions']
+        total_practice_time = overall['practice_minutes']
+        avg_session_duration = overall['avg_duration']
+        avg_practice_score = overall['avg_score']
         
         # Practice sessions in the selected period
-        period_sessions = PracticeSession.objects.filter(
-            session_date__date__gte=start_date,
-            session_date__date__lte=end_date
-        )
-        period_total_sessions = period_sessions.count()
-        period_total_time = period_sessions.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        period_avg_score = period_sessions.aggregate(
-            avg=Avg('score')
-        )['avg'] or 0
+        period = platform_stats.summarize(start_date, end_date)
+        period_total_sessions = period['sessions']
+        period_total_time = period['practice_minutes']
+        period_avg_score = period['avg_score']
         
         # Practice sessions by type distribution
-        practice_type_dist = period_sessions.values('session_type').annotate(
-            count=Count('id'),
-            avg_score=Avg('score'),
-            avg_duration=Avg('duration_minutes'),
-            total_time=Sum('duration_minutes')
-        ).order_by('-count')
+        practice_type_dist = platform_stats.type_distribution(start_date, end_date)
         
         # Active users (users who practiced in the period)
-        active_users = period_sessions.values('user_id').distinct().count()
+        active_users = platform_stats.distinct_practicing_users(start_date)
         
         # Top performing practice types
-        top_practice_types = period_sessions.values('session_type').annotate(
-            count=Count('id'),
-            avg_score=Avg('score')
-        ).order_by('-avg_score')[:5]
-        
-        # Practice session trends (daily averages)
-        practice_trends = []
-        current_date = start_date
-        while current_date <= end_date:
-            date_str = current_date.isoformat()
-            day_sessions = PracticeSession.objects.filter(
-                session_date__date=current_date
-            )
-            day_count = day_sessions.count()
-            # Calculate average score, handling cases where score might be 0 or missing
-            day_avg_score = day_sessions.aggregate(avg=Avg('score'))['avg']
-            day_avg_score = round(day_avg_score, 2) if day_avg_score is not None else 0
-            day_total_time = day_sessions.aggregate(total=Sum('duration_minutes'))['total'] or 0
-            day_active_users = day_sessions.values('user_id').distinct().count()
-            
-            practice_trends.append({
-                'date': date_str,
-                'sessions': int(day_count),
-                'avg_score': float(day_avg_score),
-                'total_time_minutes': int(day_total_time or 0),
-                'active_users': int(day_active_users)
-            })
-            current_date += timedelta(days=1)
+        top_practice_types = sorted(
+            ({'session_type': t['session_type'], 'count': t['count'], 'avg_score': t['avg_score']} for t in practice_type_dist),
+            key=lambda t: t['avg_score'] or 0,
+            reverse=True
+        )[:5]
         
         # User engagement metrics
-        total_users_practiced = PracticeSession.objects.values('user_id').distinct().count()
-        period_users_practiced = period_sessions.values('user_id').distinct().count()
+        total_users_practiced = platform_stats.distinct_practicing_users()
+        period_users_practiced = active_users
         
-        # Practice session quality metrics (handle null scores)
-        high_score_sessions = period_sessions.filter(score__gte=80).count()
-        medium_score_sessions = period_sessions.filter(score__gte=60, score__lt=80).count()
-        low_score_sessions = period_sessions.filter(score__lt=60).count()
-        # Sessions without scores (if any)
-        no_score_sessions = period_sessions.filter(score__isnull=True).count()
+        # Practice session quality metrics (score is required, so there are no unscored sessions)
+        high_score_sessions = period['high_score_sessions']
+        medium_score_sessions = period['medium_score_sessions']
+        low_score_sessions = period['low_score_sessions']
+        no_score_sessions = 0
         
         return Response({
             'time_series': time_series,
@@ -6546,84 +5764,92 @@ def admin_practice_stats(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        today = timezone.now().date()
+        today = timezone.localdate()
         last7 = today - timedelta(days=7)
         last30 = today - timedelta(days=30)
         
-        # Overall stats
-        total_sessions = PracticeSession.objects.count()
+        # Overall stats (from the daily rollup)
+        overall = platform_stats.summarize()
+        total_sessions = overall['sessions']
         logger.info(f"Calculating stats for {total_sessions} total practice sessions")
-        total_time = PracticeSession.objects.aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        avg_score_result = PracticeSession.objects.aggregate(
-            avg=Avg('score')
-        )['avg']
-        avg_score = float(avg_score_result) if avg_score_result is not None else 0.0
-        avg_duration_result = PracticeSession.objects.aggregate(
-            avg=Avg('duration_minutes')
-        )['avg']
-        avg_duration = float(avg_duration_result) if avg_duration_result is not None else 0.0
+        total_time = overall['practice_minutes']
+        avg_score = float(overall['avg_score'])
+        avg_duration = float(overall['avg_duration'])
         
         # Recent stats
-        sessions_last_7 = PracticeSession.objects.filter(session_date__date__gte=last7).count()
-        sessions_last_30 = PracticeSession.objects.filter(session_date__date__gte=last30).count()
-        time_last_7 = PracticeSession.objects.filter(session_date__date__gte=last7).aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
-        time_last_30 = PracticeSession.objects.filter(session_date__date__gte=last30).aggregate(
-            total=Sum('duration_minutes')
-        )['total'] or 0
+        recent_7 = platform_stats.summarize(last7, today)
+        recent_30 = platform_stats.summarize(last30, today)
+        sessions_last_7 = recent_7['sessions']
+        sessions_last_30 = recent_30['sessions']
+        time_last_7 = recent_7['practice_minutes']
+        time_last_30 = recent_30['practice_minutes']
         
         # Active users
-        active_users_7 = PracticeSession.objects.filter(
-            session_date__date__gte=last7
-        ).values('user_id').distinct().count()
-        active_users_30 = PracticeSession.objects.filter(
-            session_date__date__gte=last30
-        ).values('user_id').distinct().count()
+        active_users_7 = platform_stats.distinct_practicing_users(last7)
+        active_users_30 = platform_stats.distinct_practicing_users(last30)
         
         # Session type distribution
-        type_distribution = PracticeSession.objects.values('session_type').annotate(
-            count=Count('id'),
-            avg_score=Avg('score'),
-            total_time=Sum('duration_minutes')
-        ).order_by('-count')
+        type_distribution = [
+            {'session_type': t['session_type'], 'count': t['count'], 'avg_score': t['avg_score'], 'total_time': t['total_time']}
+            for t in platform_stats.type_distribution()
+        ]
         
         # Daily stats for last 30 days
+        daily_totals = platform_stats.get_daily_totals(last30, today)
         daily_stats = []
         for i in range(30):
             date = last30 + timedelta(days=i)
-            day_sessions = PracticeSession.objects.filter(session_date__date=date)
+            day = daily_totals.get(date)
             daily_stats.append({
                 'date': date.isoformat(),
-                'sessions': day_sessions.count(),
-                'total_time': day_sessions.aggregate(total=Sum('duration_minutes'))['total'] or 0,
-                'avg_score': day_sessions.aggregate(avg=Avg('score'))['avg'] or 0,
-                'active_users': day_sessions.values('user_id').distinct().count()
+                'sessions': day.sessions if day else 0,
+                'total_time': day.practice_minutes if day else 0,
+                'avg_score': day.avg_score if day else 0,
+                'active_users': day.active_users if day else 0
             })
         
-        # Get active users with practice statistics
-        active_users_data = []
+        # Get active users with practice statistics: one annotated query, sorted and paginated in SQL
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = int(request.query_params.get('page_size', 50))
+            if page < 1:
+                page = 1
+            if page_size < 1 or page_size > 100:
+                page_size = 50
+        except (ValueError, TypeError):
+            page = 1
+            page_size = 50
+        sort_fields = {
+            'total_sessions': 'total_sessions',
+            'total_time': 'total_time',
+            'avg_score': 'avg_score',
+            'sessions_last_30': 'sessions_last_30',
+            'last_session': 'last_session_date',
+        }
+        sort_field = sort_fields.get(request.query_params.get('sort', 'total_sessions'), 'total_sessions')
+        
+        last30_start = platform_stats.range_start(last30)
+        recent_filter = Q(practice_sessions__session_date__gte=last30_start)
         users_with_sessions = User.objects.filter(
             practice_sessions__isnull=False
-        ).distinct().select_related('profile')
-        
-        for user in users_with_sessions:
-            user_sessions = PracticeSession.objects.filter(user=user)
-            user_total_sessions = user_sessions.count()
-            user_total_time = user_sessions.aggregate(total=Sum('duration_minutes'))['total'] or 0
-            user_avg_score = user_sessions.aggregate(avg=Avg('score'))['avg']
-            user_avg_score = float(user_avg_score) if user_avg_score is not None else 0.0
-            
-            # Recent activity (last 30 days)
-            user_sessions_30 = user_sessions.filter(session_date__date__gte=last30)
-            user_sessions_30_count = user_sessions_30.count()
-            user_time_30 = user_sessions_30.aggregate(total=Sum('duration_minutes'))['total'] or 0
-            
-            # Last session date
-            last_session = user_sessions.order_by('-session_date').first()
-            last_session_date = last_session.session_date if last_session else None
+        ).annotate(
+            total_sessions=Count('practice_sessions'),
+            total_time=Sum('practice_sessions__duration_minutes'),
+            avg_score=Avg('practice_sessions__score'),
+            sessions_last_30=Count('practice_sessions', filter=recent_filter),
+            time_last_30=Sum('practice_sessions__duration_minutes', filter=recent_filter),
+            last_session_date=Max('practice_sessions__session_date'),
+        ).select_related('profile').order_by(F(sort_field).desc(nulls_last=True), 'id')
+        
+        total_active_users = platform_stats.distinct_practicing_users()
+        start = (page - 1) * page_size
+        
+        active_users_data = []
+        for user in users_with_sessions[start:start + page_size]:
+            user_total_time = user.total_time or 0
+            user_avg_score = float(user.avg_score) if user.avg_score is not None else 0.0
+            user_time_30 = user.time_last_30 or 0
+            last_session_date = user.last_session_date
             
             profile = getattr(user, 'profile', None)
             active_users_data.append({
@@ -6642,19 +5868,16 @@ def admin_practice_stats(request):
                     'current_streak': profile.current_streak if profile else 0,
                 } if profile else None,
                 'practice_stats': {
-                    'total_sessions': user_total_sessions,
+                    'total_sessions': user.total_sessions,
                     'total_time_minutes': int(user_total_time),
                     'total_time_hours': round(float(user_total_time) / 60, 2) if user_total_time > 0 else 0.0,
                     'avg_score': round(user_avg_score, 2),
-                    'sessions_last_30': user_sessions_30_count,
+                    'sessions_last_30': user.sessions_last_30,
                     'time_last_30_minutes': int(user_time_30),
                     'time_last_30_hours': round(float(user_time_30) / 60, 2) if user_time_30 > 0 else 0.0,
                 }
             })
         
-        # Sort by total sessions (descending)
-        active_users_data.sort(key=lambda x: x['practice_stats']['total_sessions'], reverse=True)
-        
         return Response({
             'overall': {
                 'total_sessions': total_sessions,
@@ -6675,7 +5898,13 @@ def admin_practice_stats(request):
             },
             'type_distribution': list(type_distribution),
             'daily_stats': daily_stats,
-            'active_users': active_users_data
+            'active_users': active_users_data,
+            'active_users_pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total_active_users,
+                'pages': (total_active_users + page_size - 1) // page_size
+            }
         })
     
     except Exception as e:
@@ -8375,95 +7604,17 @@ def get_user_progress_data(user: User, page_path: str = None) -> dict:
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_all_category_progress(request):
-    """Get progress for all learning categories - Automatically syncs and creates records from existing data"""
+    """Get progress for all learning categories (read-only; kept current by activity deltas)"""
     try:
-        user = request.user
-        logger.debug(f"Getting category progress for user: {user.id} ({user.username})")
-        
-        # Get all existing CategoryProgress records
-        try:
-            existing_categories = CategoryProgress.objects.filter(user=user)
-            existing_category_names = set(c.category for c in existing_categories)
-            logger.debug(f"Found {len(existing_categories)} existing category progress records")
-        except Exception as e:
-            logger.error(f"Error querying CategoryProgress: {str(e)}")
-            # If table doesn't exist, return empty array with error message
-            return Response({
-                "message": "CategoryProgress table not found. Please run migrations.",
-                "error": str(e),
-                "data": []
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
-        # Define all possible categories
-        all_categories = [
-            'young_kids',
-            'teen_kids',
-            'adults_beginner',
-            'adults_intermediate',
-            'adults_advanced',
-            'ielts_pte'
-        ]
-        
-        # For each category, ensure a record exists and is synced with latest data
-        for category in all_categories:
-            try:
-                if category not in existing_category_names:
-                    # Create new CategoryProgress record
-                    logger.info(f"Creating new CategoryProgress for category: {category}")
-                    category_progress, created = CategoryProgress.objects.get_or_create(
-                        user=user,
-                        category=category,
-                        defaults={
-                            'total_points': 0,
-                            'total_streak': 0,
-                            'lessons_completed': 0,
-                            'practice_time_minutes': 0,
-                            'average_score': 0.0,
-                            'progress_percentage': 0.0,
-                            'level': 1,
-                            'stories_completed': 0,
-                            'vocabulary_words': 0,
-                            'pronunciation_attempts': 0,
-                            'games_completed': 0,
-                        }
-                    )
-                    # Sync with existing data
-                    logger.debug(f"Syncing data for category: {category}")
-                    sync_category_progress(user, category, category_progress)
-                    logger.debug(f"Synced {category}: {category_progress.total_points} points, {category_progress.stories_completed} stories")
-                else:
-                    # Update existing record with latest data from source tables
-                    logger.debug(f"Updating existing CategoryProgress for category: {category}")
-                    category_progress = CategoryProgress.objects.get(user=user, category=category)
-                    sync_category_progress(user, category, category_progress)
-                    category_progress.save()  # Save synced data to MySQL
-                    logger.debug(f"Updated {category}: {category_progress.total_points} points, {category_progress.stories_completed} stories")
-            except Exception as e:
-                logger.error(f"Error processing category {category}: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                # Continue with other categories even if one fails
-        
-        # Get all categories (including newly created ones)
-        try:
-            categories = CategoryProgress.objects.filter(user=user).order_by('-last_activity', '-total_points')
-            logger.info(f"Returning {categories.count()} category progress records")
-            serializer = CategoryProgressSerializer(categories, many=True)
-            return Response(serializer.data)
-        except Exception as e:
-            logger.error(f"Error serializing category progress: {str(e)}")
-            return Response({
-                "message": "Error retrieving category progress",
-                "error": str(e),
-                "data": []
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        categories = get_category_progress_rows(request.user, ALL_CATEGORIES)
+        serializer = CategoryProgressSerializer(categories, many=True)
+        return Response(serializer.data)
     except Exception as e:
         logger.error(f"Error getting category progress: {str(e)}")
-        import traceback
-        traceback.print_exc()
         return Response({
-            "message": "An error occurred",
-            "error": str(e)
+            "message": "Error retrieving category progress",
+            "error": str(e),
+            "data": []
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -8472,25 +7623,12 @@ def get_all_category_progress(request):
 def get_category_progress(request, category):
     """Get progress for a specific category"""
     try:
-        user = request.user
-        category_progress, created = CategoryProgress.objects.get_or_create(
-            user=user,
-            category=category,
-            defaults={
-                'total_points': 0,
-                'total_streak': 0,
-                'lessons_completed': 0,
-                'practice_time_minutes': 0,
-                'average_score': 0.0,
-                'progress_percentage': 0.0,
-                'level': 1
-            }
-        )
-        
-        # Sync with existing progress data if newly created
-        if created:
-            sync_category_progress(user, category, category_progress)
+        if category not in ALL_CATEGORIES:
+            return Response({
+                "message": "Unknown category"
+            }, status=status.HTTP_404_NOT_FOUND)
         
+        category_progress = get_category_progress_rows(request.user, [category])[0]
         serializer = CategoryProgressSerializer(category_progress)
         return Response(serializer.data)
     except Exception as e:
@@ -9084,6 +8222,8 @@ def admin_video_create(request):
 # ============= Public Video Lessons Endpoint =============
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@content_versions.conditional(VideoLesson)
+@catalog_cache.cached(VideoLesson)
 def videos_list(request):
     """Get all active video lessons for public viewing (adults/videos page)"""
     try:
@@ -9350,6 +8490,8 @@ def video_share_event(request, slug):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@content_versions.conditional(CommonLesson)
+@catalog_cache.cached(CommonLesson)
 def adults_common_lessons(request):
     """Get all common lessons available for adults"""
     try:
@@ -9368,8 +8510,8 @@ def adults_common_lessons(request):
                 Q(title__icontains=search) | Q(description__icontains=search)
             )
         
-        lessons = queryset.order_by('order', '-created_at')
-        serializer = CommonLessonSerializer(lessons, many=True, context={'request': request})
+        lessons = CommonLessonSerializer.sparse_queryset(queryset.order_by('order', '-created_at'), request, slim=True)
+        serializer = CommonLessonSerializer(lessons, many=True, slim=True, context={'request': request})
         
         return Response({
             'success': True,
@@ -9611,7 +8753,7 @@ def adults_weekly_challenge_enroll(request, challenge_id):
 def adults_my_weekly_challenges(request):
     """Get user's weekly challenges"""
     try:
-        enrollments = UserWeeklyChallenge.objects.filter(user=request.user).order_by('-enrolled_at')
+        enrollments = UserWeeklyChallenge.objects.filter(user=request.user).select_related('challenge').order_by('-enrolled_at')
         serializer = UserWeeklyChallengeSerializer(enrollments, many=True)
         
         return Response({
@@ -9892,13 +9034,17 @@ def adults_spaced_repetition_items(request):
             queryset = queryset.filter(item_type=item_type)
         
         items = queryset.order_by('next_review_date')
-        serializer = SpacedRepetitionItemSerializer(items, many=True)
+        page = pagination.paginate(request, items, ('next_review_date',))
+        serializer = SpacedRepetitionItemSerializer(items if page is None else page.items, many=True)
         
         return Response({
             'success': True,
             'items': serializer.data,
-            'count': len(serializer.data)
+            'count': len(serializer.data),
+            **(page.links if page else {})
         })
+    except pagination.InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Adults spaced repetition items error: {str(e)}")
         return Response({
@@ -9918,14 +9064,17 @@ def adults_spaced_repetition_due(request):
             user=request.user,
             next_review_date__lte=today
         ).order_by('next_review_date')
-        
-        serializer = SpacedRepetitionItemSerializer(items, many=True)
+        page = pagination.paginate(request, items, ('next_review_date',))
+        serializer = SpacedRepetitionItemSerializer(items if page is None else page.items, many=True)
         
         return Response({
             'success': True,
             'items': serializer.data,
-            'count': len(serializer.data)
+            'count': len(serializer.data),
+            **(page.links if page else {})
         })
+    except pagination.InvalidCursor:
+        raise
     except Exception as e:
         logger.error(f"Adults spaced repetition due error: {str(e)}")
         return Response({
@@ -9997,6 +9146,8 @@ def adults_spaced_repetition_review(request, item_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@content_versions.conditional(MicrolearningModule, per_user=True)
+@catalog_cache.cached(MicrolearningModule, per_user=True)
 def adults_microlearning_modules(request):
     """Get microlearning modules"""
     try:
@@ -10006,8 +9157,10 @@ def adults_microlearning_modules(request):
         if category:
             queryset = queryset.filter(category=category)
         
-        modules = queryset.order_by('-is_featured', 'order', '-created_at')
-        serializer = MicrolearningModuleSerializer(modules, many=True, context={'request': request})
+        modules = MicrolearningModuleSerializer.sparse_queryset(
+            queryset.order_by('-is_featured', 'order', '-created_at'), request, slim=True
+        )
+        serializer = MicrolearningModuleSerializer(modules, many=True, slim=True, context={'request': request})
         
         return Response({
             'success': True,
@@ -10025,15 +9178,18 @@ def adults_microlearning_modules(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@content_versions.conditional(MicrolearningModule, per_user=True)
+@catalog_cache.cached(MicrolearningModule, per_user=True)
 def adults_microlearning_featured(request):
     """Get featured microlearning modules"""
     try:
         modules = MicrolearningModule.objects.filter(
             is_active=True,
             is_featured=True
-        ).order_by('order', '-created_at')[:5]
+        ).order_by('order', '-created_at')
+        modules = MicrolearningModuleSerializer.sparse_queryset(modules, request, slim=True)[:5]
         
-        serializer = MicrolearningModuleSerializer(modules, many=True, context={'request': request})
+        serializer = MicrolearningModuleSerializer(modules, many=True, slim=True, context={'request': request})
         
         return Response({
             'success': True,
@@ -10267,8 +9423,20 @@ def adults_analytics_summary(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _adults_dashboard_stamp(request):
+    """What the dashboard depends on besides its tables: the date and the next recommendation to expire."""
+    now = timezone.now()
+    next_expiry = PersonalizedRecommendation.objects.filter(
+        user=request.user,
+        dismissed=False,
+        expires_at__gte=now
+    ).aggregate(next_expiry=Min('expires_at'))['next_expiry']
+    return f'{now.date()}|{next_expiry}'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@content_versions.conditional(WeeklyChallenge, per_user=True, stamp=_adults_dashboard_stamp)
 def adults_dashboard(request):
     """Get comprehensive dashboard data for adults page"""
     try:
@@ -10365,6 +9533,8 @@ def adults_dashboard(request):
 # ============= Dictionary Endpoints =============
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@content_versions.conditional(DictionaryEntry)
+@catalog_cache.cached(DictionaryEntry)
 def dictionary_search(request):
     """Search dictionary entries"""
     query = request.GET.get('q', '').strip()
@@ -10381,6 +9551,8 @@ def dictionary_search(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@content_versions.conditional(DictionaryEntry)
+@catalog_cache.cached(DictionaryEntry)
 def dictionary_lookup(request, word):
     """Lookup word details"""
     try:
@@ -10395,9 +9567,10 @@ def dictionary_lookup(request, word):
 @permission_classes([IsAuthenticated])
 def my_dictionary(request):
     """Get user's personal dictionary"""
-    entries = list(UserDictionary.objects.filter(user=request.user).order_by('-added_at'))
-    serializer = UserDictionarySerializer(entries, many=True, context={'request': request})
-    return Response({'success': True, 'data': serializer.data})
+    entries = UserDictionary.objects.filter(user=request.user).select_related('dictionary_entry').order_by('-added_at')
+    page = pagination.paginate(request, entries, ('-added_at',))
+    serializer = UserDictionarySerializer(entries if page is None else page.items, many=True, context={'request': request})
+    return Response({'success': True, 'data': serializer.data, **(page.links if page else {})})
 
 
 @api_view(['POST'])
@@ -10474,7 +9647,7 @@ def flashcard_deck_detail(request, deck_id):
     """Get deck details with cards"""
     try:
         deck = FlashcardDeck.objects.get(user=request.user, id=deck_id)
-        cards = Flashcard.objects.filter(deck=deck).order_by('next_review_date')
+        cards = Flashcard.objects.filter(deck=deck).select_related('deck').order_by('next_review_date')
         deck_serializer = FlashcardDeckSerializer(deck, context={'request': request})
         cards_serializer = FlashcardSerializer(cards, many=True, context={'request': request})
         return Response({
@@ -10497,7 +9670,7 @@ def flashcards_due_for_review(request):
     if deck_id:
         query = query.filter(deck_id=deck_id)
     
-    cards = query.order_by('next_review_date')[:20]
+    cards = query.select_related('deck').order_by('next_review_date')[:20]
     serializer = FlashcardSerializer(cards, many=True, context={'request': request})
     return Response({'success': True, 'data': serializer.data})
 
@@ -10763,6 +9936,8 @@ def delete_multi_mode_practice_sessions(request):
 # ============= Business Email Coach =============
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@content_versions.conditional(EmailTemplate)
+@catalog_cache.cached(EmailTemplate)
 def email_templates(request):
     """Get email templates"""
     template_type = request.GET.get('type')
@@ -10828,143 +10003,204 @@ def submit_email_practice(request):
 @permission_classes([IsAuthenticated])
 def email_practice_history(request):
     """Get email practice history"""
-    sessions = EmailPracticeSession.objects.filter(user=request.user).order_by('-created_at')[:20]
+    sessions = EmailPracticeSession.objects.filter(user=request.user).select_related('template').order_by('-created_at')[:20]
     serializer = EmailPracticeSessionSerializer(sessions, many=True, context={'request': request})
     return Response({'success': True, 'data': serializer.data})
 
 
 # ============= Pronunciation Analyzer =============
+def _pronunciation_result(target_text, scoring=None, pending=False):
+    """
+    Score, feedback and analysis fields for a PronunciationPractice. ``scoring``
+    is a ``pronunciation_scoring.score_file`` result; without one the scores are
+    estimated from the length of the text.
+    """
+    word_count = len(target_text.split())
+    mistakes = []
+    suggestions = []
+    
+    if scoring:
+        accuracy_score = scoring['scores']['accuracy']
+        pronunciation_score = scoring['scores']['pronunciation']
+        fluency_score = scoring['scores']['fluency']
+        mistakes = list(scoring['mistakes'])
+        suggestions = list(scoring['suggestions'])
+    else:
+        base_score = 75.0
+        accuracy_score = base_score
+        pronunciation_score = base_score + 5.0  # Slightly higher default
+        fluency_score = base_score - 5.0  # Slightly lower default
+        
+        # Adjust scores based on text complexity
+        if word_count > 10:
+            # Longer sentences are harder
+            accuracy_score -= 5
+            pronunciation_score -= 3
+        elif word_count < 5:
+            # Shorter phrases are easier
+            accuracy_score += 5
+            pronunciation_score += 3
+    
+    feedback_parts = []
+    if pronunciation_score >= 80:
+        feedback_parts.append("Great pronunciation! You're speaking clearly and accurately.")
+    elif pronunciation_score >= 60:
+        feedback_parts.append("Good effort! Your pronunciation is mostly clear with room for improvement.")
+        if not scoring:
+            suggestions.append("Practice speaking more slowly to improve clarity")
+            suggestions.append("Focus on enunciating each word clearly")
+    else:
+        feedback_parts.append("Keep practicing! Focus on the fundamentals of pronunciation.")
+        if not scoring:
+            mistakes.append("Some words need clearer articulation")
+            suggestions.append("Break down longer sentences into smaller phrases")
+            suggestions.append("Listen to native speakers and mimic their pronunciation")
+            suggestions.append("Practice tongue twisters to improve articulation")
+    
+    if fluency_score < 70 and not scoring:
+        suggestions.append("Work on maintaining a steady pace while speaking")
+        suggestions.append("Practice pausing at natural breaks in sentences")
+    
+    phonetic_analysis = {
+        'word_count': word_count,
+        'character_count': len(target_text),
+        'estimated_difficulty': 'medium' if word_count > 5 else 'easy',
+        'scoring': 'signal' if scoring else ('pending' if pending else 'text'),
+    }
+    if scoring:
+        phonetic_analysis['signal'] = scoring['metrics']
+    
+    return {
+        'accuracy_score': round(accuracy_score, 2),
+        'pronunciation_score': round(pronunciation_score, 2),
+        'fluency_score': round(fluency_score, 2),
+        'phonetic_analysis': phonetic_analysis,
+        'mistakes': mistakes,
+        'suggestions': suggestions,
+        'feedback': " ".join(feedback_parts) if feedback_parts else "Continue practicing to improve your pronunciation skills.",
+    }
+
+
+def _store_pronunciation_scoring(practice_id, request_thread, future):
+    """Done-callback for scoring that outlived the request: replace the estimate with the real scores."""
+    try:
+        scoring = future.result()
+        practice = PronunciationPractice.objects.filter(pk=practice_id).only('target_text').first()
+        if practice is not None:
+            PronunciationPractice.objects.filter(pk=practice_id).update(
+                updated_at=timezone.now(),
+                **_pronunciation_result(practice.target_text, scoring)
+            )
+    except Exception as e:
+        logger.error(f"Error storing pronunciation scores for practice {practice_id}: {str(e)}")
+    finally:
+        # The pool's callback thread has its own connection; don't leave it open
+        if threading.get_ident() != request_thread:
+            connection.close()
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def submit_pronunciation_practice(request):
-    """Submit pronunciation recording for analysis"""
-    import base64
-    import os
-    from django.core.files.base import ContentFile
-    from django.conf import settings
+    """
+    Submit pronunciation recording for analysis.
+    The recording can be a multipart "audio" file part, a raw audio/* body (other
+    fields in the query string) or, for older clients, a base64 data URL in
+    "user_audio_url". The first two are streamed to disk (see api/audio_uploads.py).
+    """
+    content_type = (request.content_type or '').split(';')[0].strip().lower()
+    declared_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    # Room for the other fields and multipart framing; base64 JSON bodies are a third larger
+    length_limit = audio_uploads.max_bytes() + 64 * 1024
+    if content_type == 'application/json':
+        length_limit += audio_uploads.max_bytes() // 3
+    if declared_length > length_limit:
+        return Response({
+            'success': False,
+            'error': f'Recordings are limited to {audio_uploads.max_bytes() // (1024 * 1024)} MB'
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
     
-    target_text = request.data.get('target_text', '').strip()
-    user_audio_data = request.data.get('user_audio_url', '')  # Base64 encoded audio
-    user_audio_duration = float(request.data.get('user_audio_duration', 0.0))
+    audio_file_path = None
+    try:
+        if content_type.startswith('audio/'):
+            fields = request.query_params
+            if not fields.get('target_text', '').strip():
+                return Response({'success': False, 'error': 'target_text required'}, status=status.HTTP_400_BAD_REQUEST)
+            audio_file_path = audio_uploads.save_stream(request._request, content_type)
+        else:
+            upload = None
+            if content_type == 'multipart/form-data':
+                upload = audio_uploads.AudioUploadHandler(request._request)
+                request._request.upload_handlers = [upload]
+            fields = request.data
+            if upload is not None:
+                if upload.error:
+                    raise upload.error
+                audio_file_path = upload.url
+    except audio_uploads.AudioTooLarge as e:
+        return Response({'success': False, 'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    target_text = fields.get('target_text', '').strip()
+    user_audio_data = fields.get('user_audio_url', '')  # Base64 encoded audio (legacy clients)
+    user_audio_duration = float(fields.get('user_audio_duration', 0.0))
     
     if not target_text:
         return Response({'success': False, 'error': 'target_text required'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Save audio file if provided
-    audio_file_path = None
-    if user_audio_data and user_audio_data.startswith('data:audio'):
+    # Save base64 audio if provided
+    if not audio_file_path and user_audio_data and user_audio_data.startswith('data:audio'):
         try:
-            # Extract base64 data
-            header, encoded = user_audio_data.split(',', 1)
-            audio_data = base64.b64decode(encoded)
-            
-            # Create media directory if it doesn't exist
-            audio_dir = os.path.join(settings.MEDIA_ROOT, 'pronunciation_recordings')
-            os.makedirs(audio_dir, exist_ok=True)
-            
-            # Generate unique filename
-            filename = f"pronunciation_{request.user.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.webm"
-            file_path = os.path.join(audio_dir, filename)
-            
-            # Save file
-            with open(file_path, 'wb') as f:
-                f.write(audio_data)
-            
-            # Store relative path for URL
-            audio_file_path = f'/media/pronunciation_recordings/{filename}'
+            audio_file_path = audio_uploads.save_data_url(user_audio_data)
+        except audio_uploads.AudioTooLarge as e:
+            return Response({'success': False, 'error': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
         except Exception as e:
             logger.error(f"Error saving audio file: {str(e)}")
             # Continue without audio file
     
-    # Basic pronunciation analysis
-    # In production, integrate with speech recognition API (e.g., Google Cloud Speech-to-Text, Azure, etc.)
-    target_lower = target_text.lower()
-    word_count = len(target_text.split())
-    
-    # Calculate basic scores (can be enhanced with actual speech recognition)
-    # For now, provide reasonable default scores that can be improved with real analysis
-    base_score = 75.0
-    accuracy_score = base_score
-    pronunciation_score = base_score + 5.0  # Slightly higher default
-    fluency_score = base_score - 5.0  # Slightly lower default
-    
-    # Adjust scores based on text complexity
-    if word_count > 10:
-        # Longer sentences are harder
-        accuracy_score -= 5
-        pronunciation_score -= 3
-    elif word_count < 5:
-        # Shorter phrases are easier
-        accuracy_score += 5
-        pronunciation_score += 3
-    
-    # Generate phonetic representation (basic - can use phonemizer library)
-    target_phonetic = target_text  # Placeholder - can integrate phonemizer
-    
-    # Generate feedback and suggestions
-    feedback_parts = []
-    suggestions = []
-    mistakes = []
-    
-    if pronunciation_score >= 80:
-        feedback_parts.append("Great pronunciation! You're speaking clearly and accurately.")
-    elif pronunciation_score >= 60:
-        feedback_parts.append("Good effort! Your pronunciation is mostly clear with room for improvement.")
-        suggestions.append("Practice speaking more slowly to improve clarity")
-        suggestions.append("Focus on enunciating each word clearly")
-    else:
-        feedback_parts.append("Keep practicing! Focus on the fundamentals of pronunciation.")
-        mistakes.append("Some words need clearer articulation")
-        suggestions.append("Break down longer sentences into smaller phrases")
-        suggestions.append("Listen to native speakers and mimic their pronunciation")
-        suggestions.append("Practice tongue twisters to improve articulation")
-    
-    if fluency_score < 70:
-        suggestions.append("Work on maintaining a steady pace while speaking")
-        suggestions.append("Practice pausing at natural breaks in sentences")
+    # Score the recording itself in the scoring pool; fall back to the text-only estimate
+    scoring = None
+    pending = None
+    recording_path = audio_uploads.local_path(audio_file_path) if audio_file_path else None
+    if recording_path:
+        try:
+            pending = pronunciation_scoring.submit(recording_path, target_text)
+            if pending is not None:
+                scoring = pending.result(timeout=pronunciation_scoring.wait_seconds())
+                pending = None
+        except TimeoutError:
+            # Still scoring: answer with the estimate and store the real scores when they arrive
+            logger.warning(f"Pronunciation scoring for {recording_path} is taking longer than expected")
+        except Exception as e:
+            logger.error(f"Error scoring pronunciation recording: {str(e)}")
+            pending = None
     
-    feedback = " ".join(feedback_parts) if feedback_parts else "Continue practicing to improve your pronunciation skills."
+    if scoring and not user_audio_duration:
+        user_audio_duration = scoring['metrics']['duration_seconds']
+    result = _pronunciation_result(target_text, scoring, pending=pending is not None)
+    word_count = result['phonetic_analysis']['word_count']
     
     # Create practice record
     practice = PronunciationPractice.objects.create(
         user=request.user,
         target_text=target_text,
-        target_phonetic=target_phonetic,
-        target_audio_url=request.data.get('target_audio_url', ''),
+        target_phonetic=target_text,  # Placeholder - can integrate phonemizer
+        target_audio_url=fields.get('target_audio_url', ''),
         user_audio_url=audio_file_path or '',
         user_audio_duration=user_audio_duration,
-        accuracy_score=round(accuracy_score, 2),
-        pronunciation_score=round(pronunciation_score, 2),
-        fluency_score=round(fluency_score, 2),
-        phonetic_analysis={
-            'word_count': word_count,
-            'character_count': len(target_text),
-            'estimated_difficulty': 'medium' if word_count > 5 else 'easy'
-        },
-        mistakes=mistakes,
-        feedback=feedback,
-        suggestions=suggestions,
         attempts=1,
-        difficulty_level=min(10, max(1, word_count // 2))
+        difficulty_level=min(10, max(1, word_count // 2)),
+        **result
     )
+    if pending is not None:
+        pending.add_done_callback(functools.partial(_store_pronunciation_scoring, practice.id, threading.get_ident()))
     
     # Update user progress for all adult categories
-    try:
-        from .models import CategoryProgress
-        adult_categories = ['adults_beginner', 'adults_intermediate', 'adults_advanced']
-        
-        for category in adult_categories:
-            progress, _ = CategoryProgress.objects.get_or_create(
-                user=request.user,
-                category=category,
-                defaults={'progress_percentage': 0}
-            )
-            # Increment pronunciation attempts
-            progress.pronunciation_attempts = (progress.pronunciation_attempts or 0) + 1
-            progress.last_activity = timezone.now()
-            progress.save()
-    except Exception as e:
-        logger.error(f"Error updating pronunciation progress: {str(e)}")
+    for category in ADULT_CATEGORIES:
+        update_category_progress_from_activity(
+            user=request.user,
+            category=category,
+            pronunciation_attempts=1
+        )
     
     serializer = PronunciationPracticeSerializer(practice, context={'request': request})
     return Response({'success': True, 'data': serializer.data}, status=status.HTTP_201_CREATED)
@@ -11059,6 +10295,8 @@ def delete_pronunciation_practices(request):
 # ============= Cultural Intelligence =============
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@content_versions.conditional(CulturalIntelligenceModule, per_user=True)
+@catalog_cache.cached(CulturalIntelligenceModule, per_user=True)
 def cultural_modules(request):
     """Get cultural intelligence modules"""
     category = request.GET.get('category')
@@ -11096,7 +10334,7 @@ def cultural_progress(request):
     module_id = request.data.get('module_id') if request.method == 'POST' else request.GET.get('module_id')
     
     if request.method == 'GET':
-        progress_list = CulturalIntelligenceProgress.objects.filter(user=request.user)
+        progress_list = CulturalIntelligenceProgress.objects.filter(user=request.user).select_related('module')
         if module_id:
             progress_list = progress_list.filter(module_id=module_id)
         
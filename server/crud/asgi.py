@@ -3,6 +3,11 @@ ASGI config for admin project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+In production this process only receives /api/kids/gemini/game (see
+nginx_production.conf and systemd_elora_async.service), which is served by the
+non-blocking kids_gemini_game_async view. Everything else stays on the sync
+gunicorn workers behind crud.wsgi.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -12,5 +17,6 @@ import os
 from django.core.asgi import get_asgi_application  # pyright: ignore[reportMissingImports]
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crud.settings')
+os.environ.setdefault('GEMINI_ASYNC_PROXY', 'True')
 
 application = get_asgi_application()
@@ -13,6 +13,24 @@ logger = logging.getLogger(__name__)
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# nginx `internal` location aliased to MEDIA_ROOT (e.g. /protected-media/). When set,
+# media responses hand the file to nginx with X-Accel-Redirect instead of streaming it.
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+# Largest pronunciation recording accepted by adults/pronunciation/practice (api/audio_uploads.py)
+PRONUNCIATION_AUDIO_MAX_BYTES = config('PRONUNCIATION_AUDIO_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+# Processes that score pronunciation recordings (0 disables audio scoring), and how
+# long a request waits for a score before answering with an estimate
+PRONUNCIATION_SCORING_WORKERS = config('PRONUNCIATION_SCORING_WORKERS', default=2, cast=int)
+PRONUNCIATION_SCORING_WAIT = config('PRONUNCIATION_SCORING_WAIT', default=3.0, cast=float)
+
+# Cursor pagination for history lists (api/pagination.py). While CURSOR_PAGINATION_LEGACY
+# is on, clients that send neither ?cursor= nor ?limit= still get the full list
+CURSOR_PAGINATION_LEGACY = config('CURSOR_PAGINATION_LEGACY', default=True, cast=bool)
+CURSOR_PAGINATION_DEFAULT_LIMIT = config('CURSOR_PAGINATION_DEFAULT_LIMIT', default=50, cast=int)
+CURSOR_PAGINATION_MAX_LIMIT = config('CURSOR_PAGINATION_MAX_LIMIT', default=200, cast=int)
+
+# ETags and 304 responses for catalog and dashboard endpoints (api/content_versions.py)
+CONDITIONAL_GET = config('CONDITIONAL_GET', default=True, cast=bool)
 
 # Base URL for constructing absolute URLs when request context is not available
 BASE_URL = config('BASE_URL', default='http://127.0.0.1:8000')
@@ -124,6 +142,37 @@ DATABASES = {
 }
 logger.info(f"Using MySQL database: {db_name} on {db_host}:{db_port}")
 
+# Shared cache for serialized catalog responses (api/catalog_cache.py). 'db' keeps entries in
+# a table created by `manage.py createcachetable`, 'file' in a directory (one host only) and
+# 'redis' in Redis or a compatible server (needs redis-py); 'off' disables it. The default
+# cache stays per-process.
+CATALOG_CACHE_BACKEND = config('CATALOG_CACHE_BACKEND', default='db')
+CATALOG_CACHE_LOCATION = config('CATALOG_CACHE_LOCATION', default='')
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+CATALOG_CACHE_MAX_ENTRIES = config('CATALOG_CACHE_MAX_ENTRIES', default=5000, cast=int)
+_CATALOG_CACHE_BACKENDS = {
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'catalog_cache'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache' / 'catalog')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    'off': ('django.core.cache.backends.dummy.DummyCache', ''),
+}
+if CATALOG_CACHE_BACKEND not in _CATALOG_CACHE_BACKENDS:
+    raise ImproperlyConfigured(f"CATALOG_CACHE_BACKEND must be one of {', '.join(_CATALOG_CACHE_BACKENDS)}")
+_catalog_backend, _catalog_location = _CATALOG_CACHE_BACKENDS[CATALOG_CACHE_BACKEND]
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': _catalog_backend,
+        'LOCATION': CATALOG_CACHE_LOCATION or _catalog_location,
+        'TIMEOUT': CATALOG_CACHE_TIMEOUT,
+        'KEY_PREFIX': 'catalog',
+    },
+}
+if CATALOG_CACHE_BACKEND in ('db', 'file'):
+    CACHES['catalog']['OPTIONS'] = {'MAX_ENTRIES': CATALOG_CACHE_MAX_ENTRIES}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -168,6 +217,17 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework Configuration
+# JSON renderer/parser for the API: 'orjson' (api/renderers.py, falls back to the
+# stdlib when orjson is not installed) or 'stdlib' for DRF's own classes
+JSON_BACKEND = config('JSON_BACKEND', default='orjson')
+_JSON_CLASSES = {
+    'orjson': ('api.renderers.ORJSONRenderer', 'api.renderers.ORJSONParser'),
+    'stdlib': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}
+if JSON_BACKEND not in _JSON_CLASSES:
+    raise ImproperlyConfigured(f"JSON_BACKEND must be one of {', '.join(_JSON_CLASSES)}")
+JSON_RENDERER_CLASS, JSON_PARSER_CLASS = _JSON_CLASSES[JSON_BACKEND]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -176,10 +236,10 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        JSON_RENDERER_CLASS,
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        JSON_PARSER_CLASS,
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ),
@@ -248,6 +308,33 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Gemini AI proxy
+# crud/asgi.py turns GEMINI_ASYNC_PROXY on, so the ASGI pool serves the non-blocking
+# kids game view; the sync gunicorn workers keep the blocking one.
+GEMINI_ASYNC_PROXY = config('GEMINI_ASYNC_PROXY', default=False, cast=bool)
+GEMINI_API_BASE = config('GEMINI_API_BASE', default='https://generativelanguage.googleapis.com')
+GEMINI_MAX_CONCURRENCY = config('GEMINI_MAX_CONCURRENCY', default=50, cast=int)  # per ASGI worker
+GEMINI_QUEUE_TIMEOUT = config('GEMINI_QUEUE_TIMEOUT', default=5, cast=float)  # seconds to wait for a free slot
+
+# Pools of cached opening turns for the kids games (api/opening_cache.py)
+GEMINI_OPENING_CACHE = config('GEMINI_OPENING_CACHE', default=True, cast=bool)
+GEMINI_OPENING_POOL_SIZE = config('GEMINI_OPENING_POOL_SIZE', default=5, cast=int)  # openings per game/age band/level/line
+GEMINI_OPENING_TTL = config('GEMINI_OPENING_TTL', default=21600, cast=int)  # seconds
+GEMINI_OPENING_MAX_SERVES = config('GEMINI_OPENING_MAX_SERVES', default=20, cast=int)
+GEMINI_OPENING_BACKGROUND_REFILL = config('GEMINI_OPENING_BACKGROUND_REFILL', default=True, cast=bool)
+
+# Circuit breakers for external dependencies (api/circuit_breaker.py); state is
+# shared by all workers through the database. Unset keys use DEFAULT_POLICY.
+UPSTREAM_CIRCUITS = {
+    'gemini': {
+        'max_in_flight': config('GEMINI_MAX_IN_FLIGHT', default=100, cast=int),  # across all workers
+        'failure_rate': config('GEMINI_BREAKER_FAILURE_RATE', default=0.5, cast=float),
+        'min_requests': config('GEMINI_BREAKER_MIN_REQUESTS', default=10, cast=int),
+        'window_seconds': config('GEMINI_BREAKER_WINDOW', default=60, cast=int),
+        'open_seconds': config('GEMINI_BREAKER_OPEN_SECONDS', default=30, cast=int),
+    },
+}
+
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -296,6 +383,15 @@ else:
     logger.info("  Emails will print to terminal, not be sent via SMTP")
     logger.info("  To send real emails, set EMAIL_HOST_USER, EMAIL_HOST_PASSWORD, and DEFAULT_FROM_EMAIL in .env")
 
+# Seconds before an SMTP connect/send gives up; without it a dead mail host blocks forever
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+
+# Transactional email outbox (api/email_outbox.py), drained by `manage.py send_outbox_emails`
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+EMAIL_OUTBOX_RETRY_BASE = config('EMAIL_OUTBOX_RETRY_BASE', default=60, cast=int)  # seconds, doubled per retry
+EMAIL_OUTBOX_RETRY_MAX = config('EMAIL_OUTBOX_RETRY_MAX', default=3600, cast=int)
+EMAIL_OUTBOX_LOCK_TIMEOUT = config('EMAIL_OUTBOX_LOCK_TIMEOUT', default=300, cast=int)
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -353,5 +449,9 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        # Game-turn debug lines include children's messages; opt in with GEMINI_LOG_LEVEL=DEBUG
+        'api.gemini': {
+            'level': config('GEMINI_LOG_LEVEL', default='INFO'),
+        },
     },
 }
\ No newline at end of file